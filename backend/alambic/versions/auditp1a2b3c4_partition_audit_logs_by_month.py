@@ -0,0 +1,117 @@
+"""partition core.audit_logs by month on created_at
+
+Retention used to be a startup `DELETE ... WHERE created_at < cutoff` on the
+whole table — a long lock-holding transaction that bloated the heap. The table
+becomes RANGE-partitioned by month so expired months are dropped as whole
+partitions (app.core.audit.maintain_audit_partitions, run at startup).
+
+  - the partition key must be part of the primary key: (id, created_at);
+  - a DEFAULT partition catches rows outside every monthly partition;
+  - (tenant_id, created_at, id) replaces (tenant_id, created_at) to serve the
+    keyset-paginated audit list.
+
+Existing rows are copied into the new table, so the upgrade takes time
+proportional to the current table size.
+
+Revision ID: auditp1a2b3c4
+Revises: demo1a2b3c4d
+"""
+from alembic import op
+
+revision = "auditp1a2b3c4"
+down_revision = "demo1a2b3c4d"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "id, tenant_id, actor_user_id, action, resource, resource_id, payload, meta, created_at"
+
+# Monthly partitions from the oldest row's month through three months ahead.
+_CREATE_MONTHS = """
+DO $$
+DECLARE
+    m date := date_trunc('month', COALESCE((SELECT min(created_at) FROM core.audit_logs_legacy), now()))::date;
+    stop date := (date_trunc('month', now()) + interval '4 months')::date;
+BEGIN
+    WHILE m < stop LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS core.%I PARTITION OF core.audit_logs FOR VALUES FROM (%L) TO (%L)',
+            'audit_logs_p' || to_char(m, 'YYYYMM'), m, (m + interval '1 month')::date
+        );
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE core.audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE core.audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+    for name in (
+        "ix_audit_logs_tenant_created_at",
+        "ix_audit_logs_tenant_action",
+        "ix_audit_logs_tenant_resource",
+        "ix_audit_logs_tenant_resource_id",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS core.{name}")
+
+    op.execute(
+        """
+        CREATE TABLE core.audit_logs (
+            id uuid NOT NULL DEFAULT gen_random_uuid(),
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            actor_user_id uuid REFERENCES core.users(id) ON DELETE SET NULL,
+            action varchar(150) NOT NULL,
+            resource varchar(120) NOT NULL,
+            resource_id uuid,
+            payload jsonb,
+            meta jsonb,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE core.audit_logs_default PARTITION OF core.audit_logs DEFAULT")
+    op.execute(_CREATE_MONTHS)
+
+    op.execute(f"INSERT INTO core.audit_logs ({_COLUMNS}) SELECT {_COLUMNS} FROM core.audit_logs_legacy")
+    op.execute("DROP TABLE core.audit_logs_legacy")
+
+    op.execute("CREATE INDEX ix_audit_logs_tenant_created_id ON core.audit_logs (tenant_id, created_at, id)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_action ON core.audit_logs (tenant_id, action)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_resource ON core.audit_logs (tenant_id, resource)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_resource_id ON core.audit_logs (tenant_id, resource_id)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE core.audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE core.audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    for name in (
+        "ix_audit_logs_tenant_created_id",
+        "ix_audit_logs_tenant_action",
+        "ix_audit_logs_tenant_resource",
+        "ix_audit_logs_tenant_resource_id",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS core.{name}")
+
+    op.execute(
+        """
+        CREATE TABLE core.audit_logs (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            actor_user_id uuid REFERENCES core.users(id) ON DELETE SET NULL,
+            action varchar(150) NOT NULL,
+            resource varchar(120) NOT NULL,
+            resource_id uuid,
+            payload jsonb,
+            meta jsonb,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(f"INSERT INTO core.audit_logs ({_COLUMNS}) SELECT {_COLUMNS} FROM core.audit_logs_partitioned")
+    op.execute("DROP TABLE core.audit_logs_partitioned")
+
+    op.execute("CREATE INDEX ix_audit_logs_tenant_created_at ON core.audit_logs (tenant_id, created_at)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_action ON core.audit_logs (tenant_id, action)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_resource ON core.audit_logs (tenant_id, resource)")
+    op.execute("CREATE INDEX ix_audit_logs_tenant_resource_id ON core.audit_logs (tenant_id, resource_id)")
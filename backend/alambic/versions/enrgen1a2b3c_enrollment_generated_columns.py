@@ -0,0 +1,69 @@
+"""enrollment class / term / student name as indexed generated columns
+
+The enrollment listing, bulk fee generation and the tenant roster views all
+read an enrollment's class and term out of `payload` through a COALESCE over
+its historical keys, so a class filter decodes every payload of the tenant.
+These stored generated columns hold the normalized values — Postgres
+recomputes them on every payload write and backfills them when the column is
+added — and the `(tenant_id, class_code)` / `(tenant_id, term_code)` indexes
+serve the filters.
+
+Revision ID: enrgen1a2b3c
+Revises: keyset1a2b3c
+"""
+from alembic import op
+
+revision = "enrgen1a2b3c"
+down_revision = "keyset1a2b3c"
+branch_labels = None
+depends_on = None
+
+
+def _first_payload_text(*keys: str) -> str:
+    picks = ", ".join(
+        f"nullif(btrim(CASE WHEN jsonb_typeof(payload->'{key}') = 'string' "
+        f"THEN payload->>'{key}' END, E' \\t\\n\\r'), '')"
+        for key in keys
+    )
+    return f"coalesce({picks})"
+
+
+COLUMNS = (
+    (
+        "class_code",
+        f"upper({_first_payload_text('admission_class', 'class_code', 'classCode', 'grade')})",
+    ),
+    (
+        "term_code",
+        "upper(replace("
+        f"{_first_payload_text('admission_term', 'term_code', 'termCode', 'term', 'academic_term')}"
+        ", ' ', '_'))",
+    ),
+    (
+        "student_name",
+        _first_payload_text("student_name", "studentName", "full_name", "fullName", "name"),
+    ),
+)
+
+
+def upgrade() -> None:
+    for name, expr in COLUMNS:
+        op.execute(
+            f"ALTER TABLE core.enrollments ADD COLUMN IF NOT EXISTS {name} varchar "
+            f"GENERATED ALWAYS AS ({expr}) STORED"
+        )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_tenant_class_code "
+        "ON core.enrollments (tenant_id, class_code)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_tenant_term_code "
+        "ON core.enrollments (tenant_id, term_code)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS core.ix_enrollments_tenant_term_code")
+    op.execute("DROP INDEX IF EXISTS core.ix_enrollments_tenant_class_code")
+    for name, _ in reversed(COLUMNS):
+        op.execute(f"ALTER TABLE core.enrollments DROP COLUMN IF EXISTS {name}")
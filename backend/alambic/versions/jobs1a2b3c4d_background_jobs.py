@@ -0,0 +1,62 @@
+"""background job queue
+
+Bulk invoice generation/publishing, the reconcile sweep, class-wide
+scholarship application and fee-reminder SMS runs can be queued instead of
+running inside the request. core.background_jobs is the queue; workers claim
+rows with FOR UPDATE SKIP LOCKED (see app.core.jobs).
+
+Revision ID: jobs1a2b3c4d
+Revises: kpisnap1a2b3
+"""
+from alembic import op
+
+revision = "jobs1a2b3c4d"
+down_revision = "kpisnap1a2b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.background_jobs (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            kind varchar(80) NOT NULL,
+            status varchar(16) NOT NULL DEFAULT 'QUEUED',
+            params jsonb NOT NULL DEFAULT '{}'::jsonb,
+            idempotency_key varchar(120),
+            created_by uuid REFERENCES core.users(id) ON DELETE SET NULL,
+            progress_done integer NOT NULL DEFAULT 0,
+            progress_total integer,
+            partial jsonb,
+            result jsonb,
+            error text,
+            cancel_requested boolean NOT NULL DEFAULT false,
+            attempts integer NOT NULL DEFAULT 0,
+            worker_id varchar(120),
+            created_at timestamptz NOT NULL DEFAULT now(),
+            started_at timestamptz,
+            heartbeat_at timestamptz,
+            finished_at timestamptz,
+            CONSTRAINT ck_background_jobs_status
+                CHECK (status IN ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED'))
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_background_jobs_queued ON core.background_jobs (created_at) "
+        "WHERE status = 'QUEUED'"
+    )
+    op.execute(
+        "CREATE INDEX ix_background_jobs_tenant_created ON core.background_jobs (tenant_id, created_at)"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_background_jobs_idempotency "
+        "ON core.background_jobs (tenant_id, kind, idempotency_key) "
+        "WHERE idempotency_key IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS core.background_jobs")
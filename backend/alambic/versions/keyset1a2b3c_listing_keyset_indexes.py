@@ -0,0 +1,48 @@
+"""keyset pagination indexes for the invoice, payment and enrollment listings
+
+Cursor pages seek on `(timestamp, id) < cursor` newest first; a
+`(tenant_id, timestamp DESC, id DESC)` index serves that seek (and the
+offset pages' ORDER BY) directly. The invoice and payment indexes replace the
+two-column `(tenant_id, created_at)` / `(tenant_id, received_at)` ones, which
+they cover.
+
+Revision ID: keyset1a2b3c
+Revises: search1a2b3c
+"""
+from alembic import op
+
+revision = "keyset1a2b3c"
+down_revision = "search1a2b3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_invoices_tenant_created_id "
+        "ON core.invoices (tenant_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_payments_tenant_received_id "
+        "ON core.payments (tenant_id, received_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_enrollments_tenant_created_id "
+        "ON core.enrollments (tenant_id, created_at DESC, id DESC)"
+    )
+    op.execute("DROP INDEX IF EXISTS core.ix_invoices_tenant_created_at")
+    op.execute("DROP INDEX IF EXISTS core.ix_payments_tenant_received_at")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_payments_tenant_received_at "
+        "ON core.payments (tenant_id, received_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_invoices_tenant_created_at "
+        "ON core.invoices (tenant_id, created_at)"
+    )
+    op.execute("DROP INDEX IF EXISTS core.ix_enrollments_tenant_created_id")
+    op.execute("DROP INDEX IF EXISTS core.ix_payments_tenant_received_id")
+    op.execute("DROP INDEX IF EXISTS core.ix_invoices_tenant_created_id")
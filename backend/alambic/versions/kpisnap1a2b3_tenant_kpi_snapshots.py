@@ -0,0 +1,94 @@
+"""per-tenant KPI snapshot with trigger-maintained change markers
+
+The director KPI endpoint, group dashboard and finance exports used to rerun
+every dashboard aggregate per request. They now read one precomputed row in
+core.tenant_kpi_snapshots. Statement-level triggers on the source tables
+record a marker in core.tenant_kpi_changes for each tenant they touch; a
+marked snapshot is recomputed on its next read. Snapshots are built lazily,
+so no backfill is needed.
+
+Revision ID: kpisnap1a2b3
+Revises: notif1a2b3c4d
+"""
+from alembic import op
+
+revision = "kpisnap1a2b3"
+down_revision = "notif1a2b3c4d"
+branch_labels = None
+depends_on = None
+
+_SOURCE_TABLES = (
+    "invoices",
+    "payments",
+    "students",
+    "enrollments",
+    "tenant_terms",
+    "scholarships",
+    "scholarship_allocations",
+    "student_scholarship_grants",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.tenant_kpi_snapshots (
+            tenant_id uuid PRIMARY KEY REFERENCES core.tenants(id) ON DELETE CASCADE,
+            payload jsonb NOT NULL,
+            computed_on date NOT NULL,
+            computed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE core.tenant_kpi_changes (
+            id bigserial PRIMARY KEY,
+            tenant_id uuid NOT NULL,
+            source varchar(60) NOT NULL,
+            changed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_tenant_kpi_changes_tenant ON core.tenant_kpi_changes (tenant_id)")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION core.note_tenant_kpi_change() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO core.tenant_kpi_changes (tenant_id, source)
+                SELECT DISTINCT o.tenant_id, TG_TABLE_NAME
+                FROM kpi_old o
+                WHERE o.tenant_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM core.tenant_kpi_changes c WHERE c.tenant_id = o.tenant_id);
+            ELSE
+                INSERT INTO core.tenant_kpi_changes (tenant_id, source)
+                SELECT DISTINCT n.tenant_id, TG_TABLE_NAME
+                FROM kpi_new n
+                WHERE n.tenant_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM core.tenant_kpi_changes c WHERE c.tenant_id = n.tenant_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for table in _SOURCE_TABLES:
+        for op_name, ref in (("insert", "NEW TABLE AS kpi_new"),
+                             ("update", "NEW TABLE AS kpi_new"),
+                             ("delete", "OLD TABLE AS kpi_old")):
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_kpi_{op_name} AFTER {op_name.upper()} ON core.{table} "
+                f"REFERENCING {ref} FOR EACH STATEMENT EXECUTE FUNCTION core.note_tenant_kpi_change()"
+            )
+
+
+def downgrade() -> None:
+    for table in _SOURCE_TABLES:
+        for op_name in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_kpi_{op_name} ON core.{table}")
+    op.execute("DROP FUNCTION IF EXISTS core.note_tenant_kpi_change()")
+    op.execute("DROP TABLE IF EXISTS core.tenant_kpi_changes")
+    op.execute("DROP TABLE IF EXISTS core.tenant_kpi_snapshots")
@@ -0,0 +1,69 @@
+"""materialized tenant notification feed and unread counters
+
+Tenant notifications were derived per request from four source scans plus
+read-state lookups, including for the polled unread badge. They are now
+stored in core.tenant_notifications (written by the events that raise them
+and by a periodic sweep) with a per-user unread counter in
+core.tenant_notification_counters. The first sweep after deploy backfills
+the feed; until then badges read 0.
+
+Revision ID: notif1a2b3c4d
+Revises: auditp1a2b3c4
+"""
+from alembic import op
+
+revision = "notif1a2b3c4d"
+down_revision = "auditp1a2b3c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.tenant_notifications (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            notification_id varchar(255) NOT NULL,
+            type varchar(40) NOT NULL,
+            severity varchar(16) NOT NULL DEFAULT 'info',
+            title varchar(300) NOT NULL,
+            message text NOT NULL DEFAULT '',
+            entity_type varchar(60),
+            entity_id varchar(80),
+            exclude_user_id uuid,
+            occurred_at timestamptz NOT NULL DEFAULT now(),
+            due_at timestamptz,
+            is_active boolean NOT NULL DEFAULT true,
+            resolved_at timestamptz,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT uq_tenant_notifications_tenant_notification UNIQUE (tenant_id, notification_id)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_tenant_notifications_feed "
+        "ON core.tenant_notifications (tenant_id, is_active, occurred_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX ix_tenant_notifications_tenant_type "
+        "ON core.tenant_notifications (tenant_id, type)"
+    )
+
+    op.execute(
+        """
+        CREATE TABLE core.tenant_notification_counters (
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            user_id uuid NOT NULL REFERENCES core.users(id) ON DELETE CASCADE,
+            unread_count integer NOT NULL DEFAULT 0,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT pk_tenant_notification_counters PRIMARY KEY (tenant_id, user_id)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS core.tenant_notification_counters")
+    op.execute("DROP TABLE IF EXISTS core.tenant_notifications")
@@ -0,0 +1,236 @@
+"""denormalized search documents for invoice, payment and enrollment listings
+
+The finance invoice/payment listings and the enrollment listing matched `q`
+with ILIKE across four joined tables (and DISTINCT for payments split over
+several invoices). core.search_documents holds one pre-joined text per row,
+kept current by triggers on the source tables, with a pg_trgm GIN index
+when the extension can be installed. Existing rows are backfilled.
+
+Revision ID: search1a2b3c
+Revises: jobs1a2b3c4d
+"""
+from alembic import op
+
+revision = "search1a2b3c"
+down_revision = "jobs1a2b3c4d"
+branch_labels = None
+depends_on = None
+
+# (table, columns whose update changes a document, statement-level events)
+_SYNC_TABLES = (
+    ("invoices", ("invoice_no", "enrollment_id"), ("insert", "delete")),
+    ("payments", ("receipt_no", "reference", "student_id"), ("insert", "delete")),
+    ("payment_allocations", (), ("insert", "delete")),
+    ("enrollments", ("payload", "admission_number", "student_id"), ("insert", "delete")),
+    ("students", ("first_name", "last_name", "admission_no"), ("delete",)),
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.search_documents (
+            entity_type varchar(20) NOT NULL,
+            entity_id uuid NOT NULL,
+            tenant_id uuid NOT NULL,
+            document text NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (entity_type, entity_id)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_search_documents_tenant_type ON core.search_documents (tenant_id, entity_type)"
+    )
+    # Managed Postgres lets the database owner install pg_trgm (a trusted
+    # extension since PG 13); where it cannot be installed the listings
+    # still work, just without the pattern index.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'pg_trgm unavailable (%), search documents stay unindexed', SQLERRM;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS ix_search_documents_document_trgm
+                    ON core.search_documents USING gin (document gin_trgm_ops);
+            END IF;
+        END
+        $$
+        """
+    )
+
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION core.search_refresh_invoices(ids uuid[]) RETURNS void
+        LANGUAGE sql AS $$
+            DELETE FROM core.search_documents d
+            WHERE d.entity_type = 'invoice' AND d.entity_id = ANY(ids)
+              AND NOT EXISTS (SELECT 1 FROM core.invoices i WHERE i.id = d.entity_id);
+            INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+            SELECT 'invoice', i.id, i.tenant_id,
+                   concat_ws(E'\n',
+                       i.invoice_no,
+                       CASE WHEN s.id IS NOT NULL THEN concat(s.first_name, ' ', coalesce(s.last_name, '')) END,
+                       s.admission_no,
+                       e.admission_number,
+                       e.payload->>'student_name',
+                       e.payload->>'full_name')
+            FROM core.invoices i
+            LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
+            LEFT JOIN core.students s ON s.id = e.student_id
+            WHERE i.id = ANY(ids)
+            ON CONFLICT (entity_type, entity_id) DO UPDATE
+                SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+        $$
+        """
+    )
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION core.search_refresh_payments(ids uuid[]) RETURNS void
+        LANGUAGE sql AS $$
+            DELETE FROM core.search_documents d
+            WHERE d.entity_type = 'payment' AND d.entity_id = ANY(ids)
+              AND NOT EXISTS (SELECT 1 FROM core.payments p WHERE p.id = d.entity_id);
+            INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+            SELECT 'payment', p.id, p.tenant_id,
+                   concat_ws(E'\n',
+                       p.receipt_no,
+                       p.reference,
+                       CASE WHEN ds.id IS NOT NULL THEN concat(ds.first_name, ' ', coalesce(ds.last_name, '')) END,
+                       ds.admission_no,
+                       (SELECT string_agg(concat_ws(E'\n',
+                                   CASE WHEN s.id IS NOT NULL THEN concat(s.first_name, ' ', coalesce(s.last_name, '')) END,
+                                   s.admission_no,
+                                   e.admission_number,
+                                   e.payload->>'student_name'), E'\n')
+                        FROM core.payment_allocations pa
+                        JOIN core.invoices i ON i.id = pa.invoice_id
+                        LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
+                        LEFT JOIN core.students s ON s.id = e.student_id
+                        WHERE pa.payment_id = p.id))
+            FROM core.payments p
+            LEFT JOIN core.students ds ON ds.id = p.student_id
+            WHERE p.id = ANY(ids)
+            ON CONFLICT (entity_type, entity_id) DO UPDATE
+                SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+        $$
+        """
+    )
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION core.search_refresh_enrollments(ids uuid[]) RETURNS void
+        LANGUAGE sql AS $$
+            DELETE FROM core.search_documents d
+            WHERE d.entity_type = 'enrollment' AND d.entity_id = ANY(ids)
+              AND NOT EXISTS (SELECT 1 FROM core.enrollments e WHERE e.id = d.entity_id);
+            INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+            SELECT 'enrollment', e.id, e.tenant_id,
+                   lower(concat_ws(E'\n',
+                       coalesce(e.payload->>'student_name', e.payload->>'studentName',
+                                e.payload->>'full_name', e.payload->>'fullName', e.payload->>'name'),
+                       coalesce(e.payload->>'admission_class', e.payload->>'class_code',
+                                e.payload->>'classCode', e.payload->>'grade'),
+                       coalesce(e.payload->>'admission_term', e.payload->>'term_code',
+                                e.payload->>'termCode', e.payload->>'term'),
+                       e.payload->>'admission_number',
+                       e.id::text))
+            FROM core.enrollments e
+            WHERE e.id = ANY(ids)
+            ON CONFLICT (entity_type, entity_id) DO UPDATE
+                SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+        $$
+        """
+    )
+    op.execute(
+        r"""
+        CREATE OR REPLACE FUNCTION core.search_sync() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            ids uuid[];
+        BEGIN
+            IF TG_LEVEL = 'ROW' THEN
+                ids := ARRAY[NEW.id];
+            ELSIF TG_TABLE_NAME = 'payment_allocations' THEN
+                SELECT array_agg(DISTINCT r.payment_id) INTO ids FROM search_rows r;
+            ELSE
+                SELECT array_agg(r.id) INTO ids FROM search_rows r;
+            END IF;
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_TABLE_NAME = 'invoices' THEN
+                PERFORM core.search_refresh_invoices(ids);
+                IF TG_OP = 'UPDATE' THEN
+                    PERFORM core.search_refresh_payments(ARRAY(
+                        SELECT pa.payment_id FROM core.payment_allocations pa
+                        WHERE pa.invoice_id = ANY(ids)));
+                END IF;
+            ELSIF TG_TABLE_NAME IN ('payments', 'payment_allocations') THEN
+                PERFORM core.search_refresh_payments(ids);
+            ELSIF TG_TABLE_NAME = 'enrollments' THEN
+                PERFORM core.search_refresh_enrollments(ids);
+                IF TG_OP = 'UPDATE' THEN
+                    PERFORM core.search_refresh_invoices(ARRAY(
+                        SELECT i.id FROM core.invoices i WHERE i.enrollment_id = ANY(ids)));
+                    PERFORM core.search_refresh_payments(ARRAY(
+                        SELECT pa.payment_id FROM core.payment_allocations pa
+                        JOIN core.invoices i ON i.id = pa.invoice_id
+                        WHERE i.enrollment_id = ANY(ids)));
+                END IF;
+            ELSIF TG_TABLE_NAME = 'students' THEN
+                PERFORM core.search_refresh_invoices(ARRAY(
+                    SELECT i.id FROM core.invoices i
+                    JOIN core.enrollments e ON e.id = i.enrollment_id
+                    WHERE e.student_id = ANY(ids)));
+                PERFORM core.search_refresh_payments(ARRAY(
+                    SELECT pa.payment_id FROM core.payment_allocations pa
+                    JOIN core.invoices i ON i.id = pa.invoice_id
+                    JOIN core.enrollments e ON e.id = i.enrollment_id
+                    WHERE e.student_id = ANY(ids)
+                    UNION
+                    SELECT p.id FROM core.payments p WHERE p.student_id = ANY(ids)));
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    for table, columns, statement_events in _SYNC_TABLES:
+        for op_name in statement_events:
+            ref = "OLD TABLE AS search_rows" if op_name == "delete" else "NEW TABLE AS search_rows"
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_search_{op_name} AFTER {op_name.upper()} ON core.{table} "
+                f"REFERENCING {ref} FOR EACH STATEMENT EXECUTE FUNCTION core.search_sync()"
+            )
+        if columns:
+            changed = " OR ".join(f"OLD.{c} IS DISTINCT FROM NEW.{c}" for c in columns)
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_search_update AFTER UPDATE OF {', '.join(columns)} "
+                f"ON core.{table} FOR EACH ROW WHEN ({changed}) EXECUTE FUNCTION core.search_sync()"
+            )
+
+    op.execute("SELECT core.search_refresh_enrollments(ARRAY(SELECT id FROM core.enrollments))")
+    op.execute("SELECT core.search_refresh_invoices(ARRAY(SELECT id FROM core.invoices))")
+    op.execute("SELECT core.search_refresh_payments(ARRAY(SELECT id FROM core.payments))")
+
+
+def downgrade() -> None:
+    for table, columns, statement_events in _SYNC_TABLES:
+        for op_name in (*statement_events, *(("update",) if columns else ())):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_{op_name} ON core.{table}")
+    op.execute("DROP FUNCTION IF EXISTS core.search_sync()")
+    for entity in ("invoices", "payments", "enrollments"):
+        op.execute(f"DROP FUNCTION IF EXISTS core.search_refresh_{entity}(uuid[])")
+    op.execute("DROP TABLE IF EXISTS core.search_documents")
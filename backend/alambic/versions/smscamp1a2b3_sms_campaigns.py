@@ -0,0 +1,59 @@
+"""fee-reminder SMS campaigns
+
+A fee-reminder run is now a campaign: its recipients and rendered bodies are
+queued through the SMS outbox in one go, and each queued sms_messages row
+points back at the campaign so its per-recipient status can be shown and a
+partly failed run resumed.
+
+Revision ID: smscamp1a2b3
+Revises: enrgen1a2b3c
+"""
+from alembic import op
+
+revision = "smscamp1a2b3"
+down_revision = "enrgen1a2b3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.sms_campaigns (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            kind varchar(32) NOT NULL,
+            status varchar(16) NOT NULL DEFAULT 'QUEUED',
+            message_template text NOT NULL,
+            total_recipients integer NOT NULL DEFAULT 0,
+            skipped_count integer NOT NULL DEFAULT 0,
+            sent_count integer NOT NULL DEFAULT 0,
+            failed_count integer NOT NULL DEFAULT 0,
+            units_reserved integer NOT NULL DEFAULT 0,
+            job_id uuid,
+            created_by uuid,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            completed_at timestamptz,
+            CONSTRAINT ck_sms_campaigns_status CHECK (
+                status IN ('QUEUED', 'SENDING', 'COMPLETED', 'PARTIAL', 'FAILED', 'CANCELLED')
+            )
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_sms_campaigns_tenant_created ON core.sms_campaigns (tenant_id, created_at)"
+    )
+    op.execute(
+        "ALTER TABLE core.sms_messages ADD COLUMN campaign_id uuid "
+        "REFERENCES core.sms_campaigns(id) ON DELETE SET NULL"
+    )
+    op.execute(
+        "CREATE INDEX ix_sms_messages_campaign_status ON core.sms_messages (campaign_id, status) "
+        "WHERE campaign_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS core.ix_sms_messages_campaign_status")
+    op.execute("ALTER TABLE core.sms_messages DROP COLUMN IF EXISTS campaign_id")
+    op.execute("DROP TABLE IF EXISTS core.sms_campaigns")
@@ -0,0 +1,36 @@
+"""SMS outbox dispatch claims
+
+A dispatch run used to send every sms_messages row still QUEUED, so two runs
+over the same rows (a requeued stale job and the original) both sent them.
+A run now claims each provider request's rows first — status SENDING,
+claimed_at set, under FOR UPDATE SKIP LOCKED — and a claim older than
+SMS_DISPATCH_CLAIM_TTL_SEC (its run died) can be taken over.
+
+Revision ID: smsclaim1a2b
+Revises: stkrec1a2b3c
+"""
+from alembic import op
+
+revision = "smsclaim1a2b"
+down_revision = "stkrec1a2b3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE core.sms_messages ADD COLUMN IF NOT EXISTS claimed_at timestamptz")
+    op.execute("ALTER TABLE core.sms_messages DROP CONSTRAINT IF EXISTS ck_sms_messages_status")
+    op.execute(
+        "ALTER TABLE core.sms_messages ADD CONSTRAINT ck_sms_messages_status "
+        "CHECK (status IN ('QUEUED', 'SENDING', 'SENT', 'DELIVERED', 'FAILED'))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("UPDATE core.sms_messages SET status = 'QUEUED' WHERE status = 'SENDING'")
+    op.execute("ALTER TABLE core.sms_messages DROP CONSTRAINT IF EXISTS ck_sms_messages_status")
+    op.execute(
+        "ALTER TABLE core.sms_messages ADD CONSTRAINT ck_sms_messages_status "
+        "CHECK (status IN ('QUEUED', 'SENT', 'DELIVERED', 'FAILED'))"
+    )
+    op.execute("ALTER TABLE core.sms_messages DROP COLUMN IF EXISTS claimed_at")
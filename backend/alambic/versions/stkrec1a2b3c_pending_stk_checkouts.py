@@ -0,0 +1,64 @@
+"""pending STK checkouts for the background reconciler
+
+Status polls used to query Daraja synchronously whenever a payment's
+callback had not arrived yet. In-flight checkouts are now tracked here and
+a background reconciler queries the overdue ones with backoff, so the
+status endpoints only read.
+
+Existing PENDING subscription payments and SMS top-ups that went to the
+real Daraja API (not mock fallbacks) are backfilled, due immediately.
+
+Revision ID: stkrec1a2b3c
+Revises: smscamp1a2b3
+"""
+from alembic import op
+
+revision = "stkrec1a2b3c"
+down_revision = "smscamp1a2b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE core.pending_stk_checkouts (
+            checkout_request_id varchar(120) PRIMARY KEY,
+            kind varchar(16) NOT NULL,
+            tenant_id uuid NOT NULL REFERENCES core.tenants(id) ON DELETE CASCADE,
+            attempts integer NOT NULL DEFAULT 0,
+            next_check_at timestamptz NOT NULL DEFAULT now(),
+            last_error text,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT ck_pending_stk_checkouts_kind CHECK (kind IN ('SUBSCRIPTION', 'SMS_TOPUP'))
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_pending_stk_checkouts_next_check ON core.pending_stk_checkouts (next_check_at)"
+    )
+    op.execute(
+        """
+        INSERT INTO core.pending_stk_checkouts (checkout_request_id, kind, tenant_id)
+        SELECT checkout_request_id, 'SUBSCRIPTION', tenant_id
+        FROM core.subscription_payments
+        WHERE status = 'PENDING'
+          AND coalesce(request_payload->>'mock_fallback', 'false') <> 'true'
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO core.pending_stk_checkouts (checkout_request_id, kind, tenant_id)
+        SELECT checkout_request_id, 'SMS_TOPUP', tenant_id
+        FROM core.sms_credit_topups
+        WHERE status = 'PENDING'
+          AND checkout_request_id IS NOT NULL
+          AND coalesce(request_payload->>'mock_fallback', 'false') <> 'true'
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS core.pending_stk_checkouts")
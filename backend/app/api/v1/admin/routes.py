@@ -13,6 +13,10 @@ from sqlalchemy import select, and_, or_, func
 from pydantic import BaseModel, Field
 
 from app.core.database import get_db
+from app.core.tenant_cache import invalidate_tenant_cache, tenant_cache_keys
+from app.core.permission_cache import bump_rbac_version
+from app.core.session_cache import invalidate_user_sessions
+from app.core.subscription_gate import invalidate_subscription_cache
 from app.core.dependencies import (
     get_tenant,
     get_current_user,
@@ -554,6 +558,7 @@ def suspend_tenant(
         raise HTTPException(status_code=404, detail="Tenant not found")
     t.is_active = False
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
     _metrics_cache.invalidate()
     _recent_cache.invalidate()
     return {"ok": True}
@@ -570,6 +575,7 @@ def restore_tenant(
         raise HTTPException(status_code=404, detail="Tenant not found")
     t.is_active = True
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
     _metrics_cache.invalidate()
     _recent_cache.invalidate()
     return {"ok": True}
@@ -586,6 +592,7 @@ def soft_delete_tenant(
         raise HTTPException(status_code=404, detail="Tenant not found")
     t.is_active = False
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
     _metrics_cache.invalidate()
     _recent_cache.invalidate()
     return {"ok": True}
@@ -711,6 +718,7 @@ def create_subscription(
         raise HTTPException(status_code=422, detail=msg)
 
     _metrics_cache.invalidate()
+    invalidate_subscription_cache(payload.tenant_id)
     return sub_row
 
 
@@ -732,6 +740,7 @@ def update_subscription(
         raise HTTPException(status_code=422, detail=msg)
 
     _metrics_cache.invalidate()
+    invalidate_subscription_cache(row["tenant_id"])
     return row
 
 
@@ -746,6 +755,8 @@ def cancel_subscription(
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     _metrics_cache.invalidate()
+    sub = db.get(Subscription, subscription_id)
+    invalidate_subscription_cache(sub.tenant_id if sub else None)
     return {"ok": True}
 
 
@@ -878,7 +889,6 @@ def update_subscription_plan(
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
     from app.core.modules import normalize_module_codes
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     plan = db.get(SubscriptionPlan, plan_id)
     if plan is None:
@@ -905,7 +915,6 @@ def delete_subscription_plan(
     db: Session = Depends(get_db),
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     plan = db.get(SubscriptionPlan, plan_id)
     if plan is None:
@@ -1004,7 +1013,6 @@ def assign_tenant_plan(
     clears the tier — the tenant reverts to full (grandfathered) access.
     """
     from app.core.subscription import resolve_subscription_state
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     tenant = db.get(Tenant, tenant_id)
     if tenant is None or getattr(tenant, "deleted_at", None) is not None:
@@ -1171,7 +1179,6 @@ def update_tenant_group(
     db: Session = Depends(get_db),
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     group = db.get(TenantGroup, group_id)
     if group is None:
@@ -1210,7 +1217,6 @@ def delete_tenant_group(
     db: Session = Depends(get_db),
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     group = db.get(TenantGroup, group_id)
     if group is None:
@@ -1229,7 +1235,6 @@ def attach_campus(
     db: Session = Depends(get_db),
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     group = db.get(TenantGroup, group_id)
     if group is None:
@@ -1240,6 +1245,7 @@ def attach_campus(
     tenant.group_id = group.id
     db.commit()
     invalidate_subscription_cache(tenant_id)
+    invalidate_tenant_cache(tenant_cache_keys(tenant))
     return _group_row(db, group)
 
 
@@ -1250,7 +1256,6 @@ def detach_campus(
     db: Session = Depends(get_db),
     _=Depends(require_permission_saas("subscriptions.manage")),
 ):
-    from app.core.subscription_gate import invalidate_subscription_cache
 
     group = db.get(TenantGroup, group_id)
     if group is None:
@@ -1262,6 +1267,7 @@ def detach_campus(
         tenant.group_id = None
         db.commit()
         invalidate_subscription_cache(tenant_id)
+        invalidate_tenant_cache(tenant_cache_keys(tenant))
     return _group_row(db, group)
 
 
@@ -1466,6 +1472,7 @@ def create_permission(
     p = Permission(code=code, name=name, description=description)
     db.add(p)
     db.commit()
+    bump_rbac_version()
     db.refresh(p)
     _metrics_cache.invalidate()
     return {"ok": True, "id": str(p.id)}
@@ -1501,6 +1508,7 @@ def delete_permission(
         raise HTTPException(status_code=404, detail="Permission not found")
     db.delete(p)
     db.commit()
+    bump_rbac_version()
     _metrics_cache.invalidate()
     return {"ok": True}
 
@@ -1567,6 +1575,7 @@ def create_role(
     r = Role(tenant_id=resolved_tid, code=code, name=name, description=description, is_system=False)
     db.add(r)
     db.commit()
+    bump_rbac_version(r.tenant_id)
     db.refresh(r)
     _metrics_cache.invalidate()
     return {"ok": True, "id": str(r.id)}
@@ -1602,8 +1611,10 @@ def delete_role(
         raise HTTPException(status_code=404, detail="Role not found")
     if r.is_system:
         raise HTTPException(status_code=400, detail="System roles cannot be deleted")
+    role_tenant_id = r.tenant_id
     db.delete(r)
     db.commit()
+    bump_rbac_version(role_tenant_id)
     _metrics_cache.invalidate()
     return {"ok": True}
 
@@ -1637,7 +1648,8 @@ def add_role_permissions(
     _=Depends(require_permission_saas("rbac.roles.manage")),
     permission_codes: List[str] = Body(...),
 ):
-    if not db.get(Role, role_id):
+    role = db.get(Role, role_id)
+    if not role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     codes = [c.strip() for c in permission_codes if c and c.strip()]
@@ -1658,6 +1670,8 @@ def add_role_permissions(
             db.add(RolePermission(role_id=role_id, permission_id=p.id))
 
     db.commit()
+
+    bump_rbac_version(role.tenant_id)
     return {"ok": True}
 
 
@@ -1668,7 +1682,8 @@ def remove_role_permissions(
     _=Depends(require_permission_saas("rbac.roles.manage")),
     permission_codes: List[str] = Body(...),
 ):
-    if not db.get(Role, role_id):
+    role = db.get(Role, role_id)
+    if not role:
         raise HTTPException(status_code=404, detail="Role not found")
 
     codes    = [c.strip() for c in permission_codes if c and c.strip()]
@@ -1686,6 +1701,7 @@ def remove_role_permissions(
         ).scalars().all():
             db.delete(rp)
         db.commit()
+        bump_rbac_version(role.tenant_id)
 
     return {"ok": True}
 
@@ -1705,6 +1721,7 @@ def assign_role(
         service.assign_role(db, tenant.id, payload.user_id, payload.role_code)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
+    invalidate_user_sessions(payload.user_id)
     return {"ok": True}
 
 
@@ -1736,6 +1753,7 @@ def remove_role(
     if ur:
         db.delete(ur)
         db.commit()
+        invalidate_user_sessions(user_id)
 
     return {"ok": True}
 
@@ -1757,6 +1775,7 @@ def override_permission(
         )
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
+    invalidate_user_sessions(payload.user_id)
     return {"ok": True}
 
 
@@ -1788,6 +1807,7 @@ def delete_permission_override(
     if row:
         db.delete(row)
         db.commit()
+        invalidate_user_sessions(user_id)
 
     return {"ok": True}
 
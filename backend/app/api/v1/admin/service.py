@@ -25,6 +25,8 @@ from app.models.tenant_print_profile import TenantPrintProfile
 from app.models.sms import SmsCreditAccount
 
 # If your project has hashing util (it does, used in tenants/routes.py)
+from app.core.schema_registry import invalidate_schema_registry, resolve_existing_table
+from app.core.tenant_cache import invalidate_tenant_cache, tenant_cache_keys
 from app.utils.hashing import hash_password
 
 logger = logging.getLogger(__name__)
@@ -541,6 +543,7 @@ def update_tenant(db: Session, tenant_id: UUID, data: dict):
     tenant = db.get(Tenant, tenant_id)
     if not tenant:
         return None
+    stale_cache_keys = tenant_cache_keys(tenant)
 
     if "name" in data:
         name = _clean_name(data.get("name"))
@@ -581,6 +584,7 @@ def update_tenant(db: Session, tenant_id: UUID, data: dict):
 
     db.commit()
     db.refresh(tenant)
+    invalidate_tenant_cache(stale_cache_keys, tenant_cache_keys(tenant))
     return _build_tenant_row(db, tenant)
 
 
@@ -844,6 +848,8 @@ def create_tenant_with_optional_admin(
 
     db.commit()
     db.refresh(tenant)
+    # Clear any cached "unknown tenant" answers for the new slug/domain.
+    invalidate_tenant_cache(tenant_cache_keys(tenant))
 
     if invite_email:
         _try_send_invitation_email(email=invite_email, tenant=tenant)
@@ -1389,13 +1395,14 @@ def _ensure_saas_academic_calendar_table(db: Session) -> None:
             """
         )
     )
+    if not resolve_existing_table(db, ("core.saas_academic_calendar_terms",))[0]:
+        invalidate_schema_registry()
 
 
 def _resolve_existing_table(db: Session, candidates: tuple[str, ...]) -> str:
-    for table_name in candidates:
-        exists = db.scalar(text("SELECT to_regclass(:name)"), {"name": table_name})
-        if exists:
-            return table_name
+    table_name, _ = resolve_existing_table(db, candidates)
+    if table_name:
+        return table_name
     raise ValueError("Tenant terms storage not found. Apply tenant terms migrations first.")
 
 
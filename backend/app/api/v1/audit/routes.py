@@ -2,11 +2,12 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, not_
+from sqlalchemy import select, and_, not_, tuple_
 
 from app.core.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.core.dependencies import get_tenant, require_permission
 from app.models.audit_log import AuditLog
 
@@ -26,6 +27,7 @@ def _is_saas_scope(request: Request) -> bool:
 @router.get("/logs")
 def list_audit_logs(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     _=Depends(require_permission("audit.read")),
@@ -39,8 +41,12 @@ def list_audit_logs(
     from_dt: Optional[datetime] = Query(default=None),
     to_dt: Optional[datetime] = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),  # X-Next-Cursor of the previous page
+    offset: int = Query(default=0, ge=0),  # legacy; ignored when cursor is given
 ):
+    """Newest first. Pages are keyset-based on (created_at, id): pass the
+    previous page's `X-Next-Cursor` response header as `cursor`. The header
+    is absent on the last page."""
     saas = _is_saas_scope(request)
 
     # Tenant isolation:
@@ -77,9 +83,22 @@ def list_audit_logs(
     if to_dt:
         stmt = stmt.where(AuditLog.created_at <= to_dt)
 
-    stmt = stmt.order_by(AuditLog.created_at.desc()).limit(limit).offset(offset)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(
+            tuple_(AuditLog.created_at, AuditLog.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    stmt = stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
 
     rows = db.execute(stmt).scalars().all()
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
 
     return [
         {
@@ -3,17 +3,18 @@ from uuid import uuid4, UUID as UUIDType
 
 from sqlalchemy.orm import Session
 from sqlalchemy import select, and_
-import sqlalchemy as sa
 
 from app.models.user import User
 from app.models.membership import UserTenant
 from app.models.auth import AuthSession
 from app.models.tenant import Tenant
 
-from app.utils.hashing import verify_password, hash_password
+from app.core.permission_cache import resolve_roles_permissions
+
+from app.utils.hashing import hash_refresh_token, verify_password, verify_refresh_token
 from app.utils.tokens import create_access_token, create_refresh_token, decode_token
 
-from app.models.rbac import Role, Permission, RolePermission, UserRole, UserPermissionOverride
+from app.models.rbac import Role, UserRole
 
 
 SAAS_TENANT_MARKER = "__saas__"
@@ -38,65 +39,11 @@ def _load_roles_permissions(db: Session, tenant_id, user_id) -> tuple[list[str],
     Returns:
       roles: role codes
       permissions: effective permission codes after overrides
-    """
 
-    if tenant_id is None:
-        # SaaS/global: only roles/overrides where tenant_id IS NULL
-        role_scope_filter = UserRole.tenant_id.is_(None)
-        override_scope_filter = UserPermissionOverride.tenant_id.is_(None)
-    else:
-        # Tenant: merge global + tenant-scoped
-        role_scope_filter = sa.or_(UserRole.tenant_id.is_(None), UserRole.tenant_id == tenant_id)
-        override_scope_filter = sa.or_(UserPermissionOverride.tenant_id.is_(None), UserPermissionOverride.tenant_id == tenant_id)
-
-    # 1) Roles
-    role_rows = db.execute(
-        select(Role.code)
-        .select_from(UserRole)
-        .join(Role, Role.id == UserRole.role_id)
-        .where(
-            UserRole.user_id == user_id,
-            role_scope_filter,
-        )
-    ).all()
-    role_codes = sorted({str(r[0]).strip().upper() for r in role_rows if r and r[0]})
-
-    if "SUPER_ADMIN" in role_codes:
-        all_permissions = db.execute(
-            select(Permission.code).order_by(Permission.code.asc())
-        ).scalars().all()
-        return role_codes, sorted({str(code) for code in all_permissions if code})
-
-    # 2) Role permissions
-    perm_rows = db.execute(
-        select(Permission.code)
-        .select_from(UserRole)
-        .join(Role, Role.id == UserRole.role_id)
-        .join(RolePermission, RolePermission.role_id == Role.id)
-        .join(Permission, Permission.id == RolePermission.permission_id)
-        .where(
-            UserRole.user_id == user_id,
-            role_scope_filter,
-        )
-    ).all()
-    role_perm_codes = {p[0] for p in perm_rows}
-
-    # 3) Overrides
-    override_rows = db.execute(
-        select(Permission.code, UserPermissionOverride.effect)
-        .select_from(UserPermissionOverride)
-        .join(Permission, Permission.id == UserPermissionOverride.permission_id)
-        .where(
-            UserPermissionOverride.user_id == user_id,
-            override_scope_filter,
-        )
-    ).all()
-
-    allow = {code for code, eff in override_rows if eff == "ALLOW"}
-    deny = {code for code, eff in override_rows if eff == "DENY"}
-
-    effective = (role_perm_codes | allow) - deny
-    return role_codes, sorted(effective)
+    The role → permission map comes from app.core.permission_cache; only the
+    user's own role assignments and overrides are read here (one query).
+    """
+    return resolve_roles_permissions(db, tenant_id, user_id)
 
 
 def _assert_super_admin(db: Session, user_id) -> None:
@@ -161,7 +108,7 @@ def login(db: Session, *, tenant_id, email: str, password: str) -> tuple[str, st
         tenant_id=str(tenant_id),
     )
 
-    refresh_hash = hash_password(refresh_token)
+    refresh_hash = hash_refresh_token(refresh_token)
     db.add(
         AuthSession(
             id=session_id,
@@ -218,8 +165,11 @@ def refresh(db: Session, *, tenant_id, refresh_token: str) -> tuple[str, str]:
     if session.expires_at <= datetime.now(timezone.utc):
         raise ValueError("Session expired")
 
-    if not verify_password(refresh_token, session.refresh_token_hash):
+    valid, needs_rehash = verify_refresh_token(refresh_token, session.refresh_token_hash)
+    if not valid:
         raise ValueError("Invalid refresh token")
+    if needs_rehash:
+        session.refresh_token_hash = hash_refresh_token(refresh_token)
 
     roles, permissions = _load_roles_permissions(db, tenant_id, user_id)
 
@@ -303,7 +253,7 @@ def login_saas(db: Session, *, email: str, password: str) -> tuple[str, str]:
     )
 
     # IMPORTANT: for SaaS sessions, tenant_id MUST be nullable on AuthSession
-    refresh_hash = hash_password(refresh_token)
+    refresh_hash = hash_refresh_token(refresh_token)
     db.add(
         AuthSession(
             id=session_id,
@@ -360,8 +310,11 @@ def refresh_saas(db: Session, *, refresh_token: str) -> tuple[str, str]:
     if session.expires_at <= datetime.now(timezone.utc):
         raise ValueError("Session expired")
 
-    if not verify_password(refresh_token, session.refresh_token_hash):
+    valid, needs_rehash = verify_refresh_token(refresh_token, session.refresh_token_hash)
+    if not valid:
         raise ValueError("Invalid refresh token")
+    if needs_rehash:
+        session.refresh_token_hash = hash_refresh_token(refresh_token)
 
     _assert_super_admin(db, user_id)
 
@@ -507,7 +460,7 @@ def switch_campus(
             id=session_id,
             tenant_id=target_tenant_id,
             user_id=user_id,
-            refresh_token_hash=hash_password(refresh_token),
+            refresh_token_hash=hash_refresh_token(refresh_token),
             expires_at=refresh_exp,
             revoked_at=None,
             last_used_at=None,
@@ -39,7 +39,11 @@ def list_unseen_changelog(
 ):
     """Published changelog entries this user has not yet acknowledged —
     everything published after their changelog_seen_at, newest first."""
-    rows = unseen_entries(db, getattr(user, "changelog_seen_at", None))
+    # The auth dependency returns a cached snapshot, not the ORM row.
+    seen_at = db.execute(
+        select(User.changelog_seen_at).where(User.id == user.id)
+    ).scalar_one_or_none()
+    rows = unseen_entries(db, seen_at)
 
     return [
         {
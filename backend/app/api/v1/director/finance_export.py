@@ -1,6 +1,6 @@
 """Director finance report exports — CSV + branded PDF.
 
-Both formats consume the same in-memory bundle assembled from
+Both formats consume the per-tenant KPI snapshot from
 `app.api.v1.tenants.dashboard_stats` so the numbers on the dashboard,
 the CSV, and the PDF agree to the cent.
 
@@ -19,35 +19,18 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.api.v1.finance.service import get_tenant_print_profile
-from app.api.v1.tenants.dashboard_stats import (
-    _resolve_current_term_by_date,
-    get_finance_all_time,
-    get_finance_by_class,
-    get_finance_by_provider,
-    get_finance_by_term,
-    get_finance_current_term,
-    get_scholarship_breakdown,
-    get_student_demographics,
-    get_top_outstanding,
-)
+from app.api.v1.tenants.dashboard_stats import get_kpi_snapshot
 
 
 # ── Bundle ──────────────────────────────────────────────────────────────────
 
 
 def build_finance_report_bundle(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
-    current = _resolve_current_term_by_date(db, tenant_id=tenant_id)
+    """Reads the tenant's KPI snapshot (refreshing it when stale), so an
+    export costs one lookup and matches the dashboard exactly."""
     return {
-        "generated_at":    datetime.now(timezone.utc).isoformat(),
-        "all_time":        get_finance_all_time(db, tenant_id=tenant_id),
-        "current_term":    get_finance_current_term(db, tenant_id=tenant_id, current_term=current),
-        "demographics":    get_student_demographics(db, tenant_id=tenant_id),
-        "by_class":        get_finance_by_class(db, tenant_id=tenant_id),
-        "by_term":         get_finance_by_term(db, tenant_id=tenant_id),
-        "by_provider":     get_finance_by_provider(db, tenant_id=tenant_id),
-        "top_outstanding": get_top_outstanding(db, tenant_id=tenant_id, limit=20),
-        "scholarships":    get_scholarship_breakdown(db, tenant_id=tenant_id),
-        "active_term":     current,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        **get_kpi_snapshot(db, tenant_id=tenant_id),
     }
 
 
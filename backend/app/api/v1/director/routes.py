@@ -24,17 +24,7 @@ from app.api.v1.finance import service as finance_service
 from app.api.v1.finance.service import get_tenant_print_profile
 from app.api.v1.tenants.dashboard_today import get_today_at_school
 from app.core.audit import log_event
-from app.api.v1.tenants.dashboard_stats import (
-    _resolve_current_term_by_date,
-    get_finance_all_time,
-    get_finance_by_class,
-    get_finance_by_provider,
-    get_finance_by_term,
-    get_finance_current_term,
-    get_scholarship_breakdown,
-    get_student_demographics,
-    get_top_outstanding,
-)
+from app.api.v1.tenants.dashboard_stats import get_kpi_snapshot
 from app.core.dependencies import get_current_user, get_db, get_tenant, require_permission
 
 router = APIRouter()
@@ -55,23 +45,21 @@ def get_director_kpis(
 ):
     tid = str(tenant.id)
 
-    # ── Finance: all-time + current term (shared helpers) ────────────────
-    # Shared with secretary dashboard so the numbers agree; secretary
-    # endpoint just hides the collected/billed aggregates on its way out.
-    finance = get_finance_all_time(db, tenant_id=tenant.id)
-    current_term = _resolve_current_term_by_date(db, tenant_id=tenant.id)
-    term_finance = get_finance_current_term(
-        db, tenant_id=tenant.id, current_term=current_term
-    )
-
-    # ── Demographics + detailed finance breakdowns ───────────────────────
-    demographics = get_student_demographics(db, tenant_id=tenant.id)
+    # ── Finance, demographics + breakdowns (per-tenant KPI snapshot) ─────
+    # Shared with the exports so the numbers agree; the secretary endpoint
+    # uses the same helpers and just hides the collected/billed aggregates.
+    kpis = get_kpi_snapshot(db, tenant_id=tenant.id)
+    db.commit()  # keep a refreshed snapshot
+    finance = kpis["all_time"]
+    current_term = kpis["active_term"]
+    term_finance = kpis["current_term"]
+    demographics = kpis["demographics"]
     finance_breakdowns = {
-        "by_class":     get_finance_by_class(db, tenant_id=tenant.id),
-        "by_term":      get_finance_by_term(db, tenant_id=tenant.id),
-        "by_provider":  get_finance_by_provider(db, tenant_id=tenant.id),
-        "top_outstanding": get_top_outstanding(db, tenant_id=tenant.id, limit=20),
-        "scholarships":  get_scholarship_breakdown(db, tenant_id=tenant.id),
+        "by_class":     kpis["by_class"],
+        "by_term":      kpis["by_term"],
+        "by_provider":  kpis["by_provider"],
+        "top_outstanding": kpis["top_outstanding"],
+        "scholarships":  kpis["scholarships"],
     }
 
     # ── Enrollments by status ─────────────────────────────────────────────
@@ -124,6 +112,7 @@ def get_director_kpis(
 
     # ── Assemble response ─────────────────────────────────────────────────
     return {
+        "snapshot_at": kpis["snapshot_at"],
         "finance": finance,
         "term_finance": term_finance,
         "finance_breakdowns": finance_breakdowns,
@@ -190,30 +179,27 @@ def get_group_dashboard(
     if group is None:
         return {"grouped": False}
 
-    rows = db.execute(sa.text("""
-        SELECT
-            t.id   AS tenant_id,
-            t.name AS name,
-            t.slug AS slug,
-            COALESCE((SELECT COUNT(*) FROM core.students s WHERE s.tenant_id = t.id), 0) AS students,
-            COALESCE((SELECT SUM(total_amount)   FROM core.invoices i WHERE i.tenant_id = t.id), 0) AS billed,
-            COALESCE((SELECT SUM(paid_amount)    FROM core.invoices i WHERE i.tenant_id = t.id), 0) AS collected,
-            COALESCE((SELECT SUM(balance_amount) FROM core.invoices i WHERE i.tenant_id = t.id), 0) AS outstanding
+    campus_rows = db.execute(sa.text("""
+        SELECT t.id AS tenant_id, t.name AS name, t.slug AS slug
         FROM core.tenants t
         WHERE t.group_id = :gid AND t.deleted_at IS NULL
         ORDER BY t.name ASC
     """), {"gid": str(group_id)}).mappings().all()
 
+    # Campus figures come from each campus's KPI snapshot, so they match
+    # that campus's own director dashboard (active students, non-cancelled
+    # invoices).
     campuses = []
     tot_students = 0
     tot_billed = Decimal("0")
     tot_collected = Decimal("0")
     tot_outstanding = Decimal("0")
-    for r in rows:
-        billed = _dec(r["billed"])
-        collected = _dec(r["collected"])
-        outstanding = _dec(r["outstanding"])
-        students = int(r["students"] or 0)
+    for r in campus_rows:
+        kpis = get_kpi_snapshot(db, tenant_id=r["tenant_id"])
+        billed = _dec(kpis["all_time"]["total_billed"])
+        collected = _dec(kpis["all_time"]["total_collected"])
+        outstanding = _dec(kpis["all_time"]["total_outstanding"])
+        students = int(kpis["demographics"]["total_students"] or 0)
         tot_students += students
         tot_billed += billed
         tot_collected += collected
@@ -229,7 +215,9 @@ def get_group_dashboard(
             "collection_rate_pct": (
                 int(collected / billed * 100) if billed > 0 else 0
             ),
+            "snapshot_at": kpis["snapshot_at"],
         })
+    db.commit()  # keep refreshed snapshots
 
     state = _state_from_tier(
         db, plan_code=group.plan_code, period_end=group.period_end,
@@ -424,6 +412,10 @@ def list_director_invoices(
     outstanding_only: bool = Query(False),
     date_from: Optional[str] = Query(None, description="YYYY-MM-DD inclusive"),
     date_to: Optional[str]   = Query(None, description="YYYY-MM-DD inclusive"),
+    count: str = Query("exact", pattern="^(exact|estimated)$", description="estimated: planner estimate for large totals"),
+    paging: str = Query("offset", pattern="^(offset|cursor)$", description="cursor: keyset pages with next/prev cursors"),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(False, description="cursor paging: also count the total past the first page"),
 ):
     """Server-paginated invoice table for the director Finance > Invoices page.
 
@@ -431,19 +423,26 @@ def list_director_invoices(
     are all server-side so the "Showing X-Y of Z" count is honest even with
     tens of thousands of invoices — no silent client-side truncation.
     """
-    result = finance_service.list_invoices(
-        db,
-        tenant_id=tenant.id,
-        page=page,
-        page_size=page_size,
-        q=q,
-        status=status,
-        invoice_type=invoice_type,
-        enrollment_id=enrollment_id,
-        outstanding_only=outstanding_only,
-        date_from=date_from,
-        date_to=date_to,
-    )
+    try:
+        result = finance_service.list_invoices(
+            db,
+            tenant_id=tenant.id,
+            page=page,
+            page_size=page_size,
+            q=q,
+            status=status,
+            invoice_type=invoice_type,
+            enrollment_id=enrollment_id,
+            outstanding_only=outstanding_only,
+            date_from=date_from,
+            date_to=date_to,
+            estimate_total=count == "estimated",
+            cursor=cursor,
+            keyset=paging == "cursor",
+            with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     # Batch-resolve student labels for the whole page in a single query so
     # the frontend gets student_name + admission_no per row without needing
     # a client-side enrollment lookup.
@@ -476,6 +475,10 @@ def list_director_payments(
     date_to: Optional[str]   = Query(None, description="YYYY-MM-DD inclusive"),
     enrollment_id: Optional[UUID] = Query(None),
     settled_only: bool = Query(False, description="Receipts view: only payments against PAID invoices"),
+    count: str = Query("exact", pattern="^(exact|estimated)$", description="estimated: planner estimate for large totals"),
+    paging: str = Query("offset", pattern="^(offset|cursor)$", description="cursor: keyset pages with next/prev cursors"),
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(False, description="cursor paging: also count the total past the first page"),
 ):
     """Server-paginated payments table shared by director + secretary.
 
@@ -487,18 +490,25 @@ def list_director_payments(
     payments) so the frontend renders names without a client-side
     enrollment map.
     """
-    result = finance_service.list_payments(
-        db,
-        tenant_id=tenant.id,
-        page=page,
-        page_size=page_size,
-        q=q,
-        provider=provider,
-        date_from=date_from,
-        date_to=date_to,
-        enrollment_id=enrollment_id,
-        settled_only=settled_only,
-    )
+    try:
+        result = finance_service.list_payments(
+            db,
+            tenant_id=tenant.id,
+            page=page,
+            page_size=page_size,
+            q=q,
+            provider=provider,
+            date_from=date_from,
+            date_to=date_to,
+            enrollment_id=enrollment_id,
+            settled_only=settled_only,
+            estimate_total=count == "estimated",
+            cursor=cursor,
+            keyset=paging == "cursor",
+            with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     # list_payments already returns dicts (not ORM); coerce UUIDs / decimals
     # to str for JSON.
     items = []
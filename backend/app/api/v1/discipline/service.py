@@ -10,6 +10,7 @@ from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api.v1.reports.results import invalidate_class_results_after_commit
 from app.models.discipline import DisciplineFollowup, DisciplineIncident, DisciplineStudent
 
 
@@ -602,6 +603,8 @@ def hard_delete_student(
             {"tid": tid_str},
         )
         counts["exam_marks"] = r.rowcount
+        if r.rowcount:
+            invalidate_class_results_after_commit(db, tenant_id)
 
     # 12. Term report remarks (via class enrollment)
     if class_enrollment_ids:
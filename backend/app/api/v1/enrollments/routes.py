@@ -99,23 +99,46 @@ def list_enrollments_paged(
     ),
     class_code: str | None = Query(default=None),
     term_code: str | None = Query(default=None),
+    paging: str = Query(
+        default="offset",
+        pattern="^(offset|cursor)$",
+        description="cursor: keyset pages with next/prev cursors (offset ignored).",
+    ),
+    cursor: str | None = Query(default=None),
+    with_total: bool = Query(
+        default=False,
+        description="Cursor paging: also count the total past the first page.",
+    ),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     _=Depends(get_current_user),
 ):
-    rows, total = service.list_enrollments_paged(
-        db,
-        tenant_id=tenant.id,
+    try:
+        rows, total, next_cursor, prev_cursor = service.list_enrollments_paged(
+            db,
+            tenant_id=tenant.id,
+            limit=limit,
+            offset=offset,
+            status=status,
+            status_in=_parse_csv_param(status_in),
+            status_not_in=_parse_csv_param(status_not_in),
+            search=search,
+            class_code=class_code,
+            term_code=term_code,
+            cursor=cursor,
+            keyset=paging == "cursor",
+            with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return EnrollmentPageOut(
+        items=rows,
+        total=total,
         limit=limit,
         offset=offset,
-        status=status,
-        status_in=_parse_csv_param(status_in),
-        status_not_in=_parse_csv_param(status_not_in),
-        search=search,
-        class_code=class_code,
-        term_code=term_code,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
-    return EnrollmentPageOut(items=rows, total=total, limit=limit, offset=offset)
 
 
 # ---------------------------------------------------------------------------
@@ -102,6 +102,9 @@ class EnrollmentOut(BaseModel):
 
 class EnrollmentPageOut(BaseModel):
     items: list[EnrollmentOut]
-    total: int
+    # None on cursor pages past the first unless with_total was asked for.
+    total: Optional[int]
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
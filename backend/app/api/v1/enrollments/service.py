@@ -8,6 +8,8 @@ from uuid import UUID
 
 from app.models.enrollment import Enrollment
 from app.core.audit import log_event
+from app.core.pagination import keyset_page
+from app.core.search import ENTITY_ENROLLMENT, search_document_ids
 from app.api.v1.finance import service as finance_service
 
 
@@ -556,11 +558,18 @@ def list_enrollments_paged(
     search: str | None = None,
     class_code: str | None = None,
     term_code: str | None = None,
-) -> tuple[list[Enrollment], int]:
+    cursor: str | None = None,
+    keyset: bool = False,
+    with_total: bool = False,
+) -> tuple[list[Enrollment], int | None, str | None, str | None]:
     """
     Tenant-scoped, server-side paginated enrollment listing.
 
     Supports deterministic ordering and optional status/search/class/term filters.
+    Returns (rows, total, next_cursor, prev_cursor). With `keyset` or a
+    `cursor` the page is a keyset page (offset ignored) and the total is
+    only counted on the first page or with `with_total`; otherwise both
+    cursors are None. Raises ValueError on an invalid cursor.
     """
     q = select(Enrollment).where(Enrollment.tenant_id == tenant_id)
 
@@ -575,75 +584,45 @@ def list_enrollments_paged(
     if exclude_statuses:
         q = q.where(sa.not_(sa.func.upper(Enrollment.status).in_(exclude_statuses)))
 
-    class_expr = sa.func.lower(
-        sa.func.coalesce(
-            Enrollment.payload["admission_class"].astext,
-            Enrollment.payload["class_code"].astext,
-            Enrollment.payload["classCode"].astext,
-            Enrollment.payload["grade"].astext,
-            "",
-        )
-    )
-    term_expr = sa.func.lower(
-        sa.func.coalesce(
-            Enrollment.payload["admission_term"].astext,
-            Enrollment.payload["term_code"].astext,
-            Enrollment.payload["termCode"].astext,
-            Enrollment.payload["term"].astext,
-            "",
-        )
-    )
-
-    normalized_class = str(class_code or "").strip().lower()
+    # class_code / term_code are generated columns holding the payload's
+    # class and term, normalized the same way as the parameters below.
+    normalized_class = str(class_code or "").strip().upper()
     if normalized_class:
-        q = q.where(class_expr == normalized_class)
+        q = q.where(Enrollment.class_code == normalized_class)
 
-    normalized_term = str(term_code or "").strip().lower()
+    normalized_term = str(term_code or "").strip().replace(" ", "_").upper()
     if normalized_term:
-        q = q.where(term_expr == normalized_term)
+        q = q.where(Enrollment.term_code == normalized_term)
 
     normalized_search = str(search or "").strip().lower()
     if normalized_search:
-        like = f"%{normalized_search}%"
-        name_expr = sa.func.lower(
-            sa.func.coalesce(
-                Enrollment.payload["student_name"].astext,
-                Enrollment.payload["studentName"].astext,
-                Enrollment.payload["full_name"].astext,
-                Enrollment.payload["fullName"].astext,
-                Enrollment.payload["name"].astext,
-                "",
-            )
-        )
-        admission_expr = sa.func.lower(
-            sa.func.coalesce(
-                Enrollment.payload["admission_number"].astext,
-                "",
-            )
-        )
-        id_expr = sa.func.lower(sa.cast(Enrollment.id, sa.String))
+        # Name, class, term, admission number and id, precomputed in the
+        # enrollment's search document (app.core.search).
         q = q.where(
-            sa.or_(
-                name_expr.like(like),
-                class_expr.like(like),
-                term_expr.like(like),
-                admission_expr.like(like),
-                id_expr.like(like),
-            )
+            Enrollment.id.in_(search_document_ids(tenant_id, ENTITY_ENROLLMENT, normalized_search))
         )
 
-    count_stmt = select(sa.func.count()).select_from(q.order_by(None).subquery())
-    total = int(db.execute(count_stmt).scalar_one() or 0)
+    total: int | None = None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    if not cursor or with_total:
+        count_stmt = select(sa.func.count()).select_from(q.order_by(None).subquery())
+        total = int(db.execute(count_stmt).scalar_one() or 0)
 
-    rows = (
-        db.execute(
-            q.order_by(Enrollment.created_at.desc(), Enrollment.id.desc())
-            .offset(offset)
-            .limit(limit)
+    if keyset or cursor:
+        rows, next_cursor, prev_cursor = keyset_page(
+            db, q, order_cols=(Enrollment.created_at, Enrollment.id), cursor=cursor, limit=limit,
+        )
+    else:
+        rows = (
+            db.execute(
+                q.order_by(Enrollment.created_at.desc(), Enrollment.id.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+            .scalars()
+            .all()
         )
-        .scalars()
-        .all()
-    )
 
     try:
         adm_map = _load_admission_number_map(db, tenant_id=tenant_id)
@@ -661,7 +640,7 @@ def list_enrollments_paged(
         admission_number = adm_map.get(rid) or payload_adm or None
         setattr(row, "admission_number", admission_number)
 
-    return rows, total
+    return rows, total, next_cursor, prev_cursor
 
 
 def get_enrollment(
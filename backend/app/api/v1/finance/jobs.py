@@ -0,0 +1,103 @@
+"""Background job handlers for the long-running finance operations.
+
+Each handler mirrors its synchronous route (same service call, same commit
+rule, same dashboard invalidation as the finance router) and reports
+progress through the job context. See app.core.jobs.
+"""
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.api.v1.finance import service
+from app.api.v1.sms import notifications as sms_notify
+from app.api.v1.tenants.dashboard_sections import SCOPE_FINANCE, invalidate_dashboard_sections_after_commit
+from app.core.jobs import JobContext, register_job
+
+BULK_GENERATE_FEES_INVOICES = "finance.invoices.bulk_generate"
+BULK_PUBLISH_INVOICES = "finance.invoices.bulk_publish"
+RECONCILE_SWEEP = "finance.reconcile.sweep"
+BULK_APPLY_SCHOLARSHIP = "finance.scholarships.bulk_apply"
+
+
+@register_job(BULK_GENERATE_FEES_INVOICES, permission="finance.invoices.manage")
+def run_bulk_generate_fees_invoices(db: Session, job: JobContext) -> dict:
+    invalidate_dashboard_sections_after_commit(db, job.tenant_id, SCOPE_FINANCE)
+    p = job.params
+    dry_run = bool(p.get("dry_run", False))
+    result = service.bulk_generate_fees_invoices(
+        db,
+        tenant_id=job.tenant_id,
+        actor_user_id=job.actor_user_id,
+        term_number=int(p["term_number"]),
+        academic_year=int(p["academic_year"]),
+        class_code=p.get("class_code"),
+        dry_run=dry_run,
+        progress=job.progress,
+    )
+    if dry_run:
+        db.rollback()
+    return result
+
+
+@register_job(BULK_PUBLISH_INVOICES, permission="finance.invoices.manage")
+def run_bulk_publish_invoices(db: Session, job: JobContext) -> dict:
+    invalidate_dashboard_sections_after_commit(db, job.tenant_id, SCOPE_FINANCE)
+    p = job.params
+    result = service.bulk_publish_invoices(
+        db,
+        tenant_id=job.tenant_id,
+        actor_user_id=job.actor_user_id,
+        invoice_ids=[UUID(str(i)) for i in (p.get("invoice_ids") or [])],
+        all_drafts=bool(p.get("all_drafts", False)),
+        term_number=p.get("term_number"),
+        academic_year=p.get("academic_year"),
+        all_drafts_limit=int(p.get("all_drafts_limit") or 5000),
+        progress=job.progress,
+    )
+    db.commit()
+    # Parent SMS only after the publish is durable, as in the sync route.
+    sms_notify.fire_bulk_invoice_notifications(
+        db,
+        tenant_id=job.tenant_id,
+        actor_user_id=job.actor_user_id,
+        invoice_ids=[UUID(row["invoice_id"]) for row in result.get("published", [])],
+    )
+    return result
+
+
+@register_job(RECONCILE_SWEEP, permission="finance.fees.manage")
+def run_reconcile_sweep(db: Session, job: JobContext) -> dict:
+    invalidate_dashboard_sections_after_commit(db, job.tenant_id, SCOPE_FINANCE)
+    p = job.params
+    dry_run = bool(p.get("dry_run", False))
+    result = service.sweep_reconcile_invoices(
+        db,
+        tenant_id=job.tenant_id,
+        actor_user_id=job.actor_user_id,
+        academic_year=p.get("academic_year"),
+        dry_run=dry_run,
+        progress=job.progress,
+    )
+    if dry_run:
+        db.rollback()
+    return result
+
+
+@register_job(BULK_APPLY_SCHOLARSHIP, permission="finance.policy.manage")
+def run_bulk_apply_scholarship(db: Session, job: JobContext) -> dict:
+    invalidate_dashboard_sections_after_commit(db, job.tenant_id, SCOPE_FINANCE)
+    p = job.params
+    return service.bulk_apply_scholarship_to_class(
+        db,
+        tenant_id=job.tenant_id,
+        actor_user_id=job.actor_user_id,
+        scholarship_id=UUID(str(p["scholarship_id"])),
+        class_code=str(p.get("class_code") or ""),
+        term_number=int(p.get("term_number") or 0),
+        academic_year=int(p.get("academic_year") or 0),
+        reason=str(p.get("reason") or ""),
+        dry_run=bool(p.get("dry_run", False)),
+        progress=job.progress,
+    )
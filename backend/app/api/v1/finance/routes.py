@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.core.database import get_db
 from app.core.dependencies import get_tenant, get_current_user, require_permission
+from app.core.jobs import enqueue_job, job_accepted
 from app.core.subscription_gate import block_when_inactive
 
 
@@ -35,6 +36,7 @@ def _enforce_director_for_non_draft(request: Request, status: str) -> None:
             ),
         )
 
+from app.api.v1.finance import jobs as finance_jobs
 from app.api.v1.finance import service
 from app.api.v1.payments import service as payments_service
 from app.api.v1.sms import notifications as sms_notify
@@ -559,6 +561,8 @@ def reconcile_structure_route(
 def reconcile_sweep_route(
     academic_year: int | None = Query(default=None, ge=2000, le=2100),
     dry_run: bool = Query(default=False),
+    run_async: bool = Query(default=False, alias="async"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     user=Depends(get_current_user),
@@ -566,7 +570,20 @@ def reconcile_sweep_route(
     """The 'forever checking' arm: verify every structure-generated invoice
     of the academic year (default: latest with invoices) against its current
     fee structure and fix any drift. Idempotent — a clean ledger is a no-op.
-    Callable manually from the finance page or by an external cron."""
+    Callable manually from the finance page or by an external cron.
+
+    async=true queues the sweep as a background job: 202 + job URL."""
+    if run_async:
+        job = enqueue_job(
+            db,
+            tenant_id=tenant.id,
+            kind=finance_jobs.RECONCILE_SWEEP,
+            params={"academic_year": academic_year, "dry_run": dry_run},
+            actor_user_id=user.id,
+            idempotency_key=idempotency_key,
+        )
+        db.commit()
+        return job_accepted(job)
     try:
         result = service.sweep_reconcile_invoices(
             db,
@@ -815,6 +832,8 @@ def apply_scholarship_to_invoice_route(
 def bulk_apply_scholarship_route(
     scholarship_id: UUID,
     payload: dict,
+    run_async: bool = Query(default=False, alias="async"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     user=Depends(get_current_user),
@@ -822,7 +841,9 @@ def bulk_apply_scholarship_route(
     """Director action — apply this scholarship to every student in a class
     for a given term + year. Optional dry_run returns the preview without
     persisting. Skip-on-conflict: students whose invoice already has an
-    ACTIVE scholarship are reported as skipped, never replaced."""
+    ACTIVE scholarship are reported as skipped, never replaced.
+
+    async=true queues the run as a background job: 202 + job URL."""
     try:
         class_code = str(payload.get("class_code") or "")
         term_number = int(payload.get("term_number") or 0)
@@ -832,6 +853,25 @@ def bulk_apply_scholarship_route(
     except (ValueError, TypeError):
         raise HTTPException(status_code=400, detail="invalid request")
 
+    if run_async:
+        job = enqueue_job(
+            db,
+            tenant_id=tenant.id,
+            kind=finance_jobs.BULK_APPLY_SCHOLARSHIP,
+            params={
+                "scholarship_id": scholarship_id,
+                "class_code": class_code,
+                "term_number": term_number,
+                "academic_year": academic_year,
+                "reason": reason,
+                "dry_run": dry_run,
+            },
+            actor_user_id=user.id,
+            idempotency_key=idempotency_key,
+        )
+        db.commit()
+        return job_accepted(job)
+
     try:
         result = service.bulk_apply_scholarship_to_class(
             db,
@@ -1166,6 +1206,8 @@ def publish_invoice_route(
 )
 def bulk_generate_fees_invoices_route(
     payload: BulkGenerateFeesInvoicesRequest,
+    run_async: bool = Query(default=False, alias="async"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     user=Depends(get_current_user),
@@ -1179,7 +1221,21 @@ def bulk_generate_fees_invoices_route(
     the secretary commits the batch.
 
     Per-student failures don't abort the batch; each row shows up in
-    created/skipped/failed with a reason code the UI can render."""
+    created/skipped/failed with a reason code the UI can render.
+
+    async=true queues the batch as a background job: 202 + job URL; the
+    job's result is this endpoint's response body."""
+    if run_async:
+        job = enqueue_job(
+            db,
+            tenant_id=tenant.id,
+            kind=finance_jobs.BULK_GENERATE_FEES_INVOICES,
+            params=payload.model_dump(),
+            actor_user_id=user.id,
+            idempotency_key=idempotency_key,
+        )
+        db.commit()
+        return job_accepted(job)
     try:
         result = service.bulk_generate_fees_invoices(
             db,
@@ -1207,6 +1263,8 @@ def bulk_generate_fees_invoices_route(
 )
 def bulk_publish_invoices_route(
     payload: BulkPublishInvoicesRequest,
+    run_async: bool = Query(default=False, alias="async"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     user=Depends(get_current_user),
@@ -1214,7 +1272,20 @@ def bulk_publish_invoices_route(
     """Publish a batch of DRAFT invoices in one request — typically the
     DRAFTs the secretary just generated via /generate/fees/bulk and
     reviewed. Each row publishes in its own savepoint so one bad invoice
-    doesn't sink the rest. Returns per-row outcomes."""
+    doesn't sink the rest. Returns per-row outcomes.
+
+    async=true queues the batch as a background job: 202 + job URL."""
+    if run_async:
+        job = enqueue_job(
+            db,
+            tenant_id=tenant.id,
+            kind=finance_jobs.BULK_PUBLISH_INVOICES,
+            params=payload.model_dump(),
+            actor_user_id=user.id,
+            idempotency_key=idempotency_key,
+        )
+        db.commit()
+        return job_accepted(job)
     try:
         result = service.bulk_publish_invoices(
             db,
@@ -1230,21 +1301,10 @@ def bulk_publish_invoices_route(
         # Best-effort parent SMS for each successfully published invoice.
         # Same rule as the single publish endpoint: notification failure
         # must never roll back a published invoice.
-        try:
-            from app.models.invoice import Invoice as _Invoice
-            from sqlalchemy import select as _select
-            for row in result.get("published", []):
-                inv = db.execute(
-                    _select(_Invoice).where(_Invoice.id == UUID(row["invoice_id"]))
-                ).scalar_one_or_none()
-                if inv is not None:
-                    sms_notify.fire_invoice_notification(
-                        db, tenant_id=tenant.id, actor_user_id=user.id,
-                        enrollment_id=inv.enrollment_id,
-                        invoice_no=inv.invoice_no, total_amount=inv.total_amount,
-                    )
-        except Exception:
-            pass
+        sms_notify.fire_bulk_invoice_notifications(
+            db, tenant_id=tenant.id, actor_user_id=user.id,
+            invoice_ids=[UUID(row["invoice_id"]) for row in result.get("published", [])],
+        )
         return result
     except ValueError as e:
         db.rollback()
@@ -1380,6 +1440,10 @@ def list_invoices(
     date_to: str | None = Query(default=None, description="YYYY-MM-DD inclusive"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: str = Query(default="exact", pattern="^(exact|estimated)$", description="estimated: planner estimate for large totals"),
+    paging: str = Query(default="offset", pattern="^(offset|cursor)$", description="cursor: keyset pages with next/prev cursors"),
+    cursor: str | None = Query(default=None),
+    with_total: bool = Query(default=False, description="cursor paging: also count the total past the first page"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     _=Depends(get_current_user),
@@ -1391,13 +1455,18 @@ def list_invoices(
     frontend renders names without a client-side map. Used for both the
     Invoices tab and the Receipts tab (status=PAID).
     """
-    result = service.list_invoices(
-        db, tenant_id=tenant.id, enrollment_id=enrollment_id,
-        invoice_type=invoice_type, status=status,
-        outstanding_only=outstanding_only,
-        q=q, date_from=date_from, date_to=date_to,
-        page=page, page_size=page_size,
-    )
+    try:
+        result = service.list_invoices(
+            db, tenant_id=tenant.id, enrollment_id=enrollment_id,
+            invoice_type=invoice_type, status=status,
+            outstanding_only=outstanding_only,
+            q=q, date_from=date_from, date_to=date_to,
+            page=page, page_size=page_size,
+            estimate_total=count == "estimated",
+            cursor=cursor, keyset=paging == "cursor", with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     # Batch-resolve student labels for this page — same helper the
     # director endpoint uses. Kept small dependency here for isolation.
     from app.api.v1.director.routes import _batch_student_labels, _serialize_invoice_row
@@ -1787,6 +1856,10 @@ def list_payments(
     settled_only: bool = Query(default=False, description="Receipts view: only payments against PAID invoices"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: str = Query(default="exact", pattern="^(exact|estimated)$", description="estimated: planner estimate for large totals"),
+    paging: str = Query(default="offset", pattern="^(offset|cursor)$", description="cursor: keyset pages with next/prev cursors"),
+    cursor: str | None = Query(default=None),
+    with_total: bool = Query(default=False, description="cursor paging: also count the total past the first page"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     _=Depends(get_current_user),
@@ -1797,11 +1870,16 @@ def list_payments(
     list_payments service). Response no longer uses PaymentPageOut so the
     extended row payload (student_label, received_at) surfaces cleanly.
     """
-    result = service.list_payments(
-        db, tenant_id=tenant.id, enrollment_id=enrollment_id,
-        q=q, provider=provider, date_from=date_from, date_to=date_to,
-        settled_only=settled_only, page=page, page_size=page_size,
-    )
+    try:
+        result = service.list_payments(
+            db, tenant_id=tenant.id, enrollment_id=enrollment_id,
+            q=q, provider=provider, date_from=date_from, date_to=date_to,
+            settled_only=settled_only, page=page, page_size=page_size,
+            estimate_total=count == "estimated",
+            cursor=cursor, keyset=paging == "cursor", with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     items = []
     for row in result["items"]:
         items.append({
@@ -6,8 +6,10 @@ from datetime import datetime, timezone
 import hashlib
 import json
 import logging
-from typing import Any, Optional
-from uuid import UUID
+import time
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID, uuid4
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import cast as sa_cast, Date as SA_Date, or_ as sa_or, select, func as sa_func, text as sa_text
 
 from app.core.audit import log_event
+from app.core.pagination import count_rows, keyset_page
+from app.core.search import ENTITY_INVOICE, ENTITY_PAYMENT, search_document_ids
 
 from app.models.finance_policy import FinancePolicy
 from app.models.finance_structure_policy import FinanceStructurePolicy
@@ -156,6 +160,42 @@ def _next_document_number(
         return f"{dtype}-{year:04d}-{fallback_seq}"
 
 
+def _reserve_document_numbers(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    doc_type: str,
+    count: int,
+    created_at: datetime | None = None,
+) -> list[str]:
+    """Reserve `count` consecutive document numbers with one locked upsert
+    of the sequence row (bulk generators), instead of one locked
+    read-modify-write per document. Unlike _next_document_number there is
+    no fallback: a failure propagates to the caller."""
+    dtype = str(doc_type or "").strip().upper()
+    if dtype not in {"INV", "RCT", "FS"}:
+        raise ValueError("Unsupported doc_type")
+    if count <= 0:
+        return []
+
+    year = _document_year(created_at)
+    next_seq = db.execute(
+        sa_text(
+            """
+            INSERT INTO core.document_sequences (id, tenant_id, doc_type, year, next_seq, created_at, updated_at)
+            VALUES (gen_random_uuid(), :tenant_id, :doc_type, :year, 1 + :count, now(), now())
+            ON CONFLICT (tenant_id, doc_type, year)
+            DO UPDATE SET next_seq = core.document_sequences.next_seq + :count,
+                          updated_at = now()
+            RETURNING next_seq
+            """
+        ),
+        {"tenant_id": tenant_id, "doc_type": dtype, "year": year, "count": int(count)},
+    ).scalar_one()
+    first = int(next_seq) - int(count)
+    return [f"{dtype}-{year:04d}-{seq:06d}" for seq in range(first, first + int(count))]
+
+
 def _document_checksum(
     *,
     tenant_id: UUID,
@@ -2577,6 +2617,7 @@ def bulk_apply_scholarship_to_class(
     academic_year: int,
     reason: str,
     dry_run: bool = False,
+    progress: Optional[Callable[..., None]] = None,
 ) -> dict[str, Any]:
     """Director action: apply `scholarship_id` to every student in `class_code`
     who has a non-cancelled invoice for the given term + year.
@@ -2589,7 +2630,8 @@ def bulk_apply_scholarship_to_class(
 
     Each row runs in its own savepoint so a per-row error doesn't abort
     the batch. dry_run wraps the whole thing in an outer savepoint that
-    rolls back at the end — preview without consequences.
+    rolls back at the end — preview without consequences. `progress(done,
+    total, **counts)` is called per invoice (background job runs).
     """
     if term_number not in (1, 2, 3):
         raise ValueError("term_number must be 1, 2, or 3")
@@ -2659,7 +2701,9 @@ def bulk_apply_scholarship_to_class(
 
     outer_sp = db.begin_nested()
     try:
-        for r in rows:
+        for idx, r in enumerate(rows):
+            if progress is not None:
+                progress(idx, len(rows), applied=len(applied), skipped=len(skipped), failed=len(failed))
             inv_id = r["invoice_id"]
             common = {
                 "invoice_id": str(inv_id),
@@ -2692,6 +2736,8 @@ def bulk_apply_scholarship_to_class(
             except Exception as e:  # pragma: no cover — defensive
                 sp.rollback()
                 failed.append({**common, "reason": "error", "detail": str(e)})
+        if progress is not None:
+            progress(len(rows), len(rows), applied=len(applied), skipped=len(skipped), failed=len(failed))
 
         if dry_run:
             outer_sp.rollback()
@@ -2782,38 +2828,76 @@ def _normalize_invoice_type(value: str | None) -> str | None:
     return t
 
 
+def _arrears_breakdown(bundled: list[Any], *, total: Any, paid: Any) -> tuple[dict[str, str], bool]:
+    """Arrears vs current-term split of an invoice with bundled carry-forward
+    rows, and whether those rows are now settled.
+
+    Effective outstanding, not raw amount — a CF row partially paid down in
+    cash BEFORE being bundled only contributed its remainder to the
+    invoice's arrears line.
+    """
+    arrears_total = sum(
+        (_cf_effective_amount(cf) for cf in bundled), Decimal("0")
+    )
+    paid_d = Decimal(paid or 0)
+    if arrears_total > 0:
+        arrears_paid = min(paid_d, arrears_total)
+        arrears_balance = arrears_total - arrears_paid
+    else:
+        # Net credit (or zero): the arrears line already reduces the
+        # invoice total, so there is nothing left to "pay down" on it.
+        arrears_paid = arrears_total
+        arrears_balance = Decimal("0")
+    current_term_total = Decimal(total or 0) - arrears_total
+    current_term_paid = paid_d - arrears_paid
+    current_term_balance = current_term_total - current_term_paid
+
+    # Settle bundled CF rows once the arrears portion is fully covered.
+    # For a net-credit arrears (negative total), the credit has already been
+    # absorbed by the invoice's reduced total at generation time → settle
+    # immediately so the credit is not re-used on the next invoice.
+    settle = arrears_total <= 0 or paid_d >= arrears_total
+    return {
+        "arrears_total": str(arrears_total),
+        "arrears_paid": str(arrears_paid),
+        "arrears_balance": str(arrears_balance),
+        "current_term_total": str(current_term_total),
+        "current_term_paid": str(current_term_paid),
+        "current_term_balance": str(current_term_balance),
+    }, settle
+
+
 def _recalc_invoice_amounts(db: Session, invoice: Invoice) -> None:
+    _recalc_invoices_amounts(db, [invoice])
+
+
+def _recalc_invoices_amounts(db: Session, invoices: Iterable[Invoice]) -> None:
+    """Recompute totals, paid/balance, status and the arrears breakdown of
+    every invoice in `invoices` — three grouped queries (line sums,
+    allocation sums, bundled carry-forward rows) however many invoices a
+    payment touched. Pending lines/allocations must already be flushed."""
     # A cancelled (voided) invoice is frozen — it stays out of all balances and
     # must never be flipped back to an active status by a recalc.
-    if getattr(invoice, "status", None) == "CANCELLED":
+    live = {inv.id: inv for inv in invoices if getattr(inv, "status", None) != "CANCELLED"}
+    if not live:
         return
-    total = db.execute(
-        select(sa_func.coalesce(sa_func.sum(InvoiceLine.amount), 0)).where(InvoiceLine.invoice_id == invoice.id)
-    ).scalar_one()
-    invoice.total_amount = total
+    ids = list(live)
+
+    totals = dict(
+        db.execute(
+            select(InvoiceLine.invoice_id, sa_func.coalesce(sa_func.sum(InvoiceLine.amount), 0))
+            .where(InvoiceLine.invoice_id.in_(ids))
+            .group_by(InvoiceLine.invoice_id)
+        ).all()
+    )
     # paid_amount is derived from allocations
-    paid = db.execute(
-        select(sa_func.coalesce(sa_func.sum(PaymentAllocation.amount), 0)).where(PaymentAllocation.invoice_id == invoice.id)
-    ).scalar_one()
-    invoice.paid_amount = paid
-    invoice.balance_amount = (Decimal(total) - Decimal(paid))
-
-    # Status lifecycle for non-DRAFT, non-CANCELLED invoices. DRAFT is held
-    # until publish_invoice is called explicitly — recalc must never
-    # auto-promote a DRAFT to ISSUED, or the secretary's preview-then-publish
-    # step gets bypassed every time totals are recomputed (e.g. on
-    # regeneration or a downstream CF settle).
-    if invoice.status != "DRAFT":
-        if invoice.total_amount == 0:
-            # Emptying out an existing live invoice (rare) sends it back to
-            # DRAFT for the secretary to publish or delete deliberately.
-            invoice.status = "DRAFT"
-        elif invoice.balance_amount <= 0:
-            invoice.status = "PAID"
-        elif invoice.paid_amount > 0:
-            invoice.status = "PARTIAL"
-        else:
-            invoice.status = "ISSUED"
+    paid_totals = dict(
+        db.execute(
+            select(PaymentAllocation.invoice_id, sa_func.coalesce(sa_func.sum(PaymentAllocation.amount), 0))
+            .where(PaymentAllocation.invoice_id.in_(ids))
+            .group_by(PaymentAllocation.invoice_id)
+        ).all()
+    )
 
     # Arrears (brought-forward balance) breakdown — FIFO accounting: any payment
     # is treated as clearing the arrears portion before the current-term
@@ -2821,56 +2905,53 @@ def _recalc_invoice_amounts(db: Session, invoice: Invoice) -> None:
     # invoice.meta so the UI and PDF can render "Previous balance" vs "Current
     # term" without scanning the lines themselves.
     from app.models.student_carry_forward import StudentCarryForward
-    bundled = db.execute(
+    bundled_by_invoice: dict[UUID, list[Any]] = defaultdict(list)
+    for cf in db.execute(
         select(StudentCarryForward).where(
-            StudentCarryForward.invoice_id == invoice.id,
+            StudentCarryForward.invoice_id.in_(ids),
             StudentCarryForward.status.in_(("BUNDLED", "SETTLED")),
         )
-    ).scalars().all()
+    ).scalars():
+        bundled_by_invoice[cf.invoice_id].append(cf)
+
+    for invoice_id, invoice in live.items():
+        total = totals.get(invoice_id, Decimal("0"))
+        paid = paid_totals.get(invoice_id, Decimal("0"))
+        invoice.total_amount = total
+        invoice.paid_amount = paid
+        invoice.balance_amount = (Decimal(total) - Decimal(paid))
+
+        # Status lifecycle for non-DRAFT, non-CANCELLED invoices. DRAFT is held
+        # until publish_invoice is called explicitly — recalc must never
+        # auto-promote a DRAFT to ISSUED, or the secretary's preview-then-publish
+        # step gets bypassed every time totals are recomputed (e.g. on
+        # regeneration or a downstream CF settle).
+        if invoice.status != "DRAFT":
+            if invoice.total_amount == 0:
+                # Emptying out an existing live invoice (rare) sends it back to
+                # DRAFT for the secretary to publish or delete deliberately.
+                invoice.status = "DRAFT"
+            elif invoice.balance_amount <= 0:
+                invoice.status = "PAID"
+            elif invoice.paid_amount > 0:
+                invoice.status = "PARTIAL"
+            else:
+                invoice.status = "ISSUED"
 
-    if bundled:
-        # Effective outstanding, not raw amount — a CF row partially paid
-        # down in cash BEFORE being bundled only contributed its remainder
-        # to the invoice's arrears line.
-        arrears_total = sum(
-            (_cf_effective_amount(cf) for cf in bundled), Decimal("0")
-        )
-        paid_d = Decimal(paid or 0)
-        if arrears_total > 0:
-            arrears_paid = min(paid_d, arrears_total)
-            arrears_balance = arrears_total - arrears_paid
-        else:
-            # Net credit (or zero): the arrears line already reduces the
-            # invoice total, so there is nothing left to "pay down" on it.
-            arrears_paid = arrears_total
-            arrears_balance = Decimal("0")
-        current_term_total = Decimal(total or 0) - arrears_total
-        current_term_paid = paid_d - arrears_paid
-        current_term_balance = current_term_total - current_term_paid
-
-        # Settle bundled CF rows once the arrears portion is fully covered.
-        # For a net-credit arrears (negative total), the credit has already been
-        # absorbed by the invoice's reduced total at generation time → settle
-        # immediately so the credit is not re-used on the next invoice.
-        if arrears_total <= 0 or paid_d >= arrears_total:
-            for cf in bundled:
-                if cf.status != "SETTLED":
-                    cf.status = "SETTLED"
+        bundled = bundled_by_invoice.get(invoice_id)
+        if bundled:
+            breakdown, settle = _arrears_breakdown(bundled, total=total, paid=paid)
+            if settle:
+                for cf in bundled:
+                    if cf.status != "SETTLED":
+                        cf.status = "SETTLED"
 
-        invoice.meta = {
-            **(invoice.meta or {}),
-            "arrears_total": str(arrears_total),
-            "arrears_paid": str(arrears_paid),
-            "arrears_balance": str(arrears_balance),
-            "current_term_total": str(current_term_total),
-            "current_term_paid": str(current_term_paid),
-            "current_term_balance": str(current_term_balance),
-        }
-    elif invoice.meta and "arrears_total" in (invoice.meta or {}):
-        # Arrears were detached (e.g. invoice regenerated without CF). Clear
-        # the stale breakdown so the UI doesn't display ghost numbers.
-        cleaned = {k: v for k, v in (invoice.meta or {}).items() if not k.startswith(("arrears_", "current_term_"))}
-        invoice.meta = cleaned or None
+            invoice.meta = {**(invoice.meta or {}), **breakdown}
+        elif invoice.meta and "arrears_total" in (invoice.meta or {}):
+            # Arrears were detached (e.g. invoice regenerated without CF). Clear
+            # the stale breakdown so the UI doesn't display ghost numbers.
+            cleaned = {k: v for k, v in (invoice.meta or {}).items() if not k.startswith(("arrears_", "current_term_"))}
+            invoice.meta = cleaned or None
 
 
 def create_invoice(
@@ -2929,6 +3010,52 @@ def create_invoice(
     return inv
 
 
+def _listing_page(
+    db: Session,
+    stmt,
+    *,
+    order_cols: tuple[Any, Any],
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    keyset: bool,
+    with_total: bool,
+    estimate_total: bool,
+) -> tuple[list[Any], dict]:
+    """Rows and meta of one listing page, newest first.
+
+    Offset mode (default): `page` of `page_size`, with total/pages. Keyset
+    mode (`keyset`, or any `cursor`): the page after `cursor` with
+    next_cursor/prev_cursor; the total is only counted on the first page or
+    with `with_total`. Raises ValueError on an invalid cursor.
+    """
+    ts_col, id_col = order_cols
+    if keyset or cursor:
+        total, total_estimated = (None, False)
+        if not cursor or with_total:
+            total, total_estimated = count_rows(db, stmt, estimated=estimate_total)
+        rows, next_cursor, prev_cursor = keyset_page(
+            db, stmt, order_cols=order_cols, cursor=cursor, limit=page_size,
+        )
+        return rows, {
+            "total": total, "page_size": page_size, "total_estimated": total_estimated,
+            "next_cursor": next_cursor, "prev_cursor": prev_cursor,
+        }
+
+    total, total_estimated = count_rows(db, stmt, estimated=estimate_total)
+    pages = max(1, (total + page_size - 1) // page_size)
+    page = max(1, min(page, pages))
+    rows = db.execute(
+        stmt.order_by(ts_col.desc(), id_col.desc())
+            .limit(page_size)
+            .offset((page - 1) * page_size)
+    ).scalars().all()
+    return rows, {
+        "total": total, "page": page, "page_size": page_size, "pages": pages,
+        "total_estimated": total_estimated,
+    }
+
+
 def list_invoices(
     db: Session,
     *,
@@ -2942,6 +3069,10 @@ def list_invoices(
     date_to: Optional[str] = None,
     page: int = 1,
     page_size: int = 20,
+    estimate_total: bool = False,
+    cursor: Optional[str] = None,
+    keyset: bool = False,
+    with_total: bool = False,
 ) -> dict:
     """Paginated invoice listing. All filters are server-side so the director
     table can show "Showing X-Y of Z" honestly.
@@ -2949,13 +3080,13 @@ def list_invoices(
     `q` matches against invoice_no OR the enrolled student's name / admission
     number. Student side sourced from the linked core.students row when
     present, falling back to the enrollment payload (jsonb) for legacy rows
-    where the SIS link was never populated. Case-insensitive.
+    where the SIS link was never populated. Case-insensitive; served by the
+    invoice's search document (app.core.search).
 
-    Date filters apply to created_at (inclusive).
+    Date filters apply to created_at (inclusive). `estimate_total` reports
+    the planner's estimate for large results (meta.total_estimated).
+    `keyset`/`cursor` switch to cursor pages (see _listing_page).
     """
-    from app.models.enrollment import Enrollment
-    from app.models.student import Student
-
     stmt = select(Invoice).where(Invoice.tenant_id == tenant_id)
     if enrollment_id:
         stmt = stmt.where(Invoice.enrollment_id == enrollment_id)
@@ -2965,32 +3096,8 @@ def list_invoices(
         stmt = stmt.where(Invoice.status == status.upper())
     if outstanding_only:
         stmt = stmt.where(Invoice.balance_amount > 0)
-    if q:
-        like = f"%{q.strip()}%"
-        # Left-join enrollment + student so the OR can reach into either
-        # source without dropping invoices whose enrollment/student rows
-        # are missing. Each invoice has at most one enrollment (1:1) so
-        # no de-dup needed after the joins.
-        stmt = (
-            stmt
-            .outerjoin(Enrollment, Enrollment.id == Invoice.enrollment_id)
-            .outerjoin(Student, Student.id == Enrollment.student_id)
-            .where(
-                sa_or(
-                    Invoice.invoice_no.ilike(like),
-                    # Structured student name (first + last from SIS).
-                    sa_func.concat(
-                        Student.first_name, " ", sa_func.coalesce(Student.last_name, "")
-                    ).ilike(like),
-                    # Admission number from the SIS row.
-                    Student.admission_no.ilike(like),
-                    # Enrollment-side fallbacks for legacy rows.
-                    Enrollment.admission_number.ilike(like),
-                    Enrollment.payload["student_name"].astext.ilike(like),
-                    Enrollment.payload["full_name"].astext.ilike(like),
-                )
-            )
-        )
+    if q and q.strip():
+        stmt = stmt.where(Invoice.id.in_(search_document_ids(tenant_id, ENTITY_INVOICE, q)))
     if date_from:
         # Compare on the date portion of created_at so a "from = today" filter
         # captures invoices created later today. Explicit ::date cast on the
@@ -3004,15 +3111,12 @@ def list_invoices(
             sa_func.date(Invoice.created_at) <= sa_cast(date_to, SA_Date)
         )
 
-    total: int = db.execute(select(sa_func.count()).select_from(stmt.subquery())).scalar() or 0
-    pages = max(1, (total + page_size - 1) // page_size)
-    page = max(1, min(page, pages))
-    items = db.execute(
-        stmt.order_by(Invoice.created_at.desc())
-         .limit(page_size)
-         .offset((page - 1) * page_size)
-    ).scalars().all()
-    return {"items": items, "meta": {"total": total, "page": page, "page_size": page_size, "pages": pages}}
+    items, meta = _listing_page(
+        db, stmt, order_cols=(Invoice.created_at, Invoice.id),
+        page=page, page_size=page_size, cursor=cursor, keyset=keyset,
+        with_total=with_total, estimate_total=estimate_total,
+    )
+    return {"items": items, "meta": meta}
 
 
 def get_invoice(db: Session, *, tenant_id: UUID, invoice_id: UUID) -> Invoice | None:
@@ -3391,8 +3495,7 @@ def create_payment(
     db.flush()
 
     # recalc invoices
-    for inv in invoices:
-        _recalc_invoice_amounts(db, inv)
+    _recalc_invoices_amounts(db, invoices)
     db.flush()
 
     # Surplus → auto-credit. credit_to_student_id wins; otherwise (single-student
@@ -4213,8 +4316,7 @@ def record_student_payment(
                 amount=a["amount"],
             ))
         db.flush()
-        for inv in inv_meta.values():
-            _recalc_invoice_amounts(db, inv)
+        _recalc_invoices_amounts(db, inv_meta.values())
         db.flush()
 
     # ── Book the surplus as OVERPAYMENT_CREDIT ────────────────────────────
@@ -4576,8 +4678,7 @@ def record_enrollment_payment(
             amount=alloc_amount,
         ))
     db.flush()
-    for inv, _ in invoice_allocations:
-        _recalc_invoice_amounts(db, inv)
+    _recalc_invoices_amounts(db, [inv for inv, _ in invoice_allocations])
     db.flush()
 
     # ── Audit ─────────────────────────────────────────────────────────────
@@ -5025,21 +5126,25 @@ def list_payments(
     settled_only: bool = False,
     page: int = 1,
     page_size: int = 20,
+    estimate_total: bool = False,
+    cursor: Optional[str] = None,
+    keyset: bool = False,
+    with_total: bool = False,
 ) -> dict:
     """Paginated payment listing with server-side filters.
 
     `q` matches receipt_no, reference, or the payer student's name /
-    admission — via the payment's allocation → invoice → enrollment chain.
-    All filters push to the database so the "Showing X-Y of Z" count is
-    honest at any tenant scale.
+    admission — via the payment's allocation → invoice → enrollment chain,
+    precomputed in the payment's search document (app.core.search). All
+    filters push to the database so the "Showing X-Y of Z" count is
+    honest at any tenant scale; `estimate_total` trades it for the
+    planner's estimate on large results (meta.total_estimated);
+    `keyset`/`cursor` switch to cursor pages (see _listing_page).
 
     Note: a payment may cover multiple students (family payments). Search
     matching against ANY of the allocated invoices' students is enough
     to surface the payment.
     """
-    from app.models.enrollment import Enrollment
-    from app.models.student import Student
-
     base_q = select(Payment).where(Payment.tenant_id == tenant_id)
 
     if enrollment_id:
@@ -5081,54 +5186,14 @@ def list_payments(
             sa_func.date(Payment.received_at) <= sa_cast(date_to, SA_Date)
         )
 
-    if q:
-        like = f"%{q.strip()}%"
-        # Left-join the payment's allocations → invoice → enrollment → student
-        # so q can match any student on any allocation. Left joins keep
-        # unallocated payments visible when q hits receipt_no or reference.
-        # Phase R — a second Student alias joined on Payment.student_id lets
-        # q also match zero-allocation payments (CF-only settlements) by
-        # the payer student's name / admission number.
-        from sqlalchemy.orm import aliased
-        DirectStudent = aliased(Student)
-        base_q = (
-            base_q
-            .outerjoin(PaymentAllocation, PaymentAllocation.payment_id == Payment.id)
-            .outerjoin(Invoice, Invoice.id == PaymentAllocation.invoice_id)
-            .outerjoin(Enrollment, Enrollment.id == Invoice.enrollment_id)
-            .outerjoin(Student, Student.id == Enrollment.student_id)
-            .outerjoin(DirectStudent, DirectStudent.id == Payment.student_id)
-            .where(
-                sa_or(
-                    Payment.receipt_no.ilike(like),
-                    Payment.reference.ilike(like),
-                    sa_func.concat(
-                        Student.first_name, " ", sa_func.coalesce(Student.last_name, "")
-                    ).ilike(like),
-                    Student.admission_no.ilike(like),
-                    Enrollment.admission_number.ilike(like),
-                    Enrollment.payload["student_name"].astext.ilike(like),
-                    sa_func.concat(
-                        DirectStudent.first_name, " ",
-                        sa_func.coalesce(DirectStudent.last_name, ""),
-                    ).ilike(like),
-                    DirectStudent.admission_no.ilike(like),
-                )
-            )
-            # Dedup: a payment split across N invoices would appear N times
-            # after the joins without this.
-            .distinct()
-        )
-
-    total: int = db.execute(select(sa_func.count()).select_from(base_q.subquery())).scalar() or 0
-    pages = max(1, (total + page_size - 1) // page_size)
-    page = max(1, min(page, pages))
+    if q and q.strip():
+        base_q = base_q.where(Payment.id.in_(search_document_ids(tenant_id, ENTITY_PAYMENT, q)))
 
-    payment_rows = db.execute(
-        base_q.order_by(Payment.received_at.desc())
-              .limit(page_size)
-              .offset((page - 1) * page_size)
-    ).scalars().all()
+    payment_rows, meta = _listing_page(
+        db, base_q, order_cols=(Payment.received_at, Payment.id),
+        page=page, page_size=page_size, cursor=cursor, keyset=keyset,
+        with_total=with_total, estimate_total=estimate_total,
+    )
 
     # Batch-resolve student labels for every payer across the page so the
     # frontend renders names without a client-side enrollment map.
@@ -5248,7 +5313,7 @@ def list_payments(
             "cf_allocations": cf_allocs_by_payment.get(str(payment.id), []),
         })
 
-    return {"items": items, "meta": {"total": total, "page": page, "page_size": page_size, "pages": pages}}
+    return {"items": items, "meta": meta}
 
 
 # -------------------------
@@ -7100,6 +7165,122 @@ def _once_ever_already_invoiced(
     return (result or 0) > 0
 
 
+def _payload_class_code(payload: dict[str, Any] | None) -> str | None:
+    """Class code from the intake / application form keys, as typed (the v2
+    generator normalises it later)."""
+    payload = payload or {}
+    return str(
+        payload.get("class_code")
+        or payload.get("classCode")
+        or payload.get("class")
+        or payload.get("admission_class")
+        or payload.get("grade")
+        or ""
+    ).strip() or None
+
+
+def _structure_item_lines(
+    items: list[Any],
+    *,
+    term_number: int,
+    norm_class: str,
+    already_invoiced,
+) -> list[dict]:
+    """Invoice lines for one term from a fee structure's items.
+
+    `already_invoiced(charge_frequency, fee_item_id)` answers the
+    ONCE_PER_YEAR / ONCE_EVER guards — a per-item query in the single-invoice
+    generator, a preloaded set lookup in the bulk engine.
+    """
+    lines: list[dict] = []
+    for it in items:
+        freq = it.charge_frequency or "PER_TERM"
+
+        if freq == "PER_TERM":
+            amount = _get_term_amount(it, term_number)
+        elif freq == "ONCE_PER_YEAR":
+            if term_number != 1:
+                # ONCE_PER_YEAR is only charged in Term 1
+                continue
+            if already_invoiced(freq, it.fee_item_id):
+                continue
+            amount = it.term_1_amount  # canonical value for once-per-year items
+        elif freq == "ONCE_EVER":
+            if already_invoiced(freq, it.fee_item_id):
+                continue
+            amount = it.term_1_amount  # canonical value
+        else:
+            amount = _get_term_amount(it, term_number)
+
+        if Decimal(amount or 0) == 0:
+            continue
+
+        lines.append({
+            "description": f"{it.fee_item_name} ({norm_class})",
+            "amount": Decimal(amount),
+            "meta": {
+                "fee_item_id": str(it.fee_item_id),
+                "fee_item_code": it.fee_item_code,
+                "charge_frequency": freq,
+            },
+        })
+
+    if not lines:
+        raise ValueError("No chargeable fee items for this term (all items already invoiced or zero-amount)")
+    return lines
+
+
+def _carry_forward_rollup(cf_rows: list[Any]) -> tuple[list[Any], Optional[dict]]:
+    """Split a student's OPEN carry-forward rows for a new invoice.
+
+    DOUBLE-BILLING GUARD: bundle only the EFFECTIVE outstanding of each row
+    (amount − settled_amount for debits). A parent who paid part of their
+    arrears in cash (Phase N waterfall) must not be billed the already-paid
+    portion again on the next invoice. Rows fully covered by direct payment
+    are marked SETTLED here rather than bundled (defensive — the waterfall
+    already flips them, but a raced row must never re-bill at zero).
+
+    Returns the rows to bundle and the "Brought Forward" line (description /
+    amount / meta), or None when the bundled rows net to zero.
+    """
+    bundlable: list = []
+    for cf in cf_rows:
+        if _cf_effective_amount(cf) == 0:
+            cf.status = "SETTLED"
+        else:
+            bundlable.append(cf)
+    arrears_total = sum(
+        (_cf_effective_amount(cf) for cf in bundlable), Decimal("0")
+    )
+    if arrears_total == 0:
+        return bundlable, None
+    description = (
+        "Arrears (Brought Forward)"
+        if arrears_total > 0
+        else "Credit Balance (Brought Forward)"
+    )
+    breakdown = [
+        {
+            "id": str(cf.id),
+            "term_label": cf.term_label,
+            "original_amount": str(cf.amount),
+            "already_settled": str(getattr(cf, "settled_amount", 0) or 0),
+            "amount": str(_cf_effective_amount(cf)),
+            "category": cf.category,
+        }
+        for cf in bundlable
+    ]
+    return bundlable, {
+        "description": description,
+        "amount": arrears_total,
+        "meta": {
+            "line_type": "CARRY_FORWARD_ROLLUP",
+            "carry_forward_ids": [str(cf.id) for cf in bundlable],
+            "breakdown": breakdown,
+        },
+    }
+
+
 def generate_school_fees_invoice_v2(
     db: Session,
     *,
@@ -7146,14 +7327,7 @@ def generate_school_fees_invoice_v2(
 
     # ── class_code resolution (multi-level fallback) ──────────────────────────
     # 1) Check common payload keys from the intake / application form
-    class_code = str(
-        enrollment_payload.get("class_code")
-        or enrollment_payload.get("classCode")
-        or enrollment_payload.get("class")
-        or enrollment_payload.get("admission_class")
-        or enrollment_payload.get("grade")
-        or ""
-    ).strip() or None
+    class_code = _payload_class_code(enrollment_payload)
 
     # 2) Check the student's current class via student_class_enrollments
     if not class_code and student_id:
@@ -7280,46 +7454,19 @@ def generate_school_fees_invoice_v2(
     if not items:
         raise ValueError("Fee structure has no items")
 
-    lines: list[dict] = []
-    for it in items:
-        freq = it.charge_frequency or "PER_TERM"
-
-        if freq == "PER_TERM":
-            amount = _get_term_amount(it, term_number)
-        elif freq == "ONCE_PER_YEAR":
-            if term_number != 1:
-                # ONCE_PER_YEAR is only charged in Term 1
-                continue
-            if _once_per_year_already_invoiced(
+    def _already_invoiced(freq: str, fee_item_id: UUID) -> bool:
+        if freq == "ONCE_PER_YEAR":
+            return _once_per_year_already_invoiced(
                 db, tenant_id=tenant_id, enrollment_id=enrollment_id,
-                academic_year=academic_year, fee_item_id=it.fee_item_id
-            ):
-                continue
-            amount = it.term_1_amount  # canonical value for once-per-year items
-        elif freq == "ONCE_EVER":
-            if _once_ever_already_invoiced(
-                db, tenant_id=tenant_id, enrollment_id=enrollment_id, fee_item_id=it.fee_item_id
-            ):
-                continue
-            amount = it.term_1_amount  # canonical value
-        else:
-            amount = _get_term_amount(it, term_number)
-
-        if Decimal(amount or 0) == 0:
-            continue
-
-        lines.append({
-            "description": f"{it.fee_item_name} ({norm_class})",
-            "amount": Decimal(amount),
-            "meta": {
-                "fee_item_id": str(it.fee_item_id),
-                "fee_item_code": it.fee_item_code,
-                "charge_frequency": freq,
-            },
-        })
+                academic_year=academic_year, fee_item_id=fee_item_id
+            )
+        return _once_ever_already_invoiced(
+            db, tenant_id=tenant_id, enrollment_id=enrollment_id, fee_item_id=fee_item_id
+        )
 
-    if not lines:
-        raise ValueError("No chargeable fee items for this term (all items already invoiced or zero-amount)")
+    lines = _structure_item_lines(
+        items, term_number=term_number, norm_class=norm_class, already_invoiced=_already_invoiced,
+    )
 
     # ── Interview fee credit for NEW students (Term 1 only) ───────────────────
     # If this student already paid an interview fee, carry it forward as a
@@ -7405,49 +7552,9 @@ def generate_school_fees_invoice_v2(
             )
         ).scalars().all()
         if cf_rows:
-            # DOUBLE-BILLING GUARD: bundle only the EFFECTIVE outstanding of
-            # each row (amount − settled_amount for debits). A parent who
-            # paid part of their arrears in cash (Phase N waterfall) must
-            # not be billed the already-paid portion again on the next
-            # invoice. Rows fully covered by direct payment are settled
-            # here rather than bundled (defensive — the waterfall already
-            # flips them, but a raced row must never re-bill at zero).
-            bundlable: list = []
-            for cf in cf_rows:
-                if _cf_effective_amount(cf) == 0:
-                    cf.status = "SETTLED"
-                else:
-                    bundlable.append(cf)
-            arrears_total = sum(
-                (_cf_effective_amount(cf) for cf in bundlable), Decimal("0")
-            )
-            if arrears_total != 0:
-                description = (
-                    "Arrears (Brought Forward)"
-                    if arrears_total > 0
-                    else "Credit Balance (Brought Forward)"
-                )
-                breakdown = [
-                    {
-                        "id": str(cf.id),
-                        "term_label": cf.term_label,
-                        "original_amount": str(cf.amount),
-                        "already_settled": str(getattr(cf, "settled_amount", 0) or 0),
-                        "amount": str(_cf_effective_amount(cf)),
-                        "category": cf.category,
-                    }
-                    for cf in bundlable
-                ]
-                db.add(InvoiceLine(
-                    invoice_id=inv.id,
-                    description=description,
-                    amount=arrears_total,
-                    meta={
-                        "line_type": "CARRY_FORWARD_ROLLUP",
-                        "carry_forward_ids": [str(cf.id) for cf in bundlable],
-                        "breakdown": breakdown,
-                    },
-                ))
+            bundlable, rollup = _carry_forward_rollup(cf_rows)
+            if rollup is not None:
+                db.add(InvoiceLine(invoice_id=inv.id, **rollup))
             for cf in bundlable:
                 cf.status = "BUNDLED"
                 cf.invoice_id = inv.id
@@ -7611,29 +7718,29 @@ def generate_school_fees_invoice_v2(
 # ═════════════════════════════════════════════════════════════════════════════
 
 
-def _structure_expected_lines(
+def _load_structure_items(
     db: Session,
     *,
     tenant_id: UUID,
-    structure_id: UUID,
-    term_number: int,
-) -> dict[str, dict] | None:
-    """Expected per-fee-item billing for (structure, term).
-
-    Returns {fee_item_id_str: {name, code, freq, amount}} or None when the
-    structure no longer exists (deleted structures freeze their invoices —
-    we have no source of truth to reconcile against).
-    """
-    structure = db.execute(
-        select(FeeStructure).where(
-            FeeStructure.id == structure_id,
-            FeeStructure.tenant_id == tenant_id,
-        )
-    ).scalar_one_or_none()
-    if structure is None:
-        return None
-    items = db.execute(
+    structure_ids: list[UUID],
+) -> dict[UUID, tuple[str, list[Any]]]:
+    """(class_code, fee items with amounts + charge frequency) for each of
+    `structure_ids` that still exists, in two queries however many
+    structures are asked for."""
+    out: dict[UUID, tuple[str, list[Any]]] = {
+        sid: (class_code, [])
+        for sid, class_code in db.execute(
+            select(FeeStructure.id, FeeStructure.class_code).where(
+                FeeStructure.tenant_id == tenant_id,
+                FeeStructure.id.in_(structure_ids),
+            )
+        ).all()
+    }
+    if not out:
+        return out
+    for it in db.execute(
         select(
+            FeeStructureItem.structure_id,
             FeeStructureItem.fee_item_id,
             FeeStructureItem.term_1_amount,
             FeeStructureItem.term_2_amount,
@@ -7645,10 +7752,19 @@ def _structure_expected_lines(
         .select_from(FeeStructureItem)
         .join(FeeItem, FeeItem.id == FeeStructureItem.fee_item_id)
         .where(
-            FeeStructureItem.structure_id == structure.id,
+            FeeStructureItem.structure_id.in_(list(out)),
             FeeItem.tenant_id == tenant_id,
         )
-    ).all()
+    ).all():
+        out[it.structure_id][1].append(it)
+    return out
+
+
+def _expected_lines_for_term(class_code: str, items: list[Any], term_number: int) -> dict[str, dict]:
+    """Expected per-fee-item billing for one term of a structure.
+
+    Returns {fee_item_id_str: {name, code, freq, amount, class_code}}.
+    """
     expected: dict[str, dict] = {}
     for it in items:
         freq = it.charge_frequency or "PER_TERM"
@@ -7661,72 +7777,56 @@ def _structure_expected_lines(
             "code": it.fee_item_code,
             "freq": freq,
             "amount": amount.quantize(Decimal("0.01")),
-            "class_code": structure.class_code,
+            "class_code": class_code,
         }
     return expected
 
 
-def reconcile_invoice_against_structure(
+def _structure_expected_lines(
     db: Session,
     *,
     tenant_id: UUID,
-    actor_user_id: Optional[UUID],
-    invoice: Invoice,
-    dry_run: bool = False,
-) -> Optional[dict]:
-    """Detect + fix drift between one invoice and its source fee structure.
+    structure_id: UUID,
+    term_number: int,
+) -> dict[str, dict] | None:
+    """Expected per-fee-item billing for (structure, term).
 
-    Returns None when the invoice is aligned (or out of scope); otherwise a
-    summary dict {invoice_id, invoice_no, changes[], old_total, new_total,
-    overpayment_credited, applied} describing what changed (or would change,
-    when dry_run=True).
+    Returns {fee_item_id_str: {name, code, freq, amount}} or None when the
+    structure no longer exists (deleted structures freeze their invoices —
+    we have no source of truth to reconcile against).
     """
-    if invoice.invoice_type != "SCHOOL_FEES":
-        return None
-    if invoice.status == "CANCELLED":
-        return None
-    meta = invoice.meta or {}
-    structure_id = _uuid_from_any(meta.get("fee_structure_id"))
-    if structure_id is None or invoice.term_number is None:
+    loaded = _load_structure_items(db, tenant_id=tenant_id, structure_ids=[structure_id]).get(structure_id)
+    if loaded is None:
         return None
+    class_code, items = loaded
+    return _expected_lines_for_term(class_code, items, term_number)
 
-    expected = _structure_expected_lines(
-        db,
-        tenant_id=tenant_id,
-        structure_id=structure_id,
-        term_number=int(invoice.term_number),
-    )
-    if expected is None:
-        return None  # structure deleted — invoice frozen
-
-    lines = db.execute(
-        select(InvoiceLine)
-        .where(InvoiceLine.invoice_id == invoice.id)
-        .order_by(InvoiceLine.id.asc())
-    ).scalars().all()
 
-    # Structure-sourced lines on the invoice, keyed by fee_item_id.
-    structure_lines: dict[str, InvoiceLine] = {}
-    for ln in lines:
-        ln_meta = ln.meta or {}
-        fid = ln_meta.get("fee_item_id")
-        if fid:
-            structure_lines[str(fid)] = ln
-
-    enrollment_id = invoice.enrollment_id
-    academic_year = invoice.academic_year
+def _reconcile_changes(
+    *,
+    expected: dict[str, dict],
+    current: dict[str, tuple[Decimal, str]],
+    term_number: int,
+    already_invoiced: Callable[[str, str], bool],
+) -> list[dict]:
+    """The drift between an invoice's structure-sourced lines (`current`:
+    fee_item_id → (amount, description)) and the structure's `expected`
+    lines; empty when the invoice is aligned.
 
+    `already_invoiced(charge_frequency, fee_item_id)` answers the ONCE_*
+    guards for items missing from the invoice — a per-item query for one
+    invoice, a preloaded set lookup in the sweep.
+    """
     changes: list[dict] = []
 
     # 1. Amount drift + removed items.
-    for fid, ln in structure_lines.items():
-        current_amount = Decimal(str(ln.amount or 0)).quantize(Decimal("0.01"))
+    for fid, (current_amount, description) in current.items():
         exp = expected.get(fid)
         if exp is None:
             changes.append({
                 "kind": "remove_line",
                 "fee_item_id": fid,
-                "description": ln.description,
+                "description": description,
                 "old_amount": str(current_amount),
                 "new_amount": "0",
             })
@@ -7734,7 +7834,7 @@ def reconcile_invoice_against_structure(
             changes.append({
                 "kind": "update_amount",
                 "fee_item_id": fid,
-                "description": ln.description,
+                "description": description,
                 "old_amount": str(current_amount),
                 "new_amount": str(exp["amount"]),
             })
@@ -7743,24 +7843,18 @@ def reconcile_invoice_against_structure(
     #    ONCE_PER_YEAR item added mid-year doesn't double-bill a student who
     #    already paid it on another invoice.
     for fid, exp in expected.items():
-        if fid in structure_lines:
+        if fid in current:
             continue
         if exp["amount"] <= 0:
             continue
         freq = exp["freq"]
         if freq == "ONCE_PER_YEAR":
-            if int(invoice.term_number) != 1:
+            if term_number != 1:
                 continue
-            if enrollment_id is not None and academic_year is not None and _once_per_year_already_invoiced(
-                db, tenant_id=tenant_id, enrollment_id=enrollment_id,
-                academic_year=int(academic_year), fee_item_id=UUID(fid),
-            ):
+            if already_invoiced(freq, fid):
                 continue
         elif freq == "ONCE_EVER":
-            if enrollment_id is not None and _once_ever_already_invoiced(
-                db, tenant_id=tenant_id, enrollment_id=enrollment_id,
-                fee_item_id=UUID(fid),
-            ):
+            if already_invoiced(freq, fid):
                 continue
         changes.append({
             "kind": "add_line",
@@ -7771,10 +7865,118 @@ def reconcile_invoice_against_structure(
             "fee_item_code": exp["code"],
             "charge_frequency": freq,
         })
+    return changes
+
+
+def _structure_line_map(lines: list[InvoiceLine]) -> dict[str, InvoiceLine]:
+    """Structure-sourced lines of one invoice keyed by fee_item_id (lines
+    in id order; a duplicate fee item keeps the last)."""
+    structure_lines: dict[str, InvoiceLine] = {}
+    for ln in lines:
+        fid = (ln.meta or {}).get("fee_item_id")
+        if fid:
+            structure_lines[str(fid)] = ln
+    return structure_lines
+
+
+def reconcile_invoice_against_structure(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    invoice: Invoice,
+    dry_run: bool = False,
+) -> Optional[dict]:
+    """Detect + fix drift between one invoice and its source fee structure.
+
+    Returns None when the invoice is aligned (or out of scope); otherwise a
+    summary dict {invoice_id, invoice_no, changes[], old_total, new_total,
+    overpayment_credited, applied} describing what changed (or would change,
+    when dry_run=True).
+    """
+    if invoice.invoice_type != "SCHOOL_FEES":
+        return None
+    if invoice.status == "CANCELLED":
+        return None
+    meta = invoice.meta or {}
+    structure_id = _uuid_from_any(meta.get("fee_structure_id"))
+    if structure_id is None or invoice.term_number is None:
+        return None
+
+    expected = _structure_expected_lines(
+        db,
+        tenant_id=tenant_id,
+        structure_id=structure_id,
+        term_number=int(invoice.term_number),
+    )
+    if expected is None:
+        return None  # structure deleted — invoice frozen
+
+    structure_lines = _structure_line_map(
+        db.execute(
+            select(InvoiceLine)
+            .where(InvoiceLine.invoice_id == invoice.id)
+            .order_by(InvoiceLine.id.asc())
+        ).scalars().all()
+    )
+
+    enrollment_id = invoice.enrollment_id
+    academic_year = invoice.academic_year
+
+    def already_invoiced(freq: str, fid: str) -> bool:
+        if enrollment_id is None:
+            return False
+        if freq == "ONCE_PER_YEAR":
+            return academic_year is not None and _once_per_year_already_invoiced(
+                db, tenant_id=tenant_id, enrollment_id=enrollment_id,
+                academic_year=int(academic_year), fee_item_id=UUID(fid),
+            )
+        return _once_ever_already_invoiced(
+            db, tenant_id=tenant_id, enrollment_id=enrollment_id, fee_item_id=UUID(fid),
+        )
 
+    changes = _reconcile_changes(
+        expected=expected,
+        current={
+            fid: (Decimal(str(ln.amount or 0)).quantize(Decimal("0.01")), ln.description)
+            for fid, ln in structure_lines.items()
+        },
+        term_number=int(invoice.term_number),
+        already_invoiced=already_invoiced,
+    )
     if not changes:
         return None  # aligned — idempotent no-op
 
+    return _apply_reconcile_changes(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        invoice=invoice,
+        structure_id=structure_id,
+        structure_lines=structure_lines,
+        changes=changes,
+        dry_run=dry_run,
+    )
+
+
+def _apply_reconcile_changes(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    invoice: Invoice,
+    structure_id: UUID,
+    structure_lines: dict[str, InvoiceLine],
+    changes: list[dict],
+    dry_run: bool,
+) -> dict:
+    """Apply a non-empty diff from _reconcile_changes to `invoice` (or just
+    describe it when dry_run) — line edits, scholarship recompute, totals,
+    overpayment credit, revision stamp and the invoice.reconciled audit
+    event. Returns the invoice's reconcile summary."""
+    enrollment_id = invoice.enrollment_id
+    academic_year = invoice.academic_year
+
     old_total = Decimal(str(invoice.total_amount or 0))
 
     summary: dict = {
@@ -7990,6 +8192,172 @@ def reconcile_invoice_against_structure(
     return summary
 
 
+def _reconcile_invoice_set(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    scope: list[Any],
+    dry_run: bool,
+    progress: Optional[Callable[..., None]] = None,
+) -> dict:
+    """Set-based reconcile of every non-CANCELLED SCHOOL_FEES invoice
+    matching the `scope` filters.
+
+    Invoices are grouped by (fee_structure_id, student_type, term_number):
+    expected lines are computed once per group from one load of all the
+    structures involved, the structure-sourced lines of every invoice come
+    from one query, and the ONCE_* guards are answered from one preloaded
+    history query. Only invoices that actually drifted are loaded as ORM
+    rows and go through _apply_reconcile_changes — an aligned ledger costs
+    four queries however many invoices it holds.
+    """
+    started = time.perf_counter()
+    base = [
+        Invoice.tenant_id == tenant_id,
+        Invoice.invoice_type == "SCHOOL_FEES",
+        Invoice.status != "CANCELLED",
+        *scope,
+    ]
+    rows = db.execute(
+        select(
+            Invoice.id,
+            Invoice.enrollment_id,
+            Invoice.academic_year,
+            Invoice.term_number,
+            Invoice.student_type_snapshot,
+            Invoice.meta["fee_structure_id"].astext.label("fee_structure_id"),
+        )
+        .where(*base)
+        .order_by(Invoice.academic_year, Invoice.term_number, Invoice.created_at, Invoice.id)
+    ).all()
+
+    groups: dict[tuple[UUID, Optional[str], int], list[Any]] = {}
+    for r in rows:
+        structure_id = _uuid_from_any(r.fee_structure_id)
+        if structure_id is None or r.term_number is None:
+            continue
+        groups.setdefault((structure_id, r.student_type_snapshot, int(r.term_number)), []).append(r)
+
+    structures = _load_structure_items(
+        db, tenant_id=tenant_id, structure_ids=list({key[0] for key in groups}),
+    ) if groups else {}
+
+    # Structure-sourced lines of every invoice in scope, in one pass.
+    current: dict[UUID, dict[str, tuple[Decimal, str]]] = {}
+    line_fid = InvoiceLine.meta["fee_item_id"].astext
+    if structures:
+        for invoice_id, fid, amount, description in db.execute(
+            select(InvoiceLine.invoice_id, line_fid, InvoiceLine.amount, InvoiceLine.description)
+            .join(Invoice, Invoice.id == InvoiceLine.invoice_id)
+            .where(*base, line_fid.isnot(None), line_fid != "")
+            .order_by(InvoiceLine.id.asc())
+        ).all():
+            current.setdefault(invoice_id, {})[fid] = (
+                Decimal(str(amount or 0)).quantize(Decimal("0.01")),
+                description,
+            )
+
+    # ONCE_* history for the enrollments in scope — the same questions
+    # _once_per_year_already_invoiced / _once_ever_already_invoiced ask per
+    # item, answered for the whole sweep.
+    once_fids = {
+        str(it.fee_item_id)
+        for _, items in structures.values()
+        for it in items
+        if (it.charge_frequency or "PER_TERM") in ("ONCE_PER_YEAR", "ONCE_EVER")
+    }
+    once_year: set[tuple[UUID, Optional[int], str]] = set()
+    once_ever: set[tuple[UUID, str]] = set()
+    if once_fids:
+        scoped_enrollments = select(Invoice.enrollment_id).where(*base, Invoice.enrollment_id.isnot(None))
+        for enr_id, year, fid in db.execute(
+            select(Invoice.enrollment_id, Invoice.academic_year, line_fid)
+            .join(Invoice, Invoice.id == InvoiceLine.invoice_id)
+            .where(
+                Invoice.tenant_id == tenant_id,
+                Invoice.invoice_type == "SCHOOL_FEES",
+                Invoice.enrollment_id.in_(scoped_enrollments),
+                line_fid.in_(once_fids),
+            )
+            .distinct()
+        ).all():
+            once_year.add((enr_id, year, fid))
+            once_ever.add((enr_id, fid))
+
+    drifted: list[tuple[Any, UUID, list[dict]]] = []
+    for (structure_id, _student_type, term_number), members in groups.items():
+        loaded = structures.get(structure_id)
+        if loaded is None:
+            continue  # structure deleted — its invoices are frozen
+        expected = _expected_lines_for_term(loaded[0], loaded[1], term_number)
+        for r in members:
+            def already_invoiced(freq: str, fid: str, r=r) -> bool:
+                if r.enrollment_id is None:
+                    return False
+                if freq == "ONCE_PER_YEAR":
+                    return r.academic_year is not None and (r.enrollment_id, r.academic_year, fid) in once_year
+                return (r.enrollment_id, fid) in once_ever
+
+            changes = _reconcile_changes(
+                expected=expected,
+                current=current.get(r.id, {}),
+                term_number=term_number,
+                already_invoiced=already_invoiced,
+            )
+            if not changes:
+                continue
+            # A ONCE_* line added here counts as invoiced for the rest of the
+            # sweep, exactly as the per-invoice path sees the flushed line.
+            for c in changes:
+                if c["kind"] == "add_line" and r.enrollment_id is not None:
+                    once_year.add((r.enrollment_id, r.academic_year, c["fee_item_id"]))
+                    once_ever.add((r.enrollment_id, c["fee_item_id"]))
+            drifted.append((r, structure_id, changes))
+
+    results: list[dict] = []
+    if drifted:
+        drifted_ids = [r.id for r, _, _ in drifted]
+        invoices = {
+            inv.id: inv
+            for inv in db.execute(select(Invoice).where(Invoice.id.in_(drifted_ids))).scalars().all()
+        }
+        lines_by_invoice: dict[UUID, list[InvoiceLine]] = {}
+        for ln in db.execute(
+            select(InvoiceLine)
+            .where(InvoiceLine.invoice_id.in_(drifted_ids))
+            .order_by(InvoiceLine.id.asc())
+        ).scalars().all():
+            lines_by_invoice.setdefault(ln.invoice_id, []).append(ln)
+
+        for idx, (r, structure_id, changes) in enumerate(drifted):
+            if progress is not None:
+                progress(idx, len(drifted), checked=len(rows), reconciled=len(results))
+            results.append(_apply_reconcile_changes(
+                db,
+                tenant_id=tenant_id,
+                actor_user_id=actor_user_id,
+                invoice=invoices[r.id],
+                structure_id=structure_id,
+                structure_lines=_structure_line_map(lines_by_invoice.get(r.id, [])),
+                changes=changes,
+                dry_run=dry_run,
+            ))
+    if progress is not None:
+        progress(len(drifted), len(drifted), checked=len(rows), reconciled=len(results))
+
+    elapsed = time.perf_counter() - started
+    return {
+        "checked": len(rows),
+        "reconciled": len(results),
+        "dry_run": dry_run,
+        "groups": len(groups),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "invoices_per_sec": round(len(rows) / elapsed, 1) if elapsed > 0 else None,
+        "invoices": results,
+    }
+
+
 def reconcile_structure_invoices(
     db: Session,
     *,
@@ -8003,30 +8371,18 @@ def reconcile_structure_invoices(
     Called by the structure-edit hooks (drift fixed the moment it's born)
     and by the per-structure manual endpoint.
     """
-    invoices = db.execute(
-        select(Invoice).where(
-            Invoice.tenant_id == tenant_id,
-            Invoice.invoice_type == "SCHOOL_FEES",
-            Invoice.status != "CANCELLED",
-            Invoice.meta["fee_structure_id"].astext == str(fee_structure_id),
-        )
-    ).scalars().all()
-    results: list[dict] = []
-    for inv in invoices:
-        summary = reconcile_invoice_against_structure(
-            db,
-            tenant_id=tenant_id,
-            actor_user_id=actor_user_id,
-            invoice=inv,
-            dry_run=dry_run,
-        )
-        if summary is not None:
-            results.append(summary)
+    result = _reconcile_invoice_set(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        scope=[Invoice.meta["fee_structure_id"].astext == str(fee_structure_id)],
+        dry_run=dry_run,
+    )
     return {
-        "checked": len(invoices),
-        "reconciled": len(results),
+        "checked": result["checked"],
+        "reconciled": result["reconciled"],
         "dry_run": dry_run,
-        "invoices": results,
+        "invoices": result["invoices"],
     }
 
 
@@ -8037,6 +8393,7 @@ def sweep_reconcile_invoices(
     actor_user_id: Optional[UUID],
     academic_year: Optional[int] = None,
     dry_run: bool = False,
+    progress: Optional[Callable[..., None]] = None,
 ) -> dict:
     """Verify every structure-generated invoice of an academic year against
     its current fee structure and fix drift. The 'forever checking' arm —
@@ -8044,6 +8401,10 @@ def sweep_reconcile_invoices(
     edit-hooks existed, plus anything else that slipped through.
 
     academic_year defaults to the most recent year that has any invoice.
+    Set-based (_reconcile_invoice_set) so it can run nightly for every
+    tenant; the result reports groups, elapsed_ms and invoices_per_sec.
+    `progress(done, total, **counts)` is called as drifted invoices are
+    fixed (background job runs).
     """
     if academic_year is None:
         academic_year = db.execute(
@@ -8056,27 +8417,17 @@ def sweep_reconcile_invoices(
         return {"checked": 0, "reconciled": 0, "dry_run": dry_run, "invoices": [],
                 "academic_year": None}
 
-    invoices = db.execute(
-        select(Invoice).where(
-            Invoice.tenant_id == tenant_id,
-            Invoice.invoice_type == "SCHOOL_FEES",
-            Invoice.status != "CANCELLED",
+    result = _reconcile_invoice_set(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        scope=[
             Invoice.academic_year == int(academic_year),
             Invoice.meta["fee_structure_id"].astext.isnot(None),
-        )
-    ).scalars().all()
-
-    results: list[dict] = []
-    for inv in invoices:
-        summary = reconcile_invoice_against_structure(
-            db,
-            tenant_id=tenant_id,
-            actor_user_id=actor_user_id,
-            invoice=inv,
-            dry_run=dry_run,
-        )
-        if summary is not None:
-            results.append(summary)
+        ],
+        dry_run=dry_run,
+        progress=progress,
+    )
 
     log_event(
         db,
@@ -8087,19 +8438,15 @@ def sweep_reconcile_invoices(
         resource_id=tenant_id,
         payload={
             "academic_year": int(academic_year),
-            "checked": len(invoices),
-            "reconciled": len(results),
+            "checked": result["checked"],
+            "reconciled": result["reconciled"],
             "dry_run": dry_run,
+            "elapsed_ms": result["elapsed_ms"],
+            "invoices_per_sec": result["invoices_per_sec"],
         },
         meta=None,
     )
-    return {
-        "academic_year": int(academic_year),
-        "checked": len(invoices),
-        "reconciled": len(results),
-        "dry_run": dry_run,
-        "invoices": results,
-    }
+    return {"academic_year": int(academic_year), **result}
 
 
 def publish_invoice(
@@ -8274,14 +8621,565 @@ def replace_fees_invoice(
 _BULK_ELIGIBLE_STATUSES = ("ENROLLED", "ENROLLED_PARTIAL")
 
 
-def _enrollment_display_name(payload: dict[str, Any] | None) -> str:
-    if not isinstance(payload, dict):
-        return "Unknown student"
-    for key in ("student_name", "studentName", "full_name", "fullName", "name"):
-        value = payload.get(key)
-        if isinstance(value, str) and value.strip():
-            return value.strip()
-    return "Unknown student"
+def _bulk_outcome_for_error(
+    enr: Enrollment,
+    *,
+    display_name: str,
+    enr_class: Optional[str],
+    msg: str,
+    existing_invoice_id: Optional[str] = None,
+) -> tuple[str, dict[str, Any]]:
+    """Classify a per-enrollment generation error as ("skipped" | "failed",
+    row) so the UI can render actionable chips per row instead of dumping
+    raw text."""
+    row: dict[str, Any] = {
+        "enrollment_id": str(enr.id),
+        "student_name": display_name,
+        "class_code": enr_class,
+    }
+    lowered = msg.lower()
+    if "already exists" in lowered:
+        return "skipped", {
+            **row,
+            "reason": "already_invoiced",
+            "detail": msg,
+            "existing_invoice_id": existing_invoice_id,
+        }
+    if "cannot determine class" in lowered:
+        reason = "no_class"
+    elif "no active fee structure" in lowered:
+        reason = "no_structure"
+    elif "no chargeable" in lowered or "fee structure has no items" in lowered:
+        reason = "no_chargeable_items"
+    else:
+        reason = "error"
+    return "failed", {**row, "reason": reason, "detail": msg}
+
+
+def _bulk_created_row(
+    enr: Enrollment,
+    *,
+    display_name: str,
+    enr_class: Optional[str],
+    invoice_id: UUID,
+    invoice_no: Optional[str],
+    total_amount: Any,
+    meta: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "enrollment_id": str(enr.id),
+        "student_id": str(enr.student_id) if enr.student_id else None,
+        "student_name": display_name,
+        "class_code": enr_class,
+        "invoice_id": str(invoice_id),
+        "invoice_no": invoice_no,
+        "total_amount": str(total_amount or 0),
+        "student_type": meta.get("student_type"),
+        "student_type_resolved_by": meta.get("student_type_resolved_by"),
+    }
+
+
+def _bulk_generate_rowwise(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    term_number: int,
+    academic_year: int,
+    batch: list[tuple[Enrollment, str, Optional[str]]],
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """Reference path: one generate_school_fees_invoice_v2 call per
+    enrollment, each under its own savepoint. Used when the set-based
+    engine cannot complete (e.g. a concurrent generator won a unique-index
+    race), so the per-row contract holds regardless."""
+    created: list[dict[str, Any]] = []
+    skipped: list[dict[str, Any]] = []
+    failed: list[dict[str, Any]] = []
+    for enr, display_name, enr_class in batch:
+        # Inner savepoint: a single failing enrollment must not poison
+        # the session for the rest of the batch.
+        inner_sp = db.begin_nested()
+        try:
+            inv = generate_school_fees_invoice_v2(
+                db,
+                tenant_id=tenant_id,
+                actor_user_id=actor_user_id,
+                enrollment_id=enr.id,
+                term_number=term_number,
+                academic_year=academic_year,
+                include_carry_forward=True,
+            )
+            inner_sp.commit()
+            created.append(_bulk_created_row(
+                enr, display_name=display_name, enr_class=enr_class,
+                invoice_id=inv.id, invoice_no=inv.invoice_no,
+                total_amount=inv.total_amount, meta=dict(inv.meta or {}),
+            ))
+            continue
+        except ValueError as e:
+            inner_sp.rollback()
+            msg = str(e)
+        except Exception as e:  # pragma: no cover — defensive
+            inner_sp.rollback()
+            failed.append({
+                "enrollment_id": str(enr.id),
+                "student_name": display_name,
+                "class_code": enr_class,
+                "reason": "error",
+                "detail": str(e),
+            })
+            continue
+
+        existing_id: Optional[str] = None
+        if "already exists" in msg.lower():
+            # Pull the duplicate's id for the UI to link to.
+            existing_inv = db.execute(
+                select(Invoice.id).where(
+                    Invoice.tenant_id == tenant_id,
+                    Invoice.enrollment_id == enr.id,
+                    Invoice.term_number == term_number,
+                    Invoice.academic_year == academic_year,
+                    Invoice.invoice_type == "SCHOOL_FEES",
+                )
+            ).scalars().first()
+            existing_id = str(existing_inv) if existing_inv else None
+        kind, row = _bulk_outcome_for_error(
+            enr, display_name=display_name, enr_class=enr_class,
+            msg=msg, existing_invoice_id=existing_id,
+        )
+        (skipped if kind == "skipped" else failed).append(row)
+    return created, skipped, failed
+
+
+def _bulk_generate_batch(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    term_number: int,
+    academic_year: int,
+    batch: list[tuple[Enrollment, str, Optional[str]]],
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """Set-based equivalent of calling generate_school_fees_invoice_v2 for
+    every enrollment in `batch`.
+
+    Everything the per-invoice generator looks up row by row — class
+    fallbacks, existing invoices, students, structures and their items,
+    ONCE_* history, interview invoices, carry-forward rows and grants — is
+    loaded once for the whole batch. Lines are computed in memory with the
+    same helpers and error messages, invoice numbers come from one reserved
+    block, and invoices + lines go in as two multi-row INSERTs. Grants are
+    still applied per invoice through apply_scholarship_to_invoice (budget
+    and recipient caps are sequential by nature), but only for students
+    that have one.
+
+    Raises on anything unexpected; the caller rolls the batch back and
+    falls back to _bulk_generate_rowwise.
+    """
+    from app.models.student_carry_forward import StudentCarryForward
+    from app.models.student_fee_assignment import StudentFeeAssignment
+    from app.models.student_scholarship_grant import StudentScholarshipGrant
+
+    created: list[dict[str, Any]] = []
+    skipped: list[dict[str, Any]] = []
+    failed: list[dict[str, Any]] = []
+    if not batch:
+        return created, skipped, failed
+
+    enrollment_ids = [enr.id for enr, _, _ in batch]
+    student_ids = list({enr.student_id for enr, _, _ in batch if enr.student_id})
+
+    # ── Preload ──────────────────────────────────────────────────────────────
+    payload_class = {enr.id: _payload_class_code(enr.payload) for enr, _, _ in batch}
+
+    sce_class: dict[UUID, Optional[str]] = {}
+    sce_students = list({
+        enr.student_id for enr, _, _ in batch if enr.student_id and not payload_class[enr.id]
+    })
+    if sce_students:
+        for sid, code in db.execute(
+            sa_text(
+                """
+                SELECT DISTINCT ON (sce.student_id) sce.student_id, tc.code
+                FROM core.student_class_enrollments sce
+                JOIN core.tenant_classes tc ON tc.id = sce.class_id
+                WHERE sce.tenant_id = :tid
+                  AND sce.student_id = ANY(CAST(:sids AS uuid[]))
+                ORDER BY sce.student_id, sce.created_at DESC
+                """
+            ),
+            {"tid": str(tenant_id), "sids": [str(s) for s in sce_students]},
+        ).all():
+            sce_class[sid] = str(code).strip() or None
+
+    sfa_class: dict[UUID, Optional[str]] = {}
+    sfa_enrollments = [
+        enr.id for enr, _, _ in batch
+        if not payload_class[enr.id] and not sce_class.get(enr.student_id)
+    ]
+    if sfa_enrollments:
+        for enr_id, code in db.execute(
+            select(StudentFeeAssignment.enrollment_id, FeeStructure.class_code)
+            .join(FeeStructure, FeeStructure.id == StudentFeeAssignment.fee_structure_id)
+            .where(
+                StudentFeeAssignment.tenant_id == tenant_id,
+                StudentFeeAssignment.enrollment_id.in_(sfa_enrollments),
+            )
+            .order_by(StudentFeeAssignment.enrollment_id, StudentFeeAssignment.assigned_at.desc())
+        ).all():
+            sfa_class.setdefault(enr_id, code)
+
+    existing: dict[UUID, tuple[UUID, Optional[str]]] = {}
+    for inv_id, enr_id, inv_no in db.execute(
+        select(Invoice.id, Invoice.enrollment_id, Invoice.invoice_no).where(
+            Invoice.tenant_id == tenant_id,
+            Invoice.enrollment_id.in_(enrollment_ids),
+            Invoice.term_number == term_number,
+            Invoice.academic_year == academic_year,
+            Invoice.invoice_type == "SCHOOL_FEES",
+        )
+    ).all():
+        existing.setdefault(enr_id, (inv_id, inv_no))
+
+    admission_years: dict[UUID, int] = {}
+    prior_fees_students: set[UUID] = set()
+    cf_by_student: dict[UUID, list[Any]] = {}
+    grants_by_student: dict[UUID, list[Any]] = {}
+    if student_ids:
+        admission_years = dict(db.execute(
+            select(Student.id, Student.admission_year).where(
+                Student.tenant_id == tenant_id, Student.id.in_(student_ids),
+            )
+        ).all())
+        prior_fees_students = set(db.execute(
+            select(Enrollment.student_id)
+            .join(Invoice, Invoice.enrollment_id == Enrollment.id)
+            .where(
+                Invoice.tenant_id == tenant_id,
+                Enrollment.student_id.in_(student_ids),
+                Invoice.invoice_type == "SCHOOL_FEES",
+                Invoice.status != "CANCELLED",
+            )
+            .distinct()
+        ).scalars().all())
+        for cf in db.execute(
+            select(StudentCarryForward).where(
+                StudentCarryForward.tenant_id == tenant_id,
+                StudentCarryForward.student_id.in_(student_ids),
+                StudentCarryForward.status == "OPEN",
+            )
+        ).scalars().all():
+            cf_by_student.setdefault(cf.student_id, []).append(cf)
+        for grant in db.execute(
+            select(StudentScholarshipGrant).where(
+                StudentScholarshipGrant.tenant_id == tenant_id,
+                StudentScholarshipGrant.student_id.in_(student_ids),
+                StudentScholarshipGrant.status == "ACTIVE",
+                sa_or(
+                    StudentScholarshipGrant.academic_year.is_(None),
+                    StudentScholarshipGrant.academic_year == academic_year,
+                ),
+                sa_or(
+                    StudentScholarshipGrant.term_number.is_(None),
+                    StudentScholarshipGrant.term_number == term_number,
+                ),
+            )
+        ).scalars().all():
+            grants_by_student.setdefault(grant.student_id, []).append(grant)
+
+    structures: dict[tuple[str, str], FeeStructure] = {}
+    for structure in db.execute(
+        select(FeeStructure).where(
+            FeeStructure.tenant_id == tenant_id,
+            FeeStructure.academic_year == academic_year,
+            FeeStructure.is_active == True,
+        )
+    ).scalars().all():
+        structures.setdefault((structure.class_code, str(structure.student_type)), structure)
+
+    items_by_structure: dict[UUID, list[Any]] = {}
+    if structures:
+        for it in db.execute(
+            select(
+                FeeStructureItem.structure_id,
+                FeeStructureItem.fee_item_id,
+                FeeStructureItem.term_1_amount,
+                FeeStructureItem.term_2_amount,
+                FeeStructureItem.term_3_amount,
+                FeeItem.name.label("fee_item_name"),
+                FeeItem.code.label("fee_item_code"),
+                FeeItem.charge_frequency,
+            )
+            .select_from(FeeStructureItem)
+            .join(FeeItem, FeeItem.id == FeeStructureItem.fee_item_id)
+            .where(
+                FeeStructureItem.structure_id.in_([s.id for s in structures.values()]),
+                FeeItem.tenant_id == tenant_id,
+            )
+        ).all():
+            items_by_structure.setdefault(it.structure_id, []).append(it)
+
+    # ONCE_PER_YEAR / ONCE_EVER history: (enrollment, fee item) pairs ever
+    # invoiced, and the subset invoiced in this academic year.
+    invoiced_ever: set[tuple[UUID, str]] = set()
+    invoiced_this_year: set[tuple[UUID, str]] = set()
+    for enr_id, year, fee_item_id in db.execute(
+        select(Invoice.enrollment_id, Invoice.academic_year, InvoiceLine.meta["fee_item_id"].astext)
+        .select_from(InvoiceLine)
+        .join(Invoice, Invoice.id == InvoiceLine.invoice_id)
+        .where(
+            Invoice.tenant_id == tenant_id,
+            Invoice.enrollment_id.in_(enrollment_ids),
+            Invoice.invoice_type == "SCHOOL_FEES",
+            InvoiceLine.meta["fee_item_id"].astext.is_not(None),
+        )
+    ).all():
+        invoiced_ever.add((enr_id, fee_item_id))
+        if year == academic_year:
+            invoiced_this_year.add((enr_id, fee_item_id))
+
+    interview_by_enrollment: dict[UUID, tuple[UUID, Any]] = {}
+    if term_number == 1:
+        for inv_id, enr_id, paid in db.execute(
+            select(Invoice.id, Invoice.enrollment_id, Invoice.paid_amount)
+            .where(
+                Invoice.tenant_id == tenant_id,
+                Invoice.enrollment_id.in_(enrollment_ids),
+                Invoice.invoice_type == "INTERVIEW",
+            )
+            .order_by(Invoice.enrollment_id, Invoice.created_at.desc())
+        ).all():
+            interview_by_enrollment.setdefault(enr_id, (inv_id, paid))
+
+    # ── Plan every invoice in memory ─────────────────────────────────────────
+    plans: list[dict[str, Any]] = []
+    for enr, display_name, enr_class in batch:
+        student_id = enr.student_id
+        try:
+            class_code = (
+                payload_class[enr.id]
+                or (sce_class.get(student_id) if student_id else None)
+                or sfa_class.get(enr.id)
+            )
+            if not class_code:
+                raise ValueError(
+                    "Cannot determine class for this enrollment. "
+                    "Please ensure the student is assigned to a class or the enrollment form includes a class."
+                )
+            if enr.id in existing:
+                dupe_id, dupe_no = existing[enr.id]
+                raise ValueError(
+                    f"A SCHOOL_FEES invoice already exists for this student in "
+                    f"Term {term_number} {academic_year} "
+                    f"(invoice: {dupe_no or str(dupe_id)[:8]})"
+                )
+
+            admission_year = admission_years.get(student_id, academic_year) if student_id else academic_year
+            source = str((enr.payload or {}).get("enrollment_source") or "").upper()
+            if source == "EXISTING_STUDENT":
+                student_type, resolved_by = "RETURNING", STUDENT_TYPE_RESOLVED_SOURCE_OVERRIDE
+            elif student_id is not None and student_id in prior_fees_students:
+                student_type, resolved_by = "RETURNING", STUDENT_TYPE_RESOLVED_PRIOR_INVOICE
+            elif admission_year < academic_year:
+                student_type, resolved_by = "RETURNING", STUDENT_TYPE_RESOLVED_YEAR_MATH
+            else:
+                student_type, resolved_by = "NEW", STUDENT_TYPE_RESOLVED_FIRST_INTAKE
+
+            norm_class = _norm_upper(str(class_code))
+            structure = structures.get((norm_class, student_type))
+            if not structure:
+                raise ValueError(
+                    f"No active fee structure found for class '{norm_class}', "
+                    f"year {academic_year}, student type {student_type}"
+                )
+            items = items_by_structure.get(structure.id) or []
+            if not items:
+                raise ValueError("Fee structure has no items")
+
+            def _already_invoiced(freq: str, fee_item_id: UUID, _enr_id: UUID = enr.id) -> bool:
+                history = invoiced_this_year if freq == "ONCE_PER_YEAR" else invoiced_ever
+                return (_enr_id, str(fee_item_id)) in history
+
+            structure_lines = _structure_item_lines(
+                items, term_number=term_number, norm_class=norm_class,
+                already_invoiced=_already_invoiced,
+            )
+        except ValueError as e:
+            msg = str(e)
+            existing_id = str(existing[enr.id][0]) if enr.id in existing else None
+            kind, row = _bulk_outcome_for_error(
+                enr, display_name=display_name, enr_class=enr_class,
+                msg=msg, existing_invoice_id=existing_id,
+            )
+            (skipped if kind == "skipped" else failed).append(row)
+            continue
+
+        invoice_id = uuid4()
+        lines: list[dict[str, Any]] = []
+        bundled: list[Any] = []
+        # A student's OPEN carry-forward rows go to the first invoice that
+        # claims them, exactly as in sequential generation.
+        cf_rows = cf_by_student.pop(student_id, []) if student_id else []
+        if cf_rows:
+            bundled, rollup = _carry_forward_rollup(cf_rows)
+            if rollup is not None:
+                lines.append(rollup)
+            for cf in bundled:
+                cf.status = "BUNDLED"
+                cf.invoice_id = invoice_id
+        lines.extend(structure_lines)
+
+        interview = interview_by_enrollment.get(enr.id)
+        if student_type == "NEW" and interview and Decimal(interview[1] or 0) > 0:
+            lines.append({
+                "description": "Interview Fee Credit (already paid)",
+                "amount": -Decimal(str(interview[1])),
+                "meta": {"line_type": "INTERVIEW_CREDIT", "interview_invoice_id": str(interview[0])},
+            })
+
+        total = sum((Decimal(ln["amount"]) for ln in lines), Decimal("0"))
+        meta: dict[str, Any] = {}
+        if bundled:
+            breakdown, settle = _arrears_breakdown(bundled, total=total, paid=Decimal("0"))
+            if settle:
+                for cf in bundled:
+                    cf.status = "SETTLED"
+            meta.update(breakdown)
+        meta.update({
+            "fee_structure_id": str(structure.id),
+            "class_code": structure.class_code,
+            "student_type": student_type,
+            "student_type_resolved_by": resolved_by,
+            "academic_year": academic_year,
+            "term_number": term_number,
+        })
+
+        # Later enrollments of the same student now have a prior invoice.
+        if student_id is not None:
+            prior_fees_students.add(student_id)
+        plans.append({
+            "enrollment": enr,
+            "display_name": display_name,
+            "enr_class": enr_class,
+            "invoice_id": invoice_id,
+            "student_type": student_type,
+            "lines": lines,
+            "total": total,
+            "meta": meta,
+        })
+
+    if not plans:
+        return created, skipped, failed
+
+    # ── Write ────────────────────────────────────────────────────────────────
+    numbers = _reserve_document_numbers(db, tenant_id=tenant_id, doc_type="INV", count=len(plans))
+    db.execute(
+        Invoice.__table__.insert(),
+        [
+            {
+                "id": plan["invoice_id"],
+                "tenant_id": tenant_id,
+                "invoice_no": invoice_no,
+                "invoice_type": "SCHOOL_FEES",
+                "status": "DRAFT",
+                "enrollment_id": plan["enrollment"].id,
+                "term_number": term_number,
+                "academic_year": academic_year,
+                "student_type_snapshot": plan["student_type"],
+                "total_amount": plan["total"],
+                "paid_amount": Decimal("0"),
+                "balance_amount": plan["total"],
+                "meta": plan["meta"],
+            }
+            for plan, invoice_no in zip(plans, numbers)
+        ],
+    )
+    db.execute(
+        InvoiceLine.__table__.insert(),
+        [
+            {
+                "invoice_id": plan["invoice_id"],
+                "description": ln["description"],
+                "amount": ln["amount"],
+                "meta": ln.get("meta"),
+            }
+            for plan in plans
+            for ln in plan["lines"]
+        ],
+    )
+    db.flush()  # carry-forward status / invoice links
+
+    granted = {
+        plan["invoice_id"]: plan for plan in plans
+        if plan["enrollment"].student_id in grants_by_student
+    }
+    granted_invoices: dict[UUID, Invoice] = {}
+    if granted:
+        granted_invoices = {
+            inv.id: inv
+            for inv in db.execute(select(Invoice).where(Invoice.id.in_(list(granted)))).scalars().all()
+        }
+    for invoice_id, plan in granted.items():
+        enr = plan["enrollment"]
+        inv = granted_invoices[invoice_id]
+        for grant in grants_by_student[enr.student_id]:
+            try:
+                apply_scholarship_to_invoice(
+                    db,
+                    tenant_id=tenant_id,
+                    actor_user_id=actor_user_id,
+                    invoice=inv,
+                    scholarship_id=grant.scholarship_id,
+                    requested_amount=None,  # driven by scholarship type
+                    reason=f"[Grant] {grant.granted_reason}",
+                    student_id=enr.student_id,
+                    enrollment_id=enr.id,
+                )
+            except ValueError as exc:
+                log_event(
+                    db,
+                    tenant_id=tenant_id,
+                    actor_user_id=actor_user_id,
+                    action="scholarship.grant.auto_apply_failed",
+                    resource="scholarship_grant",
+                    resource_id=grant.id,
+                    payload={
+                        "invoice_id": str(inv.id),
+                        "scholarship_id": str(grant.scholarship_id),
+                        "reason": str(exc),
+                    },
+                    meta=None,
+                )
+
+    for plan, invoice_no in zip(plans, numbers):
+        meta = plan["meta"]
+        log_event(
+            db,
+            tenant_id=tenant_id,
+            actor_user_id=actor_user_id,
+            action="invoice.create.v2",
+            resource="invoice",
+            resource_id=plan["invoice_id"],
+            payload={
+                "type": "SCHOOL_FEES",
+                "term_number": term_number,
+                "academic_year": academic_year,
+                "student_type": meta["student_type"],
+                "student_type_resolved_by": meta["student_type_resolved_by"],
+            },
+            meta=None,
+        )
+        inv = granted_invoices.get(plan["invoice_id"])
+        created.append(_bulk_created_row(
+            plan["enrollment"],
+            display_name=plan["display_name"],
+            enr_class=plan["enr_class"],
+            invoice_id=plan["invoice_id"],
+            invoice_no=invoice_no,
+            total_amount=inv.total_amount if inv is not None else plan["total"],
+            meta=meta,
+        ))
+    return created, skipped, failed
 
 
 def bulk_generate_fees_invoices(
@@ -8293,6 +9191,7 @@ def bulk_generate_fees_invoices(
     academic_year: int,
     class_code: Optional[str] = None,
     dry_run: bool = False,
+    progress: Optional[Callable[..., None]] = None,
 ) -> dict[str, Any]:
     """Generate DRAFT v2 fees invoices for every eligible enrollment in one
     go. Returns a structured outcome map — see module comment.
@@ -8303,11 +9202,15 @@ def bulk_generate_fees_invoices(
       • Optional class_code filter (case-insensitive normalised).
       • Per-student failure NEVER aborts the batch — bad rows are recorded
         and the loop moves on.
+      • Set-based: the batch is planned in memory and written with bulk
+        INSERTs (_bulk_generate_batch); if that fails as a whole it is
+        rolled back and redone one invoice at a time.
       • dry_run=True: every generated invoice (and any bundled CF) is rolled
         back at the end via a savepoint, so the preview is consequence-free.
-      • Audit: 'invoice.bulk_generate' with the summary counts. Per-student
-        rows are NOT individually audited (the per-student v2 generator
-        already audits each created invoice via 'invoice.create.v2').
+      • Audit: 'invoice.bulk_generate' with the summary counts, plus one
+        'invoice.create.v2' per created invoice.
+      • progress(done, total, **counts), when given, is called before and
+        after the batch (background job runs).
     """
     if term_number not in (1, 2, 3):
         raise ValueError("term_number must be 1, 2, or 3")
@@ -8316,139 +9219,47 @@ def bulk_generate_fees_invoices(
 
     class_filter_norm = _norm_upper(class_code) if class_code else None
 
-    # Pull every eligible enrollment for this tenant. Loading payloads in one
-    # pass keeps the per-row class_code resolution cheap.
-    enrollments = db.execute(
-        select(Enrollment).where(
-            Enrollment.tenant_id == tenant_id,
-            Enrollment.status.in_(_BULK_ELIGIBLE_STATUSES),
-        )
-    ).scalars().all()
+    # Pull every eligible enrollment for this tenant — of the requested class
+    # only, filtered in SQL on the generated class_code column, so the
+    # outcome list only shows what the caller actually asked for.
+    stmt = select(Enrollment).where(
+        Enrollment.tenant_id == tenant_id,
+        Enrollment.status.in_(_BULK_ELIGIBLE_STATUSES),
+    )
+    if class_filter_norm:
+        stmt = stmt.where(Enrollment.class_code == class_filter_norm)
+    enrollments = db.execute(stmt).scalars().all()
 
-    created: list[dict[str, Any]] = []
-    skipped: list[dict[str, Any]] = []
-    failed: list[dict[str, Any]] = []
+    batch: list[tuple[Enrollment, str, Optional[str]]] = [
+        (enr, enr.student_name or "Unknown student", enr.class_code)
+        for enr in enrollments
+    ]
+
+    generate_args = {
+        "tenant_id": tenant_id,
+        "actor_user_id": actor_user_id,
+        "term_number": term_number,
+        "academic_year": academic_year,
+        "batch": batch,
+    }
+    if progress is not None:
+        progress(0, len(batch))
 
     # Wrap the whole batch in a savepoint so dry_run can roll back atomically.
-    # In commit mode (dry_run=False), per-row failures are rolled back
-    # individually via inner savepoints; the outer one is released cleanly.
     outer_sp = db.begin_nested()
     try:
-        for enr in enrollments:
-            display_name = _enrollment_display_name(enr.payload)
-            enr_class = _extract_enrollment_class_code(enr.payload)
-
-            # Class filter — applied here so the outcome list only shows
-            # what the caller actually asked for.
-            if class_filter_norm and (enr_class or "") != class_filter_norm:
-                continue
-
-            row_failed: Optional[dict[str, Any]] = None
-            row_skipped: Optional[dict[str, Any]] = None
-            row_created: Optional[dict[str, Any]] = None
-
-            # Inner savepoint: a single failing enrollment must not poison
-            # the session for the rest of the batch.
-            inner_sp = db.begin_nested()
-            try:
-                inv = generate_school_fees_invoice_v2(
-                    db,
-                    tenant_id=tenant_id,
-                    actor_user_id=actor_user_id,
-                    enrollment_id=enr.id,
-                    term_number=term_number,
-                    academic_year=academic_year,
-                    include_carry_forward=True,
-                )
-                inner_sp.commit()
-                meta = dict(inv.meta or {})
-                row_created = {
-                    "enrollment_id": str(enr.id),
-                    "student_id": str(enr.student_id) if enr.student_id else None,
-                    "student_name": display_name,
-                    "class_code": enr_class,
-                    "invoice_id": str(inv.id),
-                    "invoice_no": inv.invoice_no,
-                    "total_amount": str(inv.total_amount or 0),
-                    "student_type": meta.get("student_type"),
-                    "student_type_resolved_by": meta.get("student_type_resolved_by"),
-                }
-            except ValueError as e:
-                inner_sp.rollback()
-                msg = str(e)
-                # Classify the common failure reasons so the UI can render
-                # actionable chips per row instead of dumping raw text.
-                if "already exists" in msg.lower():
-                    # Pull the duplicate's id out of the existing v2 generator's
-                    # message for the UI to link to.
-                    existing_id: Optional[str] = None
-                    existing_inv = db.execute(
-                        select(Invoice).where(
-                            Invoice.tenant_id == tenant_id,
-                            Invoice.enrollment_id == enr.id,
-                            Invoice.term_number == term_number,
-                            Invoice.academic_year == academic_year,
-                            Invoice.invoice_type == "SCHOOL_FEES",
-                        )
-                    ).scalar_one_or_none()
-                    if existing_inv:
-                        existing_id = str(existing_inv.id)
-                    row_skipped = {
-                        "enrollment_id": str(enr.id),
-                        "student_name": display_name,
-                        "class_code": enr_class,
-                        "reason": "already_invoiced",
-                        "detail": msg,
-                        "existing_invoice_id": existing_id,
-                    }
-                elif "cannot determine class" in msg.lower():
-                    row_failed = {
-                        "enrollment_id": str(enr.id),
-                        "student_name": display_name,
-                        "class_code": enr_class,
-                        "reason": "no_class",
-                        "detail": msg,
-                    }
-                elif "no active fee structure" in msg.lower():
-                    row_failed = {
-                        "enrollment_id": str(enr.id),
-                        "student_name": display_name,
-                        "class_code": enr_class,
-                        "reason": "no_structure",
-                        "detail": msg,
-                    }
-                elif "no chargeable" in msg.lower() or "fee structure has no items" in msg.lower():
-                    row_failed = {
-                        "enrollment_id": str(enr.id),
-                        "student_name": display_name,
-                        "class_code": enr_class,
-                        "reason": "no_chargeable_items",
-                        "detail": msg,
-                    }
-                else:
-                    row_failed = {
-                        "enrollment_id": str(enr.id),
-                        "student_name": display_name,
-                        "class_code": enr_class,
-                        "reason": "error",
-                        "detail": msg,
-                    }
-            except Exception as e:  # pragma: no cover — defensive
-                inner_sp.rollback()
-                row_failed = {
-                    "enrollment_id": str(enr.id),
-                    "student_name": display_name,
-                    "class_code": enr_class,
-                    "reason": "error",
-                    "detail": str(e),
-                }
-
-            if row_created is not None:
-                created.append(row_created)
-            elif row_skipped is not None:
-                skipped.append(row_skipped)
-            elif row_failed is not None:
-                failed.append(row_failed)
+        batch_sp = db.begin_nested()
+        try:
+            created, skipped, failed = _bulk_generate_batch(db, **generate_args)
+            batch_sp.commit()
+        except Exception:
+            batch_sp.rollback()
+            logger.warning(
+                "Set-based bulk invoice generation failed for tenant %s; retrying per enrollment",
+                tenant_id,
+                exc_info=True,
+            )
+            created, skipped, failed = _bulk_generate_rowwise(db, **generate_args)
 
         if dry_run:
             outer_sp.rollback()  # nothing persists
@@ -8463,6 +9274,8 @@ def bulk_generate_fees_invoices(
         except Exception:
             pass
         raise
+    if progress is not None:
+        progress(len(batch), len(batch), created=len(created), skipped=len(skipped), failed=len(failed))
 
     summary = {
         "total": len(created) + len(skipped) + len(failed),
@@ -8526,6 +9339,7 @@ def bulk_publish_invoices(
     term_number: Optional[int] = None,
     academic_year: Optional[int] = None,
     all_drafts_limit: int = 5000,
+    progress: Optional[Callable[..., None]] = None,
 ) -> dict[str, Any]:
     """Publish a batch of DRAFT invoices. Per-row outcome:
 
@@ -8541,6 +9355,9 @@ def bulk_publish_invoices(
     DRAFT in the tenant (optionally filtered by term_number + academic_year)
     up to all_drafts_limit, so the caller doesn't need to fetch the list
     first and there's no UI/server drift.
+
+    `progress(done, total, **counts)` is called per invoice (background
+    job runs).
     """
     if all_drafts:
         invoice_ids = _snapshot_draft_invoice_ids(
@@ -8561,7 +9378,12 @@ def bulk_publish_invoices(
     skipped: list[dict[str, Any]] = []
     failed: list[dict[str, Any]] = []
 
-    for inv_id in invoice_ids:
+    for idx, inv_id in enumerate(invoice_ids):
+        if progress is not None:
+            progress(
+                idx, len(invoice_ids),
+                published=len(published), skipped=len(skipped), failed=len(failed),
+            )
         sp = db.begin_nested()
         try:
             inv = db.execute(
@@ -8616,6 +9438,12 @@ def bulk_publish_invoices(
                 "detail": str(e),
             })
 
+    if progress is not None:
+        progress(
+            len(invoice_ids), len(invoice_ids),
+            published=len(published), skipped=len(skipped), failed=len(failed),
+        )
+
     summary = {
         "total": len(invoice_ids),
         "published": len(published),
@@ -8719,12 +9547,14 @@ def delete_invoice_cascade(
     db.flush()
 
     # Recalc invoices that shared a now-partially-unallocated payment.
-    for other_id in affected_other_invoices:
-        if other_id == invoice_id:
-            continue
-        other = db.get(Invoice, other_id)
-        if other is not None and other.status != "CANCELLED":
-            _recalc_invoice_amounts(db, other)
+    other_ids = [i for i in affected_other_invoices if i != invoice_id]
+    if other_ids:
+        _recalc_invoices_amounts(
+            db,
+            db.execute(
+                select(Invoice).where(Invoice.id.in_(other_ids))
+            ).scalars().all(),
+        )
     db.flush()
 
     log_event(
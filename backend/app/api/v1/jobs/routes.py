@@ -0,0 +1,75 @@
+"""Background job status and cancellation — the job URLs returned by the
+async (`?async=true`) mode of the bulk endpoints."""
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user, get_tenant, permission_set, role_set
+from app.core.jobs import get_job, get_job_kind, list_jobs, request_cancel, serialize_job
+from app.models.background_job import BackgroundJob
+
+router = APIRouter()
+
+
+def _can_see(request: Request, user, job: BackgroundJob) -> bool:
+    """The submitter, anyone holding the permission the job's endpoint
+    requires, and SUPER_ADMIN."""
+    if job.created_by is not None and job.created_by == user.id:
+        return True
+    if "SUPER_ADMIN" in role_set(request):
+        return True
+    kind = get_job_kind(job.kind)
+    return kind is not None and kind.permission is not None and kind.permission in permission_set(request)
+
+
+def _visible_job(request: Request, db: Session, tenant, user, job_id: UUID) -> BackgroundJob:
+    job = get_job(db, tenant_id=tenant.id, job_id=job_id)
+    if job is None or not _can_see(request, user, job):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("")
+def list_my_jobs(
+    kind: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    user=Depends(get_current_user),
+):
+    """The caller's most recent jobs in this tenant, newest first."""
+    jobs = list_jobs(db, tenant_id=tenant.id, created_by=user.id, kind=kind, limit=limit)
+    return [serialize_job(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+def get_job_status(
+    job_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    user=Depends(get_current_user),
+):
+    """Status, progress counters, partial counts and — once SUCCEEDED — the
+    result (the body the endpoint would have returned synchronously)."""
+    return serialize_job(_visible_job(request, db, tenant, user, job_id))
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(
+    job_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    user=Depends(get_current_user),
+):
+    """A queued job is cancelled at once; a running one stops at its next
+    progress report and its work is rolled back. Finished jobs are
+    returned unchanged."""
+    job = request_cancel(db, job=_visible_job(request, db, tenant, user, job_id))
+    db.commit()
+    return serialize_job(job)
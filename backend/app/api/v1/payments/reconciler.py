@@ -0,0 +1,317 @@
+"""Background STK status reconciler.
+
+An M-Pesa STK push is settled by Daraja's callback. When the callback is
+late or lost, the frontend's status polls used to query Daraja inside the
+request. Now every real (non-mock) checkout — subscription payment or SMS
+top-up — is tracked in core.pending_stk_checkouts when it is initiated,
+and a per-worker loop queries Daraja only for the overdue ones:
+
+  - a checkout is first due STK_RECONCILE_FIRST_CHECK_SEC after the push,
+    which leaves the callback time to arrive;
+  - each pass claims up to STK_RECONCILE_BATCH_SIZE due rows (FOR UPDATE
+    SKIP LOCKED, leased by pushing next_check_at forward), so workers never
+    query the same checkout twice at once;
+  - a final result is applied through the same paths as the callback
+    (`_apply_payment_status_update` / `_apply_topup_completed`) and the row
+    deleted; a still-pending one backs off exponentially, up to
+    STK_RECONCILE_MAX_DELAY_SEC. After STK_RECONCILE_GIVE_UP_SEC it is
+    dropped and stays PENDING, as it would without the reconciler.
+
+The status endpoints only read. The callback and the reconciler lock the
+payment row before settling it, so whichever comes second sees it final.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import anyio
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, LatencyHistogram
+from app.models.stk_checkout import PendingStkCheckout
+
+logger = logging.getLogger(__name__)
+
+KIND_SUBSCRIPTION = "SUBSCRIPTION"
+KIND_SMS_TOPUP = "SMS_TOPUP"
+
+_passes = Counter("stk_reconcile_passes")
+_settled = Counter("stk_reconcile_settled")
+_pass_latency = LatencyHistogram("stk_reconcile_pass")
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def track_checkout(db: Session, *, kind: str, tenant_id: UUID, checkout_request_id: str) -> None:
+    """Start tracking an initiated STK push (same transaction as its row)."""
+    db.execute(
+        pg_insert(PendingStkCheckout)
+        .values(
+            checkout_request_id=checkout_request_id,
+            kind=kind,
+            tenant_id=tenant_id,
+            next_check_at=_now_utc() + timedelta(seconds=int(settings.STK_RECONCILE_FIRST_CHECK_SEC)),
+        )
+        .on_conflict_do_nothing(index_elements=["checkout_request_id"])
+    )
+
+
+def forget_checkout(db: Session, *, checkout_request_id: str) -> None:
+    """Stop tracking a checkout whose payment is final."""
+    db.execute(
+        sa.delete(PendingStkCheckout).where(
+            PendingStkCheckout.checkout_request_id == checkout_request_id
+        )
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = max(1, int(settings.STK_RECONCILE_BASE_DELAY_SEC))
+    cap = max(base, int(settings.STK_RECONCILE_MAX_DELAY_SEC))
+    return timedelta(seconds=min(cap, base * (2 ** min(attempts, 16))))
+
+
+def _claim_due(db: Session, *, limit: int) -> list[Any]:
+    """Lease up to `limit` due checkouts to this pass and commit the lease."""
+    now = _now_utc()
+    due = (
+        sa.select(PendingStkCheckout.checkout_request_id)
+        .where(PendingStkCheckout.next_check_at <= now)
+        .order_by(PendingStkCheckout.next_check_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    # The lease: a pass that dies mid-way leaves its rows due again later.
+    lease_until = now + timedelta(seconds=max(60, int(settings.DARAJA_TIMEOUT_SEC or 30) * 3))
+    rows = db.execute(
+        sa.update(PendingStkCheckout)
+        .where(PendingStkCheckout.checkout_request_id.in_(due))
+        .values(next_check_at=lease_until)
+        .returning(
+            PendingStkCheckout.checkout_request_id,
+            PendingStkCheckout.kind,
+            PendingStkCheckout.attempts,
+            PendingStkCheckout.created_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return rows
+
+
+def _reschedule(db: Session, row: Any, *, error: Optional[str]) -> str:
+    give_up_at = row.created_at + timedelta(seconds=int(settings.STK_RECONCILE_GIVE_UP_SEC))
+    if _now_utc() >= give_up_at:
+        logger.warning(
+            "STK checkout %s (%s) still unresolved after %ss — no longer reconciled",
+            row.checkout_request_id, row.kind, settings.STK_RECONCILE_GIVE_UP_SEC,
+        )
+        forget_checkout(db, checkout_request_id=row.checkout_request_id)
+        return "expired"
+    db.execute(
+        sa.update(PendingStkCheckout)
+        .where(PendingStkCheckout.checkout_request_id == row.checkout_request_id)
+        .values(
+            attempts=row.attempts + 1,
+            next_check_at=_now_utc() + _retry_delay(row.attempts),
+            last_error=error,
+        )
+    )
+    return "pending"
+
+
+def _settle_subscription_payment(db: Session, checkout_id: str, query_res: dict[str, Any]) -> str:
+    from app.api.v1.payments import service
+    from app.core.audit import log_event
+    from app.models.subscription import SubscriptionPayment
+
+    status_api, result_code, result_desc = service._stk_query_outcome(query_res)
+    if status_api == "pending":
+        return "pending"
+    pay = db.execute(
+        sa.select(SubscriptionPayment)
+        .where(SubscriptionPayment.checkout_request_id == checkout_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if pay is not None and str(pay.status or "").upper() not in service.FINAL_PAYMENT_STATUSES:
+        service._apply_payment_status_update(
+            db,
+            pay=pay,
+            status_api=status_api,
+            result_code=result_code,
+            result_desc=result_desc,
+            callback_payload=query_res,
+        )
+        log_event(
+            db,
+            tenant_id=pay.tenant_id,
+            actor_user_id=None,
+            action=f"subscription.payment.{status_api}",
+            resource="subscription_payment",
+            resource_id=pay.id,
+            payload={
+                "checkout_request_id": checkout_id,
+                "result_code": result_code,
+                "result_desc": result_desc,
+            },
+            meta={"source": "stk_query"},
+        )
+    return status_api
+
+
+def _settle_sms_topup(db: Session, checkout_id: str, query_res: dict[str, Any]) -> str:
+    from app.api.v1.payments.service import _stk_query_outcome
+    from app.api.v1.sms import service as sms_service
+    from app.models.sms import SmsCreditTopup
+
+    status_api, result_code, result_desc = _stk_query_outcome(query_res)
+    if status_api == "pending":
+        return "pending"
+    topup = db.execute(
+        sa.select(SmsCreditTopup)
+        .where(SmsCreditTopup.checkout_request_id == checkout_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if topup is not None and topup.status not in sms_service.TOPUP_FINAL_STATUSES:
+        if status_api == "completed":
+            sms_service._apply_topup_completed(
+                db,
+                topup=topup,
+                result_code=result_code,
+                result_desc=result_desc or "Completed",
+                callback_payload=query_res,
+            )
+        else:
+            sms_service._apply_topup_failed(
+                db,
+                topup=topup,
+                result_code=result_code,
+                result_desc=result_desc,
+                callback_payload=query_res,
+            )
+    return status_api
+
+
+def _is_final(db: Session, row: Any) -> bool:
+    from app.api.v1.payments.service import FINAL_PAYMENT_STATUSES
+    from app.models.sms import SmsCreditTopup
+    from app.models.subscription import SubscriptionPayment
+
+    model = SubscriptionPayment if row.kind == KIND_SUBSCRIPTION else SmsCreditTopup
+    status = db.execute(
+        sa.select(model.status).where(model.checkout_request_id == row.checkout_request_id)
+    ).scalar()
+    return status is None or str(status).upper() in FINAL_PAYMENT_STATUSES
+
+
+def _reconcile_one(db: Session, row: Any) -> str:
+    from app.api.v1.payments.service import _call_daraja_stk_query
+
+    if _is_final(db, row):
+        # Settled by its callback (or the payment is gone): nothing to ask.
+        forget_checkout(db, checkout_request_id=row.checkout_request_id)
+        return "settled"
+    try:
+        query_res = _call_daraja_stk_query(checkout_request_id=row.checkout_request_id)
+    except (RuntimeError, ValueError) as exc:
+        # Daraja answers "still being processed" with an error status.
+        return _reschedule(db, row, error=str(exc)[:500])
+
+    settle = _settle_subscription_payment if row.kind == KIND_SUBSCRIPTION else _settle_sms_topup
+    outcome = settle(db, row.checkout_request_id, query_res)
+    if outcome == "pending":
+        return _reschedule(db, row, error=None)
+    forget_checkout(db, checkout_request_id=row.checkout_request_id)
+    return outcome
+
+
+def reconcile_pending_checkouts(db: Session, *, limit: Optional[int] = None) -> dict[str, int]:
+    """One reconciler pass over the due checkouts, one commit per checkout.
+    Returns counts by outcome."""
+    totals = {"checked": 0, "completed": 0, "failed": 0, "pending": 0, "settled": 0, "expired": 0}
+    with _pass_latency.time():
+        for row in _claim_due(db, limit=int(limit or settings.STK_RECONCILE_BATCH_SIZE)):
+            try:
+                outcome = _reconcile_one(db, row)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.warning("STK reconcile failed for %s", row.checkout_request_id, exc_info=True)
+                continue
+            totals["checked"] += 1
+            totals[outcome] = totals.get(outcome, 0) + 1
+            if outcome in {"completed", "failed"}:
+                _settled.inc()
+    _passes.inc()
+    return totals
+
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+async def run_reconcile_pass(session_factory: Optional[Callable[[], Session]] = None) -> dict[str, int]:
+    """One pass off the event loop, on an AnyIO worker thread like a
+    threadpool route: the cache invalidations a settled payment queues for
+    after commit go through `run_from_sync`, which only reaches Redis (and
+    the other workers) from such a thread."""
+    if session_factory is None:
+        from app.core.database import SessionLocal as session_factory
+
+    def _run():
+        with session_factory() as db:
+            return reconcile_pending_checkouts(db)
+
+    return await anyio.to_thread.run_sync(_run)
+
+
+async def _reconcile_loop(interval_s: float) -> None:
+    while True:
+        try:
+            await run_reconcile_pass()
+        except Exception:
+            logger.warning("STK reconcile pass failed", exc_info=True)
+        await asyncio.sleep(interval_s)
+
+
+def start_stk_reconciler() -> None:
+    """Start the per-worker reconcile loop. Mock Daraja (DARAJA_USE_MOCK)
+    never tracks checkouts, so there is nothing to run;
+    STK_RECONCILE_INTERVAL_SEC=0 disables it."""
+    global _reconcile_task
+    interval = int(settings.STK_RECONCILE_INTERVAL_SEC)
+    if interval <= 0 or bool(settings.DARAJA_USE_MOCK):
+        return
+    if _reconcile_task is not None and not _reconcile_task.done():
+        return
+    _reconcile_task = asyncio.get_running_loop().create_task(_reconcile_loop(float(interval)))
+
+
+async def stop_stk_reconciler() -> None:
+    global _reconcile_task
+    task, _reconcile_task = _reconcile_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+def stk_reconcile_snapshot() -> dict[str, Any]:
+    return {
+        "running": _reconcile_task is not None and not _reconcile_task.done(),
+        "passes": _passes.value,
+        "settled": _settled.value,
+        "latency": _pass_latency.snapshot(),
+    }
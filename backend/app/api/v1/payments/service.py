@@ -10,17 +10,18 @@ logger = logging.getLogger(__name__)
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Any, Optional
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 from uuid import UUID, uuid4
 
 from sqlalchemy import select
 from sqlalchemy.exc import InternalError, OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 
+from app.api.v1.payments import reconciler
+from app.core import http_client
 from app.core.audit import log_event
 from app.core.config import settings
+from app.core.subscription_gate import invalidate_subscription_cache_after_commit
 from app.models.subscription import Subscription, SubscriptionPayment
 from app.models.tenant import Tenant
 
@@ -262,7 +263,8 @@ def get_daraja_connectivity_check() -> dict[str, Any]:
         oauth_attempted = True
         started = time.monotonic()
         try:
-            _daraja_access_token()
+            # A live round trip, not the cached token.
+            _daraja_access_token(refresh=True)
             oauth_ok = True
             oauth_latency_ms = int((time.monotonic() - started) * 1000)
         except ValueError as exc:
@@ -347,75 +349,88 @@ def _http_json(
     max_retries: int = 0,
     retry_backoff_sec: float = 0.6,
 ) -> dict[str, Any]:
-    attempt = 0
-    while True:
-        body_bytes = None
-        req_headers = dict(headers or {})
-        if payload is not None:
-            body_bytes = json.dumps(payload).encode("utf-8")
-            req_headers.setdefault("Content-Type", "application/json")
-
-        req = Request(url=url, data=body_bytes, method=method.upper())
-        for key, value in req_headers.items():
-            req.add_header(key, value)
+    body_bytes = None
+    req_headers = dict(headers or {})
+    if payload is not None:
+        body_bytes = json.dumps(payload).encode("utf-8")
+        req_headers.setdefault("Content-Type", "application/json")
 
+    try:
+        resp = http_client.request(
+            method,
+            url,
+            headers=req_headers,
+            body=body_bytes,
+            timeout_sec=timeout_sec,
+            max_retries=max_retries,
+            retry_backoff_sec=retry_backoff_sec,
+        )
+    except http_client.HttpStatusError as err:
+        detail_raw = err.text()
+        detail = detail_raw or str(err)
         try:
-            with urlopen(req, timeout=timeout_sec) as resp:
-                raw = resp.read().decode("utf-8")
-                return json.loads(raw) if raw else {}
-        except HTTPError as err:
-            detail_raw = err.read().decode("utf-8", errors="ignore")
-            detail = detail_raw or str(err)
-            try:
-                parsed = json.loads(detail_raw) if detail_raw else {}
-                if isinstance(parsed, dict):
-                    detail = (
-                        str(parsed.get("errorMessage") or "")
-                        or str(parsed.get("error_description") or "")
-                        or str(parsed.get("ResponseDescription") or "")
-                        or detail
-                    )
-            except Exception:
-                pass
-
-            # Upstream/server-side failures: retry a few times, then return 503 upstream signal.
-            if err.code >= 500:
-                if attempt < max_retries:
-                    time.sleep(retry_backoff_sec * (2**attempt))
-                    attempt += 1
-                    continue
-                raise RuntimeError(f"Daraja upstream unavailable ({err.code}): {detail}")
-            raise ValueError(f"Daraja request failed ({err.code}): {detail}")
-        except (URLError, TimeoutError) as err:
-            if attempt < max_retries:
-                time.sleep(retry_backoff_sec * (2**attempt))
-                attempt += 1
-                continue
-            raise RuntimeError(f"Daraja network error: {err}")
-
-
-def _daraja_access_token() -> str:
+            parsed = json.loads(detail_raw) if detail_raw else {}
+            if isinstance(parsed, dict):
+                detail = (
+                    str(parsed.get("errorMessage") or "")
+                    or str(parsed.get("error_description") or "")
+                    or str(parsed.get("ResponseDescription") or "")
+                    or detail
+                )
+        except Exception:
+            pass
+
+        if err.status == 401 and req_headers.get("Authorization", "").startswith("Bearer "):
+            # A revoked / expired token: the next call fetches a new one.
+            http_client.token_cache.invalidate()
+        # Upstream/server-side failures (already retried): 503 upstream signal.
+        if err.status >= 500:
+            raise RuntimeError(f"Daraja upstream unavailable ({err.status}): {detail}")
+        raise ValueError(f"Daraja request failed ({err.status}): {detail}")
+    except http_client.HttpNetworkError as err:
+        raise RuntimeError(f"Daraja network error: {err}")
+    return resp.json()
+
+
+def _daraja_access_token(*, refresh: bool = False) -> str:
+    """Cached OAuth token (shared with the SMS top-up flow), refreshed
+    shortly before it expires — or now, with `refresh`."""
     missing = _required_daraja_config_missing()
     if missing:
         raise ValueError(
             "Daraja configuration missing: " + ", ".join(sorted(missing))
         )
 
-    creds = f"{settings.DARAJA_CONSUMER_KEY}:{settings.DARAJA_CONSUMER_SECRET}".encode(
-        "utf-8"
-    )
-    auth = base64.b64encode(creds).decode("utf-8")
-    data = _http_json(
-        method="GET",
-        url=f"{_daraja_base_url()}/oauth/v1/generate?grant_type=client_credentials",
-        headers={"Authorization": f"Basic {auth}"},
-        timeout_sec=int(settings.DARAJA_TIMEOUT_SEC or 30),
-        max_retries=2,
-    )
-    token = str(data.get("access_token") or "").strip()
-    if not token:
-        raise ValueError("Daraja access token response missing access_token")
-    return token
+    url = f"{_daraja_base_url()}/oauth/v1/generate?grant_type=client_credentials"
+
+    def fetch() -> tuple[str, float]:
+        creds = f"{settings.DARAJA_CONSUMER_KEY}:{settings.DARAJA_CONSUMER_SECRET}".encode(
+            "utf-8"
+        )
+        auth = base64.b64encode(creds).decode("utf-8")
+        data = _http_json(
+            method="GET",
+            url=url,
+            headers={"Authorization": f"Basic {auth}"},
+            timeout_sec=int(settings.DARAJA_TIMEOUT_SEC or 30),
+            max_retries=2,
+        )
+        token = str(data.get("access_token") or "").strip()
+        if not token:
+            raise ValueError("Daraja access token response missing access_token")
+        return token, _token_lifetime(data)
+
+    key = (url, settings.DARAJA_CONSUMER_KEY)
+    if refresh:
+        http_client.token_cache.invalidate(key)
+    return http_client.token_cache.get(key, fetch)
+
+
+def _token_lifetime(data: dict[str, Any]) -> float:
+    try:
+        return float(data.get("expires_in") or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
 
 def _call_daraja_stk_push(*, phone_number: str, amount: Decimal, account_reference: str, description: str) -> dict[str, Any]:
@@ -479,6 +494,27 @@ def _call_daraja_stk_query(*, checkout_request_id: str) -> dict[str, Any]:
     return data
 
 
+def _stk_query_outcome(query_res: dict[str, Any]) -> tuple[str, int | None, str | None]:
+    """(status_api, result_code, result_desc) of an STK query response;
+    "pending" while M-Pesa has no final result yet."""
+    response_code = str(query_res.get("ResponseCode") or "").strip()
+    if response_code != "0":
+        result_desc = (
+            str(query_res.get("errorMessage") or "").strip()
+            or str(query_res.get("ResponseDescription") or "").strip()
+            or "STK query failed"
+        )
+        return "pending", None, result_desc
+
+    raw_result_code = query_res.get("ResultCode")
+    try:
+        result_code = int(raw_result_code) if raw_result_code is not None else None
+    except Exception:
+        result_code = None
+    result_desc = str(query_res.get("ResultDesc") or "").strip() or None
+    return _status_from_result_code(result_code), result_code, result_desc
+
+
 def _get_tenant_subscription_row(
     db: Session,
     *,
@@ -786,6 +822,13 @@ def initiate_tenant_subscription_payment(
     )
     db.add(pay)
     db.flush()
+    if not settings.DARAJA_USE_MOCK and not mock_fallback:
+        reconciler.track_checkout(
+            db,
+            kind=reconciler.KIND_SUBSCRIPTION,
+            tenant_id=tenant_id,
+            checkout_request_id=checkout_request_id,
+        )
 
     log_event(
         db,
@@ -886,6 +929,7 @@ def _apply_payment_status_update(
             sub = db.get(Subscription, pay.subscription_id)
             if sub and sub.tenant_id == pay.tenant_id:
                 _touch_subscription_after_success(sub, done_at)
+                invalidate_subscription_cache_after_commit(db, sub.tenant_id)
     elif status_upper in {"FAILED", "CANCELLED"}:
         pay.completed_at = _now_utc()
 
@@ -921,10 +965,11 @@ def handle_daraja_callback(
         result_code = None
 
     try:
+        # Locked: the STK reconciler may be settling the same payment.
         pay = db.execute(
-            select(SubscriptionPayment).where(
-                SubscriptionPayment.checkout_request_id == checkout_request_id
-            )
+            select(SubscriptionPayment)
+            .where(SubscriptionPayment.checkout_request_id == checkout_request_id)
+            .with_for_update()
         ).scalar_one_or_none()
     except (ProgrammingError, OperationalError, InternalError) as err:
         db.rollback()
@@ -984,6 +1029,8 @@ def handle_daraja_callback(
         phone_number=phone_number,
         amount_kes=amount_kes,
     )
+    if str(pay.status or "").upper() in FINAL_PAYMENT_STATUSES:
+        reconciler.forget_checkout(db, checkout_request_id=checkout_request_id)
 
     log_event(
         db,
@@ -1067,16 +1114,7 @@ def get_tenant_subscription_payment_status(
             "result_desc": pay.result_desc,
         }
 
-    if str(pay.status or "").upper() in FINAL_PAYMENT_STATUSES:
-        return {
-            "checkout_request_id": checkout_id,
-            "status": _status_upper_to_api(pay.status),
-            "mpesa_receipt": pay.mpesa_receipt,
-            "result_code": pay.result_code,
-            "result_desc": pay.result_desc,
-        }
-
-    if settings.DARAJA_USE_MOCK:
+    if settings.DARAJA_USE_MOCK and str(pay.status or "").upper() not in FINAL_PAYMENT_STATUSES:
         _apply_payment_status_update(
             db,
             pay=pay,
@@ -1105,53 +1143,8 @@ def get_tenant_subscription_payment_status(
             "result_desc": pay.result_desc,
         }
 
-    query_res = _call_daraja_stk_query(checkout_request_id=checkout_id)
-    response_code = str(query_res.get("ResponseCode") or "").strip()
-
-    result_code: int | None = None
-    result_desc: str | None = None
-    status_api = "pending"
-
-    if response_code == "0":
-        raw_result_code = query_res.get("ResultCode")
-        try:
-            result_code = int(raw_result_code) if raw_result_code is not None else None
-        except Exception:
-            result_code = None
-        result_desc = str(query_res.get("ResultDesc") or "").strip() or None
-        status_api = _status_from_result_code(result_code)
-    else:
-        result_desc = (
-            str(query_res.get("errorMessage") or "").strip()
-            or str(query_res.get("ResponseDescription") or "").strip()
-            or "STK query failed"
-        )
-
-    _apply_payment_status_update(
-        db,
-        pay=pay,
-        status_api=status_api,
-        result_code=result_code,
-        result_desc=result_desc,
-        callback_payload=query_res,
-    )
-
-    if status_api in {"completed", "failed"}:
-        log_event(
-            db,
-            tenant_id=pay.tenant_id,
-            actor_user_id=None,
-            action=f"subscription.payment.{status_api}",
-            resource="subscription_payment",
-            resource_id=pay.id,
-            payload={
-                "checkout_request_id": checkout_id,
-                "result_code": result_code,
-                "result_desc": result_desc,
-            },
-            meta={"source": "stk_query"},
-        )
-
+    # A pending payment is settled by its Daraja callback or, once that is
+    # overdue, by the STK reconciler (payments.reconciler): this only reads.
     return {
         "checkout_request_id": checkout_id,
         "status": _status_upper_to_api(pay.status),
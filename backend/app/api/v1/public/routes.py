@@ -25,7 +25,7 @@ from app.api.v1.parents.schemas import (
     PortalInvoiceOut, PortalPaymentOut, PortalAttendanceOut, PortalIncidentOut,
 )
 
-from app.utils.hashing import hash_password, verify_password
+from app.utils.hashing import hash_password, hash_refresh_token, verify_password, verify_refresh_token
 from app.utils.tokens import create_access_token, create_refresh_token, decode_token
 from app.utils.receipt_pdf import decode_receipt_verify_token
 
@@ -380,7 +380,7 @@ def _issue_tokens(db: Session, *, account: ProspectAccount) -> tuple[str, str]:
         ProspectAuthSession(
             id=session_id,
             account_id=account.id,
-            refresh_token_hash=hash_password(refresh_token),
+            refresh_token_hash=hash_refresh_token(refresh_token),
             expires_at=refresh_exp,
             revoked_at=None,
             last_used_at=None,
@@ -579,7 +579,8 @@ def refresh(
         raise HTTPException(status_code=401, detail="Session revoked")
     if session.expires_at <= datetime.now(timezone.utc):
         raise HTTPException(status_code=401, detail="Session expired")
-    if not verify_password(sms_public_refresh, session.refresh_token_hash):
+    # Rotated below, so a legacy argon2 hash is replaced without a rehash step.
+    if not verify_refresh_token(sms_public_refresh, session.refresh_token_hash)[0]:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
     account = db.get(ProspectAccount, account_id)
@@ -597,7 +598,7 @@ def refresh(
         sub=str(account.id),
         tenant_id=PUBLIC_TENANT_MARKER,
     )
-    session.refresh_token_hash = hash_password(new_refresh)
+    session.refresh_token_hash = hash_refresh_token(new_refresh)
     session.expires_at = new_exp
     session.last_used_at = datetime.now(timezone.utc)
     db.commit()
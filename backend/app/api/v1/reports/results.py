@@ -0,0 +1,290 @@
+"""Class-term results engine for 8-4-4 report cards.
+
+The class results overview and every report card used to aggregate marks one
+enrollment at a time (`_get_marks` + `_student_info` per classmate) — and a
+report card re-ran that for the whole class just to find the student's
+position, so downloading a class's cards was quadratic in queries.
+
+`class_term_results` loads every mark of a (class, term) in one query, with
+the student details, and computes per-student subject results, totals,
+means, grades and positions in memory. Students with the same mean
+percentage share a position (1, 1, 3 …). The result is cached per
+(tenant, class, term) on each worker and dropped on every worker when a
+mark or an exam of the tenant changes (`invalidate_class_results_after_commit`);
+REPORT_RESULTS_CACHE_TTL_SEC only bounds staleness from other edits (a
+student's name) and from a missed cache-bus message.
+
+The 8-4-4 grade scale lives here so the report routes and the engine grade
+marks the same way.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import cache_bus
+from app.core.config import settings
+from app.core.local_cache import MISSING, LocalTTLCache
+from app.core.redis import run_from_sync
+
+from .schemas import SubjectResultOut
+
+# ── 8-4-4 grade helpers ───────────────────────────────────────────────────────
+
+_GRADE_SCALE = [
+    (80, "A",  12),
+    (75, "A-", 11),
+    (70, "B+", 10),
+    (65, "B",   9),
+    (60, "B-",  8),
+    (55, "C+",  7),
+    (50, "C",   6),
+    (45, "C-",  5),
+    (40, "D+",  4),
+    (35, "D",   3),
+    (30, "D-",  2),
+    (0,  "E",   1),
+]
+
+_MEAN_GRADE_POINTS = [
+    (11.5, "A"),
+    (10.5, "A-"),
+    (9.5,  "B+"),
+    (8.5,  "B"),
+    (7.5,  "B-"),
+    (6.5,  "C+"),
+    (5.5,  "C"),
+    (4.5,  "C-"),
+    (3.5,  "D+"),
+    (2.5,  "D"),
+    (1.5,  "D-"),
+    (0.0,  "E"),
+]
+
+
+def _grade_for_pct(pct: float) -> tuple[str, int]:
+    for threshold, letter, pts in _GRADE_SCALE:
+        if pct >= threshold:
+            return letter, pts
+    return "E", 1
+
+
+def _mean_grade(mean_pts: float) -> str:
+    for threshold, letter in _MEAN_GRADE_POINTS:
+        if mean_pts >= threshold:
+            return letter
+    return "E"
+
+
+EVICT_CHANNEL = "cache:class-results"   # "<tenant_id>"
+
+_cache = LocalTTLCache(
+    name="class_results",
+    max_entries=settings.REPORT_RESULTS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REPORT_RESULTS_CACHE_TTL_SEC,
+)
+
+
+@dataclass(frozen=True)
+class StudentResult:
+    enrollment_id: str
+    student_id: Optional[str]
+    student_name: str
+    admission_no: Optional[str]
+    subjects: tuple[SubjectResultOut, ...]
+    total_marks: float
+    mean_percentage: float
+    mean_grade_points: float
+    mean_grade: str
+    position: int
+
+    @property
+    def subjects_sat(self) -> int:
+        return len(self.subjects)
+
+
+@dataclass(frozen=True)
+class ClassTermResults:
+    class_code: str
+    term_id: str
+    ranked: tuple[StudentResult, ...]   # by position, then name
+
+    @property
+    def out_of(self) -> int:
+        return len(self.ranked)
+
+    def for_enrollment(self, enrollment_id: UUID | str) -> Optional[StudentResult]:
+        eid = str(enrollment_id)
+        return next((r for r in self.ranked if r.enrollment_id == eid), None)
+
+
+# Members: enrollments with at least one mark for the class in the term. A
+# member's subjects aggregate all its marks in the term, as on its card.
+_RESULTS_SQL = sa.text(
+    """
+    WITH members AS (
+        SELECT DISTINCT em.student_enrollment_id AS eid
+        FROM core.tenant_exam_marks em
+        JOIN core.tenant_exams e ON e.id = em.exam_id
+        WHERE em.class_code = :class_code
+          AND em.tenant_id  = :tid
+          AND e.term_id     = :term_id
+    ),
+    subject_totals AS (
+        SELECT
+            em.student_enrollment_id AS eid,
+            em.subject_id,
+            ts.name                  AS subject_name,
+            SUM(em.marks_obtained)   AS total_marks,
+            SUM(em.max_marks)        AS total_max,
+            MAX(em.remarks)          AS remarks
+        FROM core.tenant_exam_marks em
+        JOIN core.tenant_exams e     ON e.id  = em.exam_id
+        JOIN core.tenant_subjects ts ON ts.id = em.subject_id
+        WHERE em.tenant_id = :tid
+          AND e.term_id    = :term_id
+          AND em.student_enrollment_id IN (SELECT eid FROM members)
+        GROUP BY em.student_enrollment_id, em.subject_id, ts.name
+    )
+    SELECT
+        CAST(m.eid AS TEXT)                        AS enrollment_id,
+        CAST(enr.student_id AS TEXT)               AS student_id,
+        s.id IS NOT NULL                           AS has_student,
+        s.first_name || ' ' || s.last_name         AS student_name,
+        s.admission_no,
+        CAST(st.subject_id AS TEXT)                AS subject_id,
+        st.subject_name,
+        st.total_marks,
+        st.total_max,
+        st.remarks
+    FROM members m
+    JOIN core.enrollments enr ON enr.id = m.eid AND enr.tenant_id = :tid
+    LEFT JOIN core.students s ON s.id = enr.student_id AND s.tenant_id = :tid
+    LEFT JOIN subject_totals st ON st.eid = m.eid
+    ORDER BY m.eid, st.subject_name ASC
+    """
+)
+
+
+def _subject_result(*, subject_id, subject_name, total_marks, total_max, remarks) -> SubjectResultOut:
+    total_m = float(total_marks or 0)
+    total_x = float(total_max or 100)
+    pct = round(total_m / total_x * 100, 2) if total_x else 0.0
+    grade, pts = _grade_for_pct(pct)
+    return SubjectResultOut(
+        subject_id=str(subject_id or ""),
+        subject_name=str(subject_name),
+        marks_obtained=round(total_m, 2),
+        max_marks=round(total_x, 2),
+        percentage=pct,
+        grade=grade,
+        grade_points=pts,
+        remarks=str(remarks) if remarks is not None else None,
+    )
+
+
+def _summarize(subjects) -> tuple[float, float, float, str]:
+    """(total_marks, mean_percentage, mean_grade_points, mean_grade)."""
+    n = len(subjects)
+    mean_pct = round(sum(s.percentage for s in subjects) / n, 2) if n else 0.0
+    mean_pts = round(sum(s.grade_points for s in subjects) / n, 2) if n else 0.0
+    total_marks = round(sum(s.marks_obtained for s in subjects), 2)
+    return total_marks, mean_pct, mean_pts, (_mean_grade(mean_pts) if n else "—")
+
+
+def _compute(db: Session, *, tenant_id: UUID, class_code: str, term_id: UUID) -> ClassTermResults:
+    rows = db.execute(
+        _RESULTS_SQL,
+        {"class_code": class_code, "tid": str(tenant_id), "term_id": str(term_id)},
+    ).mappings().all()
+
+    students: dict[str, dict] = {}
+    for r in rows:
+        student = students.get(r["enrollment_id"])
+        if student is None:
+            student = students[r["enrollment_id"]] = {
+                "student_id": r["student_id"],
+                "student_name": (r["student_name"] or "") if r["has_student"] else "Unknown Student",
+                "admission_no": r["admission_no"],
+                "subjects": [],
+            }
+        if r["subject_id"] is not None:
+            student["subjects"].append(_subject_result(
+                subject_id=r["subject_id"],
+                subject_name=r["subject_name"],
+                total_marks=r["total_marks"],
+                total_max=r["total_max"],
+                remarks=r["remarks"],
+            ))
+
+    summaries = {eid: _summarize(s["subjects"]) for eid, s in students.items()}
+    means = sorted((summary[1] for summary in summaries.values()), reverse=True)
+    # Competition ranking: one plus the number of students with a higher mean.
+    first_position = {}
+    for index, mean in enumerate(means, start=1):
+        first_position.setdefault(mean, index)
+
+    ranked = sorted(
+        (
+            StudentResult(
+                enrollment_id=eid,
+                student_id=s["student_id"],
+                student_name=s["student_name"],
+                admission_no=s["admission_no"],
+                subjects=tuple(s["subjects"]),
+                total_marks=summaries[eid][0],
+                mean_percentage=summaries[eid][1],
+                mean_grade_points=summaries[eid][2],
+                mean_grade=summaries[eid][3],
+                position=first_position[summaries[eid][1]],
+            )
+            for eid, s in students.items()
+        ),
+        key=lambda r: (r.position, r.student_name.lower(), r.enrollment_id),
+    )
+    return ClassTermResults(class_code=class_code, term_id=str(term_id), ranked=tuple(ranked))
+
+
+def class_term_results(db: Session, *, tenant_id: UUID, class_code: str, term_id: UUID) -> ClassTermResults:
+    """Every student's results and position for (class, term), cached."""
+    key = (str(tenant_id), class_code, str(term_id))
+    cached = _cache.lookup(key)
+    if cached is not MISSING:
+        return cached
+    results = _compute(db, tenant_id=tenant_id, class_code=class_code, term_id=term_id)
+    _cache.set(key, results)
+    return results
+
+
+# ---------------------------------------------------------------------
+# Invalidation
+# ---------------------------------------------------------------------
+
+def _on_evict(tenant_id: str) -> None:
+    _cache.pop_where(lambda key, _value: key[0] == tenant_id)
+
+
+cache_bus.subscribe(EVICT_CHANNEL, _on_evict)
+
+
+def invalidate_class_results(tenant_id: UUID | str) -> None:
+    """Drop the tenant's cached class results on every worker."""
+    cache_bus.dispatch(EVICT_CHANNEL, str(tenant_id))
+    run_from_sync(cache_bus.publish, EVICT_CHANNEL, str(tenant_id))
+
+
+def invalidate_class_results_after_commit(db: Session, tenant_id: UUID | str) -> None:
+    event.listen(db, "after_commit", lambda _session: invalidate_class_results(tenant_id), once=True)
+
+
+def class_results_cache_snapshot() -> dict[str, object]:
+    return _cache.snapshot()
+
+
+def clear_local_class_results_cache() -> None:
+    _cache.clear()
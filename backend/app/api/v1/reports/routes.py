@@ -29,64 +29,17 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_tenant, require_permission
 
+from .results import StudentResult, class_term_results
 from .schemas import (
     ClassResultRow,
     ReportCardOut,
     RemarksOut,
     RemarksUpsertIn,
-    SubjectResultOut,
     _VALID_CONDUCT,
 )
 
 router = APIRouter()
 
-# ── 8-4-4 grade helpers ───────────────────────────────────────────────────────
-
-_GRADE_SCALE = [
-    (80, "A",  12),
-    (75, "A-", 11),
-    (70, "B+", 10),
-    (65, "B",   9),
-    (60, "B-",  8),
-    (55, "C+",  7),
-    (50, "C",   6),
-    (45, "C-",  5),
-    (40, "D+",  4),
-    (35, "D",   3),
-    (30, "D-",  2),
-    (0,  "E",   1),
-]
-
-_MEAN_GRADE_POINTS = [
-    (11.5, "A"),
-    (10.5, "A-"),
-    (9.5,  "B+"),
-    (8.5,  "B"),
-    (7.5,  "B-"),
-    (6.5,  "C+"),
-    (5.5,  "C"),
-    (4.5,  "C-"),
-    (3.5,  "D+"),
-    (2.5,  "D"),
-    (1.5,  "D-"),
-    (0.0,  "E"),
-]
-
-
-def _grade_for_pct(pct: float) -> tuple[str, int]:
-    for threshold, letter, pts in _GRADE_SCALE:
-        if pct >= threshold:
-            return letter, pts
-    return "E", 1
-
-
-def _mean_grade(mean_pts: float) -> str:
-    for threshold, letter in _MEAN_GRADE_POINTS:
-        if mean_pts >= threshold:
-            return letter
-    return "E"
-
-
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _now_utc() -> datetime:
@@ -138,49 +91,6 @@ def _student_info(db: Session, *, student_id: str | None, tenant_id: UUID) -> di
     return dict(row)
 
 
-def _get_marks(db: Session, *, enrollment_id: UUID, term_id: UUID, tenant_id: UUID) -> list[SubjectResultOut]:
-    """Aggregate all exam marks for one enrollment in a term."""
-    rows = db.execute(
-        sa.text(
-            """
-            SELECT
-                em.subject_id,
-                ts.name AS subject_name,
-                SUM(em.marks_obtained) AS total_marks,
-                SUM(em.max_marks)      AS total_max,
-                MAX(em.remarks)        AS remarks
-            FROM core.tenant_exam_marks em
-            JOIN core.tenant_exams e  ON e.id  = em.exam_id
-            JOIN core.tenant_subjects ts ON ts.id = em.subject_id
-            WHERE em.student_enrollment_id = :eid
-              AND em.tenant_id = :tid
-              AND e.term_id    = :term_id
-            GROUP BY em.subject_id, ts.name
-            ORDER BY ts.name ASC
-            """
-        ),
-        {"eid": str(enrollment_id), "tid": str(tenant_id), "term_id": str(term_id)},
-    ).mappings().all()
-
-    results = []
-    for r in rows:
-        total_m = float(r["total_marks"] or 0)
-        total_x = float(r["total_max"] or 100)
-        pct = round(total_m / total_x * 100, 2) if total_x else 0.0
-        grade, pts = _grade_for_pct(pct)
-        results.append(SubjectResultOut(
-            subject_id=_str(r["subject_id"]) or "",
-            subject_name=str(r["subject_name"]),
-            marks_obtained=round(total_m, 2),
-            max_marks=round(total_x, 2),
-            percentage=pct,
-            grade=grade,
-            grade_points=pts,
-            remarks=_str(r.get("remarks")),
-        ))
-    return results
-
-
 def _get_remarks(db: Session, *, enrollment_id: UUID, term_id: UUID, tenant_id: UUID) -> dict | None:
     row = db.execute(
         sa.text(
@@ -195,25 +105,39 @@ def _get_remarks(db: Session, *, enrollment_id: UUID, term_id: UUID, tenant_id:
     return dict(row) if row else None
 
 
-def _build_report_card(
-    db: Session,
-    *,
-    enrollment_id: UUID,
-    tenant_id: UUID,
-    term: dict,
-    all_class_means: dict[str, float] | None = None,
-) -> ReportCardOut:
-    enr = _require_enrollment(db, enrollment_id=enrollment_id, tenant_id=tenant_id)
-    info = _student_info(db, student_id=_str(enr.get("student_id")), tenant_id=tenant_id)
+def _term_class_code(db: Session, *, enrollment_id: UUID, term_id: UUID, tenant_id: UUID) -> str:
+    """The class the enrollment sat the term's exams in ("" without marks).
+    A student moved mid-term is reported in the class of their latest exam."""
+    row = db.execute(
+        sa.text(
+            "SELECT em.class_code FROM core.tenant_exam_marks em "
+            "JOIN core.tenant_exams e ON e.id = em.exam_id "
+            "WHERE em.student_enrollment_id = :eid AND em.tenant_id = :tid "
+            "AND e.term_id = :term_id "
+            "ORDER BY e.start_date DESC NULLS LAST, e.created_at DESC, em.id DESC LIMIT 1"
+        ),
+        {"eid": str(enrollment_id), "tid": str(tenant_id), "term_id": str(term_id)},
+    ).mappings().first()
+    return str(row["class_code"]) if row else ""
+
 
-    subjects = _get_marks(db, enrollment_id=enrollment_id, term_id=UUID(str(term["id"])), tenant_id=tenant_id)
+def _build_report_card(db: Session, *, enrollment_id: UUID, tenant_id: UUID, term: dict) -> ReportCardOut:
+    enr = _require_enrollment(db, enrollment_id=enrollment_id, tenant_id=tenant_id)
+    term_id = UUID(str(term["id"]))
 
-    # Aggregate
-    n = len(subjects)
-    mean_pct = round(sum(s.percentage for s in subjects) / n, 2) if n else 0.0
-    mean_pts = round(sum(s.grade_points for s in subjects) / n, 2) if n else 0.0
-    total_marks = round(sum(s.marks_obtained for s in subjects), 2)
-    overall_grade = _mean_grade(mean_pts) if n else "—"
+    # Subjects, means and position come from the class-term results.
+    class_code = _term_class_code(db, enrollment_id=enrollment_id, term_id=term_id, tenant_id=tenant_id)
+    result: StudentResult | None = None
+    out_of = None
+    if class_code:
+        class_results = class_term_results(db, tenant_id=tenant_id, class_code=class_code, term_id=term_id)
+        result = class_results.for_enrollment(enrollment_id)
+        out_of = class_results.out_of if result else None
+    if result is None:
+        info = _student_info(db, student_id=_str(enr.get("student_id")), tenant_id=tenant_id)
+        student_name, admission_no = str(info.get("student_name") or ""), _str(info.get("admission_no"))
+    else:
+        student_name, admission_no = result.student_name, result.admission_no
 
     # Attendance (Phase 2)
     att = db.execute(
@@ -243,41 +167,22 @@ def _build_report_card(
     att_present = int(att["present"] or 0) if att else None
     att_rate    = round(att_present / att_total, 4) if att_total else None
 
-    # Class code (from marks table or remarks)
-    class_code_row = db.execute(
-        sa.text(
-            "SELECT class_code FROM core.tenant_exam_marks "
-            "WHERE student_enrollment_id = :eid AND tenant_id = :tid LIMIT 1"
-        ),
-        {"eid": str(enrollment_id), "tid": str(tenant_id)},
-    ).mappings().first()
-    class_code = str(class_code_row["class_code"]) if class_code_row else ""
-
-    # Position
-    position = None
-    out_of = None
-    if all_class_means is not None and str(enrollment_id) in all_class_means:
-        sorted_means = sorted(all_class_means.values(), reverse=True)
-        my_mean = all_class_means[str(enrollment_id)]
-        position = sorted_means.index(my_mean) + 1
-        out_of = len(all_class_means)
-
-    remarks = _get_remarks(db, enrollment_id=enrollment_id, term_id=UUID(str(term["id"])), tenant_id=tenant_id)
+    remarks = _get_remarks(db, enrollment_id=enrollment_id, term_id=term_id, tenant_id=tenant_id)
 
     return ReportCardOut(
         enrollment_id=str(enrollment_id),
         student_id=_str(enr.get("student_id")),
-        student_name=str(info.get("student_name") or ""),
-        admission_no=_str(info.get("admission_no")),
+        student_name=student_name,
+        admission_no=admission_no,
         class_code=class_code,
         term_id=str(term["id"]),
         term_name=str(term["name"]),
-        subjects=subjects,
-        total_marks=total_marks,
-        mean_percentage=mean_pct,
-        mean_grade_points=mean_pts,
-        mean_grade=overall_grade,
-        position=position,
+        subjects=list(result.subjects) if result else [],
+        total_marks=result.total_marks if result else 0.0,
+        mean_percentage=result.mean_percentage if result else 0.0,
+        mean_grade_points=result.mean_grade_points if result else 0.0,
+        mean_grade=result.mean_grade if result else "—",
+        position=result.position if result else None,
         out_of=out_of,
         attendance_total=att_total if att_total is not None and att_total > 0 else None,
         attendance_present=att_present,
@@ -291,24 +196,6 @@ def _build_report_card(
     )
 
 
-def _get_class_enrollment_ids(db: Session, *, class_code: str, term_id: UUID, tenant_id: UUID) -> list[str]:
-    """Return all enrollment IDs that have marks for this class + term."""
-    rows = db.execute(
-        sa.text(
-            """
-            SELECT DISTINCT em.student_enrollment_id
-            FROM core.tenant_exam_marks em
-            JOIN core.tenant_exams e ON e.id = em.exam_id
-            WHERE em.class_code = :class_code
-              AND em.tenant_id  = :tid
-              AND e.term_id     = :term_id
-            """
-        ),
-        {"class_code": class_code, "tid": str(tenant_id), "term_id": str(term_id)},
-    ).fetchall()
-    return [str(r[0]) for r in rows]
-
-
 # ── Routes ─────────────────────────────────────────────────────────────────────
 
 @router.get(
@@ -323,60 +210,22 @@ def get_class_results(
     tenant=Depends(get_tenant),
     _user=Depends(get_current_user),
 ):
-    term = _require_term(db, term_id=term_id, tenant_id=tenant.id)
-    enrollment_ids = _get_class_enrollment_ids(db, class_code=class_code, term_id=term_id, tenant_id=tenant.id)
-
-    if not enrollment_ids:
-        return []
-
-    # Compute mean percentage per enrollment for ranking
-    class_means: dict[str, float] = {}
-    rows_data: list[dict] = []
-
-    for eid in enrollment_ids:
-        enr = db.execute(
-            sa.text("SELECT id, student_id FROM core.enrollments WHERE id = :id AND tenant_id = :tid LIMIT 1"),
-            {"id": eid, "tid": str(tenant.id)},
-        ).mappings().first()
-        if not enr:
-            continue
-
-        subjects = _get_marks(db, enrollment_id=UUID(eid), term_id=term_id, tenant_id=tenant.id)
-        n = len(subjects)
-        mean_pct = round(sum(s.percentage for s in subjects) / n, 2) if n else 0.0
-        mean_pts = round(sum(s.grade_points for s in subjects) / n, 2) if n else 0.0
-        total_marks = round(sum(s.marks_obtained for s in subjects), 2)
-        overall_grade = _mean_grade(mean_pts) if n else "—"
-
-        info = _student_info(db, student_id=_str(enr.get("student_id")), tenant_id=tenant.id)
-        class_means[eid] = mean_pct
-        rows_data.append({
-            "enrollment_id": eid,
-            "student_id": _str(enr.get("student_id")),
-            "student_name": str(info.get("student_name") or ""),
-            "admission_no": _str(info.get("admission_no")),
-            "total_marks": total_marks,
-            "mean_percentage": mean_pct,
-            "mean_grade": overall_grade,
-            "subjects_sat": n,
-        })
-
-    # Rank by mean percentage (descending)
-    rows_data.sort(key=lambda r: r["mean_percentage"], reverse=True)
-    results = []
-    for pos, r in enumerate(rows_data, start=1):
-        results.append(ClassResultRow(
-            enrollment_id=r["enrollment_id"],
-            student_id=r["student_id"],
-            student_name=r["student_name"],
-            admission_no=r["admission_no"],
-            total_marks=r["total_marks"],
-            mean_percentage=r["mean_percentage"],
-            mean_grade=r["mean_grade"],
-            position=pos,
-            subjects_sat=r["subjects_sat"],
-        ))
-    return results
+    _require_term(db, term_id=term_id, tenant_id=tenant.id)
+    results = class_term_results(db, tenant_id=tenant.id, class_code=class_code, term_id=term_id)
+    return [
+        ClassResultRow(
+            enrollment_id=r.enrollment_id,
+            student_id=r.student_id,
+            student_name=r.student_name,
+            admission_no=r.admission_no,
+            total_marks=r.total_marks,
+            mean_percentage=r.mean_percentage,
+            mean_grade=r.mean_grade,
+            position=r.position,
+            subjects_sat=r.subjects_sat,
+        )
+        for r in results.ranked
+    ]
 
 
 @router.get(
@@ -393,31 +242,7 @@ def get_student_report_card(
 ):
     term = _require_term(db, term_id=term_id, tenant_id=tenant.id)
 
-    # Get class_code from marks to compute position within class
-    cc_row = db.execute(
-        sa.text(
-            "SELECT class_code FROM core.tenant_exam_marks "
-            "WHERE student_enrollment_id = :eid AND tenant_id = :tid LIMIT 1"
-        ),
-        {"eid": str(enrollment_id), "tid": str(tenant.id)},
-    ).mappings().first()
-    class_code = str(cc_row["class_code"]) if cc_row else ""
-
-    class_means: dict[str, float] = {}
-    if class_code:
-        eids = _get_class_enrollment_ids(db, class_code=class_code, term_id=term_id, tenant_id=tenant.id)
-        for eid in eids:
-            subjs = _get_marks(db, enrollment_id=UUID(eid), term_id=term_id, tenant_id=tenant.id)
-            n = len(subjs)
-            class_means[eid] = round(sum(s.percentage for s in subjs) / n, 2) if n else 0.0
-
-    return _build_report_card(
-        db,
-        enrollment_id=enrollment_id,
-        tenant_id=tenant.id,
-        term=term,
-        all_class_means=class_means or None,
-    )
+    return _build_report_card(db, enrollment_id=enrollment_id, tenant_id=tenant.id, term=term)
 
 
 @router.put(
@@ -587,31 +412,8 @@ def download_report_card_pdf(
 
     term = _require_term(db, term_id=term_id, tenant_id=tenant.id)
 
-    # Gather the same data as the JSON endpoint
-    cc_row = db.execute(
-        sa.text(
-            "SELECT class_code FROM core.tenant_exam_marks "
-            "WHERE student_enrollment_id = :eid AND tenant_id = :tid LIMIT 1"
-        ),
-        {"eid": str(enrollment_id), "tid": str(tenant.id)},
-    ).mappings().first()
-    class_code = str(cc_row["class_code"]) if cc_row else ""
-
-    class_means: dict[str, float] = {}
-    if class_code:
-        eids = _get_class_enrollment_ids(db, class_code=class_code, term_id=term_id, tenant_id=tenant.id)
-        for eid in eids:
-            subjs = _get_marks(db, enrollment_id=UUID(eid), term_id=term_id, tenant_id=tenant.id)
-            n = len(subjs)
-            class_means[eid] = round(sum(s.percentage for s in subjs) / n, 2) if n else 0.0
-
-    card = _build_report_card(
-        db,
-        enrollment_id=enrollment_id,
-        tenant_id=tenant.id,
-        term=term,
-        all_class_means=class_means or None,
-    )
+    # Same data as the JSON endpoint
+    card = _build_report_card(db, enrollment_id=enrollment_id, tenant_id=tenant.id, term=term)
 
     # Tenant name for school header
     tenant_name = getattr(tenant, "name", "School")
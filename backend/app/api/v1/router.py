@@ -1,6 +1,13 @@
 from fastapi import APIRouter, Depends
 
 from app.core.subscription_gate import gate
+from app.api.v1.tenants.dashboard_sections import (
+    SCOPE_ACADEMICS,
+    SCOPE_ENROLLMENTS,
+    SCOPE_FINANCE,
+    SCOPE_PEOPLE,
+    invalidates_dashboard,
+)
 from app.api.v1.tenants.routes import router as tenants_router
 from app.api.v1.auth.routes import router as auth_router
 from app.api.v1.audit.routes import router as audit_router
@@ -25,15 +32,26 @@ from app.api.v1.parents.routes import router as parents_router
 from app.api.v1.portal.routes import router as portal_router
 from app.api.v1.director.routes import router as director_router
 from app.api.v1.changelog.routes import router as changelog_router
+from app.api.v1.jobs.routes import router as jobs_router
 
 api_router = APIRouter()
 
+# Dashboard sections are cached per tenant; each router below drops the
+# scopes its writes can change once they commit (the tenants router can
+# touch every section).
+
 # Core tenant + identity
-api_router.include_router(tenants_router, prefix="/tenants", tags=["tenants"])
+api_router.include_router(
+    tenants_router, prefix="/tenants", tags=["tenants"],
+    dependencies=[Depends(invalidates_dashboard())],
+)
 
 # ✅ Compatibility alias for older frontend paths:
 # /api/v1/tenant/classes -> same as /api/v1/tenants/classes
-api_router.include_router(tenants_router, prefix="/tenant", tags=["tenant-compat"])
+api_router.include_router(
+    tenants_router, prefix="/tenant", tags=["tenant-compat"],
+    dependencies=[Depends(invalidates_dashboard())],
+)
 
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
 
@@ -50,11 +68,11 @@ api_router.include_router(admin_router, prefix="/admin", tags=["admin"])
 # gated so a lapsed tenant can always reach the renewal flow.
 api_router.include_router(
     enrollments_router, prefix="/enrollments", tags=["enrollments"],
-    dependencies=[Depends(gate())],
+    dependencies=[Depends(gate()), Depends(invalidates_dashboard(SCOPE_ENROLLMENTS, SCOPE_FINANCE))],
 )
 api_router.include_router(
     finance_router, prefix="/finance", tags=["finance"],
-    dependencies=[Depends(gate())],
+    dependencies=[Depends(gate()), Depends(invalidates_dashboard(SCOPE_FINANCE))],
 )
 api_router.include_router(support_router, prefix="/support", tags=["support"])
 api_router.include_router(payments_router, prefix="/payments", tags=["payments"])
@@ -63,13 +81,13 @@ api_router.include_router(public_router, prefix="/public", tags=["public"])
 # SIS
 api_router.include_router(
     students_router, prefix="/students", tags=["students"],
-    dependencies=[Depends(gate())],
+    dependencies=[Depends(gate()), Depends(invalidates_dashboard(SCOPE_ENROLLMENTS))],
 )
 
 # Attendance
 api_router.include_router(
     attendance_router, prefix="/attendance", tags=["attendance"],
-    dependencies=[Depends(gate())],
+    dependencies=[Depends(gate()), Depends(invalidates_dashboard(SCOPE_ACADEMICS))],
 )
 
 # Reports (8-4-4 Report Cards)
@@ -110,15 +128,18 @@ api_router.include_router(sms_admin_router, prefix="/admin/sms", tags=["admin-sm
 # HR Module (Phase 6) — leave, payroll, SMS recipients
 api_router.include_router(
     hr_router, prefix="/tenants", tags=["hr"],
-    dependencies=[Depends(gate("hr"))],
+    dependencies=[Depends(gate("hr")), Depends(invalidates_dashboard(SCOPE_PEOPLE))],
 )
 api_router.include_router(
     hr_router, prefix="/tenant", tags=["hr-compat"],
-    dependencies=[Depends(gate("hr"))],
+    dependencies=[Depends(gate("hr")), Depends(invalidates_dashboard(SCOPE_PEOPLE))],
 )
 
 # Parent Portal (Phase 7) — guardian management, bulk payments
-api_router.include_router(parents_router, prefix="/parents", tags=["parents"])
+api_router.include_router(
+    parents_router, prefix="/parents", tags=["parents"],
+    dependencies=[Depends(invalidates_dashboard(SCOPE_FINANCE, SCOPE_ENROLLMENTS))],
+)
 
 # Parent Portal (Phase 7) — parent-facing read-only dashboard
 api_router.include_router(portal_router, prefix="/portal", tags=["portal"])
@@ -128,3 +149,7 @@ api_router.include_router(director_router, prefix="/director", tags=["director"]
 
 # In-app changelog / "What's New" (tenant-facing — never subscription-gated)
 api_router.include_router(changelog_router, prefix="/changelog", tags=["changelog"])
+
+# Background jobs queued by the async mode of the bulk endpoints (never
+# gated — a lapsed tenant can still watch or cancel a running job)
+api_router.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
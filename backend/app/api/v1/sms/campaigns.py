@@ -0,0 +1,365 @@
+"""Fee-reminder SMS campaigns.
+
+send_bulk_fee_reminders used to call send_single_sms once per parent —
+re-locking the credit account and making a provider round trip each time —
+and stopped at the first insufficient-credit error. A campaign instead:
+
+  - builds every recipient and rendered body from one aggregate query;
+  - reserves the credits for all of them at once and queues them through
+    the SMS outbox (app.api.v1.sms.outbox), each message tagged with the
+    campaign id, so its status is the recipient's status;
+  - is sent by the outbox's batched dispatcher — an sms.dispatch job, or
+    inline for the synchronous endpoint — after which its counts and status
+    are settled from its messages;
+  - can be resumed: its FAILED recipients are re-queued (their credits
+    reserved again) and dispatched once more.
+
+Bodies are rendered from a template with {guardian_name}, {student_names}
+and {balance} placeholders; unknown placeholders are left as written.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.api.v1.sms import outbox
+from app.core.audit import log_event
+from app.core.jobs import enqueue_job, job_url
+from app.models.sms import SmsCampaign, SmsMessage, SmsTemplate
+
+CAMPAIGN_FEE_REMINDER = "FEE_REMINDER"
+RESUMABLE_STATUSES = frozenset({"PARTIAL", "FAILED", "CANCELLED"})
+
+DEFAULT_FEE_REMINDER_TEMPLATE = (
+    "Dear {guardian_name}, this is a reminder that {student_names} "
+    "has/have an outstanding fee balance of {balance}. "
+    "Please visit the school office to make payment. Thank you."
+)
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def render_message(template: str, values: dict[str, str]) -> str:
+    return _PLACEHOLDER.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+
+def _fmt_kes(amount: object) -> str:
+    try:
+        return f"KES {Decimal(str(amount)):,.2f}"
+    except Exception:
+        return f"KES {amount}"
+
+
+def _fee_reminder_rows(db: Session, *, tenant_id: UUID) -> list[dict]:
+    """Outstanding balance and children per parent, largest balance first."""
+    return [
+        dict(row)
+        for row in db.execute(sa.text("""
+            SELECT
+                p.phone,
+                p.first_name || ' ' || p.last_name     AS guardian_name,
+                SUM(i.balance_amount)                  AS total_outstanding,
+                STRING_AGG(DISTINCT e.student_name, ', ') AS student_names
+            FROM core.parents p
+            JOIN core.parent_enrollment_links pel ON pel.parent_id = p.id
+            JOIN core.enrollments e  ON e.id = pel.enrollment_id
+            JOIN core.invoices i     ON i.enrollment_id = e.id
+            WHERE pel.tenant_id = :tid
+              AND i.tenant_id   = :tid
+              AND i.balance_amount > 0
+              AND p.phone IS NOT NULL AND p.phone <> ''
+            GROUP BY p.id, p.phone, p.first_name, p.last_name
+            HAVING SUM(i.balance_amount) > 0
+            ORDER BY SUM(i.balance_amount) DESC
+        """), {"tid": str(tenant_id)}).mappings().all()
+    ]
+
+
+def create_fee_reminder_campaign(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    message_template: Optional[str] = None,
+    template_id: Optional[UUID] = None,
+) -> SmsCampaign:
+    """Render, reserve credits for and queue a fee reminder to every parent
+    with an outstanding balance. Parents whose phone is not a valid Kenyan
+    number (or repeats one already queued) are skipped. Raises ValueError
+    when the credits don't cover every message. The caller commits and
+    dispatches (queue_campaign_dispatch or dispatch_campaign)."""
+    from app.api.v1.sms.service import _normalize_phone
+
+    if template_id is not None:
+        tmpl = db.execute(
+            sa.select(SmsTemplate).where(SmsTemplate.id == template_id, SmsTemplate.tenant_id == tenant_id)
+        ).scalar_one_or_none()
+        if tmpl is None:
+            raise ValueError("Template not found")
+        message_template = tmpl.body
+    template = (message_template or "").strip() or DEFAULT_FEE_REMINDER_TEMPLATE
+
+    messages: list[dict] = []
+    seen: set[str] = set()
+    skipped = 0
+    for row in _fee_reminder_rows(db, tenant_id=tenant_id):
+        try:
+            phone = _normalize_phone(row["phone"])
+        except ValueError:
+            skipped += 1
+            continue
+        if phone in seen:
+            skipped += 1
+            continue
+        seen.add(phone)
+        body = render_message(template, {
+            "guardian_name": row["guardian_name"] or "Parent",
+            "student_names": row["student_names"] or "your child",
+            "balance": _fmt_kes(row["total_outstanding"]),
+        })
+        messages.append({"phone": phone, "name": row["guardian_name"], "body": body})
+
+    campaign = SmsCampaign(
+        tenant_id=tenant_id,
+        kind=CAMPAIGN_FEE_REMINDER,
+        status="QUEUED" if messages else "COMPLETED",
+        message_template=template,
+        total_recipients=len(messages),
+        skipped_count=skipped,
+        created_by=actor_user_id,
+        completed_at=None if messages else _now_utc(),
+    )
+    db.add(campaign)
+    db.flush()
+    _, units = outbox.queue_messages(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        messages=messages,
+        campaign_id=campaign.id,
+        template_id=template_id,
+    )
+    campaign.units_reserved = units
+
+    log_event(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        action="sms.campaign.create",
+        resource="sms_campaign",
+        resource_id=campaign.id,
+        payload={"kind": CAMPAIGN_FEE_REMINDER, "recipients": len(messages),
+                 "skipped": skipped, "units_reserved": units},
+        meta=None,
+    )
+    return campaign
+
+
+def queue_campaign_dispatch(db: Session, *, campaign: SmsCampaign, actor_user_id: Optional[UUID]) -> None:
+    """Queue the sms.dispatch job that sends the campaign (caller commits)."""
+    from app.api.v1.sms import jobs as sms_jobs
+
+    if campaign.total_recipients == 0:
+        return
+    job = enqueue_job(
+        db,
+        tenant_id=campaign.tenant_id,
+        kind=sms_jobs.DISPATCH,
+        params={"campaign_id": str(campaign.id)},
+        actor_user_id=actor_user_id,
+    )
+    campaign.job_id = job.id
+
+
+def campaign_counts(db: Session, *, campaign_id: UUID) -> dict[str, int]:
+    rows = db.execute(
+        sa.select(SmsMessage.status, sa.func.count())
+        .where(SmsMessage.campaign_id == campaign_id)
+        .group_by(SmsMessage.status)
+    ).all()
+    by_status = {status: int(n) for status, n in rows}
+    return {
+        "queued": by_status.get("QUEUED", 0) + by_status.get("SENDING", 0),
+        "sent": by_status.get("SENT", 0) + by_status.get("DELIVERED", 0),
+        "failed": by_status.get("FAILED", 0),
+    }
+
+
+def settle_campaign(db: Session, *, campaign: SmsCampaign) -> dict[str, int]:
+    """Refresh the campaign's counters from its messages and, once none is
+    still QUEUED, its final status."""
+    counts = campaign_counts(db, campaign_id=campaign.id)
+    campaign.sent_count = counts["sent"]
+    campaign.failed_count = counts["failed"]
+    if counts["queued"] == 0:
+        if counts["failed"] == 0:
+            campaign.status = "COMPLETED"
+        elif counts["sent"] == 0:
+            campaign.status = "FAILED"
+        else:
+            campaign.status = "PARTIAL"
+        campaign.completed_at = _now_utc()
+    db.flush()
+    return counts
+
+
+def get_campaign(db: Session, *, tenant_id: UUID, campaign_id: UUID) -> Optional[SmsCampaign]:
+    return db.execute(
+        sa.select(SmsCampaign).where(SmsCampaign.id == campaign_id, SmsCampaign.tenant_id == tenant_id)
+    ).scalar_one_or_none()
+
+
+def get_job_campaign(db: Session, *, tenant_id: UUID, job_id: UUID) -> Optional[SmsCampaign]:
+    """The campaign a background run created, if it got that far."""
+    return db.execute(
+        sa.select(SmsCampaign)
+        .where(SmsCampaign.tenant_id == tenant_id, SmsCampaign.job_id == job_id)
+        .order_by(SmsCampaign.created_at.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def dispatch_campaign(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    campaign_id: UUID,
+    progress: Optional[Callable[..., None]] = None,
+) -> dict:
+    """Send the campaign's QUEUED messages (see outbox.dispatch_messages)
+    and settle it. Returns the dispatch counts plus the campaign status."""
+    campaign = get_campaign(db, tenant_id=tenant_id, campaign_id=campaign_id)
+    if campaign is None:
+        raise ValueError("Campaign not found")
+    campaign.status = "SENDING"
+    db.flush()
+    result = outbox.dispatch_messages(
+        db, tenant_id=tenant_id, campaign_id=campaign_id, progress=progress
+    )
+    settle_campaign(db, campaign=campaign)
+    return {**result, "campaign_id": str(campaign.id), "status": campaign.status}
+
+
+def cancel_campaign_dispatch(db: Session, *, tenant_id: UUID, campaign_id: UUID) -> None:
+    """A cancelled dispatch: fail and refund what was not sent."""
+    outbox.release_queued(db, tenant_id=tenant_id, campaign_id=campaign_id, reason="Dispatch cancelled")
+    campaign = get_campaign(db, tenant_id=tenant_id, campaign_id=campaign_id)
+    if campaign is not None:
+        settle_campaign(db, campaign=campaign)
+        campaign.status = "CANCELLED"
+
+
+def resume_campaign(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    campaign_id: UUID,
+    actor_user_id: Optional[UUID],
+) -> SmsCampaign:
+    """Re-queue the campaign's FAILED recipients — reserving their credits
+    again — and queue another dispatch (caller commits). Raises ValueError
+    when there is nothing to resume or the credits are short.
+
+    The campaign row is locked, so two concurrent resumes run one after the
+    other (the second finds it QUEUED), and the credits reserved are those
+    of the rows this call actually flipped back to QUEUED."""
+    campaign = db.execute(
+        sa.select(SmsCampaign)
+        .where(SmsCampaign.id == campaign_id, SmsCampaign.tenant_id == tenant_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if campaign is None:
+        raise ValueError("Campaign not found")
+    if campaign.status not in RESUMABLE_STATUSES:
+        raise ValueError(f"Campaign is {campaign.status}; only a partly failed or cancelled campaign can be resumed")
+    units = sum(
+        db.execute(
+            sa.update(SmsMessage)
+            .where(SmsMessage.campaign_id == campaign.id, SmsMessage.status == "FAILED")
+            .values(status="QUEUED", error_message=None, provider_message_id=None, sent_at=None)
+            .returning(SmsMessage.units_deducted)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+    if not units:
+        raise ValueError("Campaign has no failed recipients to resume")
+    # Short credits raise here; the caller's rollback undoes the re-queue.
+    outbox.reserve_credits(db, tenant_id=tenant_id, units=int(units))
+    campaign.status = "QUEUED"
+    campaign.completed_at = None
+    campaign.units_reserved = int(campaign.units_reserved or 0) + int(units)
+    queue_campaign_dispatch(db, campaign=campaign, actor_user_id=actor_user_id)
+
+    log_event(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        action="sms.campaign.resume",
+        resource="sms_campaign",
+        resource_id=campaign.id,
+        payload={"units_reserved": int(units)},
+        meta=None,
+    )
+    db.flush()
+    return campaign
+
+
+def list_campaigns(db: Session, *, tenant_id: UUID, limit: int = 50, offset: int = 0) -> list[SmsCampaign]:
+    return list(
+        db.execute(
+            sa.select(SmsCampaign)
+            .where(SmsCampaign.tenant_id == tenant_id)
+            .order_by(SmsCampaign.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+        ).scalars().all()
+    )
+
+
+def list_campaign_recipients(
+    db: Session,
+    *,
+    campaign_id: UUID,
+    status: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[dict]:
+    from app.api.v1.sms.service import _message_to_dict
+
+    q = sa.select(SmsMessage).where(SmsMessage.campaign_id == campaign_id)
+    if status:
+        q = q.where(SmsMessage.status == status.strip().upper())
+    rows = db.execute(
+        q.order_by(SmsMessage.created_at, SmsMessage.id).offset(offset).limit(limit)
+    ).scalars().all()
+    return [_message_to_dict(m) for m in rows]
+
+
+def campaign_to_dict(db: Session, campaign: SmsCampaign) -> dict:
+    counts = campaign_counts(db, campaign_id=campaign.id)
+    return {
+        "id": str(campaign.id),
+        "kind": campaign.kind,
+        "status": campaign.status,
+        "message_template": campaign.message_template,
+        "total_recipients": campaign.total_recipients,
+        "skipped": campaign.skipped_count,
+        "queued": counts["queued"],
+        "sent": counts["sent"],
+        "failed": counts["failed"],
+        "units_reserved": campaign.units_reserved,
+        "job_id": str(campaign.job_id) if campaign.job_id else None,
+        "job_url": job_url(campaign.job_id) if campaign.job_id else None,
+        "created_at": campaign.created_at.isoformat() if campaign.created_at else None,
+        "completed_at": campaign.completed_at.isoformat() if campaign.completed_at else None,
+    }
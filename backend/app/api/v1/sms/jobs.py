@@ -0,0 +1,72 @@
+"""Background job handlers for bulk SMS runs. See app.core.jobs."""
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.api.v1.sms import campaigns, outbox
+from app.api.v1.sms.notifications import send_bulk_fee_reminders
+from app.core.jobs import JobCancelled, JobContext, register_job
+
+FEE_REMINDERS = "sms.fee_reminders"
+DISPATCH = "sms.dispatch"
+
+
+@register_job(FEE_REMINDERS, permission="sms.send")
+def run_fee_reminders(db: Session, job: JobContext) -> dict:
+    def progress(done: int, total: int | None = None, **counts) -> None:
+        # Messages already handed to the provider can't be unsent, so their
+        # credit deductions are committed before a cancellation can unwind
+        # the transaction.
+        db.commit()
+        job.progress(done, total, **counts)
+
+    try:
+        return send_bulk_fee_reminders(
+            db,
+            tenant_id=job.tenant_id,
+            actor_user_id=job.actor_user_id,
+            progress=progress,
+            job_id=job.job_id,
+        )
+    except JobCancelled:
+        db.rollback()
+        # The campaign (tagged with this job) was committed by the first
+        # progress call; fail and refund what it has not sent.
+        campaign = campaigns.get_job_campaign(db, tenant_id=job.tenant_id, job_id=job.job_id)
+        if campaign is not None:
+            campaigns.cancel_campaign_dispatch(db, tenant_id=job.tenant_id, campaign_id=campaign.id)
+        db.commit()
+        raise
+
+
+@register_job(DISPATCH, permission="sms.send")
+def run_dispatch(db: Session, job: JobContext) -> dict:
+    """Send queued outbox messages (params: message_ids, or campaign_id)."""
+    campaign_id = UUID(str(job.params["campaign_id"])) if job.params.get("campaign_id") else None
+    message_ids = [UUID(str(m)) for m in job.params.get("message_ids") or []]
+
+    def progress(done: int, total: int | None = None, **counts) -> None:
+        # Outcomes of requests already sent are kept across a cancellation.
+        db.commit()
+        job.progress(done, total, **counts)
+
+    try:
+        if campaign_id is not None:
+            return campaigns.dispatch_campaign(
+                db, tenant_id=job.tenant_id, campaign_id=campaign_id, progress=progress
+            )
+        return outbox.dispatch_messages(
+            db, tenant_id=job.tenant_id, message_ids=message_ids, progress=progress
+        )
+    except JobCancelled:
+        db.rollback()
+        if campaign_id is not None:
+            campaigns.cancel_campaign_dispatch(db, tenant_id=job.tenant_id, campaign_id=campaign_id)
+        else:
+            outbox.release_queued(
+                db, tenant_id=job.tenant_id, message_ids=message_ids, reason="Dispatch cancelled"
+            )
+        db.commit()
+        raise
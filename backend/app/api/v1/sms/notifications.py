@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import logging
 from decimal import Decimal
+from typing import Callable
 from uuid import UUID
 
 import sqlalchemy as sa
@@ -136,6 +137,31 @@ def fire_invoice_notification(
         logger.warning("fire_invoice_notification failed (non-fatal): %s", exc)
 
 
+def fire_bulk_invoice_notifications(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: UUID,
+    invoice_ids: list[UUID],
+) -> None:
+    """fire_invoice_notification for each of a batch of just-published
+    invoices. Silently no-ops on any error."""
+    try:
+        from app.models.invoice import Invoice
+
+        invoices = db.execute(
+            sa.select(Invoice).where(Invoice.tenant_id == tenant_id, Invoice.id.in_(invoice_ids))
+        ).scalars().all()
+        for inv in invoices:
+            fire_invoice_notification(
+                db, tenant_id=tenant_id, actor_user_id=actor_user_id,
+                enrollment_id=inv.enrollment_id,
+                invoice_no=inv.invoice_no, total_amount=inv.total_amount,
+            )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("fire_bulk_invoice_notifications failed (non-fatal): %s", exc)
+
+
 def fire_payment_notification(
     db: Session,
     *,
@@ -186,64 +212,39 @@ def send_bulk_fee_reminders(
     *,
     tenant_id: UUID,
     actor_user_id: UUID,
+    progress: Callable[..., None] | None = None,
+    job_id: UUID | None = None,
 ) -> dict:
     """Send fee reminder SMS to all parents with outstanding balances.
 
-    Groups by parent phone so each parent gets one consolidated message even
-    if they have multiple children with outstanding fees. Returns a summary dict.
+    Runs a fee-reminder campaign (app.api.v1.sms.campaigns) to completion
+    in the caller: each parent gets one consolidated message even if they
+    have multiple children with outstanding fees; the credits for all of
+    them are reserved up front (ValueError when short) and the messages go
+    out through the batched outbox sender. `progress(done, total, **counts)`
+    is called as provider requests complete (background job runs). A
+    background run passes its `job_id`: the campaign is tagged with it, and
+    a rerun of the same job (requeued after its worker died) finishes that
+    campaign instead of reserving and sending a second one. Returns a
+    summary dict.
     """
-    from app.api.v1.sms.service import send_single_sms
-
-    tid = str(tenant_id)
-
-    # Aggregate outstanding per parent-phone, collecting student names
-    rows = db.execute(sa.text("""
-        SELECT
-            p.phone,
-            p.first_name || ' ' || p.last_name AS guardian_name,
-            SUM(i.balance_amount)               AS total_outstanding,
-            STRING_AGG(DISTINCT e.payload->>'student_name', ', ') AS student_names
-        FROM core.parents p
-        JOIN core.parent_enrollment_links pel ON pel.parent_id = p.id
-        JOIN core.enrollments e  ON e.id = pel.enrollment_id
-        JOIN core.invoices i     ON i.enrollment_id = e.id
-        WHERE pel.tenant_id = :tid
-          AND i.tenant_id   = :tid
-          AND i.balance_amount > 0
-          AND p.phone IS NOT NULL AND p.phone <> ''
-        GROUP BY p.id, p.phone, p.first_name, p.last_name
-        HAVING SUM(i.balance_amount) > 0
-        ORDER BY SUM(i.balance_amount) DESC
-    """), {"tid": tid}).mappings().all()
-
-    sent = 0
-    failed = 0
-    skipped = 0
-
-    for row in rows:
-        students = row["student_names"] or "your child"
-        balance = _fmt_kes(row["total_outstanding"])
-        body = (
-            f"Dear {row['guardian_name']}, this is a reminder that {students} "
-            f"has/have an outstanding fee balance of {balance}. "
-            f"Please visit the school office to make payment. Thank you."
+    from app.api.v1.sms import campaigns
+
+    campaign = None
+    if job_id is not None:
+        campaign = campaigns.get_job_campaign(db, tenant_id=tenant_id, job_id=job_id)
+    if campaign is None:
+        campaign = campaigns.create_fee_reminder_campaign(
+            db, tenant_id=tenant_id, actor_user_id=actor_user_id
         )
-        try:
-            send_single_sms(
-                db,
-                tenant_id=tenant_id,
-                actor_user_id=actor_user_id,
-                to_phone=row["phone"],
-                message_body=body,
-                recipient_name=row["guardian_name"],
-            )
-            sent += 1
-        except ValueError:
-            # Insufficient credits — stop sending, report how far we got
-            skipped += len(rows) - sent - failed - 1
-            break
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("Bulk reminder failed for %s: %s", row["phone"], exc)
-            failed += 1
-
-    return {"sent": sent, "failed": failed, "skipped": skipped, "total": len(rows)}
+        campaign.job_id = job_id
+    result = campaigns.dispatch_campaign(
+        db, tenant_id=tenant_id, campaign_id=campaign.id, progress=progress
+    )
+    return {
+        "sent": result["sent"],
+        "failed": result["failed"],
+        "skipped": campaign.skipped_count,
+        "total": campaign.total_recipients + campaign.skipped_count,
+        "campaign_id": str(campaign.id),
+    }
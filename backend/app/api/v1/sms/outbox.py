@@ -0,0 +1,307 @@
+"""SMS outbox: queue messages with their credits reserved, send them later.
+
+A broadcast used to hold the tenant's credit-account row lock while it
+called the provider once per recipient. Now it goes through the outbox:
+
+  - `queue_messages` reserves the credits for every message with one
+    conditional UPDATE and inserts all the QUEUED rows in one statement; the
+    caller commits together with a dispatch job (sms.jobs.DISPATCH);
+  - `dispatch_messages` (that job) sends the rows still QUEUED: recipients
+    of the same body share a multi-recipient provider request of at most
+    AT_MAX_RECIPIENTS_PER_REQUEST numbers, SMS_DISPATCH_CONCURRENCY requests
+    in flight, and each request's statuses and credit refunds are written
+    in bulk as it completes. Only the worker threads talk to the provider;
+    every DB write happens on the job's own session.
+
+Delivery follows the job queue: at-least-once. A run claims a request's
+rows (QUEUED → SENDING, FOR UPDATE SKIP LOCKED) just before sending it, so
+two runs over the same messages never both send one; a claim older than
+SMS_DISPATCH_CLAIM_TTL_SEC belongs to a run that died and is taken over. A
+cancelled run stops starting requests, records the ones in flight and
+leaves only never-claimed rows QUEUED for `release_queued`.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import JobCancelled
+from app.models.sms import SmsCreditAccount, SmsMessage
+from app.utils.at_provider import compute_units_for_message, recipient_succeeded, send_sms_batch
+
+logger = logging.getLogger(__name__)
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def reserve_credits(db: Session, *, tenant_id: UUID, units: int) -> int:
+    """Deduct `units` from the tenant's credit balance in one statement and
+    return the new balance. Raises ValueError when the balance is short."""
+    db.execute(
+        pg_insert(SmsCreditAccount)
+        .values(tenant_id=tenant_id, balance_units=0)
+        .on_conflict_do_nothing(index_elements=["tenant_id"])
+    )
+    balance = db.execute(
+        sa.update(SmsCreditAccount)
+        .where(
+            SmsCreditAccount.tenant_id == tenant_id,
+            SmsCreditAccount.balance_units >= units,
+        )
+        .values(
+            balance_units=SmsCreditAccount.balance_units - units,
+            updated_at=_now_utc(),
+        )
+        .returning(SmsCreditAccount.balance_units)
+    ).scalar()
+    if balance is None:
+        have = db.execute(
+            sa.select(SmsCreditAccount.balance_units).where(SmsCreditAccount.tenant_id == tenant_id)
+        ).scalar()
+        raise ValueError(
+            f"Insufficient SMS credits. Need {units}, have {have or 0}. "
+            "Please top up your SMS credits."
+        )
+    return int(balance)
+
+
+def refund_credits(db: Session, *, tenant_id: UUID, units: int) -> None:
+    if units <= 0:
+        return
+    db.execute(
+        sa.update(SmsCreditAccount)
+        .where(SmsCreditAccount.tenant_id == tenant_id)
+        .values(
+            balance_units=SmsCreditAccount.balance_units + units,
+            updated_at=_now_utc(),
+        )
+    )
+
+
+def queue_messages(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    actor_user_id: Optional[UUID],
+    messages: list[dict[str, Any]],
+    template_id: Optional[UUID] = None,
+    campaign_id: Optional[UUID] = None,
+    meta: Optional[dict] = None,
+) -> tuple[list[UUID], int]:
+    """Reserve credits for and insert `messages` as QUEUED rows.
+
+    Each message is {"phone": <normalized 254…>, "name": ..., "body": ...,
+    "meta": ...?}; a message's own meta overrides `meta`. Returns the new
+    row ids, in the order given, and the units reserved. The caller commits
+    and queues their dispatch.
+    """
+    if not messages:
+        return [], 0
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "to_phone": m["phone"],
+            "recipient_name": m.get("name"),
+            "message_body": m["body"],
+            "units_deducted": compute_units_for_message(m["body"]),
+            "status": "QUEUED",
+            "template_id": template_id,
+            "campaign_id": campaign_id,
+            "meta": m.get("meta", meta),
+            "created_by": actor_user_id,
+        }
+        for m in messages
+    ]
+    units = sum(r["units_deducted"] for r in rows)
+    reserve_credits(db, tenant_id=tenant_id, units=units)
+    ids = db.scalars(
+        sa.insert(SmsMessage).returning(SmsMessage.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    return list(ids), units
+
+
+def _send_request(body: str, phones: list[str]) -> dict[str, dict[str, Any]]:
+    return send_sms_batch(to=[f"+{phone}" for phone in phones], message=body)
+
+
+def _recipient_update(row, *, results: Optional[dict], error: Optional[str], sent_at: datetime) -> dict:
+    if error is None:
+        entry = results.get(f"+{row.to_phone}") or results.get(row.to_phone)
+        if entry is not None and recipient_succeeded(entry):
+            return {
+                "id": row.id,
+                "status": "SENT",
+                "provider_message_id": str(entry.get("messageId") or "").strip() or None,
+                "error_message": None,
+                "sent_at": sent_at,
+                "claimed_at": None,
+            }
+        error = str((entry or {}).get("status") or "No result from provider")
+    return {
+        "id": row.id,
+        "status": "FAILED",
+        "provider_message_id": None,
+        "error_message": error,
+        "sent_at": None,
+        "claimed_at": None,
+    }
+
+
+def _selected(tenant_id: UUID, message_ids: Optional[list[UUID]], campaign_id: Optional[UUID], status_clause=None):
+    """WHERE clause for the given messages — by id or by campaign — that
+    are still QUEUED (or match `status_clause`)."""
+    if status_clause is None:
+        status_clause = SmsMessage.status == "QUEUED"
+    clause = sa.and_(SmsMessage.tenant_id == tenant_id, status_clause)
+    if campaign_id is not None:
+        return sa.and_(clause, SmsMessage.campaign_id == campaign_id)
+    return sa.and_(clause, SmsMessage.id.in_(message_ids or []))
+
+
+def _claimable():
+    """QUEUED, or SENDING under a claim old enough that its run is gone."""
+    stale_before = _now_utc() - timedelta(seconds=int(settings.SMS_DISPATCH_CLAIM_TTL_SEC))
+    return sa.or_(
+        SmsMessage.status == "QUEUED",
+        sa.and_(SmsMessage.status == "SENDING", SmsMessage.claimed_at < stale_before),
+    )
+
+
+def _claim(db: Session, *, tenant_id: UUID, message_ids: list[UUID]) -> set[UUID]:
+    """Mark the claimable ones of `message_ids` SENDING for this run; rows
+    another run is claiming right now are skipped. Returns the claimed ids."""
+    claimable = (
+        sa.select(SmsMessage.id)
+        .where(_selected(tenant_id, message_ids, None, _claimable()))
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return set(
+        db.execute(
+            sa.update(SmsMessage)
+            .where(SmsMessage.id.in_(claimable))
+            .values(status="SENDING", claimed_at=_now_utc())
+            .returning(SmsMessage.id)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+
+
+def dispatch_messages(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    message_ids: Optional[list[UUID]] = None,
+    campaign_id: Optional[UUID] = None,
+    progress: Optional[Callable[..., None]] = None,
+) -> dict[str, int]:
+    """Send the given messages (or a campaign's) that are still QUEUED and
+    record each recipient's outcome; failed recipients get their units back.
+
+    `progress(done, total, sent=..., failed=...)` is called after each
+    provider request is applied (background job runs). When it raises
+    JobCancelled no further request is started; the ones in flight are
+    still recorded, then the cancellation is re-raised. Returns the counts.
+    """
+    rows = db.execute(
+        sa.select(SmsMessage.id, SmsMessage.to_phone, SmsMessage.message_body, SmsMessage.units_deducted)
+        .where(_selected(tenant_id, message_ids, campaign_id, _claimable()))
+        .order_by(SmsMessage.created_at, SmsMessage.id)
+    ).all()
+
+    by_body: dict[str, list] = defaultdict(list)
+    for row in rows:
+        by_body[row.message_body].append(row)
+    size = max(1, int(settings.AT_MAX_RECIPIENTS_PER_REQUEST))
+    pending = deque(
+        (body, group[i:i + size])
+        for body, group in by_body.items()
+        for i in range(0, len(group), size)
+    )
+
+    total = len(rows)
+    done = sent = failed = refunded = 0
+    if progress is not None:
+        progress(done, total, sent=sent, failed=failed)
+    workers = max(1, int(settings.SMS_DISPATCH_CONCURRENCY))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sms-dispatch")
+    in_flight: dict[Future, list] = {}
+    cancelled: Optional[JobCancelled] = None
+    try:
+        while True:
+            while cancelled is None and pending and len(in_flight) < workers:
+                body, group = pending.popleft()
+                claimed = _claim(db, tenant_id=tenant_id, message_ids=[row.id for row in group])
+                total -= len(group) - len(claimed)   # another run holds those
+                group = [row for row in group if row.id in claimed]
+                if group:
+                    in_flight[pool.submit(_send_request, body, [row.to_phone for row in group])] = group
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                group = in_flight.pop(future)
+                results, error = None, None
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    error = str(exc) or type(exc).__name__
+                    logger.error("SMS batch of %d failed for tenant %s: %s", len(group), tenant_id, error)
+                sent_at = _now_utc()
+                updates = [_recipient_update(row, results=results, error=error, sent_at=sent_at) for row in group]
+                db.execute(sa.update(SmsMessage), updates)
+                units_back = sum(
+                    row.units_deducted for row, upd in zip(group, updates) if upd["status"] == "FAILED"
+                )
+                refund_credits(db, tenant_id=tenant_id, units=units_back)
+
+                refunded += units_back
+                batch_sent = sum(1 for upd in updates if upd["status"] == "SENT")
+                sent += batch_sent
+                failed += len(group) - batch_sent
+                done += len(group)
+                if progress is not None:
+                    try:
+                        progress(done, total, sent=sent, failed=failed)
+                    except JobCancelled as exc:
+                        cancelled = cancelled or exc
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if cancelled is not None:
+        raise cancelled
+    return {"total": total, "sent": sent, "failed": failed, "units_refunded": refunded}
+
+
+def release_queued(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    reason: str,
+    message_ids: Optional[list[UUID]] = None,
+    campaign_id: Optional[UUID] = None,
+) -> int:
+    """Fail the given messages (or a campaign's) still QUEUED and refund
+    their units — a dispatch that will not run again. Returns how many were
+    released."""
+    released = db.execute(
+        sa.update(SmsMessage)
+        .where(_selected(tenant_id, message_ids, campaign_id))
+        .values(status="FAILED", error_message=reason)
+        .returning(SmsMessage.units_deducted)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    refund_credits(db, tenant_id=tenant_id, units=sum(released))
+    return len(released)
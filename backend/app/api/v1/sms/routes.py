@@ -9,16 +9,20 @@ import logging
 from decimal import Decimal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from app.api.v1.sms import campaigns
+from app.api.v1.sms import jobs as sms_jobs
 from app.api.v1.sms import service
 from app.api.v1.sms.schemas import (
     AdminAdjustCreditsIn,
     AdminCreditAccountOut,
     BroadcastOut,
     BroadcastSmsIn,
+    FeeReminderCampaignIn,
     SendSmsIn,
+    SmsCampaignOut,
     SmsCreditAccountOut,
     SmsMessageOut,
     SmsPricingOut,
@@ -31,6 +35,7 @@ from app.api.v1.sms.schemas import (
     TopupStatusOut,
 )
 from app.core.database import get_db
+from app.core.jobs import enqueue_job, job_accepted
 from app.core.dependencies import (
     get_current_user,
     get_current_user_saas,
@@ -181,7 +186,7 @@ def send_single(
     "/send/broadcast",
     response_model=BroadcastOut,
     dependencies=[Depends(require_permission("sms.send"))],
-    summary="Send the same message to multiple recipients (up to 500)",
+    summary="Queue the same message to multiple recipients (up to 500); a background job sends it",
 )
 def broadcast(
     body: BroadcastSmsIn,
@@ -215,20 +220,152 @@ def broadcast(
     summary="Send fee reminder SMS to all parents with outstanding balances",
 )
 def send_fee_reminders(
+    run_async: bool = Query(default=False, alias="async"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     user=Depends(get_current_user),
 ):
+    """async=true queues the run as a background job: 202 + job URL."""
+    if run_async:
+        job = enqueue_job(
+            db,
+            tenant_id=tenant.id,
+            kind=sms_jobs.FEE_REMINDERS,
+            params={},
+            actor_user_id=user.id,
+            idempotency_key=idempotency_key,
+        )
+        db.commit()
+        return job_accepted(job)
     from app.api.v1.sms.notifications import send_bulk_fee_reminders
     try:
         result = send_bulk_fee_reminders(db, tenant_id=tenant.id, actor_user_id=user.id)
         db.commit()
         return result
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# TENANT — Campaigns
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.post(
+    "/campaigns/fee-reminders",
+    response_model=SmsCampaignOut,
+    status_code=201,
+    dependencies=[Depends(require_permission("sms.send"))],
+    summary="Queue a fee-reminder campaign to every parent with an outstanding balance",
+)
+def create_fee_reminder_campaign(
+    body: FeeReminderCampaignIn,
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    user=Depends(get_current_user),
+):
+    try:
+        campaign = campaigns.create_fee_reminder_campaign(
+            db,
+            tenant_id=tenant.id,
+            actor_user_id=user.id,
+            message_template=body.message_template,
+            template_id=body.template_id,
+        )
+        campaigns.queue_campaign_dispatch(db, campaign=campaign, actor_user_id=user.id)
+        db.commit()
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
+    return campaigns.campaign_to_dict(db, campaign)
+
+
+@router.get(
+    "/campaigns",
+    response_model=list[SmsCampaignOut],
+    dependencies=[Depends(require_permission("sms.credits.view"))],
+    summary="List SMS campaigns for this tenant",
+)
+def list_campaigns(
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    _=Depends(get_current_user),
+):
+    rows = campaigns.list_campaigns(db, tenant_id=tenant.id, limit=limit, offset=offset)
+    return [campaigns.campaign_to_dict(db, c) for c in rows]
+
+
+@router.get(
+    "/campaigns/{campaign_id}",
+    response_model=SmsCampaignOut,
+    dependencies=[Depends(require_permission("sms.credits.view"))],
+    summary="Campaign progress: queued / sent / failed recipients",
+)
+def get_campaign(
+    campaign_id: UUID,
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    _=Depends(get_current_user),
+):
+    campaign = campaigns.get_campaign(db, tenant_id=tenant.id, campaign_id=campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaigns.campaign_to_dict(db, campaign)
+
+
+@router.get(
+    "/campaigns/{campaign_id}/recipients",
+    response_model=list[SmsMessageOut],
+    dependencies=[Depends(require_permission("sms.credits.view"))],
+    summary="A campaign's messages with their per-recipient status",
+)
+def list_campaign_recipients(
+    campaign_id: UUID,
+    status: str | None = Query(default=None, pattern="(?i)^(queued|sent|delivered|failed)$"),
+    limit: int = Query(default=100, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    _=Depends(get_current_user),
+):
+    if campaigns.get_campaign(db, tenant_id=tenant.id, campaign_id=campaign_id) is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaigns.list_campaign_recipients(
+        db, campaign_id=campaign_id, status=status, limit=limit, offset=offset
+    )
+
+
+@router.post(
+    "/campaigns/{campaign_id}/resume",
+    response_model=SmsCampaignOut,
+    dependencies=[Depends(require_permission("sms.send"))],
+    summary="Re-queue a campaign's failed recipients",
+)
+def resume_campaign(
+    campaign_id: UUID,
+    db: Session = Depends(get_db),
+    tenant=Depends(get_tenant),
+    user=Depends(get_current_user),
+):
+    if campaigns.get_campaign(db, tenant_id=tenant.id, campaign_id=campaign_id) is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    try:
+        campaign = campaigns.resume_campaign(
+            db, tenant_id=tenant.id, campaign_id=campaign_id, actor_user_id=user.id
+        )
+        db.commit()
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
+    return campaigns.campaign_to_dict(db, campaign)
+
+
 @router.get(
     "/messages",
     response_model=list[SmsMessageOut],
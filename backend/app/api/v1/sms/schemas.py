@@ -135,12 +135,39 @@ class BroadcastResultItem(BaseModel):
 
 class BroadcastOut(BaseModel):
     total: int
+    queued: int = 0
     sent: int
     failed: int
     units_deducted: int
+    job_id: str | None = None
     results: list[BroadcastResultItem]
 
 
+# ── Campaigns ─────────────────────────────────────────────────────────────────
+
+class FeeReminderCampaignIn(BaseModel):
+    # {guardian_name}, {student_names} and {balance} are filled in per parent.
+    message_template: str | None = Field(default=None, max_length=1600)
+    template_id: UUID | None = None
+
+
+class SmsCampaignOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    message_template: str
+    total_recipients: int
+    skipped: int
+    queued: int
+    sent: int
+    failed: int
+    units_reserved: int
+    job_id: str | None = None
+    job_url: str | None = None
+    created_at: str | None = None
+    completed_at: str | None = None
+
+
 # ── Templates ─────────────────────────────────────────────────────────────────
 
 class TemplateCreateIn(BaseModel):
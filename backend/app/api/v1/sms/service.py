@@ -13,9 +13,7 @@ import time
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, Optional
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 from uuid import UUID, uuid4
 
 from sqlalchemy import select, text as sa_text, func
@@ -23,8 +21,12 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import InternalError, OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 
+from app.api.v1.payments import reconciler
+from app.api.v1.sms import jobs as sms_jobs, outbox
+from app.core import http_client
 from app.core.audit import log_event
 from app.core.config import settings
+from app.core.jobs import enqueue_job
 from app.models.sms import SmsCreditAccount, SmsCreditTopup, SmsMessage, SmsPricing, SmsTemplate
 from app.utils.at_provider import (
     compute_units_for_message,
@@ -130,22 +132,29 @@ def _daraja_password(shortcode: str, passkey: str, ts: str) -> str:
 
 
 def _daraja_access_token() -> str:
-    creds = f"{settings.DARAJA_CONSUMER_KEY}:{settings.DARAJA_CONSUMER_SECRET}".encode()
-    auth = base64.b64encode(creds).decode()
-    body_bytes = None
+    """Cached OAuth token, shared with the subscription payment flow."""
     url = f"{_daraja_base_url()}/oauth/v1/generate?grant_type=client_credentials"
-    req = Request(url=url, method="GET")
-    req.add_header("Authorization", f"Basic {auth}")
-    timeout = int(settings.DARAJA_TIMEOUT_SEC or 30)
-    try:
-        with urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode())
-    except Exception as exc:
-        raise RuntimeError(f"Daraja OAuth failed: {exc}") from exc
-    token = str(data.get("access_token") or "").strip()
-    if not token:
-        raise RuntimeError("Daraja access token response missing access_token")
-    return token
+
+    def fetch() -> tuple[str, float]:
+        creds = f"{settings.DARAJA_CONSUMER_KEY}:{settings.DARAJA_CONSUMER_SECRET}".encode()
+        auth = base64.b64encode(creds).decode()
+        timeout = int(settings.DARAJA_TIMEOUT_SEC or 30)
+        try:
+            data = http_client.request(
+                "GET", url, headers={"Authorization": f"Basic {auth}"}, timeout_sec=timeout
+            ).json()
+        except Exception as exc:
+            raise RuntimeError(f"Daraja OAuth failed: {exc}") from exc
+        token = str(data.get("access_token") or "").strip()
+        if not token:
+            raise RuntimeError("Daraja access token response missing access_token")
+        try:
+            expires_in = float(data.get("expires_in") or 0)
+        except (TypeError, ValueError):
+            expires_in = 0.0
+        return token, expires_in
+
+    return http_client.token_cache.get((url, settings.DARAJA_CONSUMER_KEY), fetch)
 
 
 def _call_stk_push(*, phone_number: str, amount: Decimal, reference: str, description: str) -> dict[str, Any]:
@@ -174,19 +183,21 @@ def _call_stk_push(*, phone_number: str, amount: Decimal, reference: str, descri
         "TransactionDesc": description[:182],
     }
 
-    req_bytes = json.dumps(body).encode()
     url = f"{_daraja_base_url()}/mpesa/stkpush/v1/processrequest"
-    req = Request(url=url, data=req_bytes, method="POST")
-    req.add_header("Authorization", f"Bearer {token}")
-    req.add_header("Content-Type", "application/json")
     timeout = int(settings.DARAJA_TIMEOUT_SEC or 30)
     try:
-        with urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode())
-    except HTTPError as err:
-        detail = err.read().decode(errors="ignore")
-        raise RuntimeError(f"Daraja STK push failed ({err.code}): {detail}") from err
-    except (URLError, TimeoutError) as err:
+        data = http_client.request(
+            "POST",
+            url,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            body=json.dumps(body).encode(),
+            timeout_sec=timeout,
+        ).json()
+    except http_client.HttpStatusError as err:
+        if err.status == 401:
+            http_client.token_cache.invalidate()
+        raise RuntimeError(f"Daraja STK push failed ({err.status}): {err.text()}") from err
+    except http_client.HttpNetworkError as err:
         raise RuntimeError(f"Daraja network error: {err}") from err
 
     if str(data.get("ResponseCode") or "") != "0":
@@ -378,6 +389,13 @@ def initiate_topup(
     )
     db.add(topup)
     db.flush()
+    if not mock_fallback:
+        reconciler.track_checkout(
+            db,
+            kind=reconciler.KIND_SMS_TOPUP,
+            tenant_id=tenant_id,
+            checkout_request_id=checkout_id,
+        )
 
     log_event(
         db,
@@ -526,10 +544,11 @@ def handle_topup_daraja_callback(
     if not checkout_id:
         return {"ResultCode": 0, "ResultDesc": "Accepted (no CheckoutRequestID)"}
 
+    # Locked: the STK reconciler may be settling the same top-up.
     topup = db.execute(
-        select(SmsCreditTopup).where(
-            SmsCreditTopup.checkout_request_id == checkout_id
-        )
+        select(SmsCreditTopup)
+        .where(SmsCreditTopup.checkout_request_id == checkout_id)
+        .with_for_update()
     ).scalar_one_or_none()
 
     if topup is None:
@@ -585,6 +604,7 @@ def handle_topup_daraja_callback(
             result_desc=result_desc,
             callback_payload=payload,
         )
+    reconciler.forget_checkout(db, checkout_request_id=checkout_id)
 
     return {"ResultCode": 0, "ResultDesc": "Accepted"}
 
@@ -719,10 +739,13 @@ def broadcast_sms(
     template_id: UUID | None = None,
     meta: dict | None = None,
 ) -> dict:
-    """Send SMS to multiple recipients.
+    """Queue SMS to multiple recipients.
 
-    Deducts credits atomically upfront, then sends.
-    Returns summary with per-recipient results.
+    Reserves the credits and inserts every message as QUEUED up front (see
+    sms.outbox), then queues a dispatch job that sends them in
+    multi-recipient provider requests; failed recipients are refunded by the
+    job. The caller commits. Returns a summary with per-recipient message ids
+    and the dispatch job id.
     """
     if not message_body or not message_body.strip():
         raise ValueError("message_body cannot be empty")
@@ -731,9 +754,6 @@ def broadcast_sms(
     if len(recipients) > 500:
         raise ValueError("Maximum 500 recipients per broadcast")
 
-    units_per_msg = compute_units_for_message(message_body)
-    total_units = units_per_msg * len(recipients)
-
     # Normalise phones, deduplicate
     seen: set[str] = set()
     normalised_recipients: list[dict] = []
@@ -747,70 +767,27 @@ def broadcast_sms(
         if norm in seen:
             continue
         seen.add(norm)
-        normalised_recipients.append({"phone": norm, "name": name})
+        normalised_recipients.append({"phone": norm, "name": name, "body": message_body})
 
     if not normalised_recipients:
         raise ValueError("No valid phone numbers in recipients list")
 
-    total_units = units_per_msg * len(normalised_recipients)
-
-    acct = _get_or_create_credit_account(db, tenant_id=tenant_id)
-    db.execute(
-        sa_text("SELECT id FROM core.sms_credit_accounts WHERE id = :id FOR UPDATE"),
-        {"id": str(acct.id)},
+    message_ids, total_units = outbox.queue_messages(
+        db,
+        tenant_id=tenant_id,
+        actor_user_id=actor_user_id,
+        messages=normalised_recipients,
+        template_id=template_id,
+        meta=meta,
+    )
+    job = enqueue_job(
+        db,
+        tenant_id=tenant_id,
+        kind=sms_jobs.DISPATCH,
+        params={"message_ids": [str(mid) for mid in message_ids]},
+        actor_user_id=actor_user_id,
     )
-    db.refresh(acct)
-    if acct.balance_units < total_units:
-        raise ValueError(
-            f"Insufficient credits for broadcast. Need {total_units}, have {acct.balance_units}."
-        )
-
-    acct.balance_units -= total_units
-    acct.updated_at = _now_utc()
-
-    results: list[dict] = []
-    units_refund = 0
-
-    for r in normalised_recipients:
-        phone = r["phone"]
-        name = r["name"]
-        msg = SmsMessage(
-            tenant_id=tenant_id,
-            to_phone=phone,
-            recipient_name=name,
-            message_body=message_body,
-            units_deducted=units_per_msg,
-            status="QUEUED",
-            template_id=template_id,
-            meta=meta,
-            created_by=actor_user_id,
-        )
-        db.add(msg)
-        db.flush()
-
-        try:
-            e164 = _to_e164(phone)
-            response = send_sms(to=e164, message=message_body)
-            provider_id = extract_at_message_id(response)
-            at_status = extract_at_status(response)
-            msg.provider_message_id = provider_id
-            msg.status = at_status
-            msg.sent_at = _now_utc()
-            results.append({"phone": phone, "name": name, "status": at_status,
-                            "message_id": str(msg.id)})
-        except RuntimeError as exc:
-            msg.status = "FAILED"
-            msg.error_message = str(exc)
-            units_refund += units_per_msg
-            results.append({"phone": phone, "name": name, "status": "FAILED",
-                            "error": str(exc), "message_id": str(msg.id)})
-
-    # Refund for failed sends
-    if units_refund > 0:
-        acct.balance_units += units_refund
-        acct.updated_at = _now_utc()
 
-    sent_count = sum(1 for r in results if r["status"] == "SENT")
     log_event(
         db,
         tenant_id=tenant_id,
@@ -820,19 +797,24 @@ def broadcast_sms(
         resource_id=None,
         payload={
             "total": len(normalised_recipients),
-            "sent": sent_count,
-            "failed": len(normalised_recipients) - sent_count,
-            "units_deducted": total_units - units_refund,
+            "queued": len(message_ids),
+            "units_reserved": total_units,
+            "job_id": str(job.id),
         },
         meta=None,
     )
 
     return {
         "total": len(normalised_recipients),
-        "sent": sent_count,
-        "failed": len(normalised_recipients) - sent_count,
-        "units_deducted": total_units - units_refund,
-        "results": results,
+        "queued": len(message_ids),
+        "sent": 0,
+        "failed": 0,
+        "units_deducted": total_units,
+        "job_id": str(job.id),
+        "results": [
+            {"phone": r["phone"], "name": r["name"], "status": "QUEUED", "message_id": str(mid)}
+            for r, mid in zip(normalised_recipients, message_ids)
+        ],
     }
 
 
@@ -7,6 +7,8 @@ import sqlalchemy as sa
 from sqlalchemy.exc import InternalError, OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 
+from app.api.v1.tenants import notification_feed
+
 THREAD_STATUS_VALUES = {
     "OPEN",
     "WAITING_ADMIN",
@@ -622,6 +624,14 @@ def admin_send_message(
         },
     )
 
+    notification_feed.try_sync_notifications(
+        db,
+        tenant_id=tenant_id,
+        type="SUPPORT_REPLY",
+        items=[_reply_feed_item(_reply_notification(created, subject=thread.get("subject")))],
+        replace=False,
+    )
+
     created["sender_name"] = None
     created["sender_email"] = None
     return _serialize_message(created)
@@ -680,13 +690,16 @@ def tenant_thread_for_notifications(
     db: Session,
     *,
     tenant_id: UUID,
-    user_id: UUID,
+    user_id: UUID | None,
     limit: int,
     offset: int,
 ) -> list[dict[str, Any]]:
+    """Admin replies in the tenant's threads, newest first. With `user_id`,
+    replies that user sent themselves are left out."""
+    sender_filter = "AND m.sender_user_id IS DISTINCT FROM :user_id" if user_id is not None else ""
     rows = _run_mappings(
         db,
-        """
+        f"""
         SELECT m.id, m.thread_id, m.tenant_id, m.sender_user_id, m.sender_mode,
                m.body,
                t.subject,
@@ -696,27 +709,55 @@ def tenant_thread_for_notifications(
           ON t.id = m.thread_id
         WHERE m.tenant_id = :tenant_id
           AND m.sender_mode = 'SAAS_ADMIN'
-          AND m.sender_user_id IS DISTINCT FROM :user_id
+          {sender_filter}
         ORDER BY m.created_at DESC, m.id DESC
         LIMIT :limit OFFSET :offset
         """,
         {
             "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
+            "user_id": str(user_id) if user_id is not None else None,
             "limit": int(limit),
             "offset": int(offset),
         },
     )
-    out: list[dict[str, Any]] = []
-    for row in rows:
-        out.append(
-            {
-                "id": f"support-msg-{row.get('id')}",
-                "thread_id": str(row.get("thread_id") or ""),
-                "tenant_id": str(row.get("tenant_id") or ""),
-                "title": f"Admin replied: {str(row.get('subject') or 'Support')}",
-                "message": str(row.get("body") or "").strip()[:180],
-                "created_at": str(row.get("created_at") or ""),
-            }
+    return [_reply_notification(row, subject=row.get("subject")) for row in rows]
+
+
+def _reply_notification(row: dict[str, Any], *, subject: Any) -> dict[str, Any]:
+    return {
+        "id": f"support-msg-{row.get('id')}",
+        "thread_id": str(row.get("thread_id") or ""),
+        "tenant_id": str(row.get("tenant_id") or ""),
+        "sender_user_id": str(row.get("sender_user_id") or "") or None,
+        "title": f"Admin replied: {str(subject or 'Support')}",
+        "message": str(row.get("body") or "").strip()[:180],
+        "created_at": str(row.get("created_at") or ""),
+    }
+
+
+def _reply_feed_item(notification: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "notification_id": notification["id"],
+        "severity": "info",
+        "title": notification["title"] or "Admin replied to your support request",
+        "message": notification["message"] or "Open Contact Admin to view the reply.",
+        "entity_type": "support_thread",
+        "entity_id": notification["thread_id"] or None,
+        "occurred_at": notification["created_at"] or None,
+        # The admin who wrote the reply is not notified about it.
+        "exclude_user_id": notification["sender_user_id"],
+    }
+
+
+def support_reply_feed_items(db: Session, *, tenant_id: UUID, limit: int) -> list[dict[str, Any]]:
+    """Admin replies shaped for the tenant notification feed."""
+    return [
+        _reply_feed_item(row)
+        for row in tenant_thread_for_notifications(
+            db,
+            tenant_id=tenant_id,
+            user_id=None,
+            limit=limit,
+            offset=0,
         )
-    return out
+    ]
@@ -0,0 +1,234 @@
+"""Concurrent, cached dashboard sections.
+
+The principal / secretary dashboards and the secretary finance setup payload
+are each a handful of independent, best-effort sections (enrollments, exams,
+invoices, fee structures, …). They used to run one after another on the
+request's session, so a page waited on the sum of all sections and redid
+every query on each refresh. `load_sections` instead:
+
+  - runs the sections concurrently on a shared thread pool, each on its own
+    pooled connection (a Session bound to the request session's engine);
+  - gives each section a deadline — a slow section degrades to its default
+    and `ok=False` instead of holding the page; if it finishes later its
+    result still lands in the cache for the next refresh;
+  - caches each successful result per tenant with the section's own TTL,
+    tagged with invalidation scopes. Writes drop the affected scopes on
+    every worker once they commit (see `invalidates_dashboard`), so the TTL
+    is only the worst-case staleness when the cache bus is unreachable.
+
+Each result carries its freshness (live / cache / timeout / error, and when
+it was loaded) so the payload can tell the UI how old a section is.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import cache_bus
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.local_cache import MISSING, LocalTTLCache
+from app.core.redis import run_from_sync
+
+logger = logging.getLogger(__name__)
+
+_WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Invalidation scopes. A write drops every cached section of the tenant that
+# lists one of the written scopes.
+SCOPE_ACADEMICS = "academics"      # exams, events, timetable, teacher assignments
+SCOPE_ENROLLMENTS = "enrollments"  # enrollments / students
+SCOPE_FINANCE = "finance"          # policy, fee catalog, structures, invoices, payments, scholarships
+SCOPE_PEOPLE = "people"            # users, roles, audit trail
+ALL_SCOPES = frozenset({SCOPE_ACADEMICS, SCOPE_ENROLLMENTS, SCOPE_FINANCE, SCOPE_PEOPLE})
+
+EVICT_CHANNEL = "cache:dashboard"   # "<tenant_id>|<scope>" | "<tenant_id>|*"
+
+_cache = LocalTTLCache(
+    name="dashboard_sections",
+    max_entries=settings.DASHBOARD_SECTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DASHBOARD_SECTION_CACHE_TTL_SEC,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DashboardSection:
+    """One independently loadable part of a dashboard payload.
+
+    `load` receives a Session of its own and returns the section value.
+    `ttl_s=0` disables caching (per-user data). `cache_key` distinguishes
+    values of the same section that depend on more than the tenant.
+    """
+
+    name: str
+    load: Callable[[Session], Any]
+    scopes: frozenset[str] = ALL_SCOPES
+    ttl_s: float = settings.DASHBOARD_SECTION_CACHE_TTL_SEC
+    default: Any = None
+    cache_key: str = ""
+
+
+@dataclass
+class SectionResult:
+    value: Any
+    ok: bool
+    source: str                      # "live" | "cache" | "timeout" | "error"
+    loaded_at: Optional[datetime] = field(default=None)
+
+    def freshness(self) -> dict[str, Any]:
+        age = None
+        if self.loaded_at is not None:
+            age = round((datetime.now(timezone.utc) - self.loaded_at).total_seconds(), 3)
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "age_s": age,
+        }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(settings.DASHBOARD_SECTION_WORKERS)),
+                    thread_name_prefix="dashboard-section",
+                )
+    return _executor
+
+
+def _cache_key(tenant_id: UUID | str, namespace: str, section: DashboardSection) -> tuple[str, str, str, str]:
+    return (str(tenant_id), namespace, section.name, section.cache_key)
+
+
+def _run_section(bind, section: DashboardSection) -> tuple[Any, datetime]:
+    with Session(bind=bind, autoflush=False) as session:
+        value = section.load(session)
+        session.rollback()  # loaders that write commit themselves
+    return value, datetime.now(timezone.utc)
+
+
+def _store(key: tuple[str, str, str, str], section: DashboardSection, future: Future) -> None:
+    if section.ttl_s <= 0 or future.cancelled() or future.exception() is not None:
+        return
+    value, loaded_at = future.result()
+    _cache.set(key, (value, loaded_at, section.scopes), ttl_seconds=section.ttl_s)
+
+
+def load_sections(
+    db: Session,
+    *,
+    tenant_id: UUID | str,
+    namespace: str,
+    sections: list[DashboardSection],
+    timeout_s: Optional[float] = None,
+) -> dict[str, SectionResult]:
+    """Serve cached sections and load the rest concurrently, each within
+    `timeout_s` (DASHBOARD_SECTION_TIMEOUT_MS by default) of the call.
+
+    `namespace` names the dashboard, so sections of different dashboards
+    may share a name without sharing cache entries.
+    """
+    timeout = settings.DASHBOARD_SECTION_TIMEOUT_MS / 1000.0 if timeout_s is None else float(timeout_s)
+    results: dict[str, SectionResult] = {}
+    pending: dict[str, tuple[DashboardSection, Future]] = {}
+    bind = db.get_bind()
+    executor = _get_executor()
+
+    for section in sections:
+        key = _cache_key(tenant_id, namespace, section)
+        if section.ttl_s > 0:
+            hit = _cache.lookup(key)
+            if hit is not MISSING:
+                value, loaded_at, _scopes = hit
+                results[section.name] = SectionResult(value, True, "cache", loaded_at)
+                continue
+        future = executor.submit(_run_section, bind, section)
+        future.add_done_callback(lambda f, k=key, s=section: _store(k, s, f))
+        pending[section.name] = (section, future)
+
+    deadline = time.monotonic() + timeout
+    for name, (section, future) in pending.items():
+        try:
+            value, loaded_at = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            results[name] = SectionResult(value, True, "live", loaded_at)
+        except FutureTimeout:
+            logger.warning("Dashboard section %s timed out after %.1fs (tenant %s)", name, timeout, tenant_id)
+            results[name] = SectionResult(section.default, False, "timeout")
+        except Exception:
+            logger.warning("Dashboard section %s failed (tenant %s)", name, tenant_id, exc_info=True)
+            results[name] = SectionResult(section.default, False, "error")
+    return results
+
+
+def freshness(results: dict[str, SectionResult]) -> dict[str, dict[str, Any]]:
+    return {name: result.freshness() for name, result in results.items()}
+
+
+# ---------------------------------------------------------------------
+# Invalidation
+# ---------------------------------------------------------------------
+
+def _on_evict(message: str) -> None:
+    tenant_id, _, scope = message.partition("|")
+    if scope == "*":
+        _cache.pop_where(lambda key, _value: key[0] == tenant_id)
+    else:
+        _cache.pop_where(lambda key, value: key[0] == tenant_id and scope in value[2])
+
+
+cache_bus.subscribe(EVICT_CHANNEL, _on_evict)
+
+
+def invalidate_dashboard_sections(tenant_id: UUID | str, *scopes: str) -> None:
+    """Drop the tenant's cached sections for `scopes` (all when none given)
+    on every worker."""
+    for scope in scopes or ("*",):
+        message = f"{tenant_id}|{scope}"
+        cache_bus.dispatch(EVICT_CHANNEL, message)
+        run_from_sync(cache_bus.publish, EVICT_CHANNEL, message)
+
+
+def invalidate_dashboard_sections_after_commit(db: Session, tenant_id: UUID | str, *scopes: str) -> None:
+    event.listen(
+        db,
+        "after_commit",
+        lambda _session: invalidate_dashboard_sections(tenant_id, *scopes),
+        once=True,
+    )
+
+
+def invalidates_dashboard(*scopes: str):
+    """Router-level dependency: a write request that commits drops the
+    tenant's cached dashboard sections for `scopes` (all when none given).
+    Requests without a tenant context (SaaS routes) are left alone."""
+
+    def _dependency(request: Request, db: Session = Depends(get_db)) -> None:
+        tenant = getattr(request.state, "tenant", None)
+        if tenant is None or request.method.upper() not in _WRITE_METHODS:
+            return
+        invalidate_dashboard_sections_after_commit(db, tenant.id, *scopes)
+
+    return _dependency
+
+
+def dashboard_cache_snapshot() -> dict[str, object]:
+    return _cache.snapshot()
+
+
+def clear_local_dashboard_cache() -> None:
+    _cache.clear()
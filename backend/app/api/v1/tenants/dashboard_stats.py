@@ -2,13 +2,16 @@
 
 Centralises the queries behind the director KPI endpoint and the secretary
 dashboard endpoint so demographics, current-term finance, and detailed
-finance breakdowns are computed identically for both audiences. Strict
+finance breakdowns are computed identically for both audiences. The
+director-facing readers go through the per-tenant KPI snapshot at the end
+of this module. Strict
 visibility rules are applied at the *caller* level (the secretary endpoint
 deliberately drops collected-money aggregates from its payload); this module
 is the data layer.
 """
 from __future__ import annotations
 
+import json
 from datetime import date as _date
 from decimal import Decimal
 from typing import Any, Optional
@@ -17,6 +20,8 @@ from uuid import UUID
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+
 
 def _dec(value: Any) -> Decimal:
     if value is None:
@@ -50,30 +55,29 @@ def _normalize_gender(value: Any) -> str:
 def get_student_demographics(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
     """Tenant-scoped student counts + gender split. Counts active students
     only (status='ACTIVE') because withdrawn/archived rows aren't part of
-    the school today."""
-    rows = db.execute(
+    the school today. Bucketed in SQL (same tokens as _normalize_gender) so
+    no student rows leave the database."""
+    row = db.execute(
         sa.text(
             """
-            SELECT gender
-            FROM core.students
-            WHERE tenant_id = :tid
-              AND COALESCE(status, 'ACTIVE') = 'ACTIVE'
+            SELECT
+                COUNT(*)                                 AS total,
+                COUNT(*) FILTER (WHERE g = ANY(:male))   AS male,
+                COUNT(*) FILTER (WHERE g = ANY(:female)) AS female
+            FROM (
+                SELECT UPPER(BTRIM(gender, E' \\t\\r\\n')) AS g
+                FROM core.students
+                WHERE tenant_id = :tid
+                  AND COALESCE(status, 'ACTIVE') = 'ACTIVE'
+            ) s
             """
         ),
-        {"tid": str(tenant_id)},
-    ).all()
-    male = 0
-    female = 0
-    unspecified = 0
-    for (g,) in rows:
-        bucket = _normalize_gender(g)
-        if bucket == "MALE":
-            male += 1
-        elif bucket == "FEMALE":
-            female += 1
-        else:
-            unspecified += 1
-    total = male + female + unspecified
+        {"tid": str(tenant_id), "male": sorted(_MALE_TOKENS), "female": sorted(_FEMALE_TOKENS)},
+    ).mappings().first()
+    total = int(row["total"] or 0)
+    male = int(row["male"] or 0)
+    female = int(row["female"] or 0)
+    unspecified = total - male - female
     return {
         "total_students": total,
         "male_count": male,
@@ -141,50 +145,170 @@ def _resolve_current_term_by_date(
 
 
 # ── Finance aggregates ──────────────────────────────────────────────────────
+#
+# Every invoice aggregate the dashboards show (all-time totals, per-class,
+# per-term and the structured current term) comes out of one GROUPING SETS
+# pass over the tenant's non-cancelled invoices, and every payment
+# aggregate out of one pass over its payments. The public get_* helpers
+# project from these rollups.
 
-def get_finance_all_time(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
-    """All-time finance KPIs. Returns Decimal-as-float for JSON-friendly
-    serialisation (matches the existing /director/kpis shape)."""
-    fin = db.execute(
+# GROUPING(is_fees, class_code, academic_year, term_number) bitmask per set.
+_ALL_INVOICES = 0b1111
+_BY_CLASS = 0b0011
+_BY_TERM = 0b0100
+
+
+def _money_totals(r: Any) -> dict[str, Any]:
+    return {
+        "billed": float(_dec(r["billed"])),
+        "collected": float(_dec(r["collected"])),
+        "outstanding": float(_dec(r["outstanding"])),
+        "invoice_count": int(r["invoice_count"] or 0),
+    }
+
+
+def _invoice_rollup(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
+    """Returns {"all": row|None, "by_class": [rows], "by_term": [rows]};
+    by_class / by_term cover SCHOOL_FEES invoices only, by_term only rows
+    tagged with term_number + academic_year."""
+    rows = db.execute(
         sa.text(
             """
             SELECT
-                COALESCE(SUM(total_amount), 0)   AS total_billed,
-                COALESCE(SUM(paid_amount), 0)    AS total_collected,
-                COALESCE(SUM(balance_amount), 0) AS total_outstanding,
+                GROUPING(is_fees, class_code, academic_year, term_number) AS grp,
+                is_fees, class_code, academic_year, term_number,
+                COALESCE(SUM(total_amount), 0)   AS billed,
+                COALESCE(SUM(paid_amount), 0)    AS collected,
+                COALESCE(SUM(balance_amount), 0) AS outstanding,
                 COUNT(*)                          AS invoice_count
-            FROM core.invoices
-            WHERE tenant_id = :tid AND status != 'CANCELLED'
+            FROM (
+                SELECT
+                    i.total_amount, i.paid_amount, i.balance_amount,
+                    i.invoice_type = 'SCHOOL_FEES' AS is_fees,
+                    COALESCE(
+                        i.meta->>'class_code',
+                        e.payload->>'class_code',
+                        e.payload->>'admission_class',
+                        'UNCATEGORISED'
+                    ) AS class_code,
+                    i.academic_year, i.term_number
+                FROM core.invoices i
+                LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
+                WHERE i.tenant_id = :tid
+                  AND i.status != 'CANCELLED'
+            ) inv
+            GROUP BY GROUPING SETS (
+                (),
+                (is_fees, class_code),
+                (is_fees, academic_year, term_number)
+            )
+            ORDER BY grp, class_code ASC, academic_year ASC, term_number ASC
             """
         ),
         {"tid": str(tenant_id)},
-    ).mappings().first()
-    pay_count = db.execute(
-        sa.text("SELECT COUNT(*) FROM core.payments WHERE tenant_id = :tid"),
+    ).mappings().all()
+    rollup: dict[str, Any] = {"all": None, "by_class": [], "by_term": []}
+    for r in rows:
+        if r["grp"] == _ALL_INVOICES:
+            rollup["all"] = r
+        elif r["grp"] == _BY_CLASS and r["is_fees"]:
+            rollup["by_class"].append(r)
+        elif (
+            r["grp"] == _BY_TERM
+            and r["is_fees"]
+            and r["term_number"] is not None
+            and r["academic_year"] is not None
+        ):
+            rollup["by_term"].append(r)
+    return rollup
+
+
+def _payment_rollup(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
+    """Returns {"payment_count": int, "by_provider": [rows]} (largest first)."""
+    rows = db.execute(
+        sa.text(
+            """
+            SELECT GROUPING(provider)       AS grp,
+                   provider,
+                   COUNT(*)                 AS payment_count,
+                   COALESCE(SUM(amount), 0) AS amount
+            FROM (
+                SELECT COALESCE(UPPER(provider), 'OTHER') AS provider, amount
+                FROM core.payments
+                WHERE tenant_id = :tid
+            ) p
+            GROUP BY GROUPING SETS ((), (provider))
+            ORDER BY grp DESC, amount DESC
+            """
+        ),
         {"tid": str(tenant_id)},
-    ).scalar() or 0
-    tb = _dec(fin["total_billed"])
-    tc = _dec(fin["total_collected"])
+    ).mappings().all()
+    total = next((r for r in rows if r["grp"] == 1), None)
+    return {
+        "payment_count": int(total["payment_count"] or 0) if total else 0,
+        "by_provider": [r for r in rows if r["grp"] == 0],
+    }
+
+
+def _finance_all_time(invoices: dict[str, Any], payments: dict[str, Any]) -> dict[str, Any]:
+    totals = _money_totals(invoices["all"]) if invoices["all"] is not None else {
+        "billed": 0.0, "collected": 0.0, "outstanding": 0.0, "invoice_count": 0,
+    }
+    tb = _dec(totals["billed"])
+    tc = _dec(totals["collected"])
     return {
-        "total_billed": float(tb),
-        "total_collected": float(tc),
-        "total_outstanding": float(_dec(fin["total_outstanding"])),
-        "invoice_count": int(fin["invoice_count"] or 0),
+        "total_billed": totals["billed"],
+        "total_collected": totals["collected"],
+        "total_outstanding": totals["outstanding"],
+        "invoice_count": totals["invoice_count"],
         "collection_rate_pct": int(tc / tb * 100) if tb > 0 else 0,
-        "payment_count": int(pay_count),
+        "payment_count": payments["payment_count"],
     }
 
 
-def get_finance_current_term(
-    db: Session, *, tenant_id: UUID, current_term: Optional[dict[str, Any]]
-) -> Optional[dict[str, Any]]:
-    """Finance KPIs scoped to the *actual* current term by-date.
+def _finance_by_class(invoices: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"class_code": r["class_code"], **_money_totals(r)} for r in invoices["by_class"]]
 
-    Uses term_number + academic_year to filter invoices when available
-    (correct), and falls back to start_date/end_date windowing on
-    created_at when the term hasn't been tagged with the structured
-    identity yet (legacy compatibility for tenants pre-Phase B).
-    """
+
+def _finance_by_term(invoices: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "academic_year": int(r["academic_year"]),
+            "term_number": int(r["term_number"]),
+            "label": f"Term {r['term_number']} {r['academic_year']}",
+            **_money_totals(r),
+        }
+        for r in invoices["by_term"]
+    ]
+
+
+def _finance_by_provider(payments: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "provider": r["provider"],
+            "payment_count": int(r["payment_count"] or 0),
+            "amount": float(_dec(r["amount"])),
+        }
+        for r in payments["by_provider"]
+    ]
+
+
+def get_finance_all_time(db: Session, *, tenant_id: UUID) -> dict[str, Any]:
+    """All-time finance KPIs. Returns Decimal-as-float for JSON-friendly
+    serialisation (matches the existing /director/kpis shape)."""
+    return _finance_all_time(
+        _invoice_rollup(db, tenant_id=tenant_id),
+        _payment_rollup(db, tenant_id=tenant_id),
+    )
+
+
+def _finance_current_term(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    current_term: Optional[dict[str, Any]],
+    invoices: Optional[dict[str, Any]] = None,
+) -> Optional[dict[str, Any]]:
     if not current_term:
         return None
 
@@ -192,24 +316,19 @@ def get_finance_current_term(
     academic_year = current_term.get("academic_year")
 
     if term_number is not None and academic_year is not None:
-        tf = db.execute(
-            sa.text(
-                """
-                SELECT
-                    COALESCE(SUM(total_amount), 0)   AS term_billed,
-                    COALESCE(SUM(paid_amount), 0)    AS term_collected,
-                    COALESCE(SUM(balance_amount), 0) AS term_outstanding,
-                    COUNT(*)                          AS term_invoice_count
-                FROM core.invoices
-                WHERE tenant_id = :tid
-                  AND status != 'CANCELLED'
-                  AND invoice_type = 'SCHOOL_FEES'
-                  AND term_number = :tn
-                  AND academic_year = :yr
-                """
+        if invoices is None:
+            invoices = _invoice_rollup(db, tenant_id=tenant_id)
+        row = next(
+            (
+                r for r in invoices["by_term"]
+                if int(r["term_number"]) == int(term_number)
+                and int(r["academic_year"]) == int(academic_year)
             ),
-            {"tid": str(tenant_id), "tn": int(term_number), "yr": int(academic_year)},
-        ).mappings().first()
+            None,
+        )
+        totals = _money_totals(row) if row is not None else {
+            "billed": 0.0, "collected": 0.0, "outstanding": 0.0, "invoice_count": 0,
+        }
         scope = "structured"
     else:
         # Legacy fallback: window by created_at against the term's date range.
@@ -221,10 +340,10 @@ def get_finance_current_term(
             sa.text(
                 """
                 SELECT
-                    COALESCE(SUM(total_amount), 0)   AS term_billed,
-                    COALESCE(SUM(paid_amount), 0)    AS term_collected,
-                    COALESCE(SUM(balance_amount), 0) AS term_outstanding,
-                    COUNT(*)                          AS term_invoice_count
+                    COALESCE(SUM(total_amount), 0)   AS billed,
+                    COALESCE(SUM(paid_amount), 0)    AS collected,
+                    COALESCE(SUM(balance_amount), 0) AS outstanding,
+                    COUNT(*)                          AS invoice_count
                 FROM core.invoices
                 WHERE tenant_id = :tid
                   AND status != 'CANCELLED'
@@ -234,15 +353,16 @@ def get_finance_current_term(
             ),
             {"tid": str(tenant_id), "start": start, "end": end},
         ).mappings().first()
+        totals = _money_totals(tf)
         scope = "created_at_window"
 
-    tb = _dec(tf["term_billed"])
-    tc = _dec(tf["term_collected"])
+    tb = _dec(totals["billed"])
+    tc = _dec(totals["collected"])
     return {
-        "term_billed": float(tb),
-        "term_collected": float(tc),
-        "term_outstanding": float(_dec(tf["term_outstanding"])),
-        "term_invoice_count": int(tf["term_invoice_count"] or 0),
+        "term_billed": totals["billed"],
+        "term_collected": totals["collected"],
+        "term_outstanding": totals["outstanding"],
+        "term_invoice_count": totals["invoice_count"],
         "term_collection_rate_pct": int(tc / tb * 100) if tb > 0 else 0,
         "term_name": current_term.get("name"),
         "term_code": current_term.get("code"),
@@ -252,111 +372,38 @@ def get_finance_current_term(
     }
 
 
+def get_finance_current_term(
+    db: Session, *, tenant_id: UUID, current_term: Optional[dict[str, Any]]
+) -> Optional[dict[str, Any]]:
+    """Finance KPIs scoped to the *actual* current term by-date.
+
+    Uses term_number + academic_year to filter invoices when available
+    (correct), and falls back to start_date/end_date windowing on
+    created_at when the term hasn't been tagged with the structured
+    identity yet (legacy compatibility for tenants pre-Phase B).
+    """
+    return _finance_current_term(db, tenant_id=tenant_id, current_term=current_term)
+
+
 def get_finance_by_class(db: Session, *, tenant_id: UUID) -> list[dict[str, Any]]:
     """Per-class billed / collected / outstanding for SCHOOL_FEES invoices.
     Class is resolved from invoice.meta->>'class_code' first (set by the v2
     generator), falling back to the enrollment payload."""
-    rows = db.execute(
-        sa.text(
-            """
-            SELECT
-                COALESCE(
-                    i.meta->>'class_code',
-                    e.payload->>'class_code',
-                    e.payload->>'admission_class',
-                    'UNCATEGORISED'
-                ) AS class_code,
-                COALESCE(SUM(i.total_amount), 0)   AS billed,
-                COALESCE(SUM(i.paid_amount), 0)    AS collected,
-                COALESCE(SUM(i.balance_amount), 0) AS outstanding,
-                COUNT(*)                            AS invoice_count
-            FROM core.invoices i
-            LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
-            WHERE i.tenant_id = :tid
-              AND i.status != 'CANCELLED'
-              AND i.invoice_type = 'SCHOOL_FEES'
-            GROUP BY 1
-            ORDER BY 1 ASC
-            """
-        ),
-        {"tid": str(tenant_id)},
-    ).mappings().all()
-    return [
-        {
-            "class_code": r["class_code"],
-            "billed": float(_dec(r["billed"])),
-            "collected": float(_dec(r["collected"])),
-            "outstanding": float(_dec(r["outstanding"])),
-            "invoice_count": int(r["invoice_count"] or 0),
-        }
-        for r in rows
-    ]
+    return _finance_by_class(_invoice_rollup(db, tenant_id=tenant_id))
 
 
 def get_finance_by_term(db: Session, *, tenant_id: UUID) -> list[dict[str, Any]]:
     """Per-(academic_year, term_number) breakdown of SCHOOL_FEES invoices.
     Excludes legacy rows missing term_number/academic_year — those land
     under all-time but not in this chart."""
-    rows = db.execute(
-        sa.text(
-            """
-            SELECT academic_year, term_number,
-                   COALESCE(SUM(total_amount), 0)   AS billed,
-                   COALESCE(SUM(paid_amount), 0)    AS collected,
-                   COALESCE(SUM(balance_amount), 0) AS outstanding,
-                   COUNT(*)                          AS invoice_count
-            FROM core.invoices
-            WHERE tenant_id = :tid
-              AND status != 'CANCELLED'
-              AND invoice_type = 'SCHOOL_FEES'
-              AND term_number IS NOT NULL
-              AND academic_year IS NOT NULL
-            GROUP BY academic_year, term_number
-            ORDER BY academic_year ASC, term_number ASC
-            """
-        ),
-        {"tid": str(tenant_id)},
-    ).mappings().all()
-    return [
-        {
-            "academic_year": int(r["academic_year"]),
-            "term_number": int(r["term_number"]),
-            "label": f"Term {r['term_number']} {r['academic_year']}",
-            "billed": float(_dec(r["billed"])),
-            "collected": float(_dec(r["collected"])),
-            "outstanding": float(_dec(r["outstanding"])),
-            "invoice_count": int(r["invoice_count"] or 0),
-        }
-        for r in rows
-    ]
+    return _finance_by_term(_invoice_rollup(db, tenant_id=tenant_id))
 
 
 def get_finance_by_provider(db: Session, *, tenant_id: UUID) -> list[dict[str, Any]]:
     """Per-payment-provider totals (M-PESA / Cash / Bank / Cheque).
     Counts only payments themselves (not invoice paid_amount) so this is
     the authoritative 'where the money came in from' view."""
-    rows = db.execute(
-        sa.text(
-            """
-            SELECT COALESCE(UPPER(provider), 'OTHER') AS provider,
-                   COUNT(*)                            AS payment_count,
-                   COALESCE(SUM(amount), 0)            AS amount
-            FROM core.payments
-            WHERE tenant_id = :tid
-            GROUP BY 1
-            ORDER BY amount DESC
-            """
-        ),
-        {"tid": str(tenant_id)},
-    ).mappings().all()
-    return [
-        {
-            "provider": r["provider"],
-            "payment_count": int(r["payment_count"] or 0),
-            "amount": float(_dec(r["amount"])),
-        }
-        for r in rows
-    ]
+    return _finance_by_provider(_payment_rollup(db, tenant_id=tenant_id))
 
 
 def get_top_outstanding(
@@ -430,38 +477,34 @@ def get_scholarship_breakdown(
       top_beneficiaries — top-N students by ACTIVE allocation total
         (drives director's "who's on the biggest bursary" view)
     """
+    # Tenant-wide totals in one round trip. Phase M2: student-level grants
+    # live independently of allocations. A student may hold an ACTIVE grant
+    # that hasn't yet produced an allocation (e.g. no invoice this term yet)
+    # — we report both counts so the director can see forward-looking
+    # commitments as well.
     totals = db.execute(
         sa.text("""
             SELECT
-                COALESCE(SUM(amount), 0)                  AS total_discount,
-                COUNT(*)                                   AS allocation_count,
-                COUNT(DISTINCT student_id)
-                    FILTER (WHERE student_id IS NOT NULL) AS unique_recipients
-            FROM core.scholarship_allocations
-            WHERE tenant_id = :tid AND status = 'ACTIVE'
-        """),
-        {"tid": str(tenant_id)},
-    ).mappings().first()
-
-    active_scholarships = db.execute(
-        sa.text("""
-            SELECT COUNT(*) FROM core.scholarships
-            WHERE tenant_id = :tid AND is_active = TRUE
-        """),
-        {"tid": str(tenant_id)},
-    ).scalar() or 0
-
-    # Phase M2: student-level grants live independently of allocations.
-    # A student may hold an ACTIVE grant that hasn't yet produced an
-    # allocation (e.g. no invoice this term yet) — we report both counts
-    # so the director can see forward-looking commitments as well.
-    grant_totals = db.execute(
-        sa.text("""
-            SELECT
-                COUNT(*)                                   AS active_grants,
-                COUNT(DISTINCT student_id)                 AS unique_grant_recipients
-            FROM core.student_scholarship_grants
-            WHERE tenant_id = :tid AND status = 'ACTIVE'
+                a.total_discount, a.allocation_count, a.unique_recipients,
+                (SELECT COUNT(*) FROM core.scholarships
+                 WHERE tenant_id = :tid AND is_active = TRUE) AS active_scholarships,
+                g.active_grants, g.unique_grant_recipients
+            FROM (
+                SELECT
+                    COALESCE(SUM(amount), 0)                  AS total_discount,
+                    COUNT(*)                                   AS allocation_count,
+                    COUNT(DISTINCT student_id)
+                        FILTER (WHERE student_id IS NOT NULL) AS unique_recipients
+                FROM core.scholarship_allocations
+                WHERE tenant_id = :tid AND status = 'ACTIVE'
+            ) a
+            CROSS JOIN (
+                SELECT
+                    COUNT(*)                   AS active_grants,
+                    COUNT(DISTINCT student_id) AS unique_grant_recipients
+                FROM core.student_scholarship_grants
+                WHERE tenant_id = :tid AND status = 'ACTIVE'
+            ) g
         """),
         {"tid": str(tenant_id)},
     ).mappings().first()
@@ -577,10 +620,110 @@ def get_scholarship_breakdown(
             "total_discount_granted":  float(_dec(totals["total_discount"])),
             "active_allocations":      int(totals["allocation_count"] or 0),
             "unique_recipients":       int(totals["unique_recipients"] or 0),
-            "active_scholarships":     int(active_scholarships),
-            "active_grants":           int(grant_totals["active_grants"] or 0),
-            "unique_grant_recipients": int(grant_totals["unique_grant_recipients"] or 0),
+            "active_scholarships":     int(totals["active_scholarships"] or 0),
+            "active_grants":           int(totals["active_grants"] or 0),
+            "unique_grant_recipients": int(totals["unique_grant_recipients"] or 0),
         },
         "by_scholarship":     rows,
         "top_beneficiaries":  top_beneficiaries,
     }
+
+
+# ── KPI snapshot ────────────────────────────────────────────────────────────
+#
+# The director KPI endpoint, the group dashboard and the finance exports all
+# read the same bundle. It is stored per tenant in core.tenant_kpi_snapshots
+# and served as-is while it is current: triggers on the source tables drop a
+# marker into core.tenant_kpi_changes whenever a tenant's invoices,
+# payments, students, enrollments, terms or scholarships change, and a
+# marked (or day-old, or KPI_SNAPSHOT_MAX_AGE_SEC-old) snapshot is
+# recomputed on its next read.
+
+
+def compute_kpi_bundle(
+    db: Session, *, tenant_id: UUID, today: Optional[_date] = None
+) -> dict[str, Any]:
+    """Every dashboard aggregate for the tenant, JSON-safe."""
+    current = _resolve_current_term_by_date(db, tenant_id=tenant_id, today=today)
+    invoices = _invoice_rollup(db, tenant_id=tenant_id)
+    payments = _payment_rollup(db, tenant_id=tenant_id)
+    bundle = {
+        "all_time":        _finance_all_time(invoices, payments),
+        "current_term":    _finance_current_term(
+            db, tenant_id=tenant_id, current_term=current, invoices=invoices
+        ),
+        "demographics":    get_student_demographics(db, tenant_id=tenant_id),
+        "by_class":        _finance_by_class(invoices),
+        "by_term":         _finance_by_term(invoices),
+        "by_provider":     _finance_by_provider(payments),
+        "top_outstanding": get_top_outstanding(db, tenant_id=tenant_id, limit=20),
+        "scholarships":    get_scholarship_breakdown(db, tenant_id=tenant_id),
+        "active_term":     current,
+    }
+    return json.loads(json.dumps(bundle, default=str))
+
+
+def refresh_kpi_snapshot(
+    db: Session, *, tenant_id: UUID, today: Optional[_date] = None
+) -> dict[str, Any]:
+    """Recompute and store the tenant's snapshot. The caller commits.
+
+    Pending change markers are cleared *before* the aggregates are read, so
+    a change committed while this runs is either included or leaves a new
+    marker behind. The one gap — a writer that saw the old marker, skipped
+    its own and committed after the aggregates were read — is bounded by
+    KPI_SNAPSHOT_MAX_AGE_SEC.
+    """
+    today_d = today or _date.today()
+    db.execute(
+        sa.text("DELETE FROM core.tenant_kpi_changes WHERE tenant_id = :tid"),
+        {"tid": str(tenant_id)},
+    )
+    bundle = compute_kpi_bundle(db, tenant_id=tenant_id, today=today_d)
+    computed_at = db.execute(
+        sa.text(
+            """
+            INSERT INTO core.tenant_kpi_snapshots (tenant_id, payload, computed_on, computed_at)
+            VALUES (:tid, CAST(:payload AS jsonb), :on, now())
+            ON CONFLICT (tenant_id) DO UPDATE
+               SET payload = EXCLUDED.payload,
+                   computed_on = EXCLUDED.computed_on,
+                   computed_at = EXCLUDED.computed_at
+            RETURNING computed_at
+            """
+        ),
+        {"tid": str(tenant_id), "payload": json.dumps(bundle), "on": today_d},
+    ).scalar()
+    return {**bundle, "snapshot_at": computed_at.isoformat()}
+
+
+def get_kpi_snapshot(
+    db: Session, *, tenant_id: UUID, today: Optional[_date] = None
+) -> dict[str, Any]:
+    """The tenant's KPI bundle plus `snapshot_at`: one primary-key read when
+    the stored snapshot is current, otherwise a refresh (the caller commits
+    so the refreshed snapshot is kept)."""
+    today_d = today or _date.today()
+    row = db.execute(
+        sa.text(
+            """
+            SELECT s.payload, s.computed_on, s.computed_at,
+                   now() - s.computed_at AS age,
+                   EXISTS (
+                       SELECT 1 FROM core.tenant_kpi_changes c
+                       WHERE c.tenant_id = s.tenant_id
+                   ) AS stale
+            FROM core.tenant_kpi_snapshots s
+            WHERE s.tenant_id = :tid
+            """
+        ),
+        {"tid": str(tenant_id)},
+    ).mappings().first()
+    if (
+        row is not None
+        and not row["stale"]
+        and row["computed_on"] == today_d
+        and row["age"].total_seconds() < settings.KPI_SNAPSHOT_MAX_AGE_SEC
+    ):
+        return {**row["payload"], "snapshot_at": row["computed_at"].isoformat()}
+    return refresh_kpi_snapshot(db, tenant_id=tenant_id, today=today_d)
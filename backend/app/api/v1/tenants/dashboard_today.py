@@ -15,6 +15,8 @@ from uuid import UUID
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
+from app.core.schema_registry import resolve_existing_table
+
 
 def _parse_iso_date(value: Any) -> Optional[_date]:
     if not value:
@@ -26,17 +28,10 @@ def _parse_iso_date(value: Any) -> Optional[_date]:
 
 
 def _table_exists(db: Session, table_name: str) -> bool:
-    """Quick check using to_regclass — tolerates the table not being deployed
-    yet (the school-calendar/events tables are created on-demand in some
-    test envs)."""
-    schema, _, table = table_name.partition(".")
-    if not table:
-        schema, table = "public", schema
-    row = db.execute(
-        sa.text("SELECT to_regclass(:qualified) AS exists"),
-        {"qualified": f"{schema}.{table}"},
-    ).first()
-    return bool(row and row[0])
+    """In-memory check against the schema registry — tolerates the table not
+    being deployed yet (the school-calendar/events tables are created
+    on-demand in some test envs)."""
+    return resolve_existing_table(db, (table_name,))[0] is not None
 
 
 def _resolve_current_term_row(
@@ -158,20 +153,10 @@ def _today_general_events(
 ) -> list[dict[str, Any]]:
     """General /events whose date range overlaps today. Tolerant to optional
     columns (start_time, location, target_scope) being absent in older envs."""
-    table = "core.tenant_events"
-    if not _table_exists(db, table):
+    table, cols = resolve_existing_table(db, ("core.tenant_events",))
+    if not table:
         return []
-    # Probe for optional columns once so the SELECT can adapt.
-    col_row = db.execute(
-        sa.text(
-            """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'core' AND table_name = 'tenant_events'
-            """
-        )
-    ).all()
-    cols = {str(r[0]) for r in col_row}
+    # Optional columns come from the registry so the SELECT can adapt.
     required = {"id", "tenant_id", "name", "start_date", "end_date"}
     if not required.issubset(cols):
         return []
@@ -0,0 +1,536 @@
+"""Materialized tenant notification feed and unread counters.
+
+Notifications used to be derived on every request: four source scans
+(overdue assets, separated teachers, approved transfers, support replies),
+a Python sort and two read-state IN-list queries — even for the unread badge
+the frontend polls. They now live in core.tenant_notifications:
+
+  - the events that raise or clear a notification write the feed in the same
+    transaction (transfer approval, staff / teacher-assignment / asset
+    changes, admin support replies);
+  - a periodic sweep re-syncs every source per tenant, which is what picks up
+    time-based ones (an asset becoming overdue) and heals anything an event
+    hook missed;
+  - core.tenant_notification_counters keeps one unread count per user,
+    adjusted when notifications activate / resolve and when the user reads
+    or dismisses one, so the badge is a primary-key lookup. The sweep
+    recounts, so a counter that drifts under concurrent writes is corrected
+    within one interval.
+
+A notification is "unread" for a user while it is active, not hidden from
+them (exclude_user_id) and has no row in core.tenant_notification_reads.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, LatencyHistogram
+from app.models.notification import (
+    TenantNotification,
+    TenantNotificationCounter,
+    TenantNotificationRead,
+)
+
+logger = logging.getLogger(__name__)
+
+_feed = TenantNotification.__table__
+_reads = TenantNotificationRead.__table__
+_counters = TenantNotificationCounter.__table__
+
+# Session-level lock so only one worker sweeps at a time.
+_SWEEP_LOCK_KEY = "tenant-notification-sweep"
+
+_sweeps = Counter("notification_sweeps")
+_sweep_latency = LatencyHistogram("notification_sweep")
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    """Collectors hand back timestamps as text in whatever shape the source
+    stored them (ISO strings, `CAST(... AS TEXT)`, bare dates)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _visible_to(user_id: UUID):
+    return _feed.c.exclude_user_id.is_distinct_from(user_id)
+
+
+def _unread_for_user_clause(tenant_id: UUID, user_id: Any):
+    return ~sa.exists().where(
+        _reads.c.tenant_id == tenant_id,
+        _reads.c.user_id == user_id,
+        _reads.c.notification_id == _feed.c.notification_id,
+    )
+
+
+def _lock_tenant_feed(db: Session, tenant_id: UUID) -> None:
+    # Serializes feed writers for one tenant (event hooks vs the sweep) so
+    # two of them never count the same activation twice.
+    db.execute(
+        sa.text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+        {"key": f"tenant-notifications:{tenant_id}"},
+    )
+
+
+def _shift_counters(db: Session, *, tenant_id: UUID, notification_ids: list[str], sign: int) -> None:
+    """Add `sign` to every existing counter of the tenant once per listed
+    notification that is unread for that user. Users without a counter row
+    are initialized lazily (see unread_count)."""
+    if not notification_ids:
+        return
+    per_user = (
+        sa.select(_counters.c.user_id, sa.func.count().label("n"))
+        .select_from(_counters.join(_feed, _feed.c.tenant_id == _counters.c.tenant_id))
+        .where(
+            _counters.c.tenant_id == tenant_id,
+            _feed.c.notification_id.in_(notification_ids),
+            _feed.c.exclude_user_id.is_distinct_from(_counters.c.user_id),
+            _unread_for_user_clause(tenant_id, _counters.c.user_id),
+        )
+        .group_by(_counters.c.user_id)
+        .subquery()
+    )
+    db.execute(
+        sa.update(_counters)
+        .where(_counters.c.tenant_id == tenant_id, _counters.c.user_id == per_user.c.user_id)
+        .values(
+            unread_count=sa.func.greatest(0, _counters.c.unread_count + sign * per_user.c.n),
+            updated_at=sa.func.now(),
+        )
+    )
+
+
+def sync_notifications(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    type: str,
+    items: Iterable[dict[str, Any]],
+    replace: bool,
+) -> dict[str, int]:
+    """Upsert `items` as active notifications of `type`.
+
+    Each item carries notification_id, title and optionally severity,
+    message, entity_type, entity_id, occurred_at, due_at, exclude_user_id.
+    With `replace=True` the items are the complete current set for the type:
+    active notifications of that type not listed are resolved.
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    for item in items:
+        key = str(item.get("notification_id") or "").strip()
+        if not key:
+            continue
+        exclude = item.get("exclude_user_id")
+        rows[key] = {
+            "tenant_id": tenant_id,
+            "notification_id": key,
+            "type": type,
+            "severity": str(item.get("severity") or "info"),
+            "title": str(item.get("title") or "")[:300],
+            "message": str(item.get("message") or ""),
+            "entity_type": item.get("entity_type") or None,
+            "entity_id": (str(item["entity_id"]) if item.get("entity_id") else None),
+            "exclude_user_id": (UUID(str(exclude)) if exclude else None),
+            "occurred_at": _as_utc(item.get("occurred_at")) or datetime.now(timezone.utc),
+            "due_at": _as_utc(item.get("due_at")),
+        }
+
+    _lock_tenant_feed(db, tenant_id)
+    keys = list(rows)
+    already_active: set[str] = set()
+    if keys:
+        already_active = set(
+            db.execute(
+                sa.select(_feed.c.notification_id).where(
+                    _feed.c.tenant_id == tenant_id,
+                    _feed.c.is_active.is_(True),
+                    _feed.c.notification_id.in_(keys),
+                )
+            ).scalars()
+        )
+
+        stmt = pg_insert(_feed)
+        changed = {
+            col: getattr(stmt.excluded, col)
+            for col in (
+                "type", "severity", "title", "message", "entity_type",
+                "entity_id", "exclude_user_id", "occurred_at", "due_at",
+            )
+        }
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[_feed.c.tenant_id, _feed.c.notification_id],
+                set_={**changed, "is_active": True, "resolved_at": None, "updated_at": sa.func.now()},
+                # Re-syncing an unchanged notification is the common case;
+                # skip the row rewrite.
+                where=sa.or_(
+                    _feed.c.is_active.is_(False),
+                    *(_feed.c[col].is_distinct_from(value) for col, value in changed.items()),
+                ),
+            ),
+            list(rows.values()),
+        )
+
+    activated = [key for key in keys if key not in already_active]
+    _shift_counters(db, tenant_id=tenant_id, notification_ids=activated, sign=1)
+
+    resolved: list[str] = []
+    if replace:
+        stale = sa.select(_feed.c.notification_id).where(
+            _feed.c.tenant_id == tenant_id,
+            _feed.c.type == type,
+            _feed.c.is_active.is_(True),
+        )
+        if keys:
+            stale = stale.where(_feed.c.notification_id.not_in(keys))
+        resolved = list(db.execute(stale).scalars())
+        if resolved:
+            _shift_counters(db, tenant_id=tenant_id, notification_ids=resolved, sign=-1)
+            db.execute(
+                sa.update(_feed)
+                .where(_feed.c.tenant_id == tenant_id, _feed.c.notification_id.in_(resolved))
+                .values(is_active=False, resolved_at=sa.func.now(), updated_at=sa.func.now())
+            )
+    return {"activated": len(activated), "resolved": len(resolved)}
+
+
+def try_sync_notifications(db: Session, **kwargs: Any) -> Optional[dict[str, int]]:
+    """sync_notifications for event hooks: runs in a savepoint and never
+    fails the caller's write — the next sweep catches up."""
+    try:
+        with db.begin_nested():
+            return sync_notifications(db, **kwargs)
+    except Exception:
+        logger.warning(
+            "Notification feed update failed for tenant %s (%s)",
+            kwargs.get("tenant_id"),
+            kwargs.get("type"),
+            exc_info=True,
+        )
+        return None
+
+
+def _count_unread(*, tenant_id: UUID, user_id: Any):
+    return (
+        sa.select(sa.func.count())
+        .select_from(_feed)
+        .where(
+            _feed.c.tenant_id == tenant_id,
+            _feed.c.is_active.is_(True),
+            _feed.c.exclude_user_id.is_distinct_from(user_id),
+            _unread_for_user_clause(tenant_id, user_id),
+        )
+        .scalar_subquery()
+    )
+
+
+def unread_count(db: Session, *, tenant_id: UUID, user_id: UUID) -> int:
+    """The badge. A user's first call counts once and stores the counter;
+    the caller commits."""
+    current = db.execute(
+        sa.select(_counters.c.unread_count).where(
+            _counters.c.tenant_id == tenant_id, _counters.c.user_id == user_id
+        )
+    ).scalar()
+    if current is not None:
+        return int(current)
+
+    counted = db.execute(
+        pg_insert(_counters)
+        .from_select(
+            ["tenant_id", "user_id", "unread_count"],
+            sa.select(
+                sa.literal(tenant_id, type_=_counters.c.tenant_id.type),
+                sa.literal(user_id, type_=_counters.c.user_id.type),
+                _count_unread(tenant_id=tenant_id, user_id=user_id),
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(_counters.c.unread_count)
+    ).scalar()
+    if counted is None:  # a concurrent request initialized it first
+        return unread_count(db, tenant_id=tenant_id, user_id=user_id)
+    return int(counted)
+
+
+def recount_unread(db: Session, *, tenant_id: UUID) -> None:
+    """Recompute every stored counter of the tenant from the feed."""
+    db.execute(
+        sa.update(_counters)
+        .where(_counters.c.tenant_id == tenant_id)
+        .values(
+            unread_count=_count_unread(tenant_id=tenant_id, user_id=_counters.c.user_id),
+            updated_at=sa.func.now(),
+        )
+    )
+
+
+def _decrement_for_newly_read(
+    db: Session, *, tenant_id: UUID, user_id: UUID, notification_ids: list[str]
+) -> None:
+    if not notification_ids:
+        return
+    newly_unread = (
+        sa.select(sa.func.count())
+        .select_from(_feed)
+        .where(
+            _feed.c.tenant_id == tenant_id,
+            _feed.c.is_active.is_(True),
+            _visible_to(user_id),
+            _feed.c.notification_id.in_(notification_ids),
+        )
+        .scalar_subquery()
+    )
+    db.execute(
+        sa.update(_counters)
+        .where(_counters.c.tenant_id == tenant_id, _counters.c.user_id == user_id)
+        .values(
+            unread_count=sa.func.greatest(0, _counters.c.unread_count - newly_unread),
+            updated_at=sa.func.now(),
+        )
+    )
+
+
+def mark_read(db: Session, *, tenant_id: UUID, user_id: UUID, notification_ids: list[str]) -> int:
+    """Returns how many of the ids were not already read."""
+    ids = sorted({str(nid).strip() for nid in notification_ids if str(nid).strip()})
+    if not ids:
+        return 0
+    inserted = list(
+        db.execute(
+            pg_insert(_reads)
+            .values([{"tenant_id": tenant_id, "user_id": user_id, "notification_id": nid} for nid in ids])
+            .on_conflict_do_nothing(
+                index_elements=[_reads.c.tenant_id, _reads.c.user_id, _reads.c.notification_id]
+            )
+            .returning(_reads.c.notification_id)
+        ).scalars()
+    )
+    _decrement_for_newly_read(db, tenant_id=tenant_id, user_id=user_id, notification_ids=inserted)
+    return len(inserted)
+
+
+def mark_all_read(db: Session, *, tenant_id: UUID, user_id: UUID) -> int:
+    unread = (
+        sa.select(
+            _feed.c.tenant_id,
+            sa.literal(user_id, type_=_reads.c.user_id.type),
+            _feed.c.notification_id,
+        )
+        .where(
+            _feed.c.tenant_id == tenant_id,
+            _feed.c.is_active.is_(True),
+            _visible_to(user_id),
+        )
+    )
+    marked = len(
+        db.execute(
+            pg_insert(_reads)
+            .from_select(["tenant_id", "user_id", "notification_id"], unread)
+            .on_conflict_do_nothing(
+                index_elements=[_reads.c.tenant_id, _reads.c.user_id, _reads.c.notification_id]
+            )
+            .returning(_reads.c.id)
+        ).all()
+    )
+    stmt = pg_insert(_counters).values(tenant_id=tenant_id, user_id=user_id, unread_count=0)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[_counters.c.tenant_id, _counters.c.user_id],
+            set_={"unread_count": 0, "updated_at": sa.func.now()},
+        )
+    )
+    return marked
+
+
+def dismiss(db: Session, *, tenant_id: UUID, user_id: UUID, notification_id: str) -> None:
+    """Hide one notification for one user (it also counts as read)."""
+    inserted = db.execute(
+        pg_insert(_reads)
+        .values(tenant_id=tenant_id, user_id=user_id, notification_id=notification_id, deleted_at=sa.func.now())
+        .on_conflict_do_nothing(
+            index_elements=[_reads.c.tenant_id, _reads.c.user_id, _reads.c.notification_id]
+        )
+        .returning(_reads.c.notification_id)
+    ).scalar()
+    if inserted is not None:
+        _decrement_for_newly_read(db, tenant_id=tenant_id, user_id=user_id, notification_ids=[inserted])
+        return
+    db.execute(
+        sa.update(_reads)
+        .where(
+            _reads.c.tenant_id == tenant_id,
+            _reads.c.user_id == user_id,
+            _reads.c.notification_id == notification_id,
+        )
+        .values(deleted_at=sa.func.now())
+    )
+
+
+def list_feed(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    user_id: UUID,
+    limit: int,
+    after: Optional[tuple[datetime, UUID]] = None,
+    offset: int = 0,
+) -> list[dict[str, Any]]:
+    """Newest first, ordered by (occurred_at, id). `after` is the last row of
+    the previous page; `offset` is only for legacy callers."""
+    read = _reads.alias("r")
+    stmt = (
+        sa.select(
+            _feed.c.id,
+            _feed.c.notification_id,
+            _feed.c.type,
+            _feed.c.severity,
+            _feed.c.title,
+            _feed.c.message,
+            _feed.c.entity_type,
+            _feed.c.entity_id,
+            _feed.c.occurred_at,
+            _feed.c.due_at,
+            read.c.notification_id.is_(None).label("unread"),
+        )
+        .select_from(
+            _feed.outerjoin(
+                read,
+                sa.and_(
+                    read.c.tenant_id == _feed.c.tenant_id,
+                    read.c.user_id == user_id,
+                    read.c.notification_id == _feed.c.notification_id,
+                ),
+            )
+        )
+        .where(
+            _feed.c.tenant_id == tenant_id,
+            _feed.c.is_active.is_(True),
+            _visible_to(user_id),
+            read.c.deleted_at.is_(None),
+        )
+        .order_by(_feed.c.occurred_at.desc(), _feed.c.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(sa.tuple_(_feed.c.occurred_at, _feed.c.id) < sa.tuple_(*after))
+    elif offset:
+        stmt = stmt.offset(offset)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+# ---------------------------------------------------------------------
+# Periodic sweep
+# ---------------------------------------------------------------------
+
+def sweep_notification_feeds(db: Session) -> Optional[dict[str, int]]:
+    """Re-sync every tenant's feed and recount its counters, one commit per
+    tenant. Returns None when another worker holds the sweep lock."""
+    # The collectors live with the tenant routes; import lazily to avoid a
+    # cycle (the routes import this module).
+    from app.api.v1.tenants.routes import refresh_notification_feed
+
+    # The sweep commits per tenant, which hands the session's connection back
+    # to the pool; the session-level lock is held on a connection of its own
+    # so the unlock runs where the lock was taken.
+    lock_conn = db.get_bind().connect()
+    try:
+        locked = lock_conn.execute(
+            sa.text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": _SWEEP_LOCK_KEY}
+        ).scalar()
+        lock_conn.commit()
+        if not locked:
+            return None
+        totals = {"tenants": 0, "activated": 0, "resolved": 0}
+        try:
+            with _sweep_latency.time():
+                tenant_ids = list(
+                    db.execute(sa.text("SELECT id FROM core.tenants WHERE is_active = true ORDER BY id")).scalars()
+                )
+                db.commit()
+                for tenant_id in tenant_ids:
+                    try:
+                        result = refresh_notification_feed(db, tenant_id=tenant_id)
+                        recount_unread(db, tenant_id=tenant_id)
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+                        logger.warning("Notification sweep failed for tenant %s", tenant_id, exc_info=True)
+                        continue
+                    totals["tenants"] += 1
+                    totals["activated"] += result["activated"]
+                    totals["resolved"] += result["resolved"]
+            _sweeps.inc()
+        finally:
+            lock_conn.execute(sa.text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": _SWEEP_LOCK_KEY})
+            lock_conn.commit()
+    finally:
+        lock_conn.close()
+    return totals
+
+
+_sweep_task: Optional[asyncio.Task] = None
+
+
+async def _sweep_loop(interval_s: float) -> None:
+    from app.core.database import SessionLocal
+
+    def _run():
+        with SessionLocal() as db:
+            return sweep_notification_feeds(db)
+
+    while True:
+        try:
+            await asyncio.to_thread(_run)
+        except Exception:
+            logger.warning("Notification sweep failed", exc_info=True)
+        await asyncio.sleep(interval_s)
+
+
+def start_notification_sweeper() -> None:
+    """Start the per-worker sweep loop (first pass immediately, which also
+    backfills a fresh feed). NOTIFICATION_SWEEP_INTERVAL_SEC=0 disables it."""
+    global _sweep_task
+    interval = int(settings.NOTIFICATION_SWEEP_INTERVAL_SEC)
+    if interval <= 0 or (_sweep_task is not None and not _sweep_task.done()):
+        return
+    _sweep_task = asyncio.get_running_loop().create_task(_sweep_loop(float(interval)))
+
+
+async def stop_notification_sweeper() -> None:
+    global _sweep_task
+    task, _sweep_task = _sweep_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+def notification_sweep_snapshot() -> dict[str, Any]:
+    return {
+        "running": _sweep_task is not None and not _sweep_task.done(),
+        "sweeps": _sweeps.value,
+        "latency": _sweep_latency.snapshot(),
+    }
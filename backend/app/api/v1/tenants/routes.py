@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import logging
 from decimal import Decimal, InvalidOperation
 from datetime import date, datetime, time, timezone
 from pathlib import Path
@@ -16,7 +17,12 @@ import sqlalchemy as sa
 from sqlalchemy.exc import ProgrammingError, OperationalError, InternalError
 
 from app.core.database import get_db
-from app.core.dependencies import get_tenant, get_current_user, require_permission
+from app.core.dependencies import get_tenant, get_current_user, permission_set, require_permission
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.permission_cache import bump_rbac_version
+from app.core.schema_registry import invalidate_schema_registry, resolve_existing_table
+from app.core.session_cache import invalidate_user_sessions
+from app.core.tenant_cache import invalidate_tenant_cache, tenant_cache_keys
 
 from app.models.tenant import Tenant
 from app.models.user import User
@@ -31,7 +37,18 @@ from app.models.rbac import (
     UserPermissionOverride,
 )
 from app.utils.hashing import hash_password, verify_password
+from app.api.v1.reports.results import invalidate_class_results_after_commit
 from app.api.v1.support import service as support_service
+from app.api.v1.tenants import dashboard_sections, notification_feed
+from app.api.v1.tenants.dashboard_sections import (
+    SCOPE_ACADEMICS,
+    SCOPE_ENROLLMENTS,
+    SCOPE_FINANCE,
+    SCOPE_PEOPLE,
+    DashboardSection,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -709,6 +726,7 @@ class SecretaryDashboardOut(BaseModel):
     # role intentionally never sees total_billed or total_collected
     # aggregates (collections analytics are director-only).
     finance_outstanding: dict | None = None
+    freshness: dict = Field(default_factory=dict)
 
 
 class PrincipalDashboardOut(BaseModel):
@@ -722,6 +740,7 @@ class PrincipalDashboardOut(BaseModel):
     notifications: list[TenantNotificationOut]
     unread_notifications: int = 0
     health: dict
+    freshness: dict = Field(default_factory=dict)
 
 
 class DirectorPermissionOut(BaseModel):
@@ -922,7 +941,7 @@ def _require_any_permission(*codes: str):
         request: Request,
         _user=Depends(get_current_user),
     ):
-        perms = set(getattr(request.state, "permissions", []) or [])
+        perms = permission_set(request)
         if any(code in perms for code in required_codes):
             return
 
@@ -1209,10 +1228,6 @@ ASSET_ASSIGNMENT_TABLE_CANDIDATES = (
     "core.asset_assignments",
     "asset_assignments",
 )
-TENANT_NOTIFICATION_READ_TABLE_CANDIDATES = (
-    "core.tenant_notification_reads",
-    "tenant_notification_reads",
-)
 ENROLLMENT_TABLE_CANDIDATES = (
     "core.enrollments",
     "enrollment.enrollments",
@@ -1288,6 +1303,8 @@ def _ensure_tenant_school_calendar_event_table(db: Session) -> str:
             """
         )
     )
+    if not _resolve_existing_table(db, candidates=TENANT_SCHOOL_CALENDAR_EVENT_TABLE_CANDIDATES[:1])[0]:
+        invalidate_schema_registry()
     return TENANT_SCHOOL_CALENDAR_EVENT_TABLE_CANDIDATES[0]
 
 
@@ -1505,32 +1522,29 @@ def _execute_on_first_table(
     sql_template: str,
     params: dict[str, Any],
 ):
-    last_error: Exception | None = None
-    for table_name in table_candidates:
-        try:
-            stmt = sa.text(sql_template.format(table=table_name))
-            return db.execute(stmt, params), table_name
-        except (ProgrammingError, OperationalError, InternalError) as err:
-            # A missing relation aborts the current transaction in Postgres.
-            # Roll back before probing the next candidate table.
-            db.rollback()
-            if _safe_db_missing_table(err):
-                last_error = err
-                continue
-            raise
-        except Exception as err:
-            if _safe_db_missing_table(err):
-                db.rollback()
-                last_error = err
-                continue
+    # Pick the table from the in-memory schema registry instead of probing
+    # each candidate with the real statement and rolling back on failure.
+    table_name, _ = _resolve_existing_table(db, candidates=table_candidates)
+    if not table_name:
+        raise HTTPException(
+            status_code=503,
+            detail="Tenant setup storage is not configured. Run database migrations.",
+        )
+    try:
+        stmt = sa.text(sql_template.format(table=table_name))
+        return db.execute(stmt, params), table_name
+    except (ProgrammingError, OperationalError, InternalError) as err:
+        if not _safe_db_missing_table(err):
             raise
-
-    if last_error:
+        # The registry was stale (table or column dropped under us). The
+        # failed statement aborted the transaction, so roll back and force a
+        # catalog reload for the next request.
+        db.rollback()
+        invalidate_schema_registry()
         raise HTTPException(
             status_code=503,
             detail="Tenant setup storage is not configured. Run database migrations.",
         )
-    raise HTTPException(status_code=503, detail="Tenant setup storage is unavailable.")
 
 
 def _read_rows_first_table(
@@ -1570,38 +1584,17 @@ def _safe_payload_obj(value: Any) -> dict[str, Any]:
     return {}
 
 
-def _split_table_ref(table_ref: str) -> tuple[str | None, str]:
-    if "." in table_ref:
-        schema, table = table_ref.split(".", 1)
-        return schema, table
-    return None, table_ref
-
-
 def _resolve_existing_table(
     db: Session,
     *,
     candidates: tuple[str, ...],
 ) -> tuple[str | None, set[str]]:
-    try:
-        inspector = sa.inspect(db.get_bind())
-    except Exception:
-        return None, set()
+    """First candidate table that exists, with its column names.
 
-    for ref in candidates:
-        schema, table = _split_table_ref(ref)
-        try:
-            cols = inspector.get_columns(table, schema=schema)
-        except Exception:
-            continue
-        if cols:
-            col_names = {
-                str(col.get("name"))
-                for col in cols
-                if col.get("name") is not None
-            }
-            return ref, col_names
-
-    return None, set()
+    Answered from the process-wide schema registry — no catalog round trip
+    on the request path.
+    """
+    return resolve_existing_table(db, candidates)
 
 
 def _list_fee_structures_fallback(
@@ -1747,7 +1740,8 @@ def _list_tenant_enrollments_for_finance(
         db,
         table_candidates=ENROLLMENT_TABLE_CANDIDATES,
         sql_template="""
-            SELECT id, status, payload, student_id, admission_number
+            SELECT id, status, payload, student_id, admission_number,
+                   class_code, term_code, student_name
             FROM {table}
             WHERE tenant_id = :tenant_id
             ORDER BY id DESC
@@ -1768,6 +1762,9 @@ def _list_tenant_enrollments_for_finance(
             "admission_number": (
                 str(row.get("admission_number")) if row.get("admission_number") else None
             ),
+            "class_code": row.get("class_code"),
+            "term_code": row.get("term_code"),
+            "student_name": row.get("student_name"),
         }
         for row in rows
         if row.get("id") is not None
@@ -1917,10 +1914,12 @@ def _serialize_student_clearance_row(
     status = _text_or_none(enrollment.get("status"), upper=True) or "UNKNOWN"
     payload = _safe_payload_obj(enrollment.get("payload"))
 
-    student_name = _enrollment_student_name(payload)
+    # Rows from core.enrollments carry the generated class/term/name
+    # columns; the payload readers normalize the same way for other rows.
+    student_name = enrollment.get("student_name") or _enrollment_student_name(payload)
     admission_number = _enrollment_admission_number(payload)
-    class_code = _enrollment_class_code(payload)
-    term_code = _enrollment_term_bucket(payload)
+    class_code = enrollment.get("class_code") or _enrollment_class_code(payload)
+    term_code = enrollment.get("term_code") or _enrollment_term_bucket(payload)
 
     nemis_no = _payload_text(payload, ("nemis_no", "nemisNo"))
     assessment_no = _payload_text(payload, ("assessment_no", "assessmentNo"))
@@ -4959,6 +4958,8 @@ def update_tenant_exam(
         ),
         params,
     ).mappings().first()
+    # Its term or class may have changed: every cached class result can move.
+    invalidate_class_results_after_commit(db, tenant.id)
     db.commit()
 
     if not updated:
@@ -5601,19 +5602,25 @@ def _year_bucket(value: Any) -> str:
         return "UNKNOWN"
 
 
+def _normalize_term_code(value: str) -> str:
+    """Same form as the generated core.enrollments.term_code column:
+    trimmed, spaces as underscores, upper-cased."""
+    return value.strip(" \t\n\r").replace(" ", "_").upper()
+
+
 def _enrollment_term_bucket(payload: dict[str, Any]) -> str:
-    for key in ("admission_term", "term_code", "term", "academic_term"):
+    for key in ("admission_term", "term_code", "termCode", "term", "academic_term"):
         value = payload.get(key)
-        if isinstance(value, str) and value.strip():
-            return _normalize_code(value)
+        if isinstance(value, str) and value.strip(" \t\n\r"):
+            return _normalize_term_code(value)
     return "UNSCOPED"
 
 
 def _invoice_term_bucket(invoice_meta: Any, *, enrollment_payload: dict[str, Any]) -> str:
     if isinstance(invoice_meta, dict):
         term_raw = invoice_meta.get("term_code")
-        if isinstance(term_raw, str) and term_raw.strip():
-            return _normalize_code(term_raw)
+        if isinstance(term_raw, str) and term_raw.strip(" \t\n\r"):
+            return _normalize_term_code(term_raw)
     return _enrollment_term_bucket(enrollment_payload)
 
 
@@ -5655,7 +5662,7 @@ def _fetch_tenant_enrollment_row(
         db,
         table_candidates=ENROLLMENT_TABLE_CANDIDATES,
         sql_template="""
-            SELECT id, status, payload
+            SELECT id, status, payload, class_code, term_code, student_name
             FROM {table}
             WHERE tenant_id = :tenant_id
               AND id = :enrollment_id
@@ -5738,7 +5745,7 @@ def tenant_students_clearance(
                 query in row.student_name.lower()
                 or query in (row.admission_number or "").lower()
                 or query in row.class_code.lower()
-                or query in row.term_code.lower()
+                or query.replace(" ", "_") in row.term_code.lower()
                 or query in row.status.lower()
                 or query in row.enrollment_id.lower()
                 or query in (row.nemis_no or "").lower()
@@ -5934,6 +5941,8 @@ def tenant_student_clearance_approve_transfer(
     if note:
         enrollment_payload["transfer_approval_note"] = note
     enrollment.payload = enrollment_payload
+    db.flush()
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("TRANSFER_APPROVED",))
 
     db.commit()
     db.refresh(enrollment)
@@ -6962,7 +6971,7 @@ def upsert_tenant_exam_mark(
         db,
         table_candidates=ENROLLMENT_TABLE_CANDIDATES,
         sql_template="""
-            SELECT id, payload
+            SELECT id, class_code
             FROM {table}
             WHERE id = :enrollment_id AND tenant_id = :tenant_id
             LIMIT 1
@@ -6973,8 +6982,7 @@ def upsert_tenant_exam_mark(
     if not enrollment_row:
         raise HTTPException(status_code=404, detail="Enrollment not found")
 
-    enrollment_payload = _safe_payload_obj(enrollment_row.get("payload"))
-    enrolled_class_code = _enrollment_class_code(enrollment_payload)
+    enrolled_class_code = str(enrollment_row.get("class_code") or "")
     if enrolled_class_code and enrolled_class_code != class_code:
         raise HTTPException(
             status_code=400,
@@ -7056,6 +7064,7 @@ def upsert_tenant_exam_mark(
             },
         ).mappings().first()
 
+    invalidate_class_results_after_commit(db, tenant.id)
     db.commit()
     if not row:
         raise HTTPException(status_code=500, detail="Failed to record exam mark")
@@ -7697,6 +7706,9 @@ def update_tenant_subject(
         ),
         params,
     ).mappings().first()
+    if "name" in params:
+        # Cached class results and report cards carry subject names.
+        invalidate_class_results_after_commit(db, tenant.id)
     db.commit()
 
     if not updated:
@@ -9157,6 +9169,7 @@ def update_tenant_staff(
             staff_id=staff_id,
         )
 
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("TEACHER_SEPARATED",))
     db.commit()
     return _serialize_staff_row(dict(updated), include_separation=is_director)
 
@@ -9617,6 +9630,7 @@ def create_teacher_assignment(
             "assigned_by": str(getattr(_user, "id", "") or "") or None,
         },
     ).mappings().first()
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("TEACHER_SEPARATED",))
     db.commit()
 
     if not created:
@@ -9807,6 +9821,7 @@ def update_teacher_assignment(
             "notes": notes,
         },
     ).mappings().first()
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("TEACHER_SEPARATED",))
     db.commit()
 
     if not updated:
@@ -9854,6 +9869,7 @@ def delete_teacher_assignment(
     if not (deleted.rowcount or 0):
         raise HTTPException(status_code=404, detail="Teacher assignment not found")
 
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("TEACHER_SEPARATED",))
     db.commit()
     return {"ok": True, "deleted_id": str(assignment_id)}
 
@@ -10594,6 +10610,7 @@ def create_asset_assignment(
             "notes": _text_or_none(payload.notes),
         },
     ).mappings().first()
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("ASSET_DUE",))
     db.commit()
 
     if not created:
@@ -10715,6 +10732,7 @@ def return_asset_assignment(
         enrollment_index = _tenant_enrollment_index(db, tenant_id=tenant.id)
         student_name = enrollment_index.get(enrollment_key, {}).get("student_name")
 
+    _refresh_notification_feed_after_change(db, tenant_id=tenant.id, types=("ASSET_DUE",))
     db.commit()
 
     assignee = _text_or_none(updated.get("assignee_type"), upper=True) or "STAFF"
@@ -11247,334 +11265,110 @@ def _count_separated_teacher_notifications(
     return len(rows)
 
 
-def _list_support_reply_notifications(
-    db: Session,
-    *,
-    tenant_id: UUID,
-    user_id: UUID,
-    limit: int,
-    offset: int,
-) -> list[TenantNotificationOut]:
-    safe_limit = max(1, min(int(limit), 1000))
-    safe_offset = max(0, int(offset))
-    try:
-        rows = support_service.tenant_thread_for_notifications(
-            db,
-            tenant_id=tenant_id,
-            user_id=user_id,
-            limit=safe_limit,
-            offset=safe_offset,
-        )
-    except Exception:
-        db.rollback()
-        return []
-
-    notifications: list[TenantNotificationOut] = []
-    for row in rows:
-        notification_id = str(row.get("id") or "").strip()
-        if not notification_id:
-            continue
-        created_at = str(row.get("created_at") or "").strip() or _now_utc().isoformat()
-        thread_id = str(row.get("thread_id") or "").strip()
-        title = str(row.get("title") or "").strip() or "Admin replied to your support request"
-        message = str(row.get("message") or "").strip() or "Open Contact Admin to view the reply."
-        notifications.append(
-            TenantNotificationOut(
-                id=notification_id,
-                type="SUPPORT_REPLY",
-                severity="info",
-                title=title,
-                message=message,
-                entity_type="support_thread",
-                entity_id=thread_id or None,
-                created_at=created_at,
-                due_at=None,
-                unread=True,
-            )
-        )
-    return notifications
-
-
-def _collect_tenant_notifications(
-    db: Session,
-    *,
-    tenant_id: UUID,
-    user_id: UUID,
-    limit: int,
-) -> list[TenantNotificationOut]:
-    fetch_limit = max(50, min(2000, int(limit)))
-    notifications = _list_overdue_asset_notifications(
-        db,
-        tenant_id=tenant_id,
-        limit=fetch_limit,
-        offset=0,
-    ) + _list_separated_teacher_notifications(
-        db,
-        tenant_id=tenant_id,
-        limit=fetch_limit,
-        offset=0,
-    ) + _list_transfer_approved_notifications(
-        db,
-        tenant_id=tenant_id,
-        limit=fetch_limit,
-        offset=0,
-    ) + _list_support_reply_notifications(
-        db,
-        tenant_id=tenant_id,
-        user_id=user_id,
-        limit=fetch_limit,
-        offset=0,
-    )
-    notifications.sort(
-        key=lambda n: (
-            str(n.created_at or ""),
-            str(n.id or ""),
-        ),
-        reverse=True,
-    )
-    return notifications
-
-
-def _read_notification_ids_for_user(
-    db: Session,
-    *,
-    tenant_id: UUID,
-    user_id: UUID,
-    notification_ids: list[str],
-) -> set[str]:
-    ids = [str(nid).strip() for nid in notification_ids if str(nid).strip()]
-    if not ids:
-        return set()
-
-    table_ref, cols = _resolve_existing_table(
-        db,
-        candidates=TENANT_NOTIFICATION_READ_TABLE_CANDIDATES,
-    )
-    if not table_ref:
-        return set()
-
-    deleted_filter = "AND deleted_at IS NULL" if "deleted_at" in cols else ""
-    stmt = sa.text(
-        f"""
-        SELECT notification_id
-        FROM {table_ref}
-        WHERE tenant_id = :tenant_id
-          AND user_id = :user_id
-          AND notification_id IN :notification_ids
-          {deleted_filter}
-        """
-    ).bindparams(sa.bindparam("notification_ids", expanding=True))
-
-    rows = db.execute(
-        stmt,
-        {
-            "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
-            "notification_ids": ids,
-        },
-    ).all()
-    return {str(row[0]) for row in rows if row and row[0] is not None}
-
-
-def _read_deleted_notification_ids_for_user(
-    db: Session,
-    *,
-    tenant_id: UUID,
-    user_id: UUID,
-    notification_ids: list[str],
-) -> set[str]:
-    ids = [str(nid).strip() for nid in notification_ids if str(nid).strip()]
-    if not ids:
-        return set()
+NOTIFICATION_FEED_TYPES = ("ASSET_DUE", "TEACHER_SEPARATED", "TRANSFER_APPROVED", "SUPPORT_REPLY")
+_NOTIFICATION_FEED_SCAN_LIMIT = 2000
 
-    table_ref, cols = _resolve_existing_table(
-        db,
-        candidates=TENANT_NOTIFICATION_READ_TABLE_CANDIDATES,
-    )
-    if not table_ref or "deleted_at" not in cols:
-        return set()
 
-    stmt = sa.text(
-        f"""
-        SELECT notification_id
-        FROM {table_ref}
-        WHERE tenant_id = :tenant_id
-          AND user_id = :user_id
-          AND notification_id IN :notification_ids
-          AND deleted_at IS NOT NULL
-        """
-    ).bindparams(sa.bindparam("notification_ids", expanding=True))
-
-    rows = db.execute(
-        stmt,
+def _notification_feed_items(notifications: list[TenantNotificationOut]) -> list[dict[str, Any]]:
+    return [
         {
-            "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
-            "notification_ids": ids,
-        },
-    ).all()
-    return {str(row[0]) for row in rows if row and row[0] is not None}
+            "notification_id": n.id,
+            "severity": n.severity,
+            "title": n.title,
+            "message": n.message,
+            "entity_type": n.entity_type,
+            "entity_id": n.entity_id,
+            "occurred_at": n.created_at,
+            "due_at": n.due_at,
+        }
+        for n in notifications
+    ]
 
 
-def _apply_notification_read_state(
+def _collect_notification_feed_source(
     db: Session,
     *,
     tenant_id: UUID,
-    user_id: UUID,
-    notifications: list[TenantNotificationOut],
-) -> list[TenantNotificationOut]:
-    notification_ids = [str(n.id) for n in notifications if getattr(n, "id", None)]
-    deleted_ids = _read_deleted_notification_ids_for_user(
-        db,
-        tenant_id=tenant_id,
-        user_id=user_id,
-        notification_ids=notification_ids,
-    )
-    read_ids = _read_notification_ids_for_user(
-        db,
-        tenant_id=tenant_id,
-        user_id=user_id,
-        notification_ids=notification_ids,
+    type: str,
+) -> list[dict[str, Any]]:
+    if type == "SUPPORT_REPLY":
+        return support_service.support_reply_feed_items(
+            db,
+            tenant_id=tenant_id,
+            limit=_NOTIFICATION_FEED_SCAN_LIMIT,
+        )
+    collector = {
+        "ASSET_DUE": _list_overdue_asset_notifications,
+        "TEACHER_SEPARATED": _list_separated_teacher_notifications,
+        "TRANSFER_APPROVED": _list_transfer_approved_notifications,
+    }[type]
+    return _notification_feed_items(
+        collector(db, tenant_id=tenant_id, limit=_NOTIFICATION_FEED_SCAN_LIMIT, offset=0)
     )
-    visible_notifications: list[TenantNotificationOut] = []
-    for notification in notifications:
-        notification_id = str(notification.id)
-        if notification_id in deleted_ids:
-            continue
-        notification.unread = notification_id not in read_ids
-        visible_notifications.append(notification)
-    return visible_notifications
 
 
-def _mark_notification_read(
+def refresh_notification_feed(
     db: Session,
     *,
     tenant_id: UUID,
-    user_id: UUID,
-    notification_id: str,
-) -> bool:
-    table_ref, cols = _resolve_existing_table(
-        db,
-        candidates=TENANT_NOTIFICATION_READ_TABLE_CANDIDATES,
-    )
-    if not table_ref:
-        return False
-
-    if "deleted_at" in cols:
-        on_conflict_sql = (
-            "DO UPDATE SET read_at = EXCLUDED.read_at "
-            f"WHERE {table_ref}.deleted_at IS NULL"
+    types: tuple[str, ...] = NOTIFICATION_FEED_TYPES,
+) -> dict[str, int]:
+    """Re-derive the given notification types from their source tables into
+    the feed (notification_feed.sync_notifications). Support replies are only
+    added — the scan is a window over an append-only message log — while the
+    other types are replaced by the current source state."""
+    totals = {"activated": 0, "resolved": 0}
+    for feed_type in types:
+        result = notification_feed.sync_notifications(
+            db,
+            tenant_id=tenant_id,
+            type=feed_type,
+            items=_collect_notification_feed_source(db, tenant_id=tenant_id, type=feed_type),
+            replace=feed_type != "SUPPORT_REPLY",
         )
-    else:
-        on_conflict_sql = "DO UPDATE SET read_at = EXCLUDED.read_at"
+        totals["activated"] += result["activated"]
+        totals["resolved"] += result["resolved"]
+    return totals
 
-    db.execute(
-        sa.text(
-            f"""
-            INSERT INTO {table_ref} (
-                tenant_id, user_id, notification_id, read_at, created_at
-            )
-            VALUES (
-                :tenant_id, :user_id, :notification_id, now(), now()
-            )
-            ON CONFLICT (tenant_id, user_id, notification_id)
-            {on_conflict_sql}
-            """
-        ),
-        {
-            "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
-            "notification_id": str(notification_id),
-        },
-    )
-    return True
 
-
-def _mark_notifications_read_bulk(
+def _refresh_notification_feed_after_change(
     db: Session,
     *,
     tenant_id: UUID,
-    user_id: UUID,
-    notification_ids: list[str],
-) -> int:
-    ids = sorted({str(nid).strip() for nid in notification_ids if str(nid).strip()})
-    if not ids:
-        return 0
-
-    table_ref, cols = _resolve_existing_table(
-        db,
-        candidates=TENANT_NOTIFICATION_READ_TABLE_CANDIDATES,
-    )
-    if not table_ref:
-        return 0
+    types: tuple[str, ...],
+) -> None:
+    # Event hook on the write path: a feed failure must not fail the write
+    # (savepoint), and the periodic sweep re-syncs the type anyway.
+    try:
+        with db.begin_nested():
+            refresh_notification_feed(db, tenant_id=tenant_id, types=types)
+    except Exception:
+        logger.warning("Notification feed refresh failed for tenant %s (%s)", tenant_id, types, exc_info=True)
 
-    if "deleted_at" in cols:
-        on_conflict_sql = (
-            "DO UPDATE SET read_at = EXCLUDED.read_at "
-            f"WHERE {table_ref}.deleted_at IS NULL"
-        )
-    else:
-        on_conflict_sql = "DO UPDATE SET read_at = EXCLUDED.read_at"
 
-    db.execute(
-        sa.text(
-            f"""
-            INSERT INTO {table_ref} (
-                tenant_id, user_id, notification_id, read_at, created_at
-            )
-            VALUES (
-                :tenant_id, :user_id, :notification_id, now(), now()
-            )
-            ON CONFLICT (tenant_id, user_id, notification_id)
-            {on_conflict_sql}
-            """
-        ),
-        [
-            {
-                "tenant_id": str(tenant_id),
-                "user_id": str(user_id),
-                "notification_id": nid,
-            }
-            for nid in ids
-        ],
+def _feed_row_to_notification(row: dict[str, Any]) -> TenantNotificationOut:
+    due_at = row.get("due_at")
+    return TenantNotificationOut(
+        id=str(row["notification_id"]),
+        type=str(row["type"]),
+        severity=str(row["severity"]),
+        title=str(row["title"]),
+        message=str(row.get("message") or ""),
+        entity_type=row.get("entity_type"),
+        entity_id=row.get("entity_id"),
+        created_at=row["occurred_at"].isoformat(),
+        due_at=due_at.isoformat() if due_at else None,
+        unread=bool(row["unread"]),
     )
-    return len(ids)
 
 
-def _delete_notification_for_user(
-    db: Session,
-    *,
-    tenant_id: UUID,
-    user_id: UUID,
-    notification_id: str,
-) -> bool:
-    table_ref, cols = _resolve_existing_table(
-        db,
-        candidates=TENANT_NOTIFICATION_READ_TABLE_CANDIDATES,
-    )
-    if not table_ref or "deleted_at" not in cols:
-        return False
-
-    db.execute(
-        sa.text(
-            f"""
-            INSERT INTO {table_ref} (
-                tenant_id, user_id, notification_id, read_at, deleted_at, created_at
-            )
-            VALUES (
-                :tenant_id, :user_id, :notification_id, now(), now(), now()
-            )
-            ON CONFLICT (tenant_id, user_id, notification_id)
-            DO UPDATE SET deleted_at = now()
-            """
-        ),
-        {
-            "tenant_id": str(tenant_id),
-            "user_id": str(user_id),
-            "notification_id": str(notification_id),
-        },
-    )
-    return True
+def _validated_notification_id(notification_id: str) -> str:
+    cleaned_id = str(notification_id or "").strip()
+    if not cleaned_id:
+        raise HTTPException(status_code=400, detail="notification_id is required")
+    if len(cleaned_id) > 255:
+        raise HTTPException(status_code=400, detail="notification_id is too long")
+    return cleaned_id
 
 
 @router.post(
@@ -11587,24 +11381,14 @@ def tenant_notification_mark_read(
     tenant=Depends(get_tenant),
     _user=Depends(get_current_user),
 ):
-    cleaned_id = str(notification_id or "").strip()
-    if not cleaned_id:
-        raise HTTPException(status_code=400, detail="notification_id is required")
-    if len(cleaned_id) > 255:
-        raise HTTPException(status_code=400, detail="notification_id is too long")
-
+    cleaned_id = _validated_notification_id(notification_id)
     user_id = _parse_uuid(getattr(_user, "id", None), field="current_user.id")
-    marked = _mark_notification_read(
+    notification_feed.mark_read(
         db,
         tenant_id=tenant.id,
         user_id=user_id,
-        notification_id=cleaned_id,
+        notification_ids=[cleaned_id],
     )
-    if not marked:
-        raise HTTPException(
-            status_code=503,
-            detail="Notification read storage is not configured. Run database migrations.",
-        )
     db.commit()
     return {"ok": True, "notification_id": cleaned_id}
 
@@ -11619,24 +11403,14 @@ def tenant_notification_delete(
     tenant=Depends(get_tenant),
     _user=Depends(get_current_user),
 ):
-    cleaned_id = str(notification_id or "").strip()
-    if not cleaned_id:
-        raise HTTPException(status_code=400, detail="notification_id is required")
-    if len(cleaned_id) > 255:
-        raise HTTPException(status_code=400, detail="notification_id is too long")
-
+    cleaned_id = _validated_notification_id(notification_id)
     user_id = _parse_uuid(getattr(_user, "id", None), field="current_user.id")
-    deleted = _delete_notification_for_user(
+    notification_feed.dismiss(
         db,
         tenant_id=tenant.id,
         user_id=user_id,
         notification_id=cleaned_id,
     )
-    if not deleted:
-        raise HTTPException(
-            status_code=503,
-            detail="Notification delete storage is not configured. Run database migrations.",
-        )
     db.commit()
     return {"ok": True, "notification_id": cleaned_id}
 
@@ -11651,29 +11425,7 @@ def tenant_notifications_mark_all_read(
     _user=Depends(get_current_user),
 ):
     user_id = _parse_uuid(getattr(_user, "id", None), field="current_user.id")
-    notifications = _collect_tenant_notifications(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        limit=2000,
-    )
-    notifications = _apply_notification_read_state(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        notifications=notifications,
-    )
-    marked_count = _mark_notifications_read_bulk(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        notification_ids=[str(n.id) for n in notifications],
-    )
-    if notifications and marked_count == 0:
-        raise HTTPException(
-            status_code=503,
-            detail="Notification read storage is not configured. Run database migrations.",
-        )
+    marked_count = notification_feed.mark_all_read(db, tenant_id=tenant.id, user_id=user_id)
     db.commit()
     return {"ok": True, "marked_count": int(marked_count)}
 
@@ -11684,28 +11436,35 @@ def tenant_notifications_mark_all_read(
     dependencies=[Depends(_require_any_permission("admin.dashboard.view_tenant", "enrollment.manage"))],
 )
 def tenant_notifications(
+    response: Response,
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
     _user=Depends(get_current_user),
     limit: int = Query(default=100, ge=1, le=500),
-    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),  # X-Next-Cursor of the previous page
+    offset: int = Query(default=0, ge=0),  # legacy; ignored when cursor is given
 ):
+    """Newest first, served from the materialized feed. Pass the previous
+    page's `X-Next-Cursor` response header as `cursor`; the header is absent
+    on the last page."""
     user_id = _parse_uuid(getattr(_user, "id", None), field="current_user.id")
-    notifications = _collect_tenant_notifications(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        limit=int(limit) + int(offset) + 100,
-    )
-    notifications = _apply_notification_read_state(
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = notification_feed.list_feed(
         db,
         tenant_id=tenant.id,
         user_id=user_id,
-        notifications=notifications,
+        limit=int(limit),
+        after=after,
+        offset=int(offset),
     )
-    start = int(offset)
-    end = start + int(limit)
-    return notifications[start:end]
+    if len(rows) == int(limit):
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["occurred_at"], rows[-1]["id"])
+    return [_feed_row_to_notification(row) for row in rows]
 
 
 @router.get(
@@ -11718,19 +11477,8 @@ def tenant_notifications_unread_count(
     _user=Depends(get_current_user),
 ):
     user_id = _parse_uuid(getattr(_user, "id", None), field="current_user.id")
-    notifications = _collect_tenant_notifications(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        limit=2000,
-    )
-    notifications = _apply_notification_read_state(
-        db,
-        tenant_id=tenant.id,
-        user_id=user_id,
-        notifications=notifications,
-    )
-    unread_count = sum(1 for notification in notifications if bool(notification.unread))
+    unread_count = notification_feed.unread_count(db, tenant_id=tenant.id, user_id=user_id)
+    db.commit()  # persists a lazily initialized counter
     return {"unread_count": int(unread_count)}
 
 
@@ -11854,6 +11602,8 @@ def create_tenant(
 
     db.commit()
     db.refresh(t)
+    # Clear any cached "unknown tenant" answers for the new slug/domain.
+    invalidate_tenant_cache(tenant_cache_keys(t))
 
     return {
         "id": str(t.id),
@@ -11920,6 +11670,7 @@ def put_tenant_profile(
         t.updated_at = _now_utc()
 
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
     db.refresh(t)
     return {
         "curriculum_type": getattr(t, "curriculum_type", "CBC") or "CBC",
@@ -11958,6 +11709,7 @@ def update_my_tenant(
         t.updated_at = _now_utc()
 
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
     db.refresh(t)
 
     return {
@@ -11983,6 +11735,7 @@ def update_tenant(
     t = db.get(Tenant, tenant_id)
     if not t:
         raise HTTPException(status_code=404, detail="Tenant not found")
+    stale_cache_keys = tenant_cache_keys(t)
 
     if payload.slug is not None:
         new_slug = _normalize_slug(payload.slug)
@@ -12009,6 +11762,7 @@ def update_tenant(
     t.updated_at = _now_utc()
 
     db.commit()
+    invalidate_tenant_cache(stale_cache_keys, tenant_cache_keys(t))
     db.refresh(t)
 
     return {
@@ -12036,6 +11790,7 @@ def suspend_tenant(
     t.is_active = False
     t.updated_at = _now_utc()
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
 
     return {"ok": True, "tenant_id": str(t.id), "is_active": bool(t.is_active)}
 
@@ -12056,6 +11811,7 @@ def activate_tenant(
     t.is_active = True
     t.updated_at = _now_utc()
     db.commit()
+    invalidate_tenant_cache(tenant_cache_keys(t))
 
     return {"ok": True, "tenant_id": str(t.id), "is_active": bool(t.is_active)}
 
@@ -12072,6 +11828,7 @@ def soft_delete_tenant(
     t = db.get(Tenant, tenant_id)
     if not t:
         raise HTTPException(status_code=404, detail="Tenant not found")
+    stale_cache_keys = tenant_cache_keys(t)
 
     t.is_active = False
     t.primary_domain = None
@@ -12081,6 +11838,7 @@ def soft_delete_tenant(
 
     t.updated_at = _now_utc()
     db.commit()
+    invalidate_tenant_cache(stale_cache_keys, tenant_cache_keys(t))
 
     return {"ok": True, "tenant_id": str(t.id)}
 
@@ -12177,6 +11935,7 @@ def create_role(
         request=request,
     )
     db.commit()
+    bump_rbac_version(tenant.id)
     db.refresh(r)
 
     return {
@@ -12278,6 +12037,7 @@ def delete_role(
     )
     db.delete(r)
     db.commit()
+    bump_rbac_version(tenant.id)
     return {"ok": True}
 
 
@@ -12329,6 +12089,7 @@ def set_role_permissions(
         request=request,
     )
     db.commit()
+    bump_rbac_version(tenant.id)
     return {"ok": True, "role_id": str(r.id), "permission_codes": codes}
 
 
@@ -12422,6 +12183,7 @@ def assign_user_role(
         request=request,
     )
     db.commit()
+    invalidate_user_sessions(user_id)
     return {"ok": True}
 
 
@@ -12468,6 +12230,7 @@ def remove_user_role(
             request=request,
         )
     db.commit()
+    invalidate_user_sessions(user_id)
     return {"ok": True}
 
 
@@ -12566,6 +12329,7 @@ def set_user_permission_overrides(
         request=request,
     )
     db.commit()
+    invalidate_user_sessions(user_id)
     return {"ok": True}
 
 
@@ -12752,192 +12516,182 @@ def secretary_finance(
         or can_manage_payments
     )
 
-    policy: dict | None = None
-    invoices: list[dict] = []
-    fee_categories: list[dict] = []
-    fee_items: list[dict] = []
-    fee_structures: list[dict] = []
-    fee_structure_items: dict[str, list[dict]] = {}
-    structure_policies: list[dict] = []
-    scholarships: list[dict] = []
-    enrollments: list[dict] = []
-    payments: list[dict] = []
+    tenant_id = tenant.id
 
-    health = {
-        "policy": False,
-        "invoices": False,
-        "fee_categories": False,
-        "fee_items": False,
-        "fee_structures": False,
-        "fee_structure_items": False,
-        "structure_policies": False,
-        "scholarships": False,
-        "enrollments": False,
-        "payments": False,
-    }
+    def load_policy(s: Session) -> dict:
+        row = finance_service.get_or_create_policy(s, tenant_id=tenant_id)
+        s.commit()
+        return _serialize_finance_policy(row)
 
-    if can_view_policy:
-        try:
-            row = finance_service.get_or_create_policy(db, tenant_id=tenant.id)
-            db.commit()
-            policy = _serialize_finance_policy(row)
-            health["policy"] = True
-        except Exception:
-            policy = None
+    def load_structure_policies(s: Session) -> list[dict]:
+        rows = finance_service.list_fee_structure_policies(s, tenant_id=tenant_id)
+        return [_serialize_structure_policy(r) for r in rows]
 
-        try:
-            rows = finance_service.list_fee_structure_policies(
-                db,
-                tenant_id=tenant.id,
-            )
-            structure_policies = [_serialize_structure_policy(r) for r in rows]
-            health["structure_policies"] = True
-        except Exception:
-            structure_policies = []
+    def load_invoices(s: Session) -> list[dict]:
+        # list_invoices returns a paginated {"items": [...], "meta": {...}}
+        # dict — the dashboard needs every invoice for its aggregates.
+        result = finance_service.list_invoices(s, tenant_id=tenant_id, page_size=2000)
+        rows = result.get("items", []) if isinstance(result, dict) else result
+        return [_serialize_invoice(r) for r in rows]
 
-    if can_view_invoices:
-        try:
-            # list_invoices returns a paginated {"items": [...], "meta": {...}}
-            # dict — the dashboard needs every invoice for its aggregates.
-            result = finance_service.list_invoices(db, tenant_id=tenant.id, page_size=2000)
-            rows = result.get("items", []) if isinstance(result, dict) else result
-            invoices = [_serialize_invoice(r) for r in rows]
-            health["invoices"] = True
-        except Exception:
-            invoices = []
+    def load_fee_categories(s: Session) -> list[dict]:
+        rows = finance_service.list_fee_categories(s, tenant_id=tenant_id)
+        return [_serialize_fee_category(r) for r in rows]
 
-    if can_view_fees:
-        try:
-            rows = finance_service.list_fee_categories(db, tenant_id=tenant.id)
-            fee_categories = [_serialize_fee_category(r) for r in rows]
-            health["fee_categories"] = True
-        except Exception:
-            fee_categories = []
+    def load_fee_items(s: Session) -> list[dict]:
+        rows = finance_service.list_fee_items(s, tenant_id=tenant_id)
+        return [_serialize_fee_item(r) for r in rows]
 
+    def load_fee_structures(s: Session) -> dict[str, Any]:
+        fee_structure_items: dict[str, list[dict]] = {}
         try:
-            rows = finance_service.list_fee_items(db, tenant_id=tenant.id)
-            fee_items = [_serialize_fee_item(r) for r in rows]
-            health["fee_items"] = True
-        except Exception:
-            fee_items = []
-
-        structure_rows: list[Any] = []
-        loaded_structures_via_service = False
-        try:
-            structure_rows = finance_service.list_fee_structures(db, tenant_id=tenant.id)
+            structure_rows = finance_service.list_fee_structures(s, tenant_id=tenant_id)
             fee_structures = [_serialize_fee_structure(r) for r in structure_rows]
-            health["fee_structures"] = True
-            loaded_structures_via_service = True
         except Exception:
-            db.rollback()
-            fee_structures, fallback_ok = _list_fee_structures_fallback(
-                db,
-                tenant_id=tenant.id,
-            )
-            health["fee_structures"] = fallback_ok
-            structure_rows = []
-
-        if health["fee_structures"]:
-            items_ok = True
-            if loaded_structures_via_service:
-                for structure in structure_rows:
-                    sid = str(getattr(structure, "id"))
-                    try:
-                        _, items = finance_service.get_structure_with_items(
-                            db,
-                            tenant_id=tenant.id,
-                            structure_id=getattr(structure, "id"),
-                        )
-                        fee_structure_items[sid] = [_serialize_structure_item(i) for i in items]
-                    except Exception:
-                        items_ok = False
-                        fee_structure_items[sid] = []
-
-                if not items_ok:
-                    fallback_items, fallback_items_ok = _list_fee_structure_items_fallback(
-                        db,
-                        tenant_id=tenant.id,
+            s.rollback()
+            fee_structures, fallback_ok = _list_fee_structures_fallback(s, tenant_id=tenant_id)
+            if not fallback_ok:
+                raise
+            structure_rows = None
+
+        items_ok = True
+        if structure_rows is not None:
+            for structure in structure_rows:
+                sid = str(getattr(structure, "id"))
+                try:
+                    _, items = finance_service.get_structure_with_items(
+                        s,
+                        tenant_id=tenant_id,
+                        structure_id=getattr(structure, "id"),
                     )
-                    if fallback_items_ok:
-                        fee_structure_items = fallback_items
-                        items_ok = True
-            else:
-                fallback_items, fallback_items_ok = _list_fee_structure_items_fallback(
-                    db,
-                    tenant_id=tenant.id,
-                )
-                fee_structure_items = fallback_items if fallback_items_ok else {}
-                items_ok = fallback_items_ok
-
-            for structure in fee_structures:
-                sid = str(structure.get("id") or "")
-                if sid and sid not in fee_structure_items:
+                    fee_structure_items[sid] = [_serialize_structure_item(i) for i in items]
+                except Exception:
+                    items_ok = False
                     fee_structure_items[sid] = []
 
-            health["fee_structure_items"] = items_ok
+            if not items_ok:
+                fallback_items, fallback_items_ok = _list_fee_structure_items_fallback(s, tenant_id=tenant_id)
+                if fallback_items_ok:
+                    fee_structure_items = fallback_items
+                    items_ok = True
+        else:
+            fallback_items, items_ok = _list_fee_structure_items_fallback(s, tenant_id=tenant_id)
+            fee_structure_items = fallback_items if items_ok else {}
 
-    if can_view_scholarships:
-        try:
-            rows = finance_service.list_scholarships(db, tenant_id=tenant.id)
-            usage_map = finance_service.scholarship_usage_map(
-                db,
-                tenant_id=tenant.id,
-                scholarship_ids=[getattr(r, "id") for r in rows] if rows else None,
-            )
-            scholarships = [
-                _serialize_scholarship(
-                    r,
-                    allocated_amount=usage_map.get(getattr(r, "id"), Decimal("0")),
-                )
-                for r in rows
-            ]
-            health["scholarships"] = True
-        except Exception:
-            scholarships = []
+        for structure in fee_structures:
+            sid = str(structure.get("id") or "")
+            if sid and sid not in fee_structure_items:
+                fee_structure_items[sid] = []
 
-    if can_view_enrollments:
-        try:
-            enrollments, ok = _list_tenant_enrollments_for_finance(
-                db,
-                tenant_id=tenant.id,
-                limit=500,
+        return {"structures": fee_structures, "items": fee_structure_items, "items_ok": items_ok}
+
+    def load_scholarships(s: Session) -> list[dict]:
+        rows = finance_service.list_scholarships(s, tenant_id=tenant_id)
+        usage_map = finance_service.scholarship_usage_map(
+            s,
+            tenant_id=tenant_id,
+            scholarship_ids=[getattr(r, "id") for r in rows] if rows else None,
+        )
+        return [
+            _serialize_scholarship(
+                r,
+                allocated_amount=usage_map.get(getattr(r, "id"), Decimal("0")),
             )
-            health["enrollments"] = ok
-        except Exception:
-            db.rollback()
-            try:
-                enrollments, ok = _list_tenant_enrollments_for_finance(
-                    db,
-                    tenant_id=tenant.id,
-                    limit=500,
-                )
-                health["enrollments"] = ok
-            except Exception:
-                enrollments = []
+            for r in rows
+        ]
 
-    if can_view_payments:
+    def load_enrollments(s: Session) -> tuple[list[dict], bool]:
         try:
-            # list_payments returns a paginated {"items": [...], "meta": {...}}
-            # dict — the dashboard needs every payment for its aggregates.
-            result = finance_service.list_payments(db, tenant_id=tenant.id, page_size=2000)
-            rows = result.get("items", []) if isinstance(result, dict) else result
-            payments = [_serialize_payment(r) for r in rows if isinstance(r, dict)]
-            health["payments"] = True
+            return _list_tenant_enrollments_for_finance(s, tenant_id=tenant_id, limit=500)
         except Exception:
-            payments = []
+            s.rollback()
+            return _list_tenant_enrollments_for_finance(s, tenant_id=tenant_id, limit=500)
+
+    def load_payments(s: Session) -> list[dict]:
+        # list_payments returns a paginated {"items": [...], "meta": {...}}
+        # dict — the dashboard needs every payment for its aggregates.
+        result = finance_service.list_payments(s, tenant_id=tenant_id, page_size=2000)
+        rows = result.get("items", []) if isinstance(result, dict) else result
+        return [_serialize_payment(r) for r in rows if isinstance(r, dict)]
+
+    finance = frozenset({SCOPE_FINANCE})
+    requested: list[DashboardSection] = []
+    if can_view_policy:
+        requested += [
+            DashboardSection("policy", load_policy, scopes=finance),
+            DashboardSection("structure_policies", load_structure_policies, scopes=finance, default=[]),
+        ]
+    if can_view_invoices:
+        requested.append(DashboardSection("invoices", load_invoices, scopes=finance, default=[]))
+    if can_view_fees:
+        requested += [
+            DashboardSection("fee_categories", load_fee_categories, scopes=finance, default=[]),
+            DashboardSection("fee_items", load_fee_items, scopes=finance, default=[]),
+            DashboardSection(
+                "fee_structures",
+                load_fee_structures,
+                scopes=finance,
+                default={"structures": [], "items": {}, "items_ok": False},
+            ),
+        ]
+    if can_view_scholarships:
+        requested.append(DashboardSection("scholarships", load_scholarships, scopes=finance, default=[]))
+    if can_view_enrollments:
+        requested.append(
+            DashboardSection(
+                "enrollments",
+                load_enrollments,
+                scopes=frozenset({SCOPE_ENROLLMENTS}),
+                default=([], False),
+            )
+        )
+    if can_view_payments:
+        requested.append(DashboardSection("payments", load_payments, scopes=finance, default=[]))
+
+    sections = dashboard_sections.load_sections(
+        db,
+        tenant_id=tenant_id,
+        namespace="secretary_finance",
+        sections=requested,
+    )
+
+    def value(name: str, default: Any) -> Any:
+        result = sections.get(name)
+        return result.value if result is not None else default
+
+    def ok(name: str) -> bool:
+        result = sections.get(name)
+        return bool(result is not None and result.ok)
+
+    structures = value("fee_structures", {"structures": [], "items": {}, "items_ok": False})
+    enrollments, enrollments_ok = value("enrollments", ([], False))
+
+    health = {
+        "policy": ok("policy"),
+        "invoices": ok("invoices"),
+        "fee_categories": ok("fee_categories"),
+        "fee_items": ok("fee_items"),
+        "fee_structures": ok("fee_structures"),
+        "fee_structure_items": ok("fee_structures") and bool(structures["items_ok"]),
+        "structure_policies": ok("structure_policies"),
+        "scholarships": ok("scholarships"),
+        "enrollments": ok("enrollments") and bool(enrollments_ok),
+        "payments": ok("payments"),
+    }
 
     return {
-        "policy": policy,
-        "invoices": invoices,
-        "fee_categories": fee_categories,
-        "fee_items": fee_items,
-        "fee_structures": fee_structures,
-        "fee_structure_items": fee_structure_items,
-        "structure_policies": structure_policies,
-        "scholarships": scholarships,
+        "policy": value("policy", None),
+        "invoices": value("invoices", []),
+        "fee_categories": value("fee_categories", []),
+        "fee_items": value("fee_items", []),
+        "fee_structures": structures["structures"],
+        "fee_structure_items": structures["items"],
+        "structure_policies": value("structure_policies", []),
+        "scholarships": value("scholarships", []),
         "enrollments": enrollments,
-        "payments": payments,
+        "payments": value("payments", []),
         "health": health,
+        "freshness": dashboard_sections.freshness(sections),
     }
 
 
@@ -14421,6 +14175,8 @@ def director_user_update(
         request=request,
     )
     db.commit()
+    if "is_active" in fields_set and payload.is_active is False:
+        invalidate_user_sessions(target_user_id)
     rows = _director_user_payloads(db, tenant_id=tenant.id, user_ids=[target_user_id])
     if not rows:
         raise HTTPException(status_code=404, detail="User not found")
@@ -14514,6 +14270,7 @@ def director_user_delete(
         request=request,
     )
     db.commit()
+    invalidate_user_sessions(target_user_id)
     return DirectorUserDeleteOut(
         ok=True,
         user_id=str(target_user_id),
@@ -14686,6 +14443,7 @@ def director_rbac_override_upsert(
         request=request,
     )
     db.commit()
+    invalidate_user_sessions(user_id)
     return {"ok": True}
 
 
@@ -14739,6 +14497,7 @@ def director_rbac_override_delete(
             request=request,
         )
     db.commit()
+    invalidate_user_sessions(user_id)
     return {"ok": True}
 
 
@@ -14760,6 +14519,8 @@ def principal_dashboard(
     - One aggregated payload for principal dashboard data.
     - Tenant-scoped and permission-gated.
     - Best-effort: each section degrades independently and never blocks the full payload.
+    - Sections load concurrently and are cached per tenant (see
+      app.api.v1.tenants.dashboard_sections); `freshness` says how old each is.
     """
     me = {
         "user": {
@@ -14776,40 +14537,19 @@ def principal_dashboard(
         "permissions": sorted(_request_permissions(request)),
     }
 
-    health = {
-        "summary": False,
-        "enrollments": False,
-        "exams": False,
-        "events": False,
-        "teacher_assignments": False,
-        "timetable_entries": False,
-        "notifications": False,
-    }
-
-    enrollments: list[dict[str, Any]] = []
-    exams: list[TenantExamOut] = []
-    events: list[TenantEventOut] = []
-    teacher_assignments: list[TeacherAssignmentOut] = []
-    timetable_entries: list[TenantSchoolTimetableOut] = []
-    notifications: list[TenantNotificationOut] = []
-    unread_notifications = 0
-
-    total_users = 0
-    total_roles = 0
-    total_audit_logs = 0
+    tenant_id = tenant.id
+    current_user_id = _parse_uuid(getattr(user, "id", None), field="current_user.id")
 
-    try:
-        value = db.execute(
+    def load_summary(s: Session) -> dict[str, int]:
+        total_users = s.execute(
             select(sa.func.count())
             .select_from(UserTenant)
             .where(
-                UserTenant.tenant_id == tenant.id,
+                UserTenant.tenant_id == tenant_id,
                 UserTenant.is_active == True,
             )
         ).scalar()
-        total_users = int(value or 0)
-
-        value = db.execute(
+        total_roles = s.execute(
             select(sa.func.count(sa.distinct(Role.code)))
             .select_from(UserRole)
             .join(Role, Role.id == UserRole.role_id)
@@ -14817,41 +14557,37 @@ def principal_dashboard(
                 UserTenant,
                 and_(
                     UserTenant.user_id == UserRole.user_id,
-                    UserTenant.tenant_id == tenant.id,
+                    UserTenant.tenant_id == tenant_id,
                     UserTenant.is_active == True,
                 ),
             )
             .where(
                 sa.or_(
-                    UserRole.tenant_id == tenant.id,
+                    UserRole.tenant_id == tenant_id,
                     UserRole.tenant_id.is_(None),
                 )
             )
         ).scalar()
-        total_roles = int(value or 0)
-
         try:
             from app.models.audit_log import AuditLog  # type: ignore
 
-            value = db.execute(
+            total_audit_logs = s.execute(
                 select(sa.func.count())
                 .select_from(AuditLog)
-                .where(AuditLog.tenant_id == tenant.id)
+                .where(AuditLog.tenant_id == tenant_id)
             ).scalar()
-            total_audit_logs = int(value or 0)
         except Exception:
+            s.rollback()
             total_audit_logs = 0
+        return {
+            "total_users": int(total_users or 0),
+            "total_roles": int(total_roles or 0),
+            "total_audit_logs": int(total_audit_logs or 0),
+        }
 
-        health["summary"] = True
-    except Exception:
-        db.rollback()
-        total_users = 0
-        total_roles = 0
-        total_audit_logs = 0
-
-    try:
+    def load_enrollments(s: Session) -> list[dict[str, Any]]:
         enrollment_rows, table_name = _read_rows_first_table(
-            db,
+            s,
             table_candidates=ENROLLMENT_TABLE_CANDIDATES,
             sql_template="""
                 SELECT id, status, payload
@@ -14861,12 +14597,14 @@ def principal_dashboard(
                 LIMIT :limit OFFSET :offset
             """,
             params={
-                "tenant_id": str(tenant.id),
+                "tenant_id": str(tenant_id),
                 "limit": 500,
                 "offset": 0,
             },
         )
-        enrollments = [
+        if not table_name:
+            raise LookupError("no enrollment table")
+        return [
             {
                 "id": str(row.get("id") or ""),
                 "status": str(row.get("status") or ""),
@@ -14875,23 +14613,19 @@ def principal_dashboard(
             for row in enrollment_rows
             if row.get("id") is not None
         ]
-        health["enrollments"] = bool(table_name)
-    except Exception:
-        db.rollback()
-        enrollments = []
 
-    try:
+    def load_exams(s: Session) -> list[TenantExamOut]:
         exam_rows = _query_tenant_exams(
-            db,
-            tenant_id=tenant.id,
+            s,
+            tenant_id=tenant_id,
             include_inactive=True,
             limit=500,
             offset=0,
         )
-        term_lookup = _term_lookup_for_tenant(db, tenant_id=tenant.id)
-        subject_lookup = _subject_lookup_for_tenant(db, tenant_id=tenant.id)
-        staff_lookup = _staff_lookup_for_tenant(db, tenant_id=tenant.id)
-        exams = [
+        term_lookup = _term_lookup_for_tenant(s, tenant_id=tenant_id)
+        subject_lookup = _subject_lookup_for_tenant(s, tenant_id=tenant_id)
+        staff_lookup = _staff_lookup_for_tenant(s, tenant_id=tenant_id)
+        return [
             _serialize_exam_row(
                 row,
                 term_lookup=term_lookup,
@@ -14900,33 +14634,29 @@ def principal_dashboard(
             )
             for row in exam_rows
         ]
-        health["exams"] = True
-    except Exception:
-        db.rollback()
-        exams = []
 
-    try:
+    def load_events(s: Session) -> list[TenantEventOut]:
         event_rows = _query_tenant_events(
-            db,
-            tenant_id=tenant.id,
+            s,
+            tenant_id=tenant_id,
             include_inactive=True,
             limit=500,
             offset=0,
         )
         event_ids = [str(row.get("id") or "") for row in event_rows if row.get("id") is not None]
         event_class_map, event_student_map = _event_target_maps(
-            db,
-            tenant_id=tenant.id,
+            s,
+            tenant_id=tenant_id,
             event_ids=event_ids,
         )
         enrollment_ids = sorted({sid for ids in event_student_map.values() for sid in ids})
         enrollment_name_lookup = _enrollment_name_lookup_by_ids(
-            db,
-            tenant_id=tenant.id,
+            s,
+            tenant_id=tenant_id,
             enrollment_ids=enrollment_ids,
         )
-        term_lookup = _term_lookup_for_tenant(db, tenant_id=tenant.id)
-        events = [
+        term_lookup = _term_lookup_for_tenant(s, tenant_id=tenant_id)
+        return [
             _serialize_event_row(
                 row,
                 term_lookup=term_lookup,
@@ -14936,14 +14666,10 @@ def principal_dashboard(
             )
             for row in event_rows
         ]
-        health["events"] = True
-    except Exception:
-        db.rollback()
-        events = []
 
-    try:
-        teacher_assignments = list_teacher_assignments(
-            db=db,
+    def load_teacher_assignments(s: Session) -> list[TeacherAssignmentOut]:
+        return list_teacher_assignments(
+            db=s,
             tenant=tenant,
             _user=user,
             class_code=None,
@@ -14953,14 +14679,10 @@ def principal_dashboard(
             limit=500,
             offset=0,
         )
-        health["teacher_assignments"] = True
-    except Exception:
-        db.rollback()
-        teacher_assignments = []
 
-    try:
-        timetable_entries = list_tenant_school_timetable(
-            db=db,
+    def load_timetable(s: Session) -> list[TenantSchoolTimetableOut]:
+        return list_tenant_school_timetable(
+            db=s,
             tenant=tenant,
             _user=user,
             term_id=None,
@@ -14971,32 +14693,54 @@ def principal_dashboard(
             limit=1000,
             offset=0,
         )
-        health["timetable_entries"] = True
-    except Exception:
-        db.rollback()
-        timetable_entries = []
 
-    try:
-        current_user_id = _parse_uuid(getattr(user, "id", None), field="current_user.id")
-        notification_rows = _collect_tenant_notifications(
-            db,
-            tenant_id=tenant.id,
-            user_id=current_user_id,
-            limit=500,
-        )
-        notification_rows = _apply_notification_read_state(
-            db,
-            tenant_id=tenant.id,
-            user_id=current_user_id,
-            notifications=notification_rows,
-        )
-        unread_notifications = sum(1 for row in notification_rows if bool(getattr(row, "unread", False)))
-        notifications = notification_rows[:50]
-        health["notifications"] = True
-    except Exception:
-        db.rollback()
-        notifications = []
-        unread_notifications = 0
+    def load_notifications(s: Session) -> tuple[list[TenantNotificationOut], int]:
+        notifications = [
+            _feed_row_to_notification(row)
+            for row in notification_feed.list_feed(
+                s,
+                tenant_id=tenant_id,
+                user_id=current_user_id,
+                limit=50,
+            )
+        ]
+        unread = notification_feed.unread_count(s, tenant_id=tenant_id, user_id=current_user_id)
+        s.commit()  # unread_count may initialize the counter row
+        return notifications, int(unread)
+
+    sections = dashboard_sections.load_sections(
+        db,
+        tenant_id=tenant_id,
+        namespace="principal",
+        sections=[
+            DashboardSection("summary", load_summary, scopes=frozenset({SCOPE_PEOPLE}), default={}),
+            DashboardSection("enrollments", load_enrollments, scopes=frozenset({SCOPE_ENROLLMENTS}), default=[]),
+            DashboardSection("exams", load_exams, scopes=frozenset({SCOPE_ACADEMICS}), default=[]),
+            DashboardSection(
+                "events",
+                load_events,
+                scopes=frozenset({SCOPE_ACADEMICS, SCOPE_ENROLLMENTS}),
+                default=[],
+            ),
+            DashboardSection(
+                "teacher_assignments",
+                load_teacher_assignments,
+                scopes=frozenset({SCOPE_ACADEMICS, SCOPE_PEOPLE}),
+                default=[],
+            ),
+            DashboardSection("timetable_entries", load_timetable, scopes=frozenset({SCOPE_ACADEMICS}), default=[]),
+            # Per-user read state — never cached.
+            DashboardSection("notifications", load_notifications, ttl_s=0, default=([], 0)),
+        ],
+    )
+
+    counts = sections["summary"].value
+    enrollments = sections["enrollments"].value
+    exams = sections["exams"].value
+    events = sections["events"].value
+    teacher_assignments = sections["teacher_assignments"].value
+    timetable_entries = sections["timetable_entries"].value
+    notifications, unread_notifications = sections["notifications"].value
 
     active_statuses = {"ENROLLED", "APPROVED", "ENROLLED_PARTIAL"}
     total_students = sum(
@@ -15006,9 +14750,9 @@ def principal_dashboard(
     )
 
     summary = {
-        "total_users": int(total_users),
-        "total_roles": int(total_roles),
-        "total_audit_logs": int(total_audit_logs),
+        "total_users": int(counts.get("total_users", 0)),
+        "total_roles": int(counts.get("total_roles", 0)),
+        "total_audit_logs": int(counts.get("total_audit_logs", 0)),
         "total_students": int(total_students),
         "total_exams": int(len(exams)),
         "total_events": int(len(events)),
@@ -15027,7 +14771,8 @@ def principal_dashboard(
         timetable_entries=timetable_entries,
         notifications=notifications,
         unread_notifications=int(unread_notifications),
-        health=health,
+        health={name: result.ok for name, result in sections.items()},
+        freshness=dashboard_sections.freshness(sections),
     )
 
 
@@ -15043,34 +14788,33 @@ def secretary_dashboard(
 ):
     """
     Secretary dashboard aggregate endpoint.
+
+    Sections load concurrently and are cached per tenant (see
+    app.api.v1.tenants.dashboard_sections); `freshness` says how old each is.
     """
     me = {
         "tenant": {"slug": tenant.slug, "name": tenant.name},
         "roles": (getattr(user, "roles", None) or []),
     }
+    tenant_id = tenant.id
 
-    users = secretary_users(db=db, tenant=tenant, _user=user, limit=100, offset=0)
+    def load_users(s: Session) -> list[SecretaryUserOut]:
+        return secretary_users(db=s, tenant=tenant, _user=user, limit=100, offset=0)
 
-    try:
-        audit = secretary_audit(db=db, tenant=tenant, _user=user, limit=8, offset=0)
-    except Exception:
-        audit = []
+    def load_audit(s: Session) -> list[SecretaryAuditOut]:
+        return secretary_audit(db=s, tenant=tenant, _user=user, include_http_events=False, limit=8, offset=0)
 
-    enrollments: list[dict] = []
-    invoices: list[dict] = []
-
-    # Best-effort enrollments
-    try:
+    def load_enrollments(s: Session) -> list[dict]:
         from app.models.enrollment import Enrollment  # type: ignore
 
-        ers = db.execute(
+        ers = s.execute(
             select(Enrollment)
-            .where(Enrollment.tenant_id == tenant.id)
+            .where(Enrollment.tenant_id == tenant_id)
             .order_by(Enrollment.created_at.desc())
             .limit(8)
         ).scalars().all()
 
-        enrollments = [
+        return [
             {
                 "id": str(e.id),
                 "status": str(getattr(e, "status", "")),
@@ -15078,21 +14822,18 @@ def secretary_dashboard(
             }
             for e in ers
         ]
-    except Exception:
-        enrollments = []
 
-    # Best-effort invoices
-    try:
-        from app.models.finance import Invoice  # type: ignore
+    def load_invoices(s: Session) -> list[dict]:
+        from app.models.invoice import Invoice
 
-        invs = db.execute(
+        invs = s.execute(
             select(Invoice)
-            .where(Invoice.tenant_id == tenant.id)
+            .where(Invoice.tenant_id == tenant_id)
             .order_by(Invoice.created_at.desc())
             .limit(10)
         ).scalars().all()
 
-        invoices = [
+        return [
             {
                 "id": str(i.id),
                 "invoice_type": str(getattr(i, "invoice_type", "")),
@@ -15103,50 +14844,70 @@ def secretary_dashboard(
             }
             for i in invs
         ]
-    except Exception:
-        invoices = []
 
-    summary = {
-        "total_users": len(users),
-        "total_roles": 0,
-        "total_audit_logs": len(audit),
-    }
-
-    health = {"api": True}
-
-    try:
+    def load_today(s: Session) -> dict:
         from app.api.v1.tenants.dashboard_today import get_today_at_school
-        today_at_school = get_today_at_school(db, tenant_id=tenant.id)
-    except Exception:
-        # Today block is supplementary — never let it break the dashboard.
-        today_at_school = None
+
+        return get_today_at_school(s, tenant_id=tenant_id)
 
     # Demographics + outstanding-only finance for the secretary KPI strip.
     # No collected/billed aggregates exposed here — RBAC at the data layer.
-    try:
-        from app.api.v1.tenants.dashboard_stats import (
-            get_student_demographics,
-            get_finance_all_time,
-        )
-        demographics = get_student_demographics(db, tenant_id=tenant.id)
-        fin_all = get_finance_all_time(db, tenant_id=tenant.id)
-        finance_outstanding = {
+    def load_demographics(s: Session) -> dict:
+        from app.api.v1.tenants.dashboard_stats import get_student_demographics
+
+        return get_student_demographics(s, tenant_id=tenant_id)
+
+    def load_finance_outstanding(s: Session) -> dict:
+        from app.api.v1.tenants.dashboard_stats import get_finance_all_time
+
+        fin_all = get_finance_all_time(s, tenant_id=tenant_id)
+        return {
             "total_outstanding": fin_all["total_outstanding"],
             "invoice_count":     fin_all["invoice_count"],
         }
-    except Exception:
-        demographics = None
-        finance_outstanding = None
+
+    sections = dashboard_sections.load_sections(
+        db,
+        tenant_id=tenant_id,
+        namespace="secretary",
+        sections=[
+            DashboardSection("users", load_users, scopes=frozenset({SCOPE_PEOPLE}), default=[]),
+            DashboardSection("audit", load_audit, scopes=frozenset({SCOPE_PEOPLE}), default=[]),
+            DashboardSection("enrollments", load_enrollments, scopes=frozenset({SCOPE_ENROLLMENTS}), default=[]),
+            DashboardSection("invoices", load_invoices, scopes=frozenset({SCOPE_FINANCE}), default=[]),
+            # Today block is supplementary — never let it break the dashboard.
+            DashboardSection(
+                "today_at_school",
+                load_today,
+                scopes=frozenset({SCOPE_ACADEMICS, SCOPE_ENROLLMENTS}),
+                cache_key=date.today().isoformat(),
+            ),
+            DashboardSection("demographics", load_demographics, scopes=frozenset({SCOPE_ENROLLMENTS})),
+            DashboardSection("finance_outstanding", load_finance_outstanding, scopes=frozenset({SCOPE_FINANCE})),
+        ],
+    )
+
+    users = sections["users"].value
+    audit = sections["audit"].value
+
+    summary = {
+        "total_users": len(users),
+        "total_roles": 0,
+        "total_audit_logs": len(audit),
+    }
+
+    health = {"api": True, **{name: result.ok for name, result in sections.items()}}
 
     return SecretaryDashboardOut(
         me=me,
         summary=summary,
-        enrollments=enrollments,
-        invoices=invoices,
+        enrollments=sections["enrollments"].value,
+        invoices=sections["invoices"].value,
         users=users,
         audit=audit,
         health=health,
-        today_at_school=today_at_school,
-        demographics=demographics,
-        finance_outstanding=finance_outstanding,
+        today_at_school=sections["today_at_school"].value,
+        demographics=sections["demographics"].value,
+        finance_outstanding=sections["finance_outstanding"].value,
+        freshness=dashboard_sections.freshness(sections),
     )
@@ -1,8 +1,9 @@
 from __future__ import annotations
-from datetime import datetime, timedelta, timezone
+import re
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 from uuid import UUID
-from sqlalchemy import delete
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.models.audit_log import AuditLog
@@ -25,22 +26,131 @@ def _sanitize(obj: Any) -> Any:
     return obj
 
 
-def prune_audit_logs(db: Session, *, retention_days: int) -> int:
+_PARTITION_NAME = re.compile(r"^audit_logs_p(\d{4})(\d{2})$")
+_DEFAULT_PARTITION = "audit_logs_default"
+_MAINTENANCE_LOCK = "core.audit_logs.maintenance"
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def audit_partition_name(month: date) -> str:
+    return f"audit_logs_p{month.year:04d}{month.month:02d}"
+
+
+def _existing_partitions(db: Session) -> list[str]:
+    return list(
+        db.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                JOIN pg_namespace n ON n.oid = p.relnamespace
+                WHERE n.nspname = 'core' AND p.relname = 'audit_logs'
+                """
+            )
+        ).scalars()
+    )
+
+
+def _create_month_partition(db: Session, month: date, *, has_default: bool) -> None:
+    """Create one monthly partition. Rows already sitting in the default
+    partition for that month (maintenance lagged behind) are moved into it —
+    Postgres refuses to create the partition while they are there."""
+    lo, hi = month, _next_month(month)
+    name = audit_partition_name(month)
+    if not has_default:
+        db.execute(
+            text(
+                f"CREATE TABLE core.{name} PARTITION OF core.audit_logs "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+            )
+        )
+        return
+    db.execute(
+        text(
+            f"""
+            CREATE TEMP TABLE _audit_move AS
+            WITH moved AS (
+                DELETE FROM core.{_DEFAULT_PARTITION}
+                WHERE created_at >= :lo AND created_at < :hi
+                RETURNING *
+            )
+            SELECT * FROM moved
+            """
+        ),
+        {"lo": lo, "hi": hi},
+    )
+    db.execute(
+        text(
+            f"CREATE TABLE core.{name} PARTITION OF core.audit_logs "
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+        )
+    )
+    db.execute(text("INSERT INTO core.audit_logs SELECT * FROM _audit_move"))
+    db.execute(text("DROP TABLE _audit_move"))
+
+
+def maintain_audit_partitions(
+    db: Session, *, retention_days: int, months_ahead: int = 3, today: date | None = None
+) -> dict[str, Any]:
     """
-    Delete audit_log rows older than retention_days.
+    Keep core.audit_logs' monthly partitions in shape.
 
-    Called once at application startup so the table stays bounded without a
-    separate cron job.  The delete uses the indexed created_at column so it
-    runs in milliseconds even on a moderately large table.
+      - creates partitions from the current month through `months_ahead`;
+      - drops whole partitions whose range ends on or before the retention
+        cutoff (a catalog operation, not a row-by-row DELETE);
+      - deletes expired rows that ended up in the default partition.
 
-    Returns the number of rows deleted (0 if retention_days <= 0).
+    Retention is therefore month-granular: a row is kept for at least
+    `retention_days` and dropped with its month. Safe to call from every
+    worker at startup — only the one holding the advisory lock does the work.
+    Commits; returns what was done.
     """
-    if retention_days <= 0:
-        return 0
-    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
-    result = db.execute(delete(AuditLog).where(AuditLog.created_at < cutoff))
+    summary: dict[str, Any] = {"created": [], "dropped": [], "pruned_default": 0}
+    locked = db.execute(
+        text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": _MAINTENANCE_LOCK}
+    ).scalar()
+    if not locked:
+        db.rollback()
+        return summary
+
+    today = today or datetime.now(timezone.utc).date()
+    existing = set(_existing_partitions(db))
+
+    month = _month_start(today)
+    for _ in range(months_ahead + 1):
+        if audit_partition_name(month) not in existing:
+            _create_month_partition(db, month, has_default=_DEFAULT_PARTITION in existing)
+            summary["created"].append(audit_partition_name(month))
+        month = _next_month(month)
+
+    if retention_days > 0:
+        cutoff = today - timedelta(days=retention_days)
+        for name in sorted(existing):
+            match = _PARTITION_NAME.match(name)
+            if match is None:
+                continue
+            upper = _next_month(date(int(match.group(1)), int(match.group(2)), 1))
+            if upper <= cutoff:
+                db.execute(text(f"DROP TABLE core.{name}"))
+                summary["dropped"].append(name)
+        if _DEFAULT_PARTITION in existing:
+            result = db.execute(
+                text(f"DELETE FROM core.{_DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+                {"cutoff": cutoff},
+            )
+            summary["pruned_default"] = result.rowcount
+
     db.commit()
-    return result.rowcount
+    return summary
 
 
 def log_event(
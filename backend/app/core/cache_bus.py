@@ -0,0 +1,128 @@
+"""Cross-worker cache invalidation over Redis pub/sub.
+
+Per-worker L1 caches (session cache, tenant cache, …) are only safe if every
+gunicorn worker hears about revocations promptly. Each worker runs ONE
+subscriber task that listens on the channels registered here and dispatches
+messages to in-process handlers; producers call `publish`.
+
+Delivery is best effort. A worker that is disconnected from Redis misses
+messages, so every L1 cache that relies on the bus must also keep a short
+TTL — that TTL is the worst-case staleness, the bus makes the common case
+immediate. The listener reconnects with backoff and never raises.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+_handlers: dict[str, list[Handler]] = {}
+_task: asyncio.Task | None = None
+_stats = {"published": 0, "received": 0, "reconnects": 0}
+
+
+def subscribe(channel: str, handler: Handler) -> None:
+    """Register an in-process handler; call at import time of the cache module.
+
+    Handlers run on the event loop and must be fast and non-blocking
+    (an L1 eviction, not I/O).
+    """
+    handlers = _handlers.setdefault(channel, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+
+def dispatch(channel: str, message: str) -> None:
+    """Run local handlers for a message (also used by publish for this worker)."""
+    for handler in _handlers.get(channel, ()):
+        try:
+            handler(message)
+        except Exception:
+            logger.warning("cache_bus handler failed for %s", channel, exc_info=True)
+
+
+async def publish(channel: str, message: str) -> None:
+    """Evict locally right away, then fan out to the other workers.
+
+    The local dispatch does not wait for the round trip through Redis, so the
+    worker that handled a logout can never serve the stale entry itself.
+    """
+    dispatch(channel, message)
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.publish(channel, message)
+        _stats["published"] += 1
+    except Exception as exc:
+        logger.warning("cache_bus publish to %s failed: %s", channel, exc)
+
+
+async def _listen() -> None:
+    backoff = 1.0
+    while True:
+        client = get_redis_client()
+        if client is None or not _handlers:
+            await asyncio.sleep(5.0)
+            continue
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(*_handlers.keys())
+            backoff = 1.0
+            while True:
+                msg = await pubsub.get_message(timeout=1.0)
+                if msg is None:
+                    continue
+                _stats["received"] += 1
+                channel = msg.get("channel")
+                data = msg.get("data")
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if isinstance(data, bytes):
+                    data = data.decode()
+                dispatch(str(channel), str(data))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _stats["reconnects"] += 1
+            logger.warning("cache_bus listener error (retry in %.0fs): %s", backoff, exc)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def start_cache_bus() -> None:
+    """Start this worker's subscriber (lifespan startup, after init_redis)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_listen(), name="cache_bus")
+
+
+async def stop_cache_bus() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except (asyncio.CancelledError, Exception):
+        pass
+    _task = None
+
+
+def snapshot() -> dict[str, object]:
+    return {
+        "running": _task is not None and not _task.done(),
+        "channels": sorted(_handlers),
+        **_stats,
+    }
@@ -64,6 +64,42 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://redis:6379/0"
     REDIS_PASSWORD: str = ""  # Set in production; leave empty for no-auth dev
 
+    # Per-worker L1 in front of the Redis session cache / blacklist.
+    # Revocations are pushed to every worker over pub/sub; this TTL is the
+    # worst-case window if a worker misses the message.
+    SESSION_CACHE_LOCAL_TTL_SEC: int = 5
+    SESSION_CACHE_LOCAL_MAX_ENTRIES: int = 4096
+
+    # Role → permission maps (app.core.permission_cache). Maps are versioned
+    # through Redis counters bumped by the RBAC mutation routes; the L1 TTL
+    # only matters when Redis is unavailable.
+    RBAC_CACHE_LOCAL_TTL_SEC: int = 60
+    RBAC_CACHE_TTL_SEC: int = 3600
+    RBAC_CACHE_MAX_ENTRIES: int = 1024
+
+    # Subscription state cache (app.core.subscription_gate). Invalidation is
+    # pushed to every worker on admin/payment changes and entries never
+    # outlive the day they were resolved on, so the TTLs can be long.
+    SUBSCRIPTION_CACHE_LOCAL_TTL_SEC: int = 300
+    SUBSCRIPTION_CACHE_TTL_SEC: int = 3600
+    SUBSCRIPTION_CACHE_MAX_ENTRIES: int = 4096
+
+    # Tenant resolution cache (TenantMiddleware).
+    # L1 is a per-worker LRU; Redis holds the shared copy. The L1 TTL bounds
+    # how long another worker can serve a tenant after it was suspended or
+    # re-slugged, so keep it short. Negative entries (unknown hosts/slugs)
+    # expire quickly so a newly created tenant becomes reachable promptly.
+    TENANT_CACHE_LOCAL_TTL_SEC: int = 15
+    TENANT_CACHE_TTL_SEC: int = 300
+    TENANT_CACHE_NEGATIVE_TTL_SEC: int = 10
+    TENANT_CACHE_MAX_ENTRIES: int = 2048
+
+    # Schema registry (app.core.schema_registry): how often a worker re-reads
+    # the Alembic head to notice migrations, and the minimum gap between
+    # catalog reloads triggered by a lookup that found none of its tables.
+    SCHEMA_REGISTRY_RECHECK_SEC: int = 60
+    SCHEMA_REGISTRY_MISS_RELOAD_SEC: int = 30
+
     # Daraja (M-Pesa STK) integration
     DARAJA_ENV: str = "sandbox"  # sandbox | production
     DARAJA_CONSUMER_KEY: str = ""
@@ -82,6 +118,34 @@ class Settings(BaseSettings):
     # 300 s (5 min) matches the M-Pesa STK prompt expiry.  Set to 0 to disable.
     DARAJA_DEDUP_WINDOW_SEC: int = 300
 
+    # Outbound provider HTTP (app.core.http_client).  Daraja and Africa's
+    # Talking calls share keep-alive connection pools: at most
+    # HTTP_POOL_MAX_IDLE_PER_HOST idle connections per host, each dropped
+    # after HTTP_POOL_IDLE_TIMEOUT_SEC unused.  Retries of 5xx / network
+    # failures draw on a per-host budget: each request earns
+    # HTTP_RETRY_BUDGET_RATIO of a retry, the bucket holds at most
+    # HTTP_RETRY_BUDGET_MIN.  OAuth tokens are refreshed
+    # HTTP_TOKEN_REFRESH_MARGIN_SEC before they expire.
+    HTTP_POOL_MAX_IDLE_PER_HOST: int = 8
+    HTTP_POOL_IDLE_TIMEOUT_SEC: float = 30.0
+    HTTP_RETRY_BUDGET_RATIO: float = 0.2
+    HTTP_RETRY_BUDGET_MIN: int = 10
+    HTTP_TOKEN_REFRESH_MARGIN_SEC: int = 60
+
+    # STK reconciler (app.api.v1.payments.reconciler).  An STK push whose
+    # callback has not arrived STK_RECONCILE_FIRST_CHECK_SEC after it was
+    # sent is queried on Daraja, retried with exponential backoff from
+    # STK_RECONCILE_BASE_DELAY_SEC up to STK_RECONCILE_MAX_DELAY_SEC, and
+    # left PENDING after STK_RECONCILE_GIVE_UP_SEC.  Each worker runs a pass
+    # of at most STK_RECONCILE_BATCH_SIZE checkouts every
+    # STK_RECONCILE_INTERVAL_SEC.  Set the interval to 0 to disable.
+    STK_RECONCILE_INTERVAL_SEC: int = 10
+    STK_RECONCILE_BATCH_SIZE: int = 50
+    STK_RECONCILE_FIRST_CHECK_SEC: int = 45
+    STK_RECONCILE_BASE_DELAY_SEC: int = 20
+    STK_RECONCILE_MAX_DELAY_SEC: int = 300
+    STK_RECONCILE_GIVE_UP_SEC: int = 3600
+
     # Africa's Talking (SMS provider)
     # ShuleHQ holds one AT account; all tenant SMS goes through it.
     # Set AT_USE_MOCK=true for CI and local dev to skip real AT calls.
@@ -94,12 +158,67 @@ class Settings(BaseSettings):
     # Units to deduct per SMS segment (160 chars = 1 unit, >160 = 2+ units)
     AT_UNITS_PER_SEGMENT: int = 1
     AT_CHARS_PER_SEGMENT: int = 160
+    # Queued SMS (broadcasts) are sent by a background job: recipients of the
+    # same body share one multi-recipient AT request of at most
+    # AT_MAX_RECIPIENTS_PER_REQUEST numbers, SMS_DISPATCH_CONCURRENCY requests
+    # in flight at a time.  A run claims a request's rows (SENDING) just
+    # before sending it; a claim older than SMS_DISPATCH_CLAIM_TTL_SEC is
+    # taken to belong to a dead run and may be claimed again.
+    AT_MAX_RECIPIENTS_PER_REQUEST: int = 100
+    SMS_DISPATCH_CONCURRENCY: int = 4
+    SMS_DISPATCH_CLAIM_TTL_SEC: int = 600
 
-    # Audit log retention.  Rows older than this many days are deleted at
-    # application startup.  90 days satisfies typical compliance requirements
-    # while keeping the table size bounded.  Set to 0 to disable pruning.
+    # Audit log retention.  Monthly partitions of core.audit_logs whose whole
+    # range is older than this many days are dropped at application startup,
+    # so rows live at least this long (up to a month longer).  90 days
+    # satisfies typical compliance requirements while keeping the table size
+    # bounded.  Set to 0 to disable pruning.
     AUDIT_LOG_RETENTION_DAYS: int = 90
 
+    # Tenant notification feed sweep (app.api.v1.tenants.notification_feed).
+    # Re-syncs every tenant's feed from its sources — picking up time-based
+    # notifications such as overdue assets — and recounts unread badges.
+    # One worker sweeps at a time.  Set to 0 to disable.
+    NOTIFICATION_SWEEP_INTERVAL_SEC: int = 300
+
+    # Dashboard sections (app.api.v1.tenants.dashboard_sections).  Principal /
+    # secretary dashboard sections load concurrently on this many pooled
+    # connections per worker, each within the timeout, and are cached per
+    # tenant.  Writes invalidate the cache on commit; the TTL only bounds
+    # staleness when the cache bus is unavailable.
+    DASHBOARD_SECTION_WORKERS: int = 8
+    DASHBOARD_SECTION_TIMEOUT_MS: int = 4000
+    DASHBOARD_SECTION_CACHE_TTL_SEC: int = 60
+    DASHBOARD_SECTION_CACHE_MAX_ENTRIES: int = 4096
+
+    # 8-4-4 class-term results (reports): per-worker cache of each class's
+    # marks, means and positions for a term.  Mark and exam writes drop the
+    # tenant's entries on commit; the TTL bounds staleness from other edits
+    # (student names) and missed cache-bus messages.
+    REPORT_RESULTS_CACHE_TTL_SEC: int = 300
+    REPORT_RESULTS_CACHE_MAX_ENTRIES: int = 1024
+
+    # Director KPI snapshot (core.tenant_kpi_snapshots).  Source-table
+    # triggers mark a tenant's snapshot stale on every change; this is the
+    # upper bound on its age regardless (a safety net for a marker lost to
+    # a write racing a refresh).
+    KPI_SNAPSHOT_MAX_AGE_SEC: int = 900
+
+    # Background jobs (app.core.jobs).  Long finance / SMS operations queued
+    # with ?async=true run on worker threads: JOB_INPROCESS_WORKERS per API
+    # worker process (0 = leave them to `python -m app.worker`, which runs
+    # JOB_WORKER_THREADS).  Idle workers poll every JOB_POLL_INTERVAL_SEC.  A
+    # running job heartbeats every JOB_HEARTBEAT_INTERVAL_SEC; one silent for
+    # JOB_STALE_AFTER_SEC (worker killed) is requeued, at most
+    # JOB_MAX_ATTEMPTS runs in total.
+    JOB_INPROCESS_WORKERS: int = 1
+    JOB_WORKER_THREADS: int = 2
+    JOB_POLL_INTERVAL_SEC: float = 2.0
+    JOB_PROGRESS_INTERVAL_MS: int = 1000
+    JOB_HEARTBEAT_INTERVAL_SEC: int = 15
+    JOB_STALE_AFTER_SEC: int = 120
+    JOB_MAX_ATTEMPTS: int = 2
+
     if _HAS_PYDANTIC_SETTINGS:
         model_config = SettingsConfigDict(env_file=_ENV_FILE, extra="ignore")
     else:
@@ -2,21 +2,25 @@
 
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, Request
 from jose import JWTError
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.v1.auth.service import _load_roles_permissions
 from app.core.database import get_db
+from app.core.metrics import LatencyHistogram
 from app.core.session_cache import (
     blacklist_token,
     cache_session,
-    get_cached_session,
     invalidate_session,
-    is_blacklisted,
+    load_session,
 )
 from app.models.user import User
 from app.utils.tokens import decode_token
@@ -56,28 +60,92 @@ def _decode_access_token(token: str) -> dict:
     return payload
 
 
-def _load_active_user(db: Session, user_id: str | None) -> User:
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid user")
-    try:
-        user = db.get(User, user_id)
-    except SQLAlchemyError:
-        raise HTTPException(status_code=503, detail="Database unavailable")
-    if not user or not user.is_active:
-        raise HTTPException(status_code=401, detail="Invalid user")
-    return user
+@dataclass(frozen=True)
+class CurrentUser:
+    """Request-scoped view of the authenticated user.
+
+    Built from the session cache on a hit (no DB I/O) or from the users row
+    on a miss. Detached from any Session — a route that needs to mutate the
+    user loads the row itself with `db.get(User, user.id)`.
+    """
+
+    id: UUID
+    email: str
+    full_name: str | None
+    phone: str | None
+    is_active: bool
+
+    @classmethod
+    def from_row(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            phone=user.phone,
+            is_active=bool(user.is_active),
+        )
+
+    @classmethod
+    def from_cache(cls, data: dict | None) -> "CurrentUser | None":
+        """None when the entry predates the cached-user format (→ reload)."""
+        raw = (data or {}).get("user")
+        if not isinstance(raw, dict):
+            return None
+        try:
+            return cls(
+                id=UUID(str(raw["id"])),
+                email=str(raw.get("email") or ""),
+                full_name=raw.get("full_name"),
+                phone=raw.get("phone"),
+                is_active=bool(raw.get("is_active")),
+            )
+        except (KeyError, ValueError):
+            return None
+
+    def to_cache(self) -> dict:
+        return {
+            "id": str(self.id),
+            "email": self.email,
+            "full_name": self.full_name,
+            "phone": self.phone,
+            "is_active": self.is_active,
+        }
+
+
+# Auth overhead per request, split by session-cache outcome. Surfaced on
+# /healthz so a regression (e.g. Redis down → every request is a miss) is
+# visible without a profiler.
+_auth_latency_hit = LatencyHistogram(name="auth.cache_hit")
+_auth_latency_miss = LatencyHistogram(name="auth.cache_miss")
 
 
-def _load_effective_permissions(
+def auth_latency_snapshot() -> dict[str, object]:
+    return {
+        "cache_hit": _auth_latency_hit.snapshot(),
+        "cache_miss": _auth_latency_miss.snapshot(),
+    }
+
+
+def _load_user_session(
     db: Session,
     *,
-    user_id: str,
+    user_id: str | None,
     tenant_id,
-) -> tuple[list[str], list[str]]:
+) -> tuple[CurrentUser, list[str], list[str]]:
+    """Blocking DB load of the user + effective permissions (cache miss).
+
+    Runs in the threadpool — never call it directly from async code.
+    """
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid user")
     try:
-        return _load_roles_permissions(db, tenant_id, user_id)
+        user = db.get(User, user_id)
+        if not user or not user.is_active:
+            raise HTTPException(status_code=401, detail="Invalid user")
+        roles, permissions = _load_roles_permissions(db, tenant_id, str(user.id))
     except SQLAlchemyError:
         raise HTTPException(status_code=503, detail="Database unavailable")
+    return CurrentUser.from_row(user), roles, permissions
 
 
 def _remaining_ttl(payload: dict) -> int:
@@ -87,6 +155,82 @@ def _remaining_ttl(payload: dict) -> int:
     return max(1, int(exp) - int(datetime.now(timezone.utc).timestamp()))
 
 
+def _set_request_grants(request: Request, user: CurrentUser, roles: list, permissions: list) -> None:
+    request.state.user_id = user.id
+    request.state.roles = roles
+    request.state.permissions = permissions
+    # Built once per request; every permission check is a set lookup.
+    request.state.role_set = frozenset(
+        str(role).strip().upper() for role in roles if isinstance(role, str) and str(role).strip()
+    )
+    request.state.permission_set = frozenset(permissions)
+
+
+def role_set(request: Request) -> frozenset[str]:
+    """Upper-cased role codes of the authenticated user."""
+    roles = getattr(request.state, "role_set", None)
+    if roles is None:
+        roles = frozenset(
+            str(role).strip().upper()
+            for role in (getattr(request.state, "roles", []) or [])
+            if isinstance(role, str) and str(role).strip()
+        )
+        request.state.role_set = roles
+    return roles
+
+
+def permission_set(request: Request) -> frozenset[str]:
+    """Effective permission codes of the authenticated user."""
+    perms = getattr(request.state, "permission_set", None)
+    if perms is None:
+        perms = frozenset(getattr(request.state, "permissions", []) or [])
+        request.state.permission_set = perms
+    return perms
+
+
+async def _resolve_session(
+    request: Request,
+    db: Session,
+    *,
+    token: str,
+    payload: dict,
+    cached: dict | None,
+    tenant_id,
+    started: float,
+) -> CurrentUser:
+    """Cache hit: zero DB I/O. Cache miss: DB load off the event loop, then
+    populate the cache. Sets request.state user/roles/permissions."""
+    user = CurrentUser.from_cache(cached)
+    if user is not None and user.is_active:
+        _set_request_grants(request, user, cached.get("roles", []), cached.get("permissions", []))
+        _auth_latency_hit.observe((time.perf_counter() - started) * 1000.0)
+        return user
+
+    try:
+        user, roles, permissions = await run_in_threadpool(
+            _load_user_session,
+            db,
+            user_id=payload.get("sub"),
+            tenant_id=tenant_id,
+        )
+        _set_request_grants(request, user, roles, permissions)
+
+        await cache_session(
+            token,
+            {
+                "user_id": str(user.id),
+                "user": user.to_cache(),
+                "roles": roles,
+                "permissions": permissions,
+            },
+            ttl_seconds=_remaining_ttl(payload),
+            user_id=str(user.id),
+        )
+    finally:
+        _auth_latency_miss.observe((time.perf_counter() - started) * 1000.0)
+    return user
+
+
 # -----------------------------
 # Auth: Tenant Mode (School Users)
 # -----------------------------
@@ -94,7 +238,7 @@ async def get_current_user(
     request: Request,
     db: Session = Depends(get_db),
     tenant=Depends(get_tenant),
-):
+) -> CurrentUser:
     """
     Tenant-auth for school users AND safe SaaS-operator impersonation.
 
@@ -104,19 +248,26 @@ async def get_current_user(
         exists (i.e. request has a valid X-Tenant-Slug / domain mapping).
 
     Session caching:
-      - On the first authenticated request the user + permissions are loaded
-        from DB and cached in Redis for the remaining token lifetime.
-      - Subsequent requests with the same token are served from cache,
-        avoiding DB round-trips for the full 15-minute access window.
+      - On the first authenticated request the user (incl. active flag) and
+        permissions are loaded from DB in the threadpool and cached in Redis
+        for the remaining token lifetime.
+      - Subsequent requests with the same token are served from cache with
+        no DB round-trip at all; the event loop is never blocked.
+      - Deactivating a user drops their cached sessions
+        (session_cache.invalidate_user_sessions).
 
     Blacklist check:
       - Tokens blacklisted at logout are rejected immediately, before any
-        DB lookup.
+        DB lookup. The blacklist check and the session read share one
+        pipelined Redis round trip, and both are usually answered by the
+        per-worker L1 without any Redis call (see session_cache).
     """
+    started = time.perf_counter()
     token = _read_bearer_token(request)
 
     # Fast-path: reject revoked tokens before touching the DB.
-    if await is_blacklisted(token):
+    revoked, cached = await load_session(token)
+    if revoked:
         raise HTTPException(status_code=401, detail="Token has been revoked")
 
     payload = _decode_access_token(token)
@@ -130,35 +281,15 @@ async def get_current_user(
         if token_tenant_id != str(tenant.id):
             raise HTTPException(status_code=401, detail="Tenant mismatch")
 
-    user_id = payload.get("sub")
-
-    # Cache hit: skip DB permission round-trip.
-    cached = await get_cached_session(token)
-    if cached:
-        user = _load_active_user(db, cached.get("user_id") or user_id)
-        request.state.user_id = user.id
-        request.state.roles = cached.get("roles", [])
-        request.state.permissions = cached.get("permissions", [])
-        return user
-
-    # Cache miss: full DB load then populate cache.
-    user = _load_active_user(db, user_id)
-    roles, permissions = _load_effective_permissions(
+    return await _resolve_session(
+        request,
         db,
-        user_id=str(user.id),
+        token=token,
+        payload=payload,
+        cached=cached,
         tenant_id=tenant.id,
+        started=started,
     )
-    request.state.user_id = user.id
-    request.state.roles = roles
-    request.state.permissions = permissions
-
-    await cache_session(
-        token,
-        {"user_id": str(user.id), "roles": roles, "permissions": permissions},
-        ttl_seconds=_remaining_ttl(payload),
-    )
-
-    return user
 
 
 # -----------------------------
@@ -167,10 +298,12 @@ async def get_current_user(
 async def get_current_user_saas(
     request: Request,
     db: Session = Depends(get_db),
-):
+) -> CurrentUser:
+    started = time.perf_counter()
     token = _read_bearer_token(request)
 
-    if await is_blacklisted(token):
+    revoked, cached = await load_session(token)
+    if revoked:
         raise HTTPException(status_code=401, detail="Token has been revoked")
 
     payload = _decode_access_token(token)
@@ -178,33 +311,15 @@ async def get_current_user_saas(
     if payload.get("tenant_id") != SAAS_TENANT_MARKER:
         raise HTTPException(status_code=401, detail="Not a SaaS token")
 
-    user_id = payload.get("sub")
-
-    cached = await get_cached_session(token)
-    if cached:
-        user = _load_active_user(db, cached.get("user_id") or user_id)
-        request.state.user_id = user.id
-        request.state.roles = cached.get("roles", [])
-        request.state.permissions = cached.get("permissions", [])
-        return user
-
-    user = _load_active_user(db, user_id)
-    roles, permissions = _load_effective_permissions(
+    return await _resolve_session(
+        request,
         db,
-        user_id=str(user.id),
+        token=token,
+        payload=payload,
+        cached=cached,
         tenant_id=None,
+        started=started,
     )
-    request.state.user_id = user.id
-    request.state.roles = roles
-    request.state.permissions = permissions
-
-    await cache_session(
-        token,
-        {"user_id": str(user.id), "roles": roles, "permissions": permissions},
-        ttl_seconds=_remaining_ttl(payload),
-    )
-
-    return user
 
 
 # -----------------------------
@@ -222,15 +337,9 @@ def require_permission(code: str):
         request: Request,
         _user=Depends(get_current_user),
     ):
-        roles = {
-            str(role).strip().upper()
-            for role in (getattr(request.state, "roles", []) or [])
-            if isinstance(role, str) and str(role).strip()
-        }
-        if "SUPER_ADMIN" in roles:
+        if "SUPER_ADMIN" in role_set(request):
             return
-        perms = getattr(request.state, "permissions", []) or []
-        if code not in perms:
+        if code not in permission_set(request):
             raise HTTPException(status_code=403, detail=f"Missing permission: {code}")
     return _checker
 
@@ -246,14 +355,8 @@ def require_permission_saas(code: str):
         request: Request,
         _user=Depends(get_current_user_saas),
     ):
-        roles = {
-            str(role).strip().upper()
-            for role in (getattr(request.state, "roles", []) or [])
-            if isinstance(role, str) and str(role).strip()
-        }
-        if "SUPER_ADMIN" in roles:
+        if "SUPER_ADMIN" in role_set(request):
             return
-        perms = getattr(request.state, "permissions", []) or []
-        if code not in perms:
+        if code not in permission_set(request):
             raise HTTPException(status_code=403, detail=f"Missing permission: {code}")
     return _checker
@@ -0,0 +1,337 @@
+"""Shared outbound HTTP client for payment / SMS provider calls.
+
+Daraja (M-Pesa) and Africa's Talking were called through `urllib.request`,
+which opens a new connection — TCP plus TLS handshake — for every request,
+and Daraja's OAuth token was fetched again before every STK push / query.
+This module gives those calls:
+
+  - keep-alive connection pools, one per (scheme, host, port): idle
+    connections are reused for up to HTTP_POOL_IDLE_TIMEOUT_SEC, at most
+    HTTP_POOL_MAX_IDLE_PER_HOST kept per host. An idle connection the
+    server has already closed is dropped before it is reused. One that
+    fails anyway is replaced transparently — not an upstream failure, no
+    retry spent — but only for idempotent methods: a POST (an STK push, an
+    SMS send) may have reached the server, so its failure is reported;
+  - per-call timeouts and retries (5xx and network errors, exponential
+    backoff), bounded by a per-host retry budget: every request earns
+    HTTP_RETRY_BUDGET_RATIO of a retry, a retry spends one, and the bucket
+    holds at most HTTP_RETRY_BUDGET_MIN. During an outage retries stop
+    multiplying the load instead of tripling it;
+  - `token_cache`, a shared OAuth access-token cache. A token is reused
+    until HTTP_TOKEN_REFRESH_MARGIN_SEC before its `expires_in`, and
+    concurrent refreshes of the same token are single-flighted: one caller
+    fetches, the others wait for its result (or its error).
+
+Only the standard library is used, so proxies are honoured the way urllib
+did: HTTPS requests tunnel through the `https_proxy` environment setting
+unless `no_proxy` excludes the host.
+
+Callers map the two exceptions to their own error messages. Mock modes
+(DARAJA_USE_MOCK / AT_USE_MOCK) never reach this module.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import select
+import ssl
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A reused keep-alive connection the server has since closed fails with one
+# of these before any response arrives; an idempotent request is re-sent on
+# a fresh connection.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class HttpStatusError(Exception):
+    """The server answered with a non-2xx status (after any retries)."""
+
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+        super().__init__(f"HTTP {status}")
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+
+class HttpNetworkError(Exception):
+    """No response: DNS, connect, TLS or read failure, or a timeout."""
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    body: bytes
+
+    def json(self) -> Any:
+        raw = self.body.decode("utf-8")
+        return json.loads(raw) if raw else {}
+
+
+class _HostPool:
+    """Idle keep-alive connections to one origin, plus its retry budget."""
+
+    def __init__(self, scheme: str, host: str, port: int) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self._idle: list[tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        self._retry_tokens = float(settings.HTTP_RETRY_BUDGET_MIN)
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            proxy = getproxies().get("https")
+            if proxy and not proxy_bypass(self.host):
+                parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+                conn = http.client.HTTPSConnection(
+                    parts.hostname, parts.port or 80, timeout=timeout, context=_ssl_context()
+                )
+                conn.set_tunnel(self.host, self.port)
+                return conn
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=timeout, context=_ssl_context()
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def acquire(self, timeout: float, *, fresh: bool = False) -> tuple[http.client.HTTPConnection, bool]:
+        """A connection for one request and whether it is a reused one."""
+        if not fresh:
+            cutoff = time.monotonic() - float(settings.HTTP_POOL_IDLE_TIMEOUT_SEC)
+            with self._lock:
+                while self._idle:
+                    conn, idle_since = self._idle.pop()
+                    if idle_since < cutoff or _peer_closed(conn):
+                        conn.close()
+                        continue
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+        return self._connect(timeout), False
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < max(0, int(settings.HTTP_POOL_MAX_IDLE_PER_HOST)):
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def earn_retry(self) -> None:
+        with self._lock:
+            self._retry_tokens = min(
+                float(settings.HTTP_RETRY_BUDGET_MIN),
+                self._retry_tokens + float(settings.HTTP_RETRY_BUDGET_RATIO),
+            )
+
+    def spend_retry(self) -> bool:
+        with self._lock:
+            if self._retry_tokens >= 1.0:
+                self._retry_tokens -= 1.0
+                return True
+            return False
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+def _peer_closed(conn: http.client.HTTPConnection) -> bool:
+    """An idle connection is readable only once the server closed it (or
+    sent something unasked) — either way it can't carry a request."""
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+_ssl_ctx: Optional[ssl.SSLContext] = None
+_pools: dict[tuple[str, str, int], _HostPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _ssl_context() -> ssl.SSLContext:
+    global _ssl_ctx
+    if _ssl_ctx is None:
+        _ssl_ctx = ssl.create_default_context()
+    return _ssl_ctx
+
+
+def _pool_for(scheme: str, host: str, port: int) -> _HostPool:
+    key = (scheme, host, port)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = _HostPool(scheme, host, port)
+        return pool
+
+
+def close_all() -> None:
+    """Close every idle pooled connection (tests, shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _send_once(
+    pool: _HostPool,
+    *,
+    method: str,
+    target: str,
+    headers: dict[str, str],
+    body: Optional[bytes],
+    timeout: float,
+) -> HttpResponse:
+    fresh = False
+    while True:
+        conn, reused = pool.acquire(timeout, fresh=fresh)
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except _STALE_CONNECTION_ERRORS as exc:
+            conn.close()
+            if reused and method in _IDEMPOTENT_METHODS:
+                fresh = True
+                continue
+            raise HttpNetworkError(str(exc) or type(exc).__name__) from exc
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            raise HttpNetworkError(str(exc) or type(exc).__name__) from exc
+        if resp.will_close:
+            conn.close()
+        else:
+            pool.release(conn)
+        return HttpResponse(status=resp.status, body=data)
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    headers: Optional[dict[str, str]] = None,
+    body: Optional[bytes] = None,
+    timeout_sec: float = 30,
+    max_retries: int = 0,
+    retry_backoff_sec: float = 0.5,
+) -> HttpResponse:
+    """Send one request over the origin's pooled connection.
+
+    5xx responses and network errors are retried up to `max_retries` times
+    (while the host's retry budget lasts), sleeping `retry_backoff_sec *
+    2**attempt` in between. Raises HttpStatusError for a non-2xx answer and
+    HttpNetworkError when no answer arrived.
+    """
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+    if scheme not in {"http", "https"} or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    pool = _pool_for(scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+
+    pool.earn_retry()
+    attempt = 0
+    while True:
+        try:
+            resp = _send_once(
+                pool,
+                method=method.upper(),
+                target=target,
+                headers=dict(headers or {}),
+                body=body,
+                timeout=timeout_sec,
+            )
+        except HttpNetworkError as exc:
+            failure: Exception = exc
+        else:
+            if 200 <= resp.status < 300:
+                return resp
+            failure = HttpStatusError(resp.status, resp.body)
+            if resp.status < 500:
+                raise failure
+        if attempt >= max_retries or not pool.spend_retry():
+            raise failure
+        logger.debug("Retrying %s %s after %s", method.upper(), parts.hostname, failure)
+        time.sleep(retry_backoff_sec * (2 ** attempt))
+        attempt += 1
+
+
+class TokenCache:
+    """Access tokens by key, reused until shortly before they expire.
+
+    `get(key, fetch)` returns the cached token or calls `fetch()` — which
+    returns (token, expires_in_seconds) — to get a new one. Concurrent
+    callers missing the same key share one fetch; a failed fetch raises in
+    every waiting caller and caches nothing.
+    """
+
+    def __init__(self, *, name: str = "") -> None:
+        self.name = name
+        self._tokens: dict[Hashable, tuple[str, float]] = {}
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fetch: Callable[[], tuple[str, float]]) -> str:
+        with self._lock:
+            hit = self._tokens.get(key)
+            if hit is not None and hit[1] > time.monotonic():
+                return hit[0]
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+        if not leader:
+            return pending.result()
+
+        try:
+            token, expires_in = fetch()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(exc)
+            raise
+        reuse_for = float(expires_in or 0) - float(settings.HTTP_TOKEN_REFRESH_MARGIN_SEC)
+        with self._lock:
+            if reuse_for > 0:
+                self._tokens[key] = (token, time.monotonic() + reuse_for)
+            self._inflight.pop(key, None)
+        pending.set_result(token)
+        return token
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one token (e.g. after the provider rejected it) or all."""
+        with self._lock:
+            if key is None:
+                self._tokens.clear()
+            else:
+                self._tokens.pop(key, None)
+
+
+token_cache = TokenCache(name="oauth")
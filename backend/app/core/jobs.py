@@ -0,0 +1,511 @@
+"""Postgres-backed background jobs for long tenant operations.
+
+Bulk invoice generation / publishing, the reconcile sweep, class-wide
+scholarship application and fee-reminder SMS runs used to execute inside the
+request, holding a DB connection and a gunicorn worker for their whole run
+(the 120 s worker timeout was the only guard). Their endpoints can now queue
+them instead (`?async=true` → 202 + job URL):
+
+  - jobs live in core.background_jobs; a worker claims the oldest QUEUED row
+    with FOR UPDATE SKIP LOCKED, so any number of workers (threads in the
+    API processes, or the standalone `python -m app.worker`) share the
+    queue without double-running a job;
+  - a handler reports progress through its JobContext; progress is written
+    in short transactions of its own (throttled to one write per
+    JOB_PROGRESS_INTERVAL_MS) and is where a cancellation request is
+    noticed — the handler's transaction is rolled back and the job ends
+    CANCELLED;
+  - while a job runs, a heartbeat thread touches its row every
+    JOB_HEARTBEAT_INTERVAL_SEC; a RUNNING job whose heartbeat is older than
+    JOB_STALE_AFTER_SEC (worker killed mid-run) is requeued, up to
+    JOB_MAX_ATTEMPTS runs — delivery is at-least-once, so handlers must be
+    safe to re-run (the bulk operations skip rows they already handled);
+  - an Idempotency-Key on the submit returns the job already created with
+    that key instead of queueing a second run.
+
+Handlers register with `register_job(kind, permission=...)`; the permission
+decides who besides the submitter may read or cancel the job.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, LatencyHistogram
+from app.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_SUCCEEDED = "SUCCEEDED"
+JOB_FAILED = "FAILED"
+JOB_CANCELLED = "CANCELLED"
+TERMINAL_STATUSES = frozenset({JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED})
+
+_jobs = BackgroundJob.__table__
+
+_claimed = Counter("jobs_claimed")
+_succeeded = Counter("jobs_succeeded")
+_failed = Counter("jobs_failed")
+_cancelled = Counter("jobs_cancelled")
+_requeued = Counter("jobs_requeued")
+_run_latency = LatencyHistogram(
+    "job_run", buckets_ms=(100, 500, 1000, 5000, 15000, 60000, 300000, 900000)
+)
+
+
+class JobCancelled(Exception):
+    """Raised from JobContext.progress once cancellation was requested."""
+
+
+@dataclass(frozen=True)
+class JobKind:
+    name: str
+    handler: Callable[[Session, "JobContext"], Any]
+    permission: Optional[str] = None
+
+
+_registry: dict[str, JobKind] = {}
+
+
+def register_job(kind: str, *, permission: Optional[str] = None):
+    """Register `handler(db, job)` for `kind`. The handler runs on its own
+    session, commits what it wants to keep and returns a JSON-able result."""
+
+    def _decorator(handler: Callable[[Session, "JobContext"], Any]):
+        _registry[kind] = JobKind(kind, handler, permission)
+        return handler
+
+    return _decorator
+
+
+def get_job_kind(kind: str) -> Optional[JobKind]:
+    return _registry.get(kind)
+
+
+class JobContext:
+    """What a running handler sees: the job's tenant, submitter and params,
+    plus `progress` for counters, partial results and cancellation."""
+
+    def __init__(
+        self,
+        *,
+        job_id: UUID,
+        tenant_id: UUID,
+        actor_user_id: Optional[UUID],
+        params: dict[str, Any],
+        bind,
+    ) -> None:
+        self.job_id = job_id
+        self.tenant_id = tenant_id
+        self.actor_user_id = actor_user_id
+        self.params = params
+        self._bind = bind
+        self._last_write = 0.0
+        self.cancel_seen = False
+        self.done = 0
+        self.total: Optional[int] = None
+        self.partial: Optional[dict[str, Any]] = None
+
+    def progress(self, done: int, total: Optional[int] = None, **partial: Any) -> None:
+        """Record progress (`partial` = running counts worth showing). The
+        write is throttled; the final one (done == total) always goes out.
+        Raises JobCancelled when the job was asked to stop."""
+        self.done = int(done)
+        if total is not None:
+            self.total = int(total)
+        if partial:
+            self.partial = jsonable_encoder(partial)
+        if self.cancel_seen:
+            raise JobCancelled()
+        interval = settings.JOB_PROGRESS_INTERVAL_MS / 1000.0
+        now = time.monotonic()
+        if now - self._last_write < interval and self.done != self.total:
+            return
+        self._last_write = now
+        if self._write_progress():
+            raise JobCancelled()
+
+    def _write_progress(self) -> bool:
+        with Session(bind=self._bind) as s:
+            cancel = s.execute(
+                _jobs.update()
+                .where(_jobs.c.id == self.job_id)
+                .values(
+                    progress_done=self.done,
+                    progress_total=self.total,
+                    partial=self.partial,
+                    heartbeat_at=sa.func.now(),
+                )
+                .returning(_jobs.c.cancel_requested)
+            ).scalar()
+            s.commit()
+        return bool(cancel)
+
+
+# ---------------------------------------------------------------------
+# Submitting and inspecting jobs
+# ---------------------------------------------------------------------
+
+def enqueue_job(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    kind: str,
+    params: dict[str, Any],
+    actor_user_id: Optional[UUID],
+    idempotency_key: Optional[str] = None,
+) -> BackgroundJob:
+    """Queue a job (the caller commits). With an idempotency key, a job
+    already submitted under the same key is returned instead."""
+    if kind not in _registry:
+        raise ValueError(f"Unknown job kind: {kind}")
+    key = (idempotency_key or "").strip()[:120] or None
+    job_id = db.execute(
+        pg_insert(_jobs)
+        .values(
+            tenant_id=tenant_id,
+            kind=kind,
+            params=jsonable_encoder(params),
+            idempotency_key=key,
+            created_by=actor_user_id,
+        )
+        .on_conflict_do_nothing(
+            index_elements=["tenant_id", "kind", "idempotency_key"],
+            index_where=sa.text("idempotency_key IS NOT NULL"),
+        )
+        .returning(_jobs.c.id)
+    ).scalar()
+    if job_id is None:
+        job_id = db.execute(
+            sa.select(_jobs.c.id).where(
+                _jobs.c.tenant_id == tenant_id,
+                _jobs.c.kind == kind,
+                _jobs.c.idempotency_key == key,
+            )
+        ).scalar_one()
+    else:
+        # Nudge the in-process workers once the job is visible to them.
+        event.listen(db, "after_commit", lambda _session: _wake.set(), once=True)
+    return db.get(BackgroundJob, job_id)
+
+
+def get_job(db: Session, *, tenant_id: UUID, job_id: UUID) -> Optional[BackgroundJob]:
+    return db.execute(
+        sa.select(BackgroundJob).where(BackgroundJob.id == job_id, BackgroundJob.tenant_id == tenant_id)
+    ).scalar_one_or_none()
+
+
+def list_jobs(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    created_by: Optional[UUID] = None,
+    kind: Optional[str] = None,
+    limit: int = 50,
+) -> list[BackgroundJob]:
+    q = sa.select(BackgroundJob).where(BackgroundJob.tenant_id == tenant_id)
+    if created_by is not None:
+        q = q.where(BackgroundJob.created_by == created_by)
+    if kind:
+        q = q.where(BackgroundJob.kind == kind)
+    return list(
+        db.execute(q.order_by(BackgroundJob.created_at.desc()).limit(limit)).scalars().all()
+    )
+
+
+def request_cancel(db: Session, *, job: BackgroundJob) -> BackgroundJob:
+    """Cancel a queued job outright; flag a running one so it stops at its
+    next progress report. Finished jobs are left as they are."""
+    if job.status == JOB_QUEUED:
+        job.status = JOB_CANCELLED
+        job.cancel_requested = True
+        job.finished_at = sa.func.now()
+    elif job.status == JOB_RUNNING:
+        job.cancel_requested = True
+    db.flush()
+    db.refresh(job)
+    return job
+
+
+def serialize_job(job: BackgroundJob) -> dict[str, Any]:
+    return {
+        "id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "url": job_url(job.id),
+        "progress": {"done": job.progress_done, "total": job.progress_total},
+        "partial": job.partial,
+        "result": job.result,
+        "error": job.error,
+        "cancel_requested": bool(job.cancel_requested),
+        "attempts": job.attempts,
+        "created_by": str(job.created_by) if job.created_by else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def job_url(job_id: UUID | str) -> str:
+    return f"/api/v1/jobs/{job_id}"
+
+
+def job_accepted(job: BackgroundJob) -> JSONResponse:
+    """202 response for an endpoint running in async mode."""
+    return JSONResponse(
+        status_code=202,
+        content=serialize_job(job),
+        headers={"Location": job_url(job.id)},
+    )
+
+
+# ---------------------------------------------------------------------
+# Running jobs
+# ---------------------------------------------------------------------
+
+def claim_next_job(db: Session, *, worker_id: str) -> Optional[dict[str, Any]]:
+    """Atomically move the oldest QUEUED job to RUNNING for `worker_id`."""
+    oldest = (
+        sa.select(_jobs.c.id)
+        .where(_jobs.c.status == JOB_QUEUED)
+        .order_by(_jobs.c.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        _jobs.update()
+        .where(_jobs.c.id == oldest)
+        .values(
+            status=JOB_RUNNING,
+            worker_id=worker_id,
+            attempts=_jobs.c.attempts + 1,
+            started_at=sa.func.now(),
+            heartbeat_at=sa.func.now(),
+        )
+        .returning(_jobs.c.id, _jobs.c.tenant_id, _jobs.c.kind, _jobs.c.params, _jobs.c.created_by)
+    ).mappings().first()
+    db.commit()
+    if row is not None:
+        _claimed.inc()
+    return dict(row) if row is not None else None
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Requeue RUNNING jobs whose worker stopped heartbeating, or fail them
+    once they have used up JOB_MAX_ATTEMPTS runs."""
+    stale = (
+        sa.select(_jobs.c.id)
+        .where(
+            _jobs.c.status == JOB_RUNNING,
+            _jobs.c.heartbeat_at < sa.func.now() - sa.text("make_interval(secs => :stale)"),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    out_of_attempts = _jobs.c.attempts >= int(settings.JOB_MAX_ATTEMPTS)
+    count = db.execute(
+        _jobs.update()
+        .where(_jobs.c.id.in_(stale))
+        .values(
+            status=sa.case((out_of_attempts, JOB_FAILED), else_=JOB_QUEUED),
+            error=sa.case((out_of_attempts, "Worker stopped responding"), else_=None),
+            finished_at=sa.case((out_of_attempts, sa.func.now()), else_=None),
+            worker_id=None,
+        ),
+        {"stale": float(settings.JOB_STALE_AFTER_SEC)},
+    ).rowcount
+    db.commit()
+    if count:
+        _requeued.inc(count)
+        logger.warning("Requeued or failed %d stale background job(s)", count)
+    return count
+
+
+def _heartbeat(bind, ctx: JobContext, stop: threading.Event) -> None:
+    interval = max(0.5, float(settings.JOB_HEARTBEAT_INTERVAL_SEC))
+    while not stop.wait(interval):
+        try:
+            with Session(bind=bind) as s:
+                cancel = s.execute(
+                    _jobs.update()
+                    .where(_jobs.c.id == ctx.job_id)
+                    .values(heartbeat_at=sa.func.now())
+                    .returning(_jobs.c.cancel_requested)
+                ).scalar()
+                s.commit()
+            ctx.cancel_seen = ctx.cancel_seen or bool(cancel)
+        except Exception:
+            logger.warning("Heartbeat for background job %s failed", ctx.job_id, exc_info=True)
+
+
+def _finish(bind, ctx: JobContext, *, status: str, result: Any = None, error: Optional[str] = None) -> None:
+    with Session(bind=bind) as s:
+        s.execute(
+            _jobs.update()
+            .where(_jobs.c.id == ctx.job_id)
+            .values(
+                status=status,
+                result=jsonable_encoder(result) if result is not None else None,
+                error=error,
+                progress_done=ctx.done,
+                progress_total=ctx.total,
+                partial=ctx.partial,
+                heartbeat_at=sa.func.now(),
+                finished_at=sa.func.now(),
+            )
+        )
+        s.commit()
+
+
+def run_job(session_factory: Callable[[], Session], claimed: dict[str, Any]) -> str:
+    """Run one claimed job to completion and record its outcome."""
+    with session_factory() as db:
+        bind = db.get_bind()
+        ctx = JobContext(
+            job_id=claimed["id"],
+            tenant_id=claimed["tenant_id"],
+            actor_user_id=claimed["created_by"],
+            params=dict(claimed["params"] or {}),
+            bind=bind,
+        )
+        kind = _registry.get(claimed["kind"])
+        if kind is None:
+            _finish(bind, ctx, status=JOB_FAILED, error=f"Unknown job kind: {claimed['kind']}")
+            _failed.inc()
+            return JOB_FAILED
+        stop_heartbeat = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(bind, ctx, stop_heartbeat), name=f"job-heartbeat-{ctx.job_id}", daemon=True
+        ).start()
+        with _run_latency.time():
+            try:
+                result = kind.handler(db, ctx)
+                db.commit()
+            except JobCancelled:
+                db.rollback()
+                _finish(bind, ctx, status=JOB_CANCELLED)
+                _cancelled.inc()
+                return JOB_CANCELLED
+            except Exception as exc:
+                db.rollback()
+                logger.warning("Background job %s (%s) failed", ctx.job_id, kind.name, exc_info=True)
+                _finish(bind, ctx, status=JOB_FAILED, error=str(exc) or exc.__class__.__name__)
+                _failed.inc()
+                return JOB_FAILED
+            finally:
+                stop_heartbeat.set()
+        _finish(bind, ctx, status=JOB_SUCCEEDED, result=result)
+        _succeeded.inc()
+        return JOB_SUCCEEDED
+
+
+def run_pending_jobs(
+    session_factory: Optional[Callable[[], Session]] = None,
+    *,
+    worker_id: Optional[str] = None,
+    max_jobs: Optional[int] = None,
+) -> int:
+    """Claim and run queued jobs until the queue is empty (or `max_jobs`
+    ran). Returns how many ran."""
+    if session_factory is None:
+        from app.core.database import SessionLocal as session_factory
+    worker_id = worker_id or _default_worker_id()
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        with session_factory() as db:
+            claimed = claim_next_job(db, worker_id=worker_id)
+        if claimed is None:
+            break
+        run_job(session_factory, claimed)
+        ran += 1
+    return ran
+
+
+# ---------------------------------------------------------------------
+# Worker threads (in-process or `python -m app.worker`)
+# ---------------------------------------------------------------------
+
+_wake = threading.Event()
+_stop = threading.Event()
+_threads: list[threading.Thread] = []
+_threads_lock = threading.Lock()
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def _worker_loop(session_factory: Callable[[], Session]) -> None:
+    worker_id = _default_worker_id()
+    poll = max(0.1, float(settings.JOB_POLL_INTERVAL_SEC))
+    while not _stop.is_set():
+        ran = 0
+        try:
+            with session_factory() as db:
+                requeue_stale_jobs(db)
+            ran = run_pending_jobs(session_factory, worker_id=worker_id, max_jobs=1)
+        except Exception:
+            logger.warning("Background job worker %s iteration failed", worker_id, exc_info=True)
+        if not ran:
+            _wake.wait(poll)
+            _wake.clear()
+
+
+def start_job_workers(count: Optional[int] = None, *, session_factory: Optional[Callable[[], Session]] = None) -> None:
+    """Start `count` worker threads (JOB_INPROCESS_WORKERS by default;
+    0 leaves the queue to the standalone worker)."""
+    if session_factory is None:
+        from app.core.database import SessionLocal as session_factory
+    count = int(settings.JOB_INPROCESS_WORKERS if count is None else count)
+    with _threads_lock:
+        if count <= 0 or any(t.is_alive() for t in _threads):
+            return
+        _stop.clear()
+        _threads.clear()
+        for i in range(count):
+            thread = threading.Thread(
+                target=_worker_loop, args=(session_factory,), name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            _threads.append(thread)
+
+
+def stop_job_workers(timeout_s: float = 10.0) -> None:
+    """Stop the worker threads. A job still running after `timeout_s` is
+    abandoned; its heartbeat goes stale and another worker requeues it."""
+    _stop.set()
+    _wake.set()
+    with _threads_lock:
+        deadline = time.monotonic() + timeout_s
+        for thread in _threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        _threads.clear()
+
+
+def jobs_snapshot() -> dict[str, Any]:
+    return {
+        "workers": sum(1 for t in _threads if t.is_alive()),
+        "kinds": sorted(_registry),
+        "claimed": _claimed.value,
+        "succeeded": _succeeded.value,
+        "failed": _failed.value,
+        "cancelled": _cancelled.value,
+        "requeued": _requeued.value,
+        "latency": _run_latency.snapshot(),
+    }
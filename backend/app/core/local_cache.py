@@ -0,0 +1,104 @@
+"""Bounded per-worker LRU cache with per-entry TTL.
+
+The L1 tier for hot-path lookups (tenant resolution, sessions, permission
+maps, subscription state). Every gunicorn worker owns its own instance, so
+entries are deliberately short-lived and always backed by a shared store
+(Redis or the database) that holds the source of truth.
+
+Why not functools.lru_cache: we need per-entry expiry, explicit invalidation
+(single key, key prefix or everything) and a hard size bound — a scanner
+hammering random subdomains must not be able to grow the process heap.
+
+Thread-safe: sync route handlers invalidate from the threadpool while the
+event loop reads in middleware, so every operation takes a short lock.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Sentinel returned by `lookup` on a miss — a cached None is a real value
+# (negative caching), so None cannot double as "absent".
+MISSING = object()
+
+
+class LocalTTLCache:
+    """LRU-evicting dict with a per-entry deadline (monotonic clock)."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float, name: str = "") -> None:
+        self.name = name
+        self._max_entries = max(1, int(max_entries))
+        self._ttl = float(ttl_seconds)
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` on miss/expiry.
+
+        Cached values may themselves be None (negative caching) — use
+        `lookup` when that distinction matters.
+        """
+        value = self.lookup(key)
+        return default if value is MISSING else value
+
+    def lookup(self, key: Hashable) -> Any:
+        """Like `get` but returns `MISSING` on miss/expiry."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                self._misses += 1
+                return MISSING
+            value, expires_at = hit
+            if expires_at <= now:
+                del self._data[key]
+                self._misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        ttl = self._ttl if ttl_seconds is None else float(ttl_seconds)
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate) -> int:
+        """Drop every entry for which `predicate(key, value)` is true. Returns count."""
+        with self._lock:
+            doomed = [k for k, (v, _) in self._data.items() if predicate(k, v)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "name": self.name,
+            "entries": len(self._data),
+            "max_entries": self._max_entries,
+            "ttl_s": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
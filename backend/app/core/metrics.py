@@ -0,0 +1,72 @@
+"""Tiny in-process metrics for /healthz.
+
+No Prometheus client in this stack — the numbers that matter for the request
+hot path (auth overhead, cache hit rates, background queue health) are
+collected here per worker and surfaced as plain JSON on /healthz.
+
+Not thread-locked on purpose (same reasoning as CircuitBreaker): a lost
+increment under a race is harmless for an operational gauge.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+_DEFAULT_BUCKETS_MS: tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count/sum/max."""
+
+    name: str
+    buckets_ms: tuple[float, ...] = _DEFAULT_BUCKETS_MS
+
+    _counts: list[int] = field(default_factory=list)
+    _count: int = 0
+    _sum_ms: float = 0.0
+    _max_ms: float = 0.0
+
+    def __post_init__(self) -> None:
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+
+    def observe(self, elapsed_ms: float) -> None:
+        for i, bound in enumerate(self.buckets_ms):
+            if elapsed_ms <= bound:
+                self._counts[i] += 1
+                break
+        else:
+            self._counts[-1] += 1
+        self._count += 1
+        self._sum_ms += elapsed_ms
+        if elapsed_ms > self._max_ms:
+            self._max_ms = elapsed_ms
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - started) * 1000.0)
+
+    def snapshot(self) -> dict[str, object]:
+        labels = [f"le_{b:g}ms" for b in self.buckets_ms] + ["gt_{:g}ms".format(self.buckets_ms[-1])]
+        return {
+            "count": self._count,
+            "avg_ms": round(self._sum_ms / self._count, 3) if self._count else 0.0,
+            "max_ms": round(self._max_ms, 3),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+@dataclass
+class Counter:
+    name: str
+    value: int = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
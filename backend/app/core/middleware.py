@@ -3,15 +3,16 @@
 from __future__ import annotations
 
 from uuid import UUID
-from types import SimpleNamespace
 import logging
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
 
+from app.core import tenant_cache
 from app.core.database import SessionLocal, database_status
+from app.core.local_cache import MISSING
 from app.core.logging_config import log_tenant_id
 from app.models.tenant import Tenant
 
@@ -26,7 +27,7 @@ def _is_missing_relation_error(exc: ProgrammingError) -> bool:
     return "does not exist" in str(exc).lower()
 
 
-class TenantMiddleware(BaseHTTPMiddleware):
+class TenantMiddleware:
     """
     Multi-tenant resolver (enterprise hybrid).
 
@@ -38,11 +39,29 @@ class TenantMiddleware(BaseHTTPMiddleware):
           - OR parse subdomain from <slug>.<base_domain> (optional)
 
     Notes:
+      - Lookups go through app.core.tenant_cache (per-worker LRU + Redis);
+        the DB is only touched on a cache miss.
       - Soft delete / suspension: is_active=False => inactive.
       - Attach tenant context on request.state.
       - SaaS routes (super admin / platform ops) MUST bypass tenant resolution.
+      - Pure ASGI: no per-request task or response buffering, so streamed
+        downloads pass straight through.
     """
 
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self._resolve(Request(scope))
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
     def _extract_host(self, request: Request) -> str:
         host = request.headers.get("x-forwarded-host") or request.headers.get("host", "")
         host = host.split(",")[0].strip()
@@ -120,50 +139,64 @@ class TenantMiddleware(BaseHTTPMiddleware):
 
         return False
 
-    async def dispatch(self, request: Request, call_next):
+    async def _resolve(self, request: Request) -> Response | None:
+        """Attach tenant context to request.state; return a response only
+        when the request must be rejected."""
         path = str(request.url.path)
 
         # ✅ Always allow CORS preflight
         if request.method.upper() == "OPTIONS":
-            return await call_next(request)
+            return None
 
         # ✅ Skip tenant resolution for public / saas paths
         if self._is_public_path(path):
-            return await call_next(request)
+            return None
 
         tenant_id_header = request.headers.get("x-tenant-id")
         tenant_slug_header = request.headers.get("x-tenant-slug")
         host = self._extract_host(request)
 
-        tenant = None
-        db = SessionLocal()
-        try:
-            # 1) X-Tenant-ID
-            if tenant_id_header:
-                try:
-                    tid = UUID(tenant_id_header)
-                except Exception:
-                    return JSONResponse(
-                        {"detail": "Invalid X-Tenant-ID header (must be UUID)."},
-                        status_code=400,
-                    )
-                tenant = db.query(Tenant).filter(Tenant.id == tid).first()
-
-            # 2) X-Tenant-Slug
-            if tenant is None and tenant_slug_header:
-                tenant = (
-                    db.query(Tenant)
-                    .filter(Tenant.slug == tenant_slug_header.lower())
-                    .first()
+        # Candidate lookups in resolution order; each is served from the
+        # tenant cache when possible and only falls through to the DB on miss.
+        candidates: list[tuple[str, object]] = []
+
+        # 1) X-Tenant-ID
+        if tenant_id_header:
+            try:
+                tid = UUID(tenant_id_header)
+            except Exception:
+                return JSONResponse(
+                    {"detail": "Invalid X-Tenant-ID header (must be UUID)."},
+                    status_code=400,
                 )
+            candidates.append((tenant_cache.id_key(tid), Tenant.id == tid))
+
+        # 2) X-Tenant-Slug
+        if tenant_slug_header:
+            slug = tenant_slug_header.lower()
+            candidates.append((tenant_cache.slug_key(slug), Tenant.slug == slug))
 
-            # 3) Host-based resolution
-            if tenant is None and host:
-                tenant = db.query(Tenant).filter(Tenant.primary_domain == host).first()
+        # 3) Host-based resolution
+        if host:
+            candidates.append((tenant_cache.domain_key(host), Tenant.primary_domain == host))
+            if "." in host:
+                slug = host.split(".")[0]
+                candidates.append((tenant_cache.slug_key(slug), Tenant.slug == slug))
 
-                if tenant is None and "." in host:
-                    slug = host.split(".")[0]
-                    tenant = db.query(Tenant).filter(Tenant.slug == slug).first()
+        tenant = None
+        db = None
+        try:
+            for key, criterion in candidates:
+                snapshot = await tenant_cache.get_cached_tenant(key)
+                if snapshot is MISSING:
+                    if db is None:
+                        db = SessionLocal()
+                    row = db.query(Tenant).filter(criterion).first()
+                    snapshot = tenant_cache.tenant_snapshot(row) if row is not None else None
+                    await tenant_cache.cache_tenant(key, snapshot)
+                if snapshot is not None:
+                    tenant = tenant_cache.tenant_context(snapshot)
+                    break
         except ProgrammingError as exc:
             if _is_missing_relation_error(exc):
                 logger.error(
@@ -185,7 +218,8 @@ class TenantMiddleware(BaseHTTPMiddleware):
         finally:
             # IMPORTANT: release DB connection before request handler runs
             # to avoid holding two sessions per request (middleware + endpoint).
-            db.close()
+            if db is not None:
+                db.close()
 
         if tenant is None:
             if tenant_slug_header:
@@ -217,16 +251,9 @@ class TenantMiddleware(BaseHTTPMiddleware):
                     status_code=403,
                 )
 
-        # Store lightweight immutable context object (detached from SQLAlchemy session).
-        tenant_ctx = SimpleNamespace(
-            id=tenant.id,
-            slug=tenant.slug,
-            name=tenant.name,
-            is_active=tenant.is_active,
-            curriculum_type=getattr(tenant, "curriculum_type", "CBC") or "CBC",
-            group_id=getattr(tenant, "group_id", None),
-            is_demo=bool(getattr(tenant, "is_demo", False)),
-        )
+        # `tenant` is already a lightweight context object detached from any
+        # SQLAlchemy session (built from the cached snapshot).
+        tenant_ctx = tenant
 
         request.state.tenant = tenant_ctx
         request.state.tenant_id = tenant_ctx.id
@@ -236,4 +263,4 @@ class TenantMiddleware(BaseHTTPMiddleware):
         # route handler automatically includes the resolved tenant_id.
         log_tenant_id.set(str(tenant_ctx.id))
 
-        return await call_next(request)
+        return None
@@ -5,13 +5,17 @@ import asyncio
 import os
 import threading
 from uuid import UUID
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import Response
-from sqlalchemy.exc import TimeoutError as SATimeoutError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DataError, IntegrityError
 
-from app.core.database import SessionLocal, engine
-from app.core.audit import log_event
+from app.core.audit import _sanitize
+from app.core.config import settings
+from app.core.metrics import Counter, LatencyHistogram
+from app.models.audit_log import AuditLog
 
 logger = logging.getLogger(__name__)
 
@@ -31,17 +35,41 @@ def _env_bool(name: str, default: bool) -> bool:
 
 
 _AUDIT_QUEUE_MAXSIZE = _env_int("AUDIT_QUEUE_MAXSIZE", 2000, 100, 20000)
-_AUDIT_WORKERS = _env_int("AUDIT_WORKERS", 1, 1, 4)
-_AUDIT_POOL_RESERVE = _env_int("AUDIT_POOL_RESERVE", 4, 1, 20)
+_AUDIT_BATCH_MAX_EVENTS = _env_int("AUDIT_BATCH_MAX_EVENTS", 200, 1, 5000)
+_AUDIT_BATCH_MAX_WAIT_MS = _env_int("AUDIT_BATCH_MAX_WAIT_MS", 250, 10, 10000)
 _AUDIT_CAPTURE_HTTP_REQUESTS = _env_bool("AUDIT_CAPTURE_HTTP_REQUESTS", False)
 _AUDIT_DROPPED_LOG_EVERY = 100
-_AUDIT_PRESSURE_LOG_EVERY = 50
 
+# Batching sink: one task drains up to _AUDIT_BATCH_MAX_EVENTS events or
+# waits at most _AUDIT_BATCH_MAX_WAIT_MS after the first one, then writes the
+# batch as a single multi-row INSERT over a dedicated connection. That
+# connection lives in its own one-slot engine, so audit writes never compete
+# with request traffic for the main pool.
 _audit_queue: asyncio.Queue[dict] | None = None
 _audit_tasks: list[asyncio.Task] = []          # tracked so shutdown can cancel them
 _audit_init_lock = threading.Lock()
-_audit_dropped_count = 0
-_audit_pressure_skipped_count = 0
+_audit_engine: Engine | None = None
+
+_enqueued = Counter("audit.enqueued")
+_dropped_queue_full = Counter("audit.dropped_queue_full")
+_dropped_write_failed = Counter("audit.dropped_write_failed")
+_written = Counter("audit.written")
+_flushes = Counter("audit.flushes")
+_flush_latency = LatencyHistogram("audit.flush")
+
+
+def audit_sink_snapshot() -> dict[str, object]:
+    return {
+        "capture_http_requests": _AUDIT_CAPTURE_HTTP_REQUESTS,
+        "queue_depth": _audit_queue.qsize() if _audit_queue is not None else 0,
+        "queue_maxsize": _AUDIT_QUEUE_MAXSIZE,
+        "enqueued": _enqueued.value,
+        "written": _written.value,
+        "flushes": _flushes.value,
+        "dropped_queue_full": _dropped_queue_full.value,
+        "dropped_write_failed": _dropped_write_failed.value,
+        "flush_latency": _flush_latency.snapshot(),
+    }
 
 
 def _as_uuid(value) -> UUID | None:
@@ -55,112 +83,103 @@ def _as_uuid(value) -> UUID | None:
         return None
 
 
-def _pool_snapshot() -> tuple[int, int] | None:
-    pool = getattr(engine, "pool", None)
-    if pool is None:
-        return None
-    try:
-        checked_out = int(pool.checkedout())  # QueuePool API
-        pool_size = int(pool.size())  # QueuePool API
-        max_overflow = int(getattr(pool, "_max_overflow", 0))
-        max_total = max(1, pool_size + max_overflow)
-        return checked_out, max_total
-    except Exception:
-        return None
-
-
-def _audit_pool_is_saturated(*, reserve_connections: int = 1) -> bool:
-    snap = _pool_snapshot()
-    if snap is None:
-        return False
-    checked_out, max_total = snap
-    threshold = max(1, max_total - max(0, reserve_connections))
-    return checked_out >= threshold
-
-
-def _log_audit_pressure_skip(reason: str) -> None:
-    global _audit_pressure_skipped_count
-    _audit_pressure_skipped_count += 1
-    if (
-        _audit_pressure_skipped_count == 1
-        or _audit_pressure_skipped_count % _AUDIT_PRESSURE_LOG_EVERY == 0
-    ):
-        snap = _pool_snapshot()
-        if snap is None:
-            logger.warning(
-                "Audit write skipped (%s). skipped_count=%s",
-                reason,
-                _audit_pressure_skipped_count,
-            )
-        else:
-            checked_out, max_total = snap
-            logger.warning(
-                "Audit write skipped (%s). skipped_count=%s pool=%s/%s",
-                reason,
-                _audit_pressure_skipped_count,
-                checked_out,
-                max_total,
-            )
+def _get_audit_engine() -> Engine:
+    global _audit_engine
+    if _audit_engine is None:
+        _audit_engine = create_engine(
+            settings.database_url_with_ssl,
+            pool_size=1,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+        )
+    return _audit_engine
 
 
-def _write_audit_event(event: dict) -> bool:
+def _audit_row(event: dict) -> dict | None:
     tenant_id = _as_uuid(event.get("tenant_id"))
     if tenant_id is None:
-        return False
-
-    # Keep request flow resilient: do not compete for last DB connections.
-    if _audit_pool_is_saturated(reserve_connections=_AUDIT_POOL_RESERVE):
-        _log_audit_pressure_skip("pool_saturated")
-        return False
-
-    actor_user_id = _as_uuid(event.get("actor_user_id"))
+        return None
     meta = event.get("meta")
     if not isinstance(meta, dict):
         meta = {}
+    return {
+        "tenant_id": tenant_id,
+        "actor_user_id": _as_uuid(event.get("actor_user_id")),
+        "action": "http.request",
+        "resource": "http",
+        "resource_id": None,
+        "payload": {},
+        "meta": _sanitize(meta),
+    }
+
+
+def _insert_rows(rows: list[dict]) -> int:
+    """Insert rows in one statement. A row the database rejects (e.g. its
+    tenant or user was deleted meanwhile) fails the whole statement, so the
+    batch is bisected until only the rejected rows are dropped."""
+    try:
+        with _get_audit_engine().begin() as conn:
+            conn.execute(insert(AuditLog).values(rows))
+        return len(rows)
+    except (IntegrityError, DataError) as exc:
+        if len(rows) == 1:
+            _dropped_write_failed.inc()
+            logger.warning("Audit event rejected by the database (dropped): %s", exc.orig)
+            return 0
+    mid = len(rows) // 2
+    return _insert_rows(rows[:mid]) + _insert_rows(rows[mid:])
+
+
+def _write_audit_batch(events: list[dict]) -> int:
+    """Insert a batch; returns the number of rows written."""
+    rows = [row for row in map(_audit_row, events) if row is not None]
+    if not rows:
+        return 0
+    with _flush_latency.time():
+        return _insert_rows(rows)
+
+
+async def _next_batch(queue: asyncio.Queue[dict]) -> list[dict]:
+    batch = [await queue.get()]
+    deadline = time.monotonic() + _AUDIT_BATCH_MAX_WAIT_MS / 1000.0
+    while len(batch) < _AUDIT_BATCH_MAX_EVENTS:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
 
-    db = SessionLocal()
+async def _flush(queue: asyncio.Queue[dict], batch: list[dict]) -> None:
     try:
-        log_event(
-            db,
-            tenant_id=tenant_id,
-            actor_user_id=actor_user_id,
-            action="http.request",
-            resource="http",
-            resource_id=None,
-            payload=None,
-            meta=meta,
-        )
-        db.commit()
-        return True
-    except SATimeoutError:
-        db.rollback()
-        _log_audit_pressure_skip("pool_timeout")
-        return False
-    except Exception:
-        db.rollback()
+        _written.inc(await asyncio.to_thread(_write_audit_batch, batch))
+        _flushes.inc()
+    except asyncio.CancelledError:
         raise
+    except Exception:
+        _dropped_write_failed.inc(len(batch))
+        logger.exception("Background audit flush failed (dropped %s event(s))", len(batch))
     finally:
-        db.close()
+        for _ in batch:
+            queue.task_done()
 
 
-async def _audit_worker(worker_id: int) -> None:
-    del worker_id
-    global _audit_queue
-
+async def _audit_worker() -> None:
     while True:
-        if _audit_queue is None:
+        queue = _audit_queue
+        if queue is None:
             await asyncio.sleep(0.1)
             continue
-
-        event = await _audit_queue.get()
-        try:
-            await asyncio.to_thread(_write_audit_event, event)
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            logger.exception("Background audit log failed")
-        finally:
-            _audit_queue.task_done()
+        await _flush(queue, await _next_batch(queue))
 
 
 def _ensure_audit_workers_started() -> None:
@@ -175,14 +194,13 @@ def _ensure_audit_workers_started() -> None:
 
         _audit_queue = asyncio.Queue(maxsize=_AUDIT_QUEUE_MAXSIZE)
         loop = asyncio.get_running_loop()
-        for idx in range(_AUDIT_WORKERS):
-            task = loop.create_task(_audit_worker(idx))
-            _audit_tasks.append(task)
+        _audit_tasks.append(loop.create_task(_audit_worker()))
 
         logger.info(
-            "Audit queue initialized (workers=%s, maxsize=%s)",
-            _AUDIT_WORKERS,
+            "Audit sink initialized (maxsize=%s, batch=%s events / %s ms)",
             _AUDIT_QUEUE_MAXSIZE,
+            _AUDIT_BATCH_MAX_EVENTS,
+            _AUDIT_BATCH_MAX_WAIT_MS,
         )
 
 
@@ -191,20 +209,21 @@ async def shutdown_audit_queue(*, drain_timeout: float = 8.0) -> None:
     Gracefully drain and shut down the audit background queue.
 
     Call this from the application lifespan shutdown *before* closing Redis
-    or the DB pool — workers need both to flush remaining events.
+    or the DB pool — the sink needs its connection to flush remaining events.
 
     Sequence:
-      1. Wait up to ``drain_timeout`` seconds for in-flight events to be written.
+      1. Wait up to ``drain_timeout`` seconds for queued events to be flushed.
          (Gunicorn graceful_timeout is 30 s; 8 s leaves ample headroom for the
          rest of teardown.)
-      2. Cancel worker tasks — they will be blocked on queue.get() at this point
+      2. Cancel the sink task — it is blocked on queue.get() at this point
          because the queue is either empty or timed out.
-      3. Await cancellation so the event loop is clean before the process exits.
+      3. Await cancellation so the event loop is clean before the process
+         exits, then release the dedicated connection.
 
     On timeout a WARNING is emitted with the count of dropped events so ops
     teams know there was data loss and can investigate queue pressure settings.
     """
-    global _audit_queue, _audit_tasks
+    global _audit_queue, _audit_tasks, _audit_engine
 
     if _audit_queue is None:
         return  # audit was never initialised (e.g. no requests came in)
@@ -223,13 +242,11 @@ async def shutdown_audit_queue(*, drain_timeout: float = 8.0) -> None:
             remaining = _audit_queue.qsize()
             logger.warning(
                 "Audit shutdown timed out after %.1fs — dropping %s unprocessed event(s). "
-                "Consider raising AUDIT_QUEUE_MAXSIZE or AUDIT_WORKERS if this recurs.",
+                "Consider raising AUDIT_BATCH_MAX_EVENTS if this recurs.",
                 drain_timeout,
                 remaining,
             )
 
-    # Workers are now blocked on queue.get() (queue empty or timed out).
-    # Cancel them cleanly so the event loop has no dangling tasks at exit.
     for task in _audit_tasks:
         task.cancel()
     if _audit_tasks:
@@ -237,32 +254,43 @@ async def shutdown_audit_queue(*, drain_timeout: float = 8.0) -> None:
         _audit_tasks.clear()
 
     _audit_queue = None
+    if _audit_engine is not None:
+        _audit_engine.dispose()
+        _audit_engine = None
     logger.info("Audit queue shut down.")
 
 
 def _try_enqueue_audit_event(event: dict) -> bool:
-    global _audit_dropped_count
-
     if _audit_queue is None:
         return False
 
     try:
         _audit_queue.put_nowait(event)
+        _enqueued.inc()
         return True
     except asyncio.QueueFull:
-        _audit_dropped_count += 1
-        if _audit_dropped_count == 1 or _audit_dropped_count % _AUDIT_DROPPED_LOG_EVERY == 0:
+        _dropped_queue_full.inc()
+        dropped = _dropped_queue_full.value
+        if dropped == 1 or dropped % _AUDIT_DROPPED_LOG_EVERY == 0:
             logger.warning(
                 "Audit queue full. Dropped events=%s (latest path=%s)",
-                _audit_dropped_count,
+                dropped,
                 (event.get("meta") or {}).get("path"),
             )
         return False
 
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class AuditMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start = time.time()
+        request = Request(scope)
 
         # Prefer the ID already set by RequestIDMiddleware (runs before us).
         request_id = (
@@ -272,13 +300,21 @@ class AuditMiddleware(BaseHTTPMiddleware):
         )
         request.state.request_id = request_id
 
-        response: Response | None = None
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
         err: Exception | None = None
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         except Exception as exc:
             err = exc
-            response = Response(status_code=500)
+            status_code = 500
 
         duration_ms = int((time.time() - start) * 1000)
 
@@ -290,7 +326,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 "request_id": request_id,
                 "method": request.method,
                 "path": str(request.url.path),
-                "status_code": response.status_code if response else 500,
+                "status_code": status_code,
                 "duration_ms": duration_ms,
                 "ip": request.client.host if request.client else None,
                 "user_agent": request.headers.get("user-agent"),
@@ -311,11 +347,6 @@ class AuditMiddleware(BaseHTTPMiddleware):
             except Exception:
                 logger.exception("Failed to enqueue background audit log")
 
-        if response is not None:
-            response.headers["X-Request-ID"] = request_id
-
         if err:
             logger.exception("Unhandled request error (%s)", request_id, exc_info=err)
             raise err
-
-        return response
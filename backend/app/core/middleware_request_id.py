@@ -1,13 +1,12 @@
 import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.logging_config import log_request_id, log_tenant_id
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+class RequestIDMiddleware:
     """
     Guarantees every request has a correlation ID before any other middleware
     or route handler runs.
@@ -26,19 +25,28 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
     inner middleware (e.g., TenantMiddleware 400s, CORS rejections).
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = request_id
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("X-Request-ID") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
 
         # Bind context vars for structured logging — reset on each request so
         # context from a previous request never leaks into the current one.
         req_token = log_request_id.set(request_id)
         ten_token = log_tenant_id.set(None)  # TenantMiddleware updates this later
         try:
-            response: Response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         finally:
             log_request_id.reset(req_token)
             log_tenant_id.reset(ten_token)
-
-        response.headers["X-Request-ID"] = request_id
-        return response
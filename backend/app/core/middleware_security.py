@@ -1,11 +1,10 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Adds security-relevant HTTP response headers to every response.
 
@@ -14,38 +13,50 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     FastAPI-level responses including error pages and health endpoints.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response: Response = await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._apply(MutableHeaders(scope=message))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _apply(headers: MutableHeaders) -> None:
         # Prevent the API from being embedded in iframes (clickjacking).
-        response.headers["X-Frame-Options"] = "DENY"
+        headers["X-Frame-Options"] = "DENY"
 
         # Prevent MIME-type sniffing — server-declared Content-Type is authoritative.
-        response.headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Content-Type-Options"] = "nosniff"
 
         # Legacy XSS filter (belt-and-suspenders; modern browsers rely on CSP).
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        headers["X-XSS-Protection"] = "1; mode=block"
 
         # Referrer: send full URL to same origin, only origin to cross-origin.
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
 
         # Disable browser features this API never needs.
-        response.headers["Permissions-Policy"] = (
+        headers["Permissions-Policy"] = (
             "geolocation=(), microphone=(), camera=(), payment=()"
         )
 
         # HSTS: only meaningful over HTTPS. Guarded by COOKIE_SECURE as a
         # production signal — do not set on HTTP-only dev environments.
         if settings.COOKIE_SECURE:
-            response.headers["Strict-Transport-Security"] = (
+            headers["Strict-Transport-Security"] = (
                 "max-age=31536000; includeSubDomains"
             )
 
         # Strict CSP for API-only responses: no resources should ever be
         # loaded from these endpoints. frame-ancestors repeats X-Frame-Options
         # for CSP-aware browsers.
-        response.headers["Content-Security-Policy"] = (
+        headers["Content-Security-Policy"] = (
             "default-src 'none'; frame-ancestors 'none'"
         )
-
-        return response
@@ -0,0 +1,303 @@
+"""Cached role → permission maps for effective-permission resolution.
+
+`_load_roles_permissions` used to run three queries per login, refresh and
+session-cache miss (roles, role→permission join, overrides), plus a full
+permission-table scan for SUPER_ADMIN. The role → permission part changes
+rarely and is shared by every user of a tenant, so it is precomputed per
+scope and cached:
+
+    scope "global"       roles with tenant_id IS NULL
+    scope "<tenant id>"  global roles + that tenant's roles
+
+Tiers:
+  - L1: per-worker LocalTTLCache of RolePermissionMap, keyed by scope.
+  - L2: Redis, `rbacmap:<scope>` → JSON, TTL = RBAC_CACHE_TTL_SEC.
+
+Versioning: `rbacver:global` and `rbacver:<tenant id>` are counters bumped by
+`bump_rbac_version` whenever roles, role permissions or the permission
+catalogue change. A map is only served while its version matches the
+counters, so a change made on one worker is picked up by every other worker
+on its next resolution. Without Redis the counters are unavailable and the
+L1 TTL (RBAC_CACHE_LOCAL_TTL_SEC) bounds staleness instead.
+
+Per-user data (role assignments, overrides) is NOT part of the map; it is
+read with one query per resolution and combined in memory. Changing it only
+needs the user's cached sessions dropped (session_cache).
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.local_cache import LocalTTLCache
+from app.core.redis import get_redis_client, run_from_sync
+from app.models.rbac import Permission, Role, RolePermission, UserPermissionOverride, UserRole
+
+logger = logging.getLogger(__name__)
+
+_MAP_PREFIX = "rbacmap:"       # rbacmap:<scope> → {"v": ..., "roles": {...}, "all": [...]}
+_VERSION_PREFIX = "rbacver:"   # rbacver:<scope> → INCR counter
+_GLOBAL = "global"
+
+_local = LocalTTLCache(
+    name="rbac_map",
+    max_entries=settings.RBAC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RBAC_CACHE_LOCAL_TTL_SEC,
+)
+
+_breaker = CircuitBreaker(name="redis.rbac_cache", failure_threshold=3, cooldown_s=30.0)
+
+
+@dataclass(frozen=True)
+class RolePermissionMap:
+    version: str | None
+    roles: dict[str, tuple[str, frozenset[str]]]   # role id → (code, permission codes)
+    all_permissions: frozenset[str]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "v": self.version,
+                "roles": {rid: [code, sorted(perms)] for rid, (code, perms) in self.roles.items()},
+                "all": sorted(self.all_permissions),
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "RolePermissionMap":
+        data = json.loads(raw)
+        return cls(
+            version=data.get("v"),
+            roles={rid: (code, frozenset(perms)) for rid, (code, perms) in data["roles"].items()},
+            all_permissions=frozenset(data["all"]),
+        )
+
+
+def cache_snapshot() -> dict[str, object]:
+    return {**_local.snapshot(), "redis": _breaker.snapshot()}
+
+
+def clear_local_rbac_cache() -> None:
+    _local.clear()
+
+
+def _scope(tenant_id) -> str:
+    return _GLOBAL if tenant_id is None else str(tenant_id).lower()
+
+
+# ── Redis (async; called from sync code via run_from_sync) ───────────────────
+
+async def _aread_version(scope: str) -> str | None:
+    if not _breaker.allow():
+        return None
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        keys = [_VERSION_PREFIX + _GLOBAL]
+        if scope != _GLOBAL:
+            keys.append(_VERSION_PREFIX + scope)
+        values = await client.mget(keys)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis rbac version read failed: %s", exc)
+        return None
+    return ":".join(str(v or 0) for v in values)
+
+
+async def _aread_map(scope: str) -> str | None:
+    if not _breaker.allow():
+        return None
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(_MAP_PREFIX + scope)
+        _breaker.record_success()
+        return raw
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis rbac map read failed: %s", exc)
+        return None
+
+
+async def _awrite_map(scope: str, raw: str) -> None:
+    if not _breaker.allow():
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.setex(_MAP_PREFIX + scope, settings.RBAC_CACHE_TTL_SEC, raw)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis rbac map write failed: %s", exc)
+
+
+async def _abump(scope: str) -> None:
+    if not _breaker.allow():
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.incr(_VERSION_PREFIX + scope)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis rbac version bump failed: %s", exc)
+
+
+# ── Map loading ──────────────────────────────────────────────────────────────
+
+def _load_map(db: Session, scope: str, tenant_id, version: str | None) -> RolePermissionMap:
+    scope_filter = Role.tenant_id.is_(None)
+    if tenant_id is not None:
+        scope_filter = sa.or_(scope_filter, Role.tenant_id == tenant_id)
+
+    rows = db.execute(
+        select(Role.id, Role.code, Permission.code)
+        .select_from(Role)
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(scope_filter)
+    ).all()
+    roles: dict[str, tuple[str, set[str]]] = {}
+    for role_id, role_code, perm_code in rows:
+        entry = roles.setdefault(str(role_id), (str(role_code).strip().upper(), set()))
+        if perm_code:
+            entry[1].add(str(perm_code))
+
+    all_permissions = db.execute(select(Permission.code)).scalars().all()
+    return RolePermissionMap(
+        version=version,
+        roles={rid: (code, frozenset(perms)) for rid, (code, perms) in roles.items()},
+        all_permissions=frozenset(str(c) for c in all_permissions if c),
+    )
+
+
+def get_role_permission_map(db: Session, tenant_id, *, refresh: bool = False) -> RolePermissionMap:
+    scope = _scope(tenant_id)
+    version = run_from_sync(_aread_version, scope)
+
+    if not refresh:
+        cached = _local.get(scope)
+        if cached is not None and (version is None or cached.version == version):
+            return cached
+        if version is not None:
+            raw = run_from_sync(_aread_map, scope)
+            if raw:
+                try:
+                    shared = RolePermissionMap.from_json(raw)
+                except (ValueError, KeyError, TypeError):
+                    shared = None
+                if shared is not None and shared.version == version:
+                    _local.set(scope, shared)
+                    return shared
+
+    loaded = _load_map(db, scope, tenant_id, version)
+    _local.set(scope, loaded)
+    if version is not None:
+        run_from_sync(_awrite_map, scope, loaded.to_json())
+    return loaded
+
+
+def bump_rbac_version(tenant_id=None) -> None:
+    """Call after committing a change to roles, role permissions or the
+    permission catalogue. `tenant_id=None` means a global change, which
+    affects every tenant's map."""
+    scope = _scope(tenant_id)
+    if scope == _GLOBAL:
+        _local.clear()
+    else:
+        _local.pop(scope)
+    run_from_sync(_abump, scope)
+
+
+# ── Resolution ───────────────────────────────────────────────────────────────
+
+def _user_grants(db: Session, tenant_id, user_id) -> list[tuple[str, str, str | None]]:
+    """Role ids and overrides for one user in one round trip."""
+    if tenant_id is None:
+        role_scope = UserRole.tenant_id.is_(None)
+        override_scope = UserPermissionOverride.tenant_id.is_(None)
+    else:
+        role_scope = sa.or_(UserRole.tenant_id.is_(None), UserRole.tenant_id == tenant_id)
+        override_scope = sa.or_(
+            UserPermissionOverride.tenant_id.is_(None),
+            UserPermissionOverride.tenant_id == tenant_id,
+        )
+
+    roles_q = select(
+        sa.literal("role").label("kind"),
+        sa.cast(UserRole.role_id, sa.String).label("ref"),
+        sa.null().cast(sa.String).label("effect"),
+    ).where(UserRole.user_id == user_id, role_scope)
+    overrides_q = (
+        select(
+            sa.literal("override").label("kind"),
+            Permission.code.label("ref"),
+            UserPermissionOverride.effect.label("effect"),
+        )
+        .select_from(UserPermissionOverride)
+        .join(Permission, Permission.id == UserPermissionOverride.permission_id)
+        .where(UserPermissionOverride.user_id == user_id, override_scope)
+    )
+    return [tuple(r) for r in db.execute(sa.union_all(roles_q, overrides_q)).all()]
+
+
+def _roles_outside_map(db: Session, role_ids: Iterable[str]) -> dict[str, tuple[str, frozenset[str]]]:
+    """Direct lookup for role ids the scope map does not know (should not
+    happen with consistent data; kept so resolution never silently drops a
+    role)."""
+    rows = db.execute(
+        select(Role.id, Role.code, Permission.code)
+        .select_from(Role)
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(Role.id.in_(list(role_ids)))
+    ).all()
+    found: dict[str, tuple[str, set[str]]] = {}
+    for role_id, role_code, perm_code in rows:
+        entry = found.setdefault(str(role_id), (str(role_code).strip().upper(), set()))
+        if perm_code:
+            entry[1].add(str(perm_code))
+    return {rid: (code, frozenset(perms)) for rid, (code, perms) in found.items()}
+
+
+def resolve_roles_permissions(db: Session, tenant_id, user_id) -> tuple[list[str], list[str]]:
+    """(role codes, effective permission codes), both sorted."""
+    grants = _user_grants(db, tenant_id, user_id)
+    role_ids = [ref for kind, ref, _ in grants if kind == "role"]
+
+    rmap = get_role_permission_map(db, tenant_id)
+    if any(rid not in rmap.roles for rid in role_ids):
+        # A role created since the map was built — rebuild once.
+        rmap = get_role_permission_map(db, tenant_id, refresh=True)
+    roles = dict(rmap.roles)
+    unknown = [rid for rid in role_ids if rid not in roles]
+    if unknown:
+        roles.update(_roles_outside_map(db, unknown))
+
+    held = [roles[rid] for rid in role_ids if rid in roles]
+    role_codes = sorted({code for code, _ in held if code})
+
+    if "SUPER_ADMIN" in role_codes:
+        return role_codes, sorted(rmap.all_permissions)
+
+    granted: set[str] = set()
+    for _, perms in held:
+        granted |= perms
+    allow = {ref for kind, ref, effect in grants if kind == "override" and effect == "ALLOW"}
+    deny = {ref for kind, ref, effect in grants if kind == "override" and effect == "DENY"}
+    return role_codes, sorted((granted | allow) - deny)
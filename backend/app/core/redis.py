@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Awaitable, Callable
+
+import anyio
 
 import redis.asyncio as aioredis
 from redis.asyncio import Redis
@@ -13,10 +16,15 @@ logger = logging.getLogger(__name__)
 
 _redis_pool: aioredis.ConnectionPool | None = None
 _redis_client: Redis | None = None
+# The event loop that owns the pool, for `run_from_sync` calls from plain
+# threads (background job workers), and how long such a call may block.
+_redis_loop: asyncio.AbstractEventLoop | None = None
+_LOOP_CALL_TIMEOUT_SEC = 5.0
 
 
 async def init_redis() -> None:
-    global _redis_pool, _redis_client
+    global _redis_pool, _redis_client, _redis_loop
+    _redis_loop = asyncio.get_running_loop()
     # Use the authenticated URL (password injected from REDIS_PASSWORD env var).
     # Log only the base URL so the password is never written to logs.
     auth_url = settings.redis_url_with_auth
@@ -44,7 +52,8 @@ async def init_redis() -> None:
 
 
 async def close_redis() -> None:
-    global _redis_pool, _redis_client
+    global _redis_pool, _redis_client, _redis_loop
+    _redis_loop = None
     if _redis_client is not None:
         await _redis_client.aclose()
         _redis_client = None
@@ -59,6 +68,47 @@ def get_redis_client() -> Redis | None:
     return _redis_client
 
 
+def run_from_sync(fn: Callable[..., Awaitable[Any]], *args: Any, default: Any = None) -> Any:
+    """Run an async Redis helper from sync code (threadpool route handlers).
+
+    FastAPI executes plain `def` routes in an anyio worker thread, so the
+    coroutine is handed back to the event loop that owns the Redis pool.
+    Any other thread (a background job worker) submits it to that loop as
+    recorded by `init_redis` and waits up to _LOOP_CALL_TIMEOUT_SEC. With no
+    loop at all (scripts, direct service calls in tests) the call is
+    skipped, `default` is returned and the caller relies on TTLs.
+    """
+    name = getattr(fn, "__name__", fn)
+    try:
+        return anyio.from_thread.run(fn, *args)
+    except RuntimeError:
+        pass   # not an AnyIO worker thread
+    except Exception as exc:
+        logger.warning("run_from_sync: %s failed: %s", name, exc)
+        return default
+
+    loop = _redis_loop
+    if loop is None:
+        logger.debug("run_from_sync: no event loop reachable; skipped %s", name)
+        return default
+    if loop.is_closed() or _running_loop() is loop:
+        # Blocking on the loop from its own thread would deadlock it.
+        logger.warning("run_from_sync: event loop unusable from this thread; skipped %s", name)
+        return default
+    try:
+        return asyncio.run_coroutine_threadsafe(fn(*args), loop).result(timeout=_LOOP_CALL_TIMEOUT_SEC)
+    except Exception as exc:
+        logger.warning("run_from_sync: %s failed: %s", name, exc or type(exc).__name__)
+    return default
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 async def get_redis() -> AsyncGenerator[Redis, None]:
     """FastAPI dependency — yields the shared client (no per-request connection overhead)."""
     from fastapi import HTTPException
@@ -0,0 +1,186 @@
+"""Process-wide, in-memory view of which tables exist and their columns.
+
+Several modules (tenants/routes.py, admin/service.py, dashboard_today.py)
+support more than one historical table location ("core.x" vs "x") and
+optional columns on older deployments. They used to answer "which candidate
+exists and what columns does it have" with a fresh SQLAlchemy inspector
+(one pg_catalog round trip per candidate, per call) or by running the real
+statement against each candidate and rolling back on failure. A principal
+dashboard render fired dozens of catalog queries that way.
+
+The registry loads every user table + column in ONE catalog query and then
+answers from memory:
+
+  - loaded lazily on first use, or eagerly at startup (`warm_schema_registry`);
+  - re-checks the Alembic head at most every SCHEMA_REGISTRY_RECHECK_SEC and
+    reloads when it moved (a deploy ran migrations under a live worker);
+  - a lookup that finds none of its candidates triggers at most one reload
+    per SCHEMA_REGISTRY_MISS_RELOAD_SEC (tables created on demand by
+    `CREATE TABLE IF NOT EXISTS` helpers become visible without a restart);
+  - `invalidate_schema_registry()` forces a reload on the next lookup.
+
+Unqualified candidate names resolve against the connection's current schema,
+mirroring what the database would do with the search_path.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CATALOG_SQL = sa.text(
+    """
+    SELECT n.nspname AS schema_name, c.relname AS table_name, a.attname AS column_name
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid
+    WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND n.nspname <> 'information_schema'
+      AND n.nspname !~ '^pg_'
+    """
+)
+
+
+def _split_ref(ref: str) -> tuple[str | None, str]:
+    if "." in ref:
+        schema, table = ref.split(".", 1)
+        return schema, table
+    return None, ref
+
+
+class SchemaRegistry:
+    def __init__(self) -> None:
+        self._tables: dict[tuple[str, str], frozenset[str]] | None = None
+        self._default_schema = "public"
+        self._alembic_head: str | None = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._loads = 0
+        self._lock = threading.Lock()
+
+    # ── Loading ─────────────────────────────────────────────────────────────
+
+    def load(self, db: Session) -> None:
+        """Read the whole catalog in one round trip and swap it in.
+
+        Uses its own pooled connection (as the SQLAlchemy inspector did) so a
+        catalog error can never abort the caller's transaction.
+        """
+        tables: dict[tuple[str, str], set[str]] = {}
+        with db.get_bind().connect() as conn:
+            for schema_name, table_name, column_name in conn.execute(_CATALOG_SQL):
+                tables.setdefault((str(schema_name), str(table_name)), set()).add(str(column_name))
+            default_schema = conn.execute(sa.text("SELECT current_schema()")).scalar() or "public"
+            head = self._read_alembic_head(conn)
+
+        now = time.monotonic()
+        with self._lock:
+            self._tables = {key: frozenset(cols) for key, cols in tables.items()}
+            self._default_schema = str(default_schema)
+            self._alembic_head = head
+            self._loaded_at = now
+            self._checked_at = now
+            self._loads += 1
+
+    @staticmethod
+    def _read_alembic_head(conn) -> str | None:
+        # to_regclass first: selecting from a missing table raises.
+        if not conn.execute(sa.text("SELECT to_regclass('alembic_version')")).scalar():
+            return None
+        rows = conn.execute(sa.text("SELECT version_num FROM alembic_version")).scalars().all()
+        return ",".join(sorted(str(r) for r in rows)) or None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tables = None
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._tables is None:
+            self.load(db)
+            return
+        now = time.monotonic()
+        if now - self._checked_at < settings.SCHEMA_REGISTRY_RECHECK_SEC:
+            return
+        self._checked_at = now
+        with db.get_bind().connect() as conn:
+            head = self._read_alembic_head(conn)
+        if head != self._alembic_head:
+            logger.info(
+                "Schema registry: alembic head moved %s -> %s; reloading",
+                self._alembic_head,
+                head,
+            )
+            self.load(db)
+
+    def _reload_after_miss(self, db: Session) -> bool:
+        if time.monotonic() - self._loaded_at < settings.SCHEMA_REGISTRY_MISS_RELOAD_SEC:
+            return False
+        self.load(db)
+        return True
+
+    # ── Lookups ─────────────────────────────────────────────────────────────
+
+    def _columns(self, ref: str) -> frozenset[str] | None:
+        schema, table = _split_ref(ref)
+        tables = self._tables or {}
+        return tables.get((schema or self._default_schema, table))
+
+    def resolve(self, db: Session, candidates: Iterable[str]) -> tuple[str | None, frozenset[str]]:
+        """First candidate that exists, with its column names."""
+        candidates = tuple(candidates)
+        try:
+            self._ensure_loaded(db)
+            for attempt in (0, 1):
+                for ref in candidates:
+                    cols = self._columns(ref)
+                    if cols:
+                        return ref, cols
+                if attempt == 0 and not self._reload_after_miss(db):
+                    break
+        except SQLAlchemyError:
+            logger.warning("Schema registry lookup failed", exc_info=True)
+        return None, frozenset()
+
+    def has_table(self, db: Session, ref: str) -> bool:
+        return self.resolve(db, (ref,))[0] is not None
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "loaded": self._tables is not None,
+            "tables": len(self._tables or {}),
+            "alembic_head": self._alembic_head,
+            "loads": self._loads,
+        }
+
+
+schema_registry = SchemaRegistry()
+
+
+def resolve_existing_table(db: Session, candidates: Iterable[str]) -> tuple[str | None, set[str]]:
+    """(table_ref, column_names) of the first existing candidate, or (None, set())."""
+    ref, cols = schema_registry.resolve(db, candidates)
+    return ref, set(cols)
+
+
+def invalidate_schema_registry() -> None:
+    """Force a catalog reload on the next lookup (e.g. after DDL)."""
+    schema_registry.invalidate()
+
+
+def warm_schema_registry(db: Session) -> None:
+    """Eager load at startup so the first request does not pay for it."""
+    try:
+        schema_registry.load(db)
+    except SQLAlchemyError:
+        logger.warning("Schema registry warm-up failed; will load lazily", exc_info=True)
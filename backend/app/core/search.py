@@ -0,0 +1,27 @@
+"""Listing search over core.search_documents.
+
+The invoice, payment and enrollment listings filter `q` / `search` through
+the trigger-maintained search document of each row (app.models.search_document)
+instead of ILIKE-ing across the joined enrollment and student tables.
+"""
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy import Select, select
+
+from app.models.search_document import SearchDocument
+
+ENTITY_INVOICE = "invoice"
+ENTITY_PAYMENT = "payment"
+ENTITY_ENROLLMENT = "enrollment"
+
+
+def search_document_ids(tenant_id: UUID, entity_type: str, q: str) -> Select:
+    """Ids of the tenant's `entity_type` rows whose search document contains
+    `q` (case-insensitive substring) — for use as `Model.id.in_(...)`."""
+    return select(SearchDocument.entity_id).where(
+        SearchDocument.tenant_id == tenant_id,
+        SearchDocument.entity_type == entity_type,
+        SearchDocument.document.ilike(f"%{q.strip()}%"),
+    )
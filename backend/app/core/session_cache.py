@@ -7,7 +7,23 @@ Design:
     rejected before any DB lookup.
   - Session cache: after the first DB round-trip to load user + permissions,
     the result is cached under the token hash for the remaining access token
-    lifetime (max 15 min). Cache hits skip the DB entirely.
+    lifetime (max 15 min). The entry carries the user snapshot (incl. the
+    active flag) as well as roles/permissions, so cache hits skip the DB
+    entirely.
+  - Per-user session index: every cached token hash is also recorded in a
+    set keyed by user id, so deactivating a user can drop all of their
+    cached sessions at once (`invalidate_user_sessions`) instead of waiting
+    for the access tokens to expire.
+  - Per-worker L1: decoded sessions (and known-revoked token hashes) are
+    kept in an in-process LRU for SESSION_CACHE_LOCAL_TTL_SEC, so steady
+    state traffic makes no Redis call at all. On an L1 miss the blacklist
+    check and the session read go out as ONE pipelined round trip
+    (`load_session`).
+  - Revocation fan-out: logout, blacklisting and user invalidation publish
+    on the cache bus (app.core.cache_bus); every worker evicts its L1 entry
+    as soon as the message arrives. The publishing worker evicts locally
+    before the Redis round trip. If a worker misses a message (pub/sub
+    reconnecting), the L1 TTL bounds how long it can serve the entry.
 
 Failure mode: every Redis call is wrapped in try/except AND guarded by a
 circuit breaker. When Redis is down (Render Key Value suspended, mid-deploy,
@@ -27,15 +43,31 @@ import hashlib
 import json
 import logging
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any
 
+from app.core import cache_bus
 from app.core.circuit_breaker import CircuitBreaker
-from app.core.redis import get_redis_client
+from app.core.config import settings
+from app.core.local_cache import MISSING, LocalTTLCache
+from app.core.redis import get_redis_client, run_from_sync
 
 logger = logging.getLogger(__name__)
 
 _BLACKLIST_PREFIX = "bl:"    # bl:<token_hash>  →  "1"
 _SESSION_PREFIX = "sess:"    # sess:<token_hash> →  json payload
+_USER_INDEX_PREFIX = "sessu:"  # sessu:<user_id>   →  set of token hashes
+
+EVICT_CHANNEL = "cache:session"  # "t:<token_hash>" | "u:<user_id>"
+
+# L1 value for a token hash known to be blacklisted.
+_REVOKED = "__revoked__"
+
+_local = LocalTTLCache(
+    max_entries=settings.SESSION_CACHE_LOCAL_MAX_ENTRIES,
+    ttl_seconds=settings.SESSION_CACHE_LOCAL_TTL_SEC,
+    name="session_cache.l1",
+)
 
 
 # One breaker shared by every session_cache call — a Redis outage is
@@ -50,10 +82,31 @@ def breaker_snapshot() -> dict[str, object]:
     return _breaker.snapshot()
 
 
+def local_snapshot() -> dict[str, object]:
+    return _local.snapshot()
+
+
+def clear_local_session_cache() -> None:
+    _local.clear()
+
+
+@lru_cache(maxsize=4096)
 def _token_hash(token: str) -> str:
+    # Memoised: the same bearer token is hashed on every request it makes.
     return hashlib.sha256(token.encode()).hexdigest()
 
 
+def _on_evict(message: str) -> None:
+    kind, _, value = message.partition(":")
+    if kind == "t":
+        _local.pop(value)
+    elif kind == "u":
+        _local.pop_where(lambda _k, v: isinstance(v, dict) and v.get("user_id") == value)
+
+
+cache_bus.subscribe(EVICT_CHANNEL, _on_evict)
+
+
 def _ttl_seconds(payload: dict) -> int:
     exp = payload.get("exp")
     if exp is None:
@@ -64,6 +117,8 @@ def _ttl_seconds(payload: dict) -> int:
 
 async def is_blacklisted(token: str) -> bool:
     """Return True if the access token has been explicitly revoked."""
+    if _local.lookup(_token_hash(token)) is _REVOKED:
+        return True
     if not _breaker.allow():
         return False
     client = get_redis_client()
@@ -81,62 +136,150 @@ async def is_blacklisted(token: str) -> bool:
 
 async def blacklist_token(token: str, payload: dict) -> None:
     """Blacklist an access token until its natural expiry."""
-    if not _breaker.allow():
-        return
-    client = get_redis_client()
-    if client is None:
-        return
-    try:
-        ttl = _ttl_seconds(payload)
-        await client.setex(_BLACKLIST_PREFIX + _token_hash(token), ttl, "1")
-        _breaker.record_success()
-    except Exception as exc:
-        _breaker.record_failure()
-        logger.warning("Redis blacklist write failed: %s", exc)
+    token_hash = _token_hash(token)
+    if _breaker.allow() and (client := get_redis_client()) is not None:
+        try:
+            ttl = _ttl_seconds(payload)
+            await client.setex(_BLACKLIST_PREFIX + token_hash, ttl, "1")
+            _breaker.record_success()
+        except Exception as exc:
+            _breaker.record_failure()
+            logger.warning("Redis blacklist write failed: %s", exc)
+    await cache_bus.publish(EVICT_CHANNEL, f"t:{token_hash}")
 
 
 async def get_cached_session(token: str) -> dict[str, Any] | None:
     """Return cached user session data, or None on cache miss."""
+    token_hash = _token_hash(token)
+    local = _local.lookup(token_hash)
+    if isinstance(local, dict):
+        return local
     if not _breaker.allow():
         return None
     client = get_redis_client()
     if client is None:
         return None
     try:
-        raw = await client.get(_SESSION_PREFIX + _token_hash(token))
+        raw = await client.get(_SESSION_PREFIX + token_hash)
         _breaker.record_success()
-        return json.loads(raw) if raw else None
     except Exception as exc:
         _breaker.record_failure()
         logger.warning("Redis session cache read failed: %s", exc)
         return None
+    data = json.loads(raw) if raw else None
+    if data is not None:
+        _local.set(token_hash, data)
+    return data
+
 
+async def load_session(token: str) -> tuple[bool, dict[str, Any] | None]:
+    """(revoked, cached_session) for the auth hot path.
 
-async def cache_session(token: str, data: dict[str, Any], ttl_seconds: int) -> None:
-    """Cache user session data for the remaining access token lifetime."""
+    L1 hit: no I/O. L1 miss: EXISTS on the blacklist and GET on the session
+    in one pipelined round trip; the answer is then held in L1.
+    """
+    token_hash = _token_hash(token)
+    local = _local.lookup(token_hash)
+    if local is _REVOKED:
+        return True, None
+    if local is not MISSING:
+        return False, local
     if not _breaker.allow():
-        return
+        return False, None
     client = get_redis_client()
     if client is None:
-        return
+        return False, None
     try:
-        await client.setex(_SESSION_PREFIX + _token_hash(token), ttl_seconds, json.dumps(data))
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.exists(_BLACKLIST_PREFIX + token_hash)
+            pipe.get(_SESSION_PREFIX + token_hash)
+            revoked, raw = await pipe.execute()
         _breaker.record_success()
     except Exception as exc:
         _breaker.record_failure()
-        logger.warning("Redis session cache write failed: %s", exc)
+        logger.warning("Redis session lookup failed: %s", exc)
+        return False, None
+    if revoked:
+        _local.set(token_hash, _REVOKED)
+        return True, None
+    data = json.loads(raw) if raw else None
+    if data is not None:
+        _local.set(token_hash, data)
+    return False, data
 
 
-async def invalidate_session(token: str) -> None:
-    """Remove a cached session entry (called alongside blacklisting on logout)."""
+async def cache_session(
+    token: str,
+    data: dict[str, Any],
+    ttl_seconds: int,
+    *,
+    user_id: str | None = None,
+) -> None:
+    """Cache user session data for the remaining access token lifetime.
+
+    With `user_id`, the entry is also added to that user's session index
+    (one pipelined round trip) so `invalidate_user_sessions` can find it.
+    """
+    token_hash = _token_hash(token)
+    _local.set(token_hash, data, ttl_seconds=min(ttl_seconds, settings.SESSION_CACHE_LOCAL_TTL_SEC))
     if not _breaker.allow():
         return
     client = get_redis_client()
     if client is None:
         return
     try:
-        await client.delete(_SESSION_PREFIX + _token_hash(token))
+        if user_id:
+            index_key = _USER_INDEX_PREFIX + user_id
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.setex(_SESSION_PREFIX + token_hash, ttl_seconds, json.dumps(data))
+                pipe.sadd(index_key, token_hash)
+                # Access tokens never outlive JWT_ACCESS_TTL_MIN, so keeping
+                # the index for one more token lifetime bounds its growth.
+                pipe.expire(index_key, max(ttl_seconds, 60))
+                await pipe.execute()
+        else:
+            await client.setex(_SESSION_PREFIX + token_hash, ttl_seconds, json.dumps(data))
         _breaker.record_success()
     except Exception as exc:
         _breaker.record_failure()
-        logger.warning("Redis session cache invalidate failed: %s", exc)
+        logger.warning("Redis session cache write failed: %s", exc)
+
+
+async def invalidate_session(token: str) -> None:
+    """Remove a cached session entry (called alongside blacklisting on logout)."""
+    token_hash = _token_hash(token)
+    if _breaker.allow() and (client := get_redis_client()) is not None:
+        try:
+            await client.delete(_SESSION_PREFIX + token_hash)
+            _breaker.record_success()
+        except Exception as exc:
+            _breaker.record_failure()
+            logger.warning("Redis session cache invalidate failed: %s", exc)
+    await cache_bus.publish(EVICT_CHANNEL, f"t:{token_hash}")
+
+
+async def ainvalidate_user_sessions(user_id: str) -> None:
+    """Drop every cached session for a user (deactivation, access removal).
+
+    The tokens themselves stay valid until expiry, but the next request with
+    any of them misses the cache and re-reads the user row, which rejects it.
+    """
+    user_id = str(user_id)
+    if _breaker.allow() and (client := get_redis_client()) is not None:
+        try:
+            index_key = _USER_INDEX_PREFIX + user_id
+            hashes = await client.smembers(index_key)
+            keys = [_SESSION_PREFIX + (h.decode() if isinstance(h, bytes) else str(h)) for h in hashes]
+            await client.delete(index_key, *keys)
+            _breaker.record_success()
+        except Exception as exc:
+            _breaker.record_failure()
+            logger.warning("Redis user session invalidate failed: %s", exc)
+    await cache_bus.publish(EVICT_CHANNEL, f"u:{user_id}")
+
+
+def invalidate_user_sessions(user_id) -> None:
+    """Sync-route entry point for `ainvalidate_user_sessions`."""
+    # Local eviction first: it must not depend on reaching the event loop.
+    cache_bus.dispatch(EVICT_CHANNEL, f"u:{user_id}")
+    run_from_sync(ainvalidate_user_sessions, str(user_id))
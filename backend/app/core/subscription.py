@@ -59,6 +59,21 @@ class SubscriptionState:
             "state_override": self.state_override,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "SubscriptionState":
+        """Inverse of to_dict (shared subscription-state cache)."""
+        return cls(
+            state=data["state"],
+            plan_code=data.get("plan_code"),
+            plan_name=data.get("plan_name"),
+            modules=frozenset(data.get("modules") or ()),
+            status=data.get("status"),
+            period_end=date.fromisoformat(data["period_end"]) if data.get("period_end") else None,
+            grace_until=date.fromisoformat(data["grace_until"]) if data.get("grace_until") else None,
+            grace_days=int(data["grace_days"]) if data.get("grace_days") is not None else _DEFAULT_GRACE_DAYS,
+            state_override=data.get("state_override"),
+        )
+
 
 def _grandfathered(
     *, period_end: Optional[date] = None, status: Optional[str] = None
@@ -6,46 +6,169 @@ app — subscription billing must not take the school offline.
 """
 from __future__ import annotations
 
+import json
 import logging
-import time
+from datetime import date, datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from app.core import cache_bus
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_tenant
+from app.core.local_cache import LocalTTLCache
 from app.core.modules import GATEABLE_MODULES, MODULE_LABELS
+from app.core.redis import get_redis_client, run_from_sync
 from app.core.subscription import SubscriptionState, resolve_subscription_state
 
 logger = logging.getLogger(__name__)
 
 _WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
 
-# Short in-process TTL cache — subscription state only changes daily (dates)
-# or on an admin action, so a 60 s window avoids resolving on every request.
-_CACHE_TTL_SEC = 60.0
-_state_cache: dict[str, tuple[SubscriptionState, float]] = {}
+# Subscription state cache.
+#   L1: per-worker bounded LRU.
+#   L2: Redis, `substate:<tenant_id>` → {"day": ..., "state": {...}}.
+# State only changes on an admin/payment action or when the date rolls over.
+# Actions invalidate through `invalidate_subscription_cache`, which deletes
+# the Redis entry and fans out over the cache bus so every worker drops its
+# L1 copy at once. Entries never outlive the day they were resolved on, so
+# a period_end passing overnight is picked up without any invalidation.
+_REDIS_PREFIX = "substate:"
+EVICT_CHANNEL = "cache:subscription"   # "<tenant_id>" | "*"
+
+_local = LocalTTLCache(
+    name="subscription_state",
+    max_entries=settings.SUBSCRIPTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SUBSCRIPTION_CACHE_LOCAL_TTL_SEC,
+)
+
+_breaker = CircuitBreaker(name="redis.subscription_cache", failure_threshold=3, cooldown_s=30.0)
+
+
+def cache_snapshot() -> dict[str, object]:
+    return {**_local.snapshot(), "redis": _breaker.snapshot()}
+
+
+def clear_local_subscription_cache() -> None:
+    _local.clear()
+
+
+def _seconds_until_tomorrow() -> int:
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def _on_evict(message: str) -> None:
+    if message == "*":
+        _local.clear()
+    else:
+        _local.pop(message)
+
+
+cache_bus.subscribe(EVICT_CHANNEL, _on_evict)
+
+
+async def _aget_shared(key: str) -> SubscriptionState | None:
+    if not _breaker.allow():
+        return None
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(_REDIS_PREFIX + key)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis subscription cache read failed: %s", exc)
+        return None
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+        if data.get("day") != date.today().isoformat():
+            return None
+        return SubscriptionState.from_dict(data["state"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+async def _aset_shared(key: str, state: SubscriptionState, ttl: int) -> None:
+    if not _breaker.allow():
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        payload = json.dumps({"day": date.today().isoformat(), "state": state.to_dict()})
+        await client.setex(_REDIS_PREFIX + key, ttl, payload)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis subscription cache write failed: %s", exc)
+
+
+async def _ainvalidate(key: str) -> None:
+    if _breaker.allow() and (client := get_redis_client()) is not None:
+        try:
+            if key == "*":
+                batch: list[str] = []
+                async for redis_key in client.scan_iter(match=_REDIS_PREFIX + "*", count=500):
+                    batch.append(redis_key)
+                    if len(batch) >= 500:
+                        await client.delete(*batch)
+                        batch.clear()
+                if batch:
+                    await client.delete(*batch)
+            else:
+                await client.delete(_REDIS_PREFIX + key)
+            _breaker.record_success()
+        except Exception as exc:
+            _breaker.record_failure()
+            logger.warning("Redis subscription cache invalidate failed: %s", exc)
+    await cache_bus.publish(EVICT_CHANNEL, key)
 
 
 def get_cached_subscription_state(db: Session, tenant_id: UUID) -> SubscriptionState:
     key = str(tenant_id)
-    now = time.monotonic()
-    hit = _state_cache.get(key)
-    if hit is not None and hit[1] > now:
-        return hit[0]
-    state = resolve_subscription_state(db, tenant_id=tenant_id)
-    _state_cache[key] = (state, now + _CACHE_TTL_SEC)
+    cached = _local.get(key)
+    if cached is not None and cached[0] == date.today():
+        return cached[1]
+
+    ttl_local = min(settings.SUBSCRIPTION_CACHE_LOCAL_TTL_SEC, _seconds_until_tomorrow())
+    state = run_from_sync(_aget_shared, key)
+    if state is None:
+        state = resolve_subscription_state(db, tenant_id=tenant_id)
+        ttl_shared = min(settings.SUBSCRIPTION_CACHE_TTL_SEC, _seconds_until_tomorrow())
+        run_from_sync(_aset_shared, key, state, ttl_shared)
+    _local.set(key, (date.today(), state), ttl_seconds=ttl_local)
     return state
 
 
 def invalidate_subscription_cache(tenant_id: UUID | str | None = None) -> None:
-    """Drop cached state — call after an admin changes a subscription/plan."""
-    if tenant_id is None:
-        _state_cache.clear()
-    else:
-        _state_cache.pop(str(tenant_id), None)
+    """Drop cached state on every worker — call after an admin or payment
+    changes a subscription, plan, group tier or group membership.
+    `tenant_id=None` drops every tenant (plan / group-wide changes)."""
+    key = "*" if tenant_id is None else str(tenant_id)
+    # Local eviction first: it must not depend on reaching the event loop.
+    cache_bus.dispatch(EVICT_CHANNEL, key)
+    run_from_sync(_ainvalidate, key)
+
+
+def invalidate_subscription_cache_after_commit(db: Session, tenant_id: UUID | str | None) -> None:
+    """For service code that mutates a subscription but leaves the commit to
+    its caller: invalidate only once the change is visible to other workers."""
+    event.listen(
+        db,
+        "after_commit",
+        lambda _session: invalidate_subscription_cache(tenant_id),
+        once=True,
+    )
 
 
 def gate(module: Optional[str] = None):
@@ -0,0 +1,203 @@
+"""Two-tier cache for TenantMiddleware's tenant resolution.
+
+Every non-public request used to open a session and run 1–3 `core.tenants`
+lookups before the handler started. Resolution results are now cached under
+lookup keys that can all be derived from a tenant row:
+
+    id:<uuid>          X-Tenant-ID header
+    slug:<slug>        X-Tenant-Slug header, or the first label of the host
+    domain:<host>      Tenant.primary_domain
+
+Tiers:
+  - L1: per-worker LocalTTLCache (bounded LRU, short TTL).
+  - L2: Redis, `tctx:<key>` → JSON, TTL = TENANT_CACHE_TTL_SEC.
+
+Negative results (no tenant for that key) are cached too, with a much shorter
+TTL, so scanners cycling through the same unknown hosts cannot drive DB load.
+
+Invalidation: routes that change a tenant's slug, domain, name, curriculum,
+group or active flag call `invalidate_tenant_cache(tenant_cache_keys(t))`
+— once with the pre-change keys when slug/domain may move. That drops the
+local L1 entries and the Redis keys; other workers converge within
+TENANT_CACHE_LOCAL_TTL_SEC.
+
+Redis failures follow the session_cache model: circuit breaker, fail open
+to the database, never block the request.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, Iterable
+from uuid import UUID
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.local_cache import MISSING, LocalTTLCache
+from app.core.redis import get_redis_client, run_from_sync
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "tctx:"      # tctx:<lookup key> → {"ctx": {...} | null}
+
+_local = LocalTTLCache(
+    name="tenant_ctx",
+    max_entries=settings.TENANT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TENANT_CACHE_LOCAL_TTL_SEC,
+)
+
+_breaker = CircuitBreaker(name="redis.tenant_cache", failure_threshold=3, cooldown_s=30.0)
+
+
+def cache_snapshot() -> dict[str, object]:
+    """Exposed on /healthz next to the session-cache breaker."""
+    return {**_local.snapshot(), "redis": _breaker.snapshot()}
+
+
+# ── Keys ─────────────────────────────────────────────────────────────────────
+
+def id_key(tenant_id: UUID | str) -> str:
+    return f"id:{str(tenant_id).lower()}"
+
+
+def slug_key(slug: str) -> str:
+    return f"slug:{str(slug).strip().lower()}"
+
+
+def domain_key(host: str) -> str:
+    return f"domain:{str(host).strip().lower()}"
+
+
+def tenant_cache_keys(tenant: Any) -> list[str]:
+    """Every lookup key under which `tenant` may currently be cached."""
+    keys = [id_key(tenant.id)]
+    if getattr(tenant, "slug", None):
+        keys.append(slug_key(tenant.slug))
+    if getattr(tenant, "primary_domain", None):
+        keys.append(domain_key(tenant.primary_domain))
+    return keys
+
+
+# ── Context snapshot ─────────────────────────────────────────────────────────
+
+def tenant_snapshot(tenant: Any) -> dict[str, Any]:
+    """Plain, JSON-able view of the fields the request path needs."""
+    group_id = getattr(tenant, "group_id", None)
+    return {
+        "id": str(tenant.id),
+        "slug": tenant.slug,
+        "name": tenant.name,
+        "is_active": bool(tenant.is_active),
+        "curriculum_type": getattr(tenant, "curriculum_type", "CBC") or "CBC",
+        "group_id": str(group_id) if group_id else None,
+        "is_demo": bool(getattr(tenant, "is_demo", False)),
+    }
+
+
+def tenant_context(snapshot: dict[str, Any]) -> SimpleNamespace:
+    """Fresh immutable-by-convention context object for request.state."""
+    group_id = snapshot.get("group_id")
+    return SimpleNamespace(
+        id=UUID(snapshot["id"]),
+        slug=snapshot["slug"],
+        name=snapshot["name"],
+        is_active=bool(snapshot["is_active"]),
+        curriculum_type=snapshot.get("curriculum_type") or "CBC",
+        group_id=UUID(group_id) if group_id else None,
+        is_demo=bool(snapshot.get("is_demo", False)),
+    )
+
+
+# ── Read / write ─────────────────────────────────────────────────────────────
+
+async def get_cached_tenant(key: str) -> Any:
+    """Return the cached snapshot dict, None (cached negative) or MISSING."""
+    value = _local.lookup(key)
+    if value is not MISSING:
+        return value
+
+    if not _breaker.allow():
+        return MISSING
+    client = get_redis_client()
+    if client is None:
+        return MISSING
+    try:
+        raw = await client.get(_REDIS_PREFIX + key)
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis tenant cache read failed: %s", exc)
+        return MISSING
+    if not raw:
+        return MISSING
+    try:
+        value = json.loads(raw).get("ctx")
+    except (ValueError, AttributeError):
+        return MISSING
+    _local.set(key, value, _local_ttl(value))
+    return value
+
+
+async def cache_tenant(key: str, snapshot: dict[str, Any] | None) -> None:
+    """Store a positive snapshot, or None to remember that `key` is unknown."""
+    _local.set(key, snapshot, _local_ttl(snapshot))
+
+    if not _breaker.allow():
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    ttl = settings.TENANT_CACHE_TTL_SEC if snapshot is not None else settings.TENANT_CACHE_NEGATIVE_TTL_SEC
+    if ttl <= 0:
+        return
+    try:
+        await client.setex(_REDIS_PREFIX + key, ttl, json.dumps({"ctx": snapshot}))
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis tenant cache write failed: %s", exc)
+
+
+def _local_ttl(snapshot: dict[str, Any] | None) -> float:
+    if snapshot is None:
+        return min(settings.TENANT_CACHE_LOCAL_TTL_SEC, settings.TENANT_CACHE_NEGATIVE_TTL_SEC)
+    return settings.TENANT_CACHE_LOCAL_TTL_SEC
+
+
+# ── Invalidation ─────────────────────────────────────────────────────────────
+
+async def ainvalidate_tenant_cache(keys: Iterable[str]) -> None:
+    keys = list(dict.fromkeys(keys))
+    for key in keys:
+        _local.pop(key)
+    if not keys or not _breaker.allow():
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.delete(*[_REDIS_PREFIX + k for k in keys])
+        _breaker.record_success()
+    except Exception as exc:
+        _breaker.record_failure()
+        logger.warning("Redis tenant cache invalidate failed: %s", exc)
+
+
+def invalidate_tenant_cache(*key_groups: Iterable[str]) -> None:
+    """Sync entry point for route handlers / services after a tenant change.
+
+    Accepts one or more key lists (typically the pre- and post-change
+    `tenant_cache_keys`). Local entries are dropped immediately; the Redis
+    delete runs on the event loop when one is reachable.
+    """
+    keys = [k for group in key_groups for k in group]
+    for key in keys:
+        _local.pop(key)
+    if keys:
+        run_from_sync(ainvalidate_tenant_cache, keys)
+
+
+def clear_local_tenant_cache() -> None:
+    """Drop every L1 entry (tests, or after bulk tenant changes)."""
+    _local.clear()
@@ -8,9 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers
 from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 import app.models  # noqa: F401 — register every ORM table before mappers configure
 from sqlalchemy.orm import configure_mappers
@@ -31,10 +31,15 @@ from app.core.middleware import TenantMiddleware
 from app.core.middleware_audit import AuditMiddleware
 from app.core.middleware_request_id import RequestIDMiddleware
 from app.core.middleware_security import SecurityHeadersMiddleware
-from app.core.audit import prune_audit_logs
+from app.core.audit import maintain_audit_partitions
+from app.api.v1.payments.reconciler import start_stk_reconciler, stop_stk_reconciler
+from app.api.v1.tenants.notification_feed import start_notification_sweeper, stop_notification_sweeper
+from app.core import cache_bus
+from app.core.jobs import start_job_workers, stop_job_workers
 from app.core.database import SessionLocal
 from app.core.middleware_audit import shutdown_audit_queue
 from app.core.rate_limit import limiter
+from app.core.schema_registry import schema_registry, warm_schema_registry
 from app.core.redis import close_redis, init_redis
 
 logger = logging.getLogger(__name__)
@@ -47,24 +52,33 @@ logger = logging.getLogger(__name__)
 _MAX_BODY_BYTES = 2 * 1024 * 1024  # 2 MB
 
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # Skip size enforcement for multipart file uploads (handled per-endpoint)
-        ct = request.headers.get("content-type", "")
-        if ct.startswith("multipart/form-data"):
-            return await call_next(request)
+class RequestSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        cl = request.headers.get("content-length")
-        if cl is not None:
+        headers = Headers(scope=scope)
+        # Skip size enforcement for multipart file uploads (handled per-endpoint)
+        ct = headers.get("content-type", "")
+        cl = headers.get("content-length")
+        if cl is not None and not ct.startswith("multipart/form-data"):
+            rejection: Response | None = None
             try:
                 if int(cl) > _MAX_BODY_BYTES:
-                    return JSONResponse(
+                    rejection = JSONResponse(
                         {"detail": f"Request body too large (max {_MAX_BODY_BYTES // 1024} KB)."},
                         status_code=413,
                     )
             except ValueError:
-                return JSONResponse({"detail": "Invalid Content-Length header."}, status_code=400)
-        return await call_next(request)
+                rejection = JSONResponse({"detail": "Invalid Content-Length header."}, status_code=400)
+            if rejection is not None:
+                await rejection(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
 
 
 @asynccontextmanager
@@ -76,24 +90,58 @@ async def lifespan(app: FastAPI):
 
     await init_redis()
 
-    # ── Audit log pruning ─────────────────────────────────────────────────────
-    # Run once at startup so the table stays bounded without a separate cron.
-    # Offloaded to a thread to avoid blocking the async event loop.
-    _retention = settings.AUDIT_LOG_RETENTION_DAYS
-    if _retention > 0:
-        def _prune():
+    # One pub/sub subscriber per worker: evicts L1 cache entries when another
+    # worker logs a user out or revokes their sessions.
+    cache_bus.start_cache_bus()
+
+    # ── Schema registry ───────────────────────────────────────────────────────
+    # One catalog read per worker so table-candidate lookups on the request
+    # path are answered from memory from the first request on.
+    if ready:
+        def _warm_schema():
+            with SessionLocal() as db:
+                warm_schema_registry(db)
+        await asyncio.to_thread(_warm_schema)
+
+    # ── Audit log partitions ─────────────────────────────────────────────────
+    # core.audit_logs is partitioned by month: create the upcoming months and
+    # drop expired ones (DROP TABLE per month, no long-running DELETE). Only
+    # one worker does the work; the rest skip on the advisory lock.
+    if ready:
+        def _maintain_audit():
             with SessionLocal() as db:
-                return prune_audit_logs(db, retention_days=_retention)
+                return maintain_audit_partitions(
+                    db, retention_days=settings.AUDIT_LOG_RETENTION_DAYS
+                )
         try:
-            _pruned = await asyncio.to_thread(_prune)
-            if _pruned:
+            _audit_maint = await asyncio.to_thread(_maintain_audit)
+            if _audit_maint["created"] or _audit_maint["dropped"]:
                 logger.info(
-                    "Audit log pruning: removed %d rows older than %d days",
-                    _pruned,
-                    _retention,
+                    "Audit log partitions: created=%s dropped=%s (retention %d days)",
+                    _audit_maint["created"],
+                    _audit_maint["dropped"],
+                    settings.AUDIT_LOG_RETENTION_DAYS,
                 )
         except Exception:
-            logger.warning("Audit log pruning failed — will retry on next startup", exc_info=True)
+            logger.warning("Audit log partition maintenance failed — will retry on next startup", exc_info=True)
+
+    # ── Notification feed sweep ─────────────────────────────────────────────
+    # Materializes time-based tenant notifications (overdue assets) and
+    # recounts unread badges every NOTIFICATION_SWEEP_INTERVAL_SEC.
+    if ready:
+        start_notification_sweeper()
+
+    # ── STK status reconciler ───────────────────────────────────────────────
+    # Queries Daraja for M-Pesa payments whose callback is overdue, so the
+    # status endpoints the frontend polls never call out.
+    if ready:
+        start_stk_reconciler()
+
+    # ── Background jobs ──────────────────────────────────────────────────────
+    # JOB_INPROCESS_WORKERS threads per worker process drain the job queue
+    # (core.background_jobs); 0 leaves it to `python -m app.worker`.
+    if ready:
+        start_job_workers()
 
     # ── CORS configuration sanity check ──────────────────────────────────────
     _cors_origins = settings.cors_origins_list
@@ -136,7 +184,11 @@ async def lifespan(app: FastAPI):
     # ── shutdown ─────────────────────────────────────────────────────────────
     # Drain audit queue first — workers need the DB pool and Redis to flush
     # remaining events. Close infrastructure connections only after drain.
+    await stop_notification_sweeper()
+    await stop_stk_reconciler()
+    await asyncio.to_thread(stop_job_workers)
     await shutdown_audit_queue()
+    await cache_bus.stop_cache_bus()
     await close_redis()
 
 
@@ -161,7 +213,11 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # ── Middleware stack ───────────────────────────────────────────────────────────
 # add_middleware inserts at position 0 (outermost), so last-added runs first.
 # Execution order on incoming requests:
-#   RequestID → SecurityHeaders → Audit → Tenant → route handler
+#   CORS → RequestID → SizeLimit → SecurityHeaders → Audit → Tenant → route handler
+#
+# All of ours are pure ASGI (no BaseHTTPMiddleware): response headers are
+# added on the http.response.start message, so bodies — including streamed
+# PDF/CSV downloads — are never buffered or re-wrapped per layer.
 #
 app.add_middleware(TenantMiddleware)          # innermost: resolves tenant context
 app.add_middleware(AuditMiddleware)           # audit logging + X-Request-ID echo
@@ -186,9 +242,12 @@ app.add_middleware(                           # outermost: CORS
         "X-Tenant-ID",
         "X-Tenant-Slug",
         "X-Request-ID",
+        "Idempotency-Key",
     ],
-    # Expose X-Request-ID so the frontend can surface correlation IDs in error UIs.
-    expose_headers=["X-Request-ID"],
+    # Expose X-Request-ID so the frontend can surface correlation IDs in error
+    # UIs, X-Next-Cursor for keyset-paginated listings and Location for the
+    # job URL of a 202 (async) bulk request.
+    expose_headers=["X-Request-ID", "X-Next-Cursor", "Location"],
     # Cache preflight responses for 10 minutes to reduce OPTIONS request overhead.
     max_age=600,
 )
@@ -198,12 +257,33 @@ app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/healthz")
 def healthz():
+    from app.core.dependencies import auth_latency_snapshot
+    from app.core.jobs import jobs_snapshot
+    from app.api.v1.tenants.dashboard_sections import dashboard_cache_snapshot
+    from app.api.v1.payments.reconciler import stk_reconcile_snapshot
+    from app.api.v1.reports.results import class_results_cache_snapshot
+    from app.api.v1.tenants.notification_feed import notification_sweep_snapshot
+    from app.core.middleware_audit import audit_sink_snapshot
     from app.core.rate_limit import limiter_health
-    from app.core.session_cache import breaker_snapshot
+    from app.core.session_cache import breaker_snapshot, local_snapshot as session_l1_snapshot
+    from app.core.subscription_gate import cache_snapshot as subscription_cache_snapshot
+    from app.core.tenant_cache import cache_snapshot as tenant_cache_snapshot
     return {
         "status": "ok",
         "rate_limiter": limiter_health(),
         "session_cache": breaker_snapshot(),
+        "session_cache_l1": session_l1_snapshot(),
+        "cache_bus": cache_bus.snapshot(),
+        "auth_latency": auth_latency_snapshot(),
+        "tenant_cache": tenant_cache_snapshot(),
+        "schema_registry": schema_registry.snapshot(),
+        "subscription_cache": subscription_cache_snapshot(),
+        "audit_sink": audit_sink_snapshot(),
+        "notification_sweep": notification_sweep_snapshot(),
+        "stk_reconciler": stk_reconcile_snapshot(),
+        "dashboard_sections": dashboard_cache_snapshot(),
+        "class_results": class_results_cache_snapshot(),
+        "jobs": jobs_snapshot(),
     }
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, text
+from sqlalchemy import DDL, Column, String, DateTime, ForeignKey, Index, event, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 
@@ -6,8 +6,18 @@ from app.core.database import Base
 
 
 class AuditLog(Base):
+    """Range-partitioned by month on created_at (see app.core.audit for the
+    partition maintenance). Postgres requires the partition key in the
+    primary key, so the table key is (id, created_at); the ORM identity stays
+    `id` alone, which is unique on its own (gen_random_uuid)."""
+
     __tablename__ = "audit_logs"
-    __table_args__ = {"schema": "core"}
+    __table_args__ = (
+        # Keyset pagination: WHERE tenant_id = ? AND (created_at, id) < (?, ?)
+        # ORDER BY created_at DESC, id DESC.
+        Index("ix_audit_logs_tenant_created_id", "tenant_id", "created_at", "id"),
+        {"schema": "core", "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
 
@@ -21,4 +31,15 @@ class AuditLog(Base):
     payload = Column(JSONB, nullable=True)  # sanitized request/extra info
     meta = Column(JSONB, nullable=True)     # ip, ua, request_id, method, path, status, duration_ms
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Rows outside every monthly partition (e.g. before maintenance has created
+# the month) land here instead of failing the insert.
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS core.audit_logs_default PARTITION OF core.audit_logs DEFAULT"),
+)
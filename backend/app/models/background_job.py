@@ -0,0 +1,82 @@
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class BackgroundJob(Base):
+    """A long-running tenant operation queued for a job worker
+    (app.core.jobs).
+
+    status lifecycle:
+        QUEUED     -> waiting for a worker (claimed with FOR UPDATE SKIP LOCKED)
+        RUNNING    -> a worker is executing it; heartbeat_at moves with progress
+        SUCCEEDED  -> result holds the operation's return value
+        FAILED     -> error holds the reason
+        CANCELLED  -> cancel_requested was honoured; the run was rolled back
+
+    progress_done / progress_total and partial are updated while the job
+    runs, so a client polling the job URL can render a progress bar and
+    running counts.
+    """
+
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED')",
+            name="ck_background_jobs_status",
+        ),
+        # Worker claim: oldest QUEUED job first.
+        Index(
+            "ix_background_jobs_queued",
+            "created_at",
+            postgresql_where=text("status = 'QUEUED'"),
+        ),
+        Index("ix_background_jobs_tenant_created", "tenant_id", "created_at"),
+        # A retried submit with the same Idempotency-Key returns the first job.
+        Index(
+            "uq_background_jobs_idempotency",
+            "tenant_id",
+            "kind",
+            "idempotency_key",
+            unique=True,
+            postgresql_where=text("idempotency_key IS NOT NULL"),
+        ),
+        {"schema": "core"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(80), nullable=False)
+    status = Column(String(16), nullable=False, server_default=text("'QUEUED'"))
+
+    params = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    idempotency_key = Column(String(120), nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("core.users.id", ondelete="SET NULL"), nullable=True)
+
+    progress_done = Column(Integer, nullable=False, server_default=text("0"))
+    progress_total = Column(Integer, nullable=True)
+    partial = Column(JSONB, nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+
+    cancel_requested = Column(Boolean, nullable=False, server_default=text("false"))
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    worker_id = Column(String(120), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
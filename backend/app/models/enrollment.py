@@ -1,10 +1,36 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Index, text
+from sqlalchemy import Column, Computed, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
 
+def _first_payload_text(*keys: str) -> str:
+    """SQL for the first of `keys` whose payload value is a non-blank string
+    (trimmed), else NULL — the same pick the Python payload readers make."""
+    picks = ", ".join(
+        f"nullif(btrim(CASE WHEN jsonb_typeof(payload->'{key}') = 'string' "
+        f"THEN payload->>'{key}' END, E' \\t\\n\\r'), '')"
+        for key in keys
+    )
+    return f"coalesce({picks})"
+
+
+# Generated-column expressions for the payload fields every listing and bulk
+# run filters on. The migration carries its own copy.
+ENROLLMENT_CLASS_CODE_SQL = (
+    f"upper({_first_payload_text('admission_class', 'class_code', 'classCode', 'grade')})"
+)
+ENROLLMENT_TERM_CODE_SQL = (
+    "upper(replace("
+    f"{_first_payload_text('admission_term', 'term_code', 'termCode', 'term', 'academic_term')}"
+    ", ' ', '_'))"
+)
+ENROLLMENT_STUDENT_NAME_SQL = _first_payload_text(
+    "student_name", "studentName", "full_name", "fullName", "name"
+)
+
+
 class Enrollment(Base):
     __tablename__ = "enrollments"
     # Mirror the migration: one admission number per tenant (partial — many
@@ -16,6 +42,10 @@ class Enrollment(Base):
             unique=True,
             postgresql_where=text("admission_number IS NOT NULL"),
         ),
+        # Keyset pages of the enrollment listing: (created_at, id) < cursor.
+        Index("ix_enrollments_tenant_created_id", "tenant_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_enrollments_tenant_class_code", "tenant_id", "class_code"),
+        Index("ix_enrollments_tenant_term_code", "tenant_id", "term_code"),
         {"schema": "core"},
     )
 
@@ -35,6 +65,15 @@ class Enrollment(Base):
     # flexible payload so step 3.1 can evolve without schema churn
     payload = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
 
+    # Normalized copies of the payload's class / term / student name, kept in
+    # step by Postgres (stored generated columns) so class and term filters
+    # run in SQL against an index instead of over decoded payloads.
+    # class_code is upper-cased, term_code upper-cased with spaces as
+    # underscores; NULL when the payload has no such field.
+    class_code = Column(String, Computed(ENROLLMENT_CLASS_CODE_SQL, persisted=True))
+    term_code = Column(String, Computed(ENROLLMENT_TERM_CODE_SQL, persisted=True))
+    student_name = Column(String, Computed(ENROLLMENT_STUDENT_NAME_SQL, persisted=True))
+
     created_by = Column(UUID(as_uuid=True), nullable=True)
     updated_by = Column(UUID(as_uuid=True), nullable=True)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Enum, SmallInteger, String, DateTime, ForeignKey, Numeric, text
+from sqlalchemy import Column, Enum, Index, SmallInteger, String, DateTime, ForeignKey, Numeric, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 
@@ -8,7 +8,11 @@ from app.models.payment import _new_verify_code
 
 class Invoice(Base):
     __tablename__ = "invoices"
-    __table_args__ = {"schema": "core"}
+    __table_args__ = (
+        # Keyset pages of the invoice listings: (created_at, id) < cursor.
+        Index("ix_invoices_tenant_created_id", "tenant_id", text("created_at DESC"), text("id DESC")),
+        {"schema": "core"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,106 @@
+from sqlalchemy import DDL, BigInteger, Column, Date, DateTime, ForeignKey, Index, String, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class TenantKpiSnapshot(Base):
+    """Precomputed director KPI / finance report bundle, one row per tenant
+    (app.api.v1.tenants.dashboard_stats.get_kpi_snapshot).
+
+    The row is current while the tenant has no pending rows in
+    core.tenant_kpi_changes, it was computed today (the current term is
+    resolved by date) and it is younger than KPI_SNAPSHOT_MAX_AGE_SEC.
+    """
+
+    __tablename__ = "tenant_kpi_snapshots"
+    __table_args__ = {"schema": "core"}
+
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("core.tenants.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    payload = Column(JSONB, nullable=False)
+    computed_on = Column(Date, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class TenantKpiChange(Base):
+    """Marks a tenant's KPI snapshot as stale.
+
+    Written by statement-level triggers on the source tables listed in
+    KPI_SOURCE_TABLES — at most one pending row per tenant in the common
+    case — and cleared when the snapshot is recomputed. No FK to tenants:
+    the triggers also fire while a tenant's rows are cascade-deleted.
+    """
+
+    __tablename__ = "tenant_kpi_changes"
+    __table_args__ = (
+        Index("ix_tenant_kpi_changes_tenant", "tenant_id"),
+        {"schema": "core"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False)
+    source = Column(String(60), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# Tables whose rows feed the KPI bundle (finance totals and breakdowns,
+# demographics, current term, scholarships).
+KPI_SOURCE_TABLES = (
+    "invoices",
+    "payments",
+    "students",
+    "enrollments",
+    "tenant_terms",
+    "scholarships",
+    "scholarship_allocations",
+    "student_scholarship_grants",
+)
+
+_NOTE_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION core.note_tenant_kpi_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO core.tenant_kpi_changes (tenant_id, source)
+        SELECT DISTINCT o.tenant_id, TG_TABLE_NAME
+        FROM kpi_old o
+        WHERE o.tenant_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM core.tenant_kpi_changes c WHERE c.tenant_id = o.tenant_id);
+    ELSE
+        INSERT INTO core.tenant_kpi_changes (tenant_id, source)
+        SELECT DISTINCT n.tenant_id, TG_TABLE_NAME
+        FROM kpi_new n
+        WHERE n.tenant_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM core.tenant_kpi_changes c WHERE c.tenant_id = n.tenant_id);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def kpi_change_trigger_ddl(table: str) -> list[str]:
+    """Statement-level triggers (one per operation — transition tables do not
+    allow combined events) that mark the touched tenants' snapshots stale."""
+    fn = "EXECUTE FUNCTION core.note_tenant_kpi_change()"
+    return [
+        f"CREATE TRIGGER trg_{table}_kpi_insert AFTER INSERT ON core.{table} "
+        f"REFERENCING NEW TABLE AS kpi_new FOR EACH STATEMENT {fn}",
+        f"CREATE TRIGGER trg_{table}_kpi_update AFTER UPDATE ON core.{table} "
+        f"REFERENCING NEW TABLE AS kpi_new FOR EACH STATEMENT {fn}",
+        f"CREATE TRIGGER trg_{table}_kpi_delete AFTER DELETE ON core.{table} "
+        f"REFERENCING OLD TABLE AS kpi_old FOR EACH STATEMENT {fn}",
+    ]
+
+
+# Installed once every table exists (create_all); migrations carry their own
+# copy of the same DDL.
+event.listen(Base.metadata, "after_create", DDL(_NOTE_CHANGE_FUNCTION))
+for _table in KPI_SOURCE_TABLES:
+    for _statement in kpi_change_trigger_ddl(_table):
+        event.listen(Base.metadata, "after_create", DDL(_statement))
@@ -0,0 +1,100 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class TenantNotification(Base):
+    """Materialized tenant notification feed.
+
+    One row per notification key (e.g. "asset-due-<assignment id>"), written
+    by the events that raise notifications and by the periodic sweep
+    (app.api.v1.tenants.notification_feed). A notification that no longer
+    applies is deactivated rather than deleted so per-user read state keyed
+    on the same id keeps its meaning if it comes back.
+    """
+
+    __tablename__ = "tenant_notifications"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "notification_id", name="uq_tenant_notifications_tenant_notification"),
+        # Keyset feed: WHERE tenant_id = ? AND is_active AND (occurred_at, id) < (?, ?)
+        # ORDER BY occurred_at DESC, id DESC.
+        Index("ix_tenant_notifications_feed", "tenant_id", "is_active", "occurred_at", "id"),
+        Index("ix_tenant_notifications_tenant_type", "tenant_id", "type"),
+        {"schema": "core"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
+    notification_id = Column(String(255), nullable=False)
+
+    type = Column(String(40), nullable=False)
+    severity = Column(String(16), nullable=False, server_default=text("'info'"))
+    title = Column(String(300), nullable=False)
+    message = Column(Text, nullable=False, server_default=text("''"))
+    entity_type = Column(String(60), nullable=True)
+    entity_id = Column(String(80), nullable=True)
+    # Hidden from this user (e.g. the admin who wrote a support reply).
+    exclude_user_id = Column(UUID(as_uuid=True), nullable=True)
+
+    occurred_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    due_at = Column(DateTime(timezone=True), nullable=True)
+
+    is_active = Column(Boolean, nullable=False, server_default=text("true"))
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class TenantNotificationRead(Base):
+    """Per-user read / dismissed marker for a notification id."""
+
+    __tablename__ = "tenant_notification_reads"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "user_id",
+            "notification_id",
+            name="uq_tenant_notification_reads_tenant_user_notification",
+        ),
+        Index("ix_tenant_notification_reads_tenant_user_read_at", "tenant_id", "user_id", "read_at"),
+        Index("ix_tenant_notification_reads_tenant_user_deleted_at", "tenant_id", "user_id", "deleted_at"),
+        {"schema": "core"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("core.users.id", ondelete="CASCADE"), nullable=False)
+    notification_id = Column(String(255), nullable=False)
+    read_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class TenantNotificationCounter(Base):
+    """Unread badge per (tenant, user), kept in step with the feed and the
+    read markers; recounted by the sweep."""
+
+    __tablename__ = "tenant_notification_counters"
+    __table_args__ = (
+        PrimaryKeyConstraint("tenant_id", "user_id", name="pk_tenant_notification_counters"),
+        {"schema": "core"},
+    )
+
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("core.users.id", ondelete="CASCADE"), nullable=False)
+    unread_count = Column(Integer, nullable=False, server_default=text("0"))
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
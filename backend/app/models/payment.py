@@ -1,6 +1,6 @@
 import secrets
 
-from sqlalchemy import CheckConstraint, Column, String, DateTime, ForeignKey, Numeric, UniqueConstraint, text
+from sqlalchemy import CheckConstraint, Column, String, DateTime, ForeignKey, Index, Numeric, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -14,7 +14,11 @@ def _new_verify_code() -> str:
 
 class Payment(Base):
     __tablename__ = "payments"
-    __table_args__ = {"schema": "core"}
+    __table_args__ = (
+        # Keyset pages of the payment listings: (received_at, id) < cursor.
+        Index("ix_payments_tenant_received_id", "tenant_id", text("received_at DESC"), text("id DESC")),
+        {"schema": "core"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("core.tenants.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,228 @@
+from sqlalchemy import DDL, Column, DateTime, Index, String, Text, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class SearchDocument(Base):
+    """Denormalized search text for one invoice, payment or enrollment — the
+    fields the listing `q` / `search` filters match against, joined into one
+    newline-separated column (newlines keep a query from matching across
+    two fields).
+
+    Maintained by triggers on the source tables (SEARCH_SYNC_TRIGGERS), so
+    every write path — ORM, raw SQL, bulk generation — keeps it current.
+    `document` carries a pg_trgm GIN index where the extension is
+    installed, which serves the `ILIKE '%…%'` filters. No FK to tenants: the
+    triggers also fire while a tenant's rows are cascade-deleted.
+    """
+
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        Index("ix_search_documents_tenant_type", "tenant_id", "entity_type"),
+        {"schema": "core"},
+    )
+
+    entity_type = Column(String(20), primary_key=True)  # invoice | payment | enrollment
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False)
+    document = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# ── Document builders ────────────────────────────────────────────────────────
+# Each refreshes the documents of the given ids and drops those whose source
+# row is gone. The invoice and payment documents carry the same fields the
+# finance listings used to join for; the enrollment document carries the
+# lower-cased fields of the enrollment listing's search.
+
+_STUDENT_NAME = "CASE WHEN {s}.id IS NOT NULL THEN concat({s}.first_name, ' ', coalesce({s}.last_name, '')) END"
+
+SEARCH_FUNCTIONS = (
+    f"""
+CREATE OR REPLACE FUNCTION core.search_refresh_invoices(ids uuid[]) RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM core.search_documents d
+    WHERE d.entity_type = 'invoice' AND d.entity_id = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM core.invoices i WHERE i.id = d.entity_id);
+    INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+    SELECT 'invoice', i.id, i.tenant_id,
+           concat_ws(E'\\n',
+               i.invoice_no,
+               {_STUDENT_NAME.format(s="s")},
+               s.admission_no,
+               e.admission_number,
+               e.payload->>'student_name',
+               e.payload->>'full_name')
+    FROM core.invoices i
+    LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
+    LEFT JOIN core.students s ON s.id = e.student_id
+    WHERE i.id = ANY(ids)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+        SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+$$
+""",
+    f"""
+CREATE OR REPLACE FUNCTION core.search_refresh_payments(ids uuid[]) RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM core.search_documents d
+    WHERE d.entity_type = 'payment' AND d.entity_id = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM core.payments p WHERE p.id = d.entity_id);
+    INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+    SELECT 'payment', p.id, p.tenant_id,
+           concat_ws(E'\\n',
+               p.receipt_no,
+               p.reference,
+               {_STUDENT_NAME.format(s="ds")},
+               ds.admission_no,
+               (SELECT string_agg(concat_ws(E'\\n',
+                           {_STUDENT_NAME.format(s="s")},
+                           s.admission_no,
+                           e.admission_number,
+                           e.payload->>'student_name'), E'\\n')
+                FROM core.payment_allocations pa
+                JOIN core.invoices i ON i.id = pa.invoice_id
+                LEFT JOIN core.enrollments e ON e.id = i.enrollment_id
+                LEFT JOIN core.students s ON s.id = e.student_id
+                WHERE pa.payment_id = p.id))
+    FROM core.payments p
+    LEFT JOIN core.students ds ON ds.id = p.student_id
+    WHERE p.id = ANY(ids)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+        SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+$$
+""",
+    """
+CREATE OR REPLACE FUNCTION core.search_refresh_enrollments(ids uuid[]) RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM core.search_documents d
+    WHERE d.entity_type = 'enrollment' AND d.entity_id = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM core.enrollments e WHERE e.id = d.entity_id);
+    INSERT INTO core.search_documents (entity_type, entity_id, tenant_id, document)
+    SELECT 'enrollment', e.id, e.tenant_id,
+           lower(concat_ws(E'\\n',
+               coalesce(e.payload->>'student_name', e.payload->>'studentName',
+                        e.payload->>'full_name', e.payload->>'fullName', e.payload->>'name'),
+               coalesce(e.payload->>'admission_class', e.payload->>'class_code',
+                        e.payload->>'classCode', e.payload->>'grade'),
+               coalesce(e.payload->>'admission_term', e.payload->>'term_code',
+                        e.payload->>'termCode', e.payload->>'term'),
+               e.payload->>'admission_number',
+               e.id::text))
+    FROM core.enrollments e
+    WHERE e.id = ANY(ids)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+        SET document = EXCLUDED.document, tenant_id = EXCLUDED.tenant_id, updated_at = now();
+$$
+""",
+    # One trigger function for every source table. INSERT/DELETE triggers are
+    # statement-level (bulk invoice generation inserts a class in one
+    # statement); UPDATE triggers are row-level, limited to the searched
+    # columns, so balance/status updates never touch the documents.
+    """
+CREATE OR REPLACE FUNCTION core.search_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    ids uuid[];
+BEGIN
+    IF TG_LEVEL = 'ROW' THEN
+        ids := ARRAY[NEW.id];
+    ELSIF TG_TABLE_NAME = 'payment_allocations' THEN
+        SELECT array_agg(DISTINCT r.payment_id) INTO ids FROM search_rows r;
+    ELSE
+        SELECT array_agg(r.id) INTO ids FROM search_rows r;
+    END IF;
+    IF ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'invoices' THEN
+        PERFORM core.search_refresh_invoices(ids);
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM core.search_refresh_payments(ARRAY(
+                SELECT pa.payment_id FROM core.payment_allocations pa
+                WHERE pa.invoice_id = ANY(ids)));
+        END IF;
+    ELSIF TG_TABLE_NAME IN ('payments', 'payment_allocations') THEN
+        PERFORM core.search_refresh_payments(ids);
+    ELSIF TG_TABLE_NAME = 'enrollments' THEN
+        PERFORM core.search_refresh_enrollments(ids);
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM core.search_refresh_invoices(ARRAY(
+                SELECT i.id FROM core.invoices i WHERE i.enrollment_id = ANY(ids)));
+            PERFORM core.search_refresh_payments(ARRAY(
+                SELECT pa.payment_id FROM core.payment_allocations pa
+                JOIN core.invoices i ON i.id = pa.invoice_id
+                WHERE i.enrollment_id = ANY(ids)));
+        END IF;
+    ELSIF TG_TABLE_NAME = 'students' THEN
+        PERFORM core.search_refresh_invoices(ARRAY(
+            SELECT i.id FROM core.invoices i
+            JOIN core.enrollments e ON e.id = i.enrollment_id
+            WHERE e.student_id = ANY(ids)));
+        PERFORM core.search_refresh_payments(ARRAY(
+            SELECT pa.payment_id FROM core.payment_allocations pa
+            JOIN core.invoices i ON i.id = pa.invoice_id
+            JOIN core.enrollments e ON e.id = i.enrollment_id
+            WHERE e.student_id = ANY(ids)
+            UNION
+            SELECT p.id FROM core.payments p WHERE p.student_id = ANY(ids)));
+    END IF;
+    RETURN NULL;
+END
+$$
+""",
+)
+
+# (table, columns whose update changes a document, statement-level events).
+SEARCH_SYNC_TABLES = (
+    ("invoices", ("invoice_no", "enrollment_id"), ("insert", "delete")),
+    ("payments", ("receipt_no", "reference", "student_id"), ("insert", "delete")),
+    ("payment_allocations", (), ("insert", "delete")),
+    ("enrollments", ("payload", "admission_number", "student_id"), ("insert", "delete")),
+    ("students", ("first_name", "last_name", "admission_no"), ("delete",)),
+)
+
+
+def search_sync_trigger_ddl(table: str, columns: tuple[str, ...], statement_events: tuple[str, ...]) -> list[str]:
+    """Triggers that keep the search documents fed by `table` current."""
+    fn = "EXECUTE FUNCTION core.search_sync()"
+    ddl = []
+    for op_name in statement_events:
+        ref = "OLD TABLE AS search_rows" if op_name == "delete" else "NEW TABLE AS search_rows"
+        ddl.append(
+            f"CREATE TRIGGER trg_{table}_search_{op_name} AFTER {op_name.upper()} ON core.{table} "
+            f"REFERENCING {ref} FOR EACH STATEMENT {fn}"
+        )
+    if columns:
+        changed = " OR ".join(f"OLD.{c} IS DISTINCT FROM NEW.{c}" for c in columns)
+        ddl.append(
+            f"CREATE TRIGGER trg_{table}_search_update AFTER UPDATE OF {', '.join(columns)} "
+            f"ON core.{table} FOR EACH ROW WHEN ({changed}) {fn}"
+        )
+    return ddl
+
+
+# pg_trgm is optional: without it the listings still filter the one narrow
+# table instead of joining four, just without an index on the pattern.
+SEARCH_TRGM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS ix_search_documents_document_trgm
+            ON core.search_documents USING gin (document gin_trgm_ops);
+    END IF;
+END
+$$
+"""
+
+
+# Installed once every table exists (create_all); migrations carry their own
+# copy of the same DDL.
+for _statement in SEARCH_FUNCTIONS:
+    event.listen(Base.metadata, "after_create", DDL(_statement))
+for _table, _columns, _events in SEARCH_SYNC_TABLES:
+    for _statement in search_sync_trigger_ddl(_table, _columns, _events):
+        event.listen(Base.metadata, "after_create", DDL(_statement))
+event.listen(Base.metadata, "after_create", DDL(SEARCH_TRGM_INDEX))
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -86,14 +87,49 @@ class SmsCreditTopup(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class SmsCampaign(Base):
+    """One bulk send (fee reminders). Its recipients are the sms_messages
+    rows carrying its id; their statuses are the per-recipient outcome."""
+    __tablename__ = "sms_campaigns"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('QUEUED','SENDING','COMPLETED','PARTIAL','FAILED','CANCELLED')",
+            name="ck_sms_campaigns_status",
+        ),
+        Index("ix_sms_campaigns_tenant_created", "tenant_id", "created_at"),
+        {"schema": "core"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True,
+                server_default=text("gen_random_uuid()"))
+    tenant_id = Column(UUID(as_uuid=True),
+                       ForeignKey("core.tenants.id", ondelete="CASCADE"),
+                       nullable=False)
+    kind = Column(String(32), nullable=False)                # FEE_REMINDER
+    status = Column(String(16), nullable=False, server_default=text("'QUEUED'"))
+    message_template = Column(Text(), nullable=False)
+    total_recipients = Column(Integer(), nullable=False, server_default=text("0"))
+    skipped_count = Column(Integer(), nullable=False, server_default=text("0"))
+    sent_count = Column(Integer(), nullable=False, server_default=text("0"))
+    failed_count = Column(Integer(), nullable=False, server_default=text("0"))
+    units_reserved = Column(Integer(), nullable=False, server_default=text("0"))
+    job_id = Column(UUID(as_uuid=True), nullable=True)     # latest dispatch run
+    created_by = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
 class SmsMessage(Base):
     """Log of every outbound SMS sent from any tenant."""
     __tablename__ = "sms_messages"
     __table_args__ = (
         CheckConstraint(
-            "status IN ('QUEUED','SENT','DELIVERED','FAILED')",
+            "status IN ('QUEUED','SENDING','SENT','DELIVERED','FAILED')",
             name="ck_sms_messages_status",
         ),
+        Index("ix_sms_messages_campaign_status", "campaign_id", "status",
+              postgresql_where=text("campaign_id IS NOT NULL")),
         {"schema": "core"},
     )
 
@@ -110,12 +146,16 @@ class SmsMessage(Base):
     provider_message_id = Column(String(120), nullable=True)
     error_message = Column(Text(), nullable=True)
     template_id = Column(UUID(as_uuid=True), nullable=True)
+    campaign_id = Column(UUID(as_uuid=True),
+                         ForeignKey("core.sms_campaigns.id", ondelete="SET NULL"),
+                         nullable=True)
     meta = Column(JSONB(), nullable=True)
     created_by = Column(UUID(as_uuid=True), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False,
                         server_default=func.now())
     sent_at = Column(DateTime(timezone=True), nullable=True)
     delivered_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # SENDING since
 
 
 class SmsTemplate(Base):
@@ -0,0 +1,37 @@
+from sqlalchemy import CheckConstraint, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class PendingStkCheckout(Base):
+    """An M-Pesa STK push still waiting for its result.
+
+    One row per in-flight checkout — subscription payment or SMS top-up —
+    for the STK reconciler (app.api.v1.payments.reconciler), which queries
+    Daraja for the ones whose callback is overdue and deletes the row once
+    the payment is final.
+    """
+
+    __tablename__ = "pending_stk_checkouts"
+    __table_args__ = (
+        CheckConstraint(
+            "kind IN ('SUBSCRIPTION', 'SMS_TOPUP')",
+            name="ck_pending_stk_checkouts_kind",
+        ),
+        Index("ix_pending_stk_checkouts_next_check", "next_check_at"),
+        {"schema": "core"},
+    )
+
+    checkout_request_id = Column(String(120), primary_key=True)
+    kind = Column(String(16), nullable=False)
+    tenant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("core.tenants.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    next_check_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
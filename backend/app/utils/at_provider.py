@@ -4,21 +4,22 @@ Usage:
     result = send_sms(to="+254712345678", message="Hello parent!", sender_id="ShuleHQ")
     # Returns: {"messageId": "...", "status": "Success", "cost": "KES 1.5000", "number": "+254712345678"}
 
+    results = send_sms_batch(to=["+254712345678", "+254723456789"], message="Hello parents!")
+    # Returns one Recipients entry per number, keyed by number:
+    # {"+254712345678": {"messageId": "...", "status": "Success", ...}, ...}
+
     In CI (AT_USE_MOCK=true) returns a deterministic mock response without
     any network calls.
 """
 from __future__ import annotations
 
-import json
 import logging
-import time
 from decimal import Decimal
 from typing import Any
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 from uuid import uuid4
 
+from app.core import http_client
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -40,18 +41,21 @@ def _at_headers() -> dict[str, str]:
 
 
 def _mock_send_result(to: str) -> dict[str, Any]:
-    """Deterministic mock response — no network calls."""
+    """Deterministic mock response — no network calls. `to` may be a
+    comma-separated list, as in a multi-recipient request."""
+    numbers = [n for n in to.split(",") if n]
     return {
         "SMSMessageData": {
-            "Message": "Sent to 1/1 Total Cost: KES 1.5000",
+            "Message": f"Sent to {len(numbers)}/{len(numbers)} Total Cost: KES {1.5 * len(numbers):.4f}",
             "Recipients": [
                 {
                     "statusCode": 101,
-                    "number": to,
+                    "number": number,
                     "status": "Success",
                     "cost": "KES 1.5000",
                     "messageId": f"mock-{uuid4().hex[:12]}",
                 }
+                for number in numbers
             ],
         }
     }
@@ -64,30 +68,24 @@ def _http_form_post(
     timeout_sec: int = 15,
     max_retries: int = 1,
 ) -> dict[str, Any]:
-    """POST application/x-www-form-urlencoded, return parsed JSON response."""
-    body_bytes = urlencode(data).encode("utf-8")
-    attempt = 0
-    while True:
-        req = Request(url=url, data=body_bytes, method="POST")
-        for k, v in headers.items():
-            req.add_header(k, v)
-        try:
-            with urlopen(req, timeout=timeout_sec) as resp:
-                raw = resp.read().decode("utf-8")
-                return json.loads(raw) if raw else {}
-        except HTTPError as err:
-            detail = err.read().decode("utf-8", errors="ignore") or str(err)
-            if err.code >= 500 and attempt < max_retries:
-                time.sleep(0.5 * (2 ** attempt))
-                attempt += 1
-                continue
-            raise RuntimeError(f"AT API error {err.code}: {detail}") from err
-        except (URLError, TimeoutError) as err:
-            if attempt < max_retries:
-                time.sleep(0.5 * (2 ** attempt))
-                attempt += 1
-                continue
-            raise RuntimeError(f"AT network error: {err}") from err
+    """POST application/x-www-form-urlencoded over the shared connection
+    pool, return parsed JSON response."""
+    try:
+        resp = http_client.request(
+            "POST",
+            url,
+            headers=headers,
+            body=urlencode(data).encode("utf-8"),
+            timeout_sec=timeout_sec,
+            max_retries=max_retries,
+            retry_backoff_sec=0.5,
+        )
+    except http_client.HttpStatusError as err:
+        detail = err.text() or str(err)
+        raise RuntimeError(f"AT API error {err.status}: {detail}") from err
+    except http_client.HttpNetworkError as err:
+        raise RuntimeError(f"AT network error: {err}") from err
+    return resp.json()
 
 
 def _compute_units(message: str) -> int:
@@ -141,6 +139,51 @@ def send_sms(*, to: str, message: str, sender_id: str | None = None) -> dict[str
     return response
 
 
+def send_sms_batch(
+    *, to: list[str], message: str, sender_id: str | None = None
+) -> dict[str, dict[str, Any]]:
+    """Send one message body to many numbers in a single Africa's Talking
+    request (comma-separated `to`).
+
+    Returns the per-recipient `Recipients` entries keyed by number; a number
+    the provider left out of its response is missing from the map. Unlike
+    `send_sms`, a rejected recipient does not raise — use
+    `recipient_succeeded` on its entry. Raises RuntimeError when the request
+    as a whole fails.
+    """
+    joined = ",".join(to)
+    if bool(settings.AT_USE_MOCK) or not str(settings.AT_USERNAME or "").strip():
+        if not bool(settings.AT_USE_MOCK):
+            logger.warning("AT_USERNAME not configured — falling back to mock send")
+        response = _mock_send_result(joined)
+    else:
+        sid = str(sender_id or settings.AT_SENDER_ID or "").strip() or None
+        payload: dict[str, str] = {
+            "username": str(settings.AT_USERNAME or ""),
+            "to": joined,
+            "message": message,
+        }
+        if sid:
+            payload["from"] = sid
+        response = _http_form_post(
+            f"{_at_base_url()}/messaging",
+            payload,
+            _at_headers(),
+            timeout_sec=int(settings.AT_TIMEOUT_SEC or 15),
+        )
+    recipients = (response.get("SMSMessageData") or {}).get("Recipients") or []
+    return {
+        str(entry.get("number") or ""): entry
+        for entry in recipients
+        if isinstance(entry, dict)
+    }
+
+
+def recipient_succeeded(entry: dict[str, Any]) -> bool:
+    """Whether one `Recipients` entry of a send response was accepted."""
+    return entry.get("statusCode", 0) in {100, 101}
+
+
 def extract_at_message_id(response: dict[str, Any]) -> str | None:
     """Pull the messageId from an AT send response."""
     recipients = (response.get("SMSMessageData") or {}).get("Recipients") or []
@@ -1,7 +1,19 @@
+import hashlib
+import hmac
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# Refresh tokens are signed, high-entropy JWTs — a slow password hash buys
+# nothing against guessing and costs ~50-100 ms of CPU per refresh. They are
+# stored as a keyed SHA-256 digest instead, tagged with a scheme version so
+# the key or algorithm can change later without a flag day. Hashes without
+# a known prefix are legacy argon2 and are upgraded on their next use.
+_REFRESH_HASH_V1 = "rt1$"
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +21,29 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
+
+
+def _refresh_hash_key() -> bytes:
+    # Derived from JWT_SECRET: rotating that secret already invalidates every
+    # refresh token, so a separate key would add config without adding safety.
+    return hashlib.sha256(b"refresh-token-hash:v1:" + settings.JWT_SECRET.encode()).digest()
+
+
+def hash_refresh_token(token: str) -> str:
+    digest = hmac.new(_refresh_hash_key(), token.encode(), hashlib.sha256).hexdigest()
+    return _REFRESH_HASH_V1 + digest
+
+
+def verify_refresh_token(token: str, token_hash: str) -> tuple[bool, bool]:
+    """Return (valid, needs_rehash).
+
+    needs_rehash is True for a valid legacy argon2 hash; callers store
+    hash_refresh_token(token) in its place.
+    """
+    if token_hash.startswith(_REFRESH_HASH_V1):
+        return hmac.compare_digest(hash_refresh_token(token), token_hash), False
+    try:
+        valid = pwd_context.verify(token, token_hash)
+    except (ValueError, TypeError):
+        return False, False
+    return valid, valid
@@ -0,0 +1,50 @@
+"""Standalone background job worker: `python -m app.worker`.
+
+Runs JOB_WORKER_THREADS job workers against core.background_jobs until
+SIGTERM/SIGINT. Use it with JOB_INPROCESS_WORKERS=0 to keep bulk jobs off the
+API containers entirely; it can also run alongside the in-process workers —
+claims use FOR UPDATE SKIP LOCKED, so no job runs twice.
+
+An event loop thread owns the Redis pool, so the cache invalidations jobs
+publish (`run_from_sync`) reach the API workers as they would in-process.
+"""
+import asyncio
+import logging
+import os
+import signal
+import threading
+
+from app.core.logging_config import configure_logging
+
+configure_logging(app_env=os.environ.get("APP_ENV", "dev"))
+
+import app.models  # noqa: E402,F401 — register every ORM table
+import app.api.v1.router  # noqa: E402,F401 — importing the routes registers every job kind
+from app.core.config import settings  # noqa: E402
+from app.core.jobs import start_job_workers, stop_job_workers  # noqa: E402
+from app.core.redis import close_redis, init_redis  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="redis-loop", daemon=True).start()
+    asyncio.run_coroutine_threadsafe(init_redis(), loop).result()
+
+    threads = max(1, int(settings.JOB_WORKER_THREADS))
+    start_job_workers(threads)
+    logger.info("Background job worker started with %d thread(s)", threads)
+    stop.wait()
+    logger.info("Background job worker stopping")
+    stop_job_workers(timeout_s=30.0)
+    asyncio.run_coroutine_threadsafe(close_redis(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
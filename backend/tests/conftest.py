@@ -120,6 +120,32 @@ def reset_rate_limiter():
     yield
 
 
+@pytest.fixture(autouse=True)
+def reset_local_caches():
+    """Every test rebuilds the schema, so tenant ids/slugs, sessions, RBAC
+    maps, subscription states, dashboard sections and class results cached by
+    a previous test must not leak into the next one."""
+    from app.api.v1.reports.results import clear_local_class_results_cache
+    from app.api.v1.tenants.dashboard_sections import clear_local_dashboard_cache
+    from app.core.permission_cache import clear_local_rbac_cache
+    from app.core.session_cache import clear_local_session_cache
+    from app.core.subscription_gate import clear_local_subscription_cache
+    from app.core.tenant_cache import clear_local_tenant_cache
+    clear_local_tenant_cache()
+    clear_local_session_cache()
+    clear_local_rbac_cache()
+    clear_local_subscription_cache()
+    clear_local_dashboard_cache()
+    clear_local_class_results_cache()
+    yield
+    clear_local_tenant_cache()
+    clear_local_session_cache()
+    clear_local_rbac_cache()
+    clear_local_subscription_cache()
+    clear_local_dashboard_cache()
+    clear_local_class_results_cache()
+
+
 @pytest.fixture(scope="function")
 def setup_db():
     """Drop and recreate the core schema for a clean-slate per test."""
@@ -128,6 +154,9 @@ def setup_db():
         conn.exec_driver_sql("DROP SCHEMA IF EXISTS core CASCADE")
         conn.exec_driver_sql("CREATE SCHEMA core")
     Base.metadata.create_all(bind=TEST_ENGINE)
+    # Pooled connections keep psycopg's server-side prepared statements,
+    # planned against the tables just dropped; start from fresh connections.
+    TEST_ENGINE.dispose()
     yield
     with TEST_ENGINE.begin() as conn:
         conn.exec_driver_sql("DROP SCHEMA IF EXISTS core CASCADE")
@@ -148,6 +148,29 @@ class TestListAuditLogs:
         ids2 = {r["id"] for r in page2.json()}
         assert ids1.isdisjoint(ids2)
 
+    def test_list_logs_keyset_cursor(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=AUDIT_READ)
+
+        for i in range(5):
+            _write_audit_event(db_session, tenant.id, action=f"test.event.{i}")
+
+        page1 = client.get(f"{BASE}/logs?limit=2", headers=headers)
+        cursor = page1.headers["X-Next-Cursor"]
+        page2 = client.get(f"{BASE}/logs?limit=2&cursor={cursor}", headers=headers)
+        page3 = client.get(
+            f"{BASE}/logs?limit=2&cursor={page2.headers['X-Next-Cursor']}", headers=headers
+        )
+        assert page3.status_code == 200
+        assert "X-Next-Cursor" not in page3.headers
+
+        seen = [r["id"] for page in (page1, page2, page3) for r in page.json()]
+        assert len(seen) == len(set(seen)) == 5
+        stamps = [r["created_at"] for page in (page1, page2, page3) for r in page.json()]
+        assert stamps == sorted(stamps, reverse=True)
+
+        assert client.get(f"{BASE}/logs?cursor=not-a-cursor", headers=headers).status_code == 400
+
     def test_list_logs_requires_auth(self, client: TestClient, db_session: Session):
         tenant = create_tenant(db_session)
         resp = client.get(
@@ -162,6 +185,42 @@ class TestListAuditLogs:
         assert resp.status_code == 403
 
 
+# ── Partition maintenance ─────────────────────────────────────────────────────
+
+class TestAuditPartitions:
+    def test_creates_upcoming_months_and_drops_expired(self, db_session: Session):
+        from datetime import date, datetime, timezone
+
+        from sqlalchemy import text
+
+        from app.core.audit import maintain_audit_partitions
+
+        tenant = create_tenant(db_session)
+        # Maintenance lagged behind: an old row is sitting in the default partition.
+        _write_audit_event(db_session, tenant.id, action="old.event")
+        db_session.execute(
+            text("UPDATE core.audit_logs SET created_at = :ts WHERE action = 'old.event'"),
+            {"ts": datetime(2026, 1, 15, tzinfo=timezone.utc)},
+        )
+        db_session.commit()
+
+        first = maintain_audit_partitions(db_session, retention_days=0, today=date(2026, 1, 20))
+        assert first["created"] == [
+            "audit_logs_p202601", "audit_logs_p202602", "audit_logs_p202603", "audit_logs_p202604",
+        ]
+        placed = db_session.execute(
+            text("SELECT tableoid::regclass::text FROM core.audit_logs WHERE action = 'old.event'")
+        ).scalar()
+        assert placed == "core.audit_logs_p202601"
+
+        later = maintain_audit_partitions(db_session, retention_days=60, today=date(2026, 4, 10))
+        assert later["created"] == ["audit_logs_p202605", "audit_logs_p202606", "audit_logs_p202607"]
+        assert later["dropped"] == ["audit_logs_p202601"]
+        assert db_session.execute(
+            text("SELECT count(*) FROM core.audit_logs WHERE action = 'old.event'")
+        ).scalar() == 0
+
+
 # ── Get single log ────────────────────────────────────────────────────────────
 
 class TestGetAuditLog:
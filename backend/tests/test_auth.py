@@ -217,6 +217,31 @@ class TestTokenRefresh:
         )
         assert resp.status_code == 401
 
+    def test_legacy_argon2_refresh_hash_is_upgraded(self, client: TestClient, db_session: Session):
+        from app.models.auth import AuthSession
+        from app.utils.hashing import hash_password
+        from app.utils.tokens import decode_token
+
+        tenant = create_tenant(db_session)
+        create_tenant_user(db_session, tenant=tenant, email="legacy@school.com", password="Refresh1!")
+        db_session.commit()
+
+        refresh_token = self._get_refresh_cookie(client, tenant, "legacy@school.com", "Refresh1!")
+        session = db_session.get(AuthSession, decode_token(refresh_token)["sid"])
+        assert session.refresh_token_hash.startswith("rt1$")
+
+        # Sessions issued before the HMAC scheme carry an argon2 hash.
+        session.refresh_token_hash = hash_password(refresh_token)
+        db_session.commit()
+
+        resp = client.post("/api/v1/auth/refresh", cookies={"sms_refresh": refresh_token})
+        assert resp.status_code == 200, resp.text
+        db_session.refresh(session)
+        assert session.refresh_token_hash.startswith("rt1$")
+
+        resp = client.post("/api/v1/auth/refresh", cookies={"sms_refresh": refresh_token})
+        assert resp.status_code == 200, resp.text
+
 
 # ── Logout ────────────────────────────────────────────────────────────────────
 
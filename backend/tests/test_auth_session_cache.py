@@ -0,0 +1,99 @@
+"""Auth dependency served from the session cache.
+
+Redis is not available under test, so the Redis tier is swapped for an
+in-memory dict. The contract checked here:
+  - a cache hit authenticates with zero DB statements;
+  - entries written before the user snapshot was cached are treated as misses;
+  - removing a user's access drops their cached sessions.
+"""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import dependencies
+from tests.conftest import TEST_ENGINE
+from tests.helpers import create_tenant, make_actor
+
+
+class _StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(TEST_ENGINE, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(TEST_ENGINE, "before_cursor_execute", self)
+
+
+@pytest.fixture
+def session_store(monkeypatch):
+    store: dict[str, dict] = {}
+
+    async def _load(token):
+        return False, store.get(token)
+
+    async def _set(token, data, ttl_seconds, *, user_id=None):
+        store[token] = data
+
+    monkeypatch.setattr(dependencies, "load_session", _load)
+    monkeypatch.setattr(dependencies, "cache_session", _set)
+    return store
+
+
+def _token(headers: dict[str, str]) -> str:
+    return headers["Authorization"].split(" ", 1)[1]
+
+
+def test_cache_hit_issues_no_db_statements(client: TestClient, db_session: Session, session_store):
+    tenant = create_tenant(db_session, slug="auth-cache")
+    user, headers = make_actor(db_session, tenant=tenant, permissions=["users.manage"])
+
+    first = client.get("/api/v1/auth/me", headers=headers)
+    assert first.status_code == 200, first.text
+    cached = session_store[_token(headers)]
+    assert cached["user"]["id"] == str(user.id)
+    assert cached["user"]["is_active"] is True
+
+    with _StatementCounter() as counter:
+        second = client.get("/api/v1/auth/me", headers=headers)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert counter.count == 0
+
+
+def test_legacy_cache_entry_is_reloaded(client: TestClient, db_session: Session, session_store):
+    tenant = create_tenant(db_session, slug="auth-legacy")
+    user, headers = make_actor(db_session, tenant=tenant, permissions=[])
+    session_store[_token(headers)] = {"user_id": str(user.id), "roles": [], "permissions": []}
+
+    resp = client.get("/api/v1/auth/me", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["user"]["email"] == user.email
+    assert "user" in session_store[_token(headers)]
+
+
+def test_removing_access_invalidates_cached_sessions(
+    client: TestClient, db_session: Session, monkeypatch
+):
+    from app.api.v1.tenants import routes as tenant_routes
+
+    dropped: list[str] = []
+    monkeypatch.setattr(tenant_routes, "invalidate_user_sessions", lambda uid: dropped.append(str(uid)))
+
+    tenant = create_tenant(db_session, slug="auth-revoke")
+    _, director_headers = make_actor(
+        db_session, tenant=tenant, permissions=["users.manage"], role_code="DIRECTOR"
+    )
+    target, _ = make_actor(db_session, tenant=tenant, permissions=[])
+
+    resp = client.delete(f"/api/v1/tenants/director/users/{target.id}", headers=director_headers)
+    assert resp.status_code == 200, resp.text
+    assert dropped == [str(target.id)]
@@ -0,0 +1,250 @@
+"""Tests for the background job queue (app.core.jobs).
+
+  POST <bulk endpoint>?async=true  → 202 + Location: /api/v1/jobs/{id}
+  GET  /api/v1/jobs/{id}
+  POST /api/v1/jobs/{id}/cancel
+
+Coverage focus:
+  • async mode queues instead of running; a worker pass runs the job and the
+    job's result is the synchronous response body.
+  • Idempotency-Key returns the first job instead of queueing a second run.
+  • cancellation — a queued job never runs; a running job stops at its next
+    progress report and its work is rolled back.
+  • a failing handler leaves the job FAILED with the error.
+  • a RUNNING job whose heartbeat went stale is requeued, then failed once
+    it used up its attempts.
+  • job visibility — submitter, holders of the endpoint's permission, and
+    nobody from another tenant.
+  • a job's cache invalidations are published to the other workers, though
+    job threads are not AnyIO worker threads.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.api.v1.finance import jobs as finance_jobs
+from app.api.v1.tenants import dashboard_sections
+from app.core import jobs
+from app.core import redis as app_redis
+from app.core.config import settings
+from app.models.background_job import BackgroundJob
+from app.models.invoice import Invoice
+from tests.conftest import TestSessionLocal
+from tests.helpers import create_tenant, make_actor
+from tests.test_finance_bulk_generate import (
+    _enroll_with_admission_year,
+    _make_actor_with_perms,
+)
+from tests.test_finance_v2 import _setup_full_structure
+
+BASE = "/api/v1/finance"
+
+
+def _seed_class(client, headers, db_session, *, students: int = 2) -> None:
+    _setup_full_structure(
+        client, headers, class_code="GRADE_1",
+        academic_year=2026, student_type="RETURNING",
+    )
+    for _ in range(students):
+        _enroll_with_admission_year(
+            client, headers, db_session,
+            class_code="GRADE_1", admission_year=2025,
+        )
+
+
+def _bulk_generate_async(client, headers, **extra_headers):
+    return client.post(
+        f"{BASE}/invoices/generate/fees/bulk?async=true",
+        json={"term_number": 1, "academic_year": 2026},
+        headers={**headers, **extra_headers},
+    )
+
+
+def _invoice_count(db_session: Session, tenant_id) -> int:
+    return len(db_session.execute(
+        select(Invoice.id).where(Invoice.tenant_id == tenant_id)
+    ).all())
+
+
+class TestAsyncMode:
+    def test_async_bulk_generate_queues_then_runs(self, client: TestClient, db_session: Session):
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="job1")
+        _seed_class(client, headers, db_session)
+
+        resp = _bulk_generate_async(client, headers)
+        assert resp.status_code == 202, resp.text
+        body = resp.json()
+        assert body["status"] == "QUEUED"
+        assert resp.headers["Location"] == f"/api/v1/jobs/{body['id']}"
+        assert _invoice_count(db_session, tenant.id) == 0
+
+        assert jobs.run_pending_jobs(TestSessionLocal) == 1
+
+        status = client.get(resp.headers["Location"], headers=headers)
+        assert status.status_code == 200
+        job = status.json()
+        assert job["status"] == "SUCCEEDED", job
+        assert job["result"]["summary"]["created"] == 2
+        assert job["progress"] == {"done": 2, "total": 2}
+        assert job["attempts"] == 1
+        db_session.expire_all()
+        assert _invoice_count(db_session, tenant.id) == 2
+
+    def test_sync_mode_is_unchanged(self, client: TestClient, db_session: Session):
+        _, headers = _make_actor_with_perms(db_session, slug_prefix="job2")
+        _seed_class(client, headers, db_session, students=1)
+        resp = client.post(
+            f"{BASE}/invoices/generate/fees/bulk",
+            json={"term_number": 1, "academic_year": 2026},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["summary"]["created"] == 1
+        assert db_session.execute(select(BackgroundJob)).first() is None
+
+    def test_idempotency_key_returns_the_first_job(self, client: TestClient, db_session: Session):
+        _, headers = _make_actor_with_perms(db_session, slug_prefix="job3")
+        first = _bulk_generate_async(client, headers, **{"Idempotency-Key": "gen-term1"})
+        second = _bulk_generate_async(client, headers, **{"Idempotency-Key": "gen-term1"})
+        other = _bulk_generate_async(client, headers, **{"Idempotency-Key": "gen-term1-again"})
+        assert first.status_code == second.status_code == other.status_code == 202
+        assert first.json()["id"] == second.json()["id"]
+        assert other.json()["id"] != first.json()["id"]
+        assert len(db_session.execute(select(BackgroundJob)).scalars().all()) == 2
+
+    def test_failing_job_records_error(self, client: TestClient, db_session: Session):
+        _, headers = _make_actor_with_perms(db_session, slug_prefix="job4")
+        resp = client.post(
+            f"{BASE}/scholarships/{uuid4()}/bulk-apply?async=true",
+            json={"class_code": "GRADE_1", "term_number": 1, "academic_year": 2026, "reason": "x"},
+            headers=headers,
+        )
+        assert resp.status_code == 202
+        jobs.run_pending_jobs(TestSessionLocal)
+        job = client.get(resp.headers["Location"], headers=headers).json()
+        assert job["status"] == "FAILED"
+        assert job["error"] == "Scholarship not found"
+
+
+class TestCancellation:
+    def test_cancel_queued_job_never_runs(self, client: TestClient, db_session: Session):
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="job5")
+        _seed_class(client, headers, db_session, students=1)
+        url = _bulk_generate_async(client, headers).headers["Location"]
+
+        cancelled = client.post(f"{url}/cancel", headers=headers)
+        assert cancelled.status_code == 200
+        assert cancelled.json()["status"] == "CANCELLED"
+        assert jobs.run_pending_jobs(TestSessionLocal) == 0
+        assert _invoice_count(db_session, tenant.id) == 0
+
+    def test_cancel_running_job_rolls_back_its_work(self, client: TestClient, db_session: Session):
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="job6")
+        _seed_class(client, headers, db_session)
+        client.post(
+            f"{BASE}/invoices/generate/fees/bulk",
+            json={"term_number": 1, "academic_year": 2026},
+            headers=headers,
+        )
+        resp = client.post(
+            f"{BASE}/invoices/publish/bulk?async=true",
+            json={"all_drafts": True},
+            headers=headers,
+        )
+        assert resp.status_code == 202
+
+        with TestSessionLocal() as worker_db:
+            claimed = jobs.claim_next_job(worker_db, worker_id="test-worker")
+        assert client.post(f"{resp.headers['Location']}/cancel", headers=headers).json()["cancel_requested"]
+
+        assert jobs.run_job(TestSessionLocal, claimed) == jobs.JOB_CANCELLED
+        db_session.expire_all()
+        statuses = db_session.execute(
+            select(Invoice.status).where(Invoice.tenant_id == tenant.id)
+        ).scalars().all()
+        assert statuses == ["DRAFT", "DRAFT"]
+        assert client.get(resp.headers["Location"], headers=headers).json()["status"] == "CANCELLED"
+
+
+class TestStaleJobs:
+    def test_stale_running_job_is_requeued_then_failed(self, client: TestClient, db_session: Session):
+        _, headers = _make_actor_with_perms(db_session, slug_prefix="job7")
+        job_id = _bulk_generate_async(client, headers).json()["id"]
+
+        for expected in ("QUEUED", "FAILED"):
+            with TestSessionLocal() as worker_db:
+                assert str(jobs.claim_next_job(worker_db, worker_id="dead-worker")["id"]) == job_id
+            db_session.execute(
+                text("UPDATE core.background_jobs SET heartbeat_at = now() - interval '1 hour' WHERE id = :id"),
+                {"id": job_id},
+            )
+            db_session.commit()
+            with TestSessionLocal() as worker_db:
+                assert jobs.requeue_stale_jobs(worker_db) == 1
+            db_session.expire_all()
+            job = db_session.get(BackgroundJob, job_id)
+            assert job.status == expected
+        assert job.attempts == settings.JOB_MAX_ATTEMPTS
+        assert job.error == "Worker stopped responding"
+
+
+class TestVisibility:
+    def test_job_visible_to_submitter_and_permission_holders_only(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="job8")
+        url = _bulk_generate_async(client, headers).headers["Location"]
+
+        _, manager = make_actor(db_session, tenant=tenant, permissions=["finance.invoices.manage"])
+        _, viewer = make_actor(db_session, tenant=tenant, permissions=["finance.invoices.view"])
+        other_tenant = create_tenant(
+            db_session, slug=f"job8b-{uuid4().hex[:6]}", domain=f"job8b-{uuid4().hex[:6]}.example.com",
+        )
+        _, outsider = make_actor(db_session, tenant=other_tenant, permissions=["finance.invoices.manage"])
+
+        assert client.get(url, headers=headers).status_code == 200
+        assert client.get(url, headers=manager).status_code == 200
+        assert client.get(url, headers=viewer).status_code == 404
+        assert client.post(f"{url}/cancel", headers=viewer).status_code == 404
+        assert client.get(url, headers=outsider).status_code == 404
+
+        mine = client.get("/api/v1/jobs", headers=headers).json()
+        assert [j["url"] for j in mine] == [url]
+        assert client.get("/api/v1/jobs", headers=manager).json() == []
+
+
+class _RecordingRedis:
+    def __init__(self) -> None:
+        self.published: list[tuple[str, str]] = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+def test_job_thread_invalidation_is_published(db_session: Session, monkeypatch):
+    tenant = create_tenant(db_session)
+    user, _ = make_actor(db_session, tenant=tenant, permissions=["finance.fees.manage"])
+    jobs.enqueue_job(
+        db_session, tenant_id=tenant.id, kind=finance_jobs.RECONCILE_SWEEP, params={}, actor_user_id=user.id
+    )
+    db_session.commit()
+
+    # The API worker's event loop, as init_redis records it.
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    monkeypatch.setattr(app_redis, "_redis_loop", loop)
+    redis = _RecordingRedis()
+    try:
+        with patch("app.core.cache_bus.get_redis_client", return_value=redis):
+            assert jobs.run_pending_jobs(TestSessionLocal) == 1
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+
+    assert (dashboard_sections.EVICT_CHANNEL, f"{tenant.id}|finance") in redis.published
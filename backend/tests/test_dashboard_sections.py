@@ -0,0 +1,137 @@
+"""Concurrent, cached dashboard sections (app.api.v1.tenants.dashboard_sections).
+
+  - independent sections run at the same time on separate connections;
+  - a section that misses its deadline degrades to its default, and its late
+    result still serves the next request from cache;
+  - the dashboards report per-section freshness, serve repeat loads from
+    cache, and reload after a tenant write commits.
+"""
+from __future__ import annotations
+
+import time
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.v1.tenants import dashboard_sections
+from app.api.v1.tenants.dashboard_sections import SCOPE_FINANCE, SCOPE_PEOPLE, DashboardSection
+from tests.helpers import create_tenant, make_actor
+
+PERMS = ["admin.dashboard.view_tenant"]
+
+
+def _slow_backend_pid(delay: float):
+    def load(s: Session) -> int:
+        return s.execute(sa.text("SELECT pg_backend_pid() FROM pg_sleep(:d)"), {"d": delay}).scalar()
+
+    return load
+
+
+def test_sections_load_concurrently_on_separate_connections(db_session: Session):
+    started = time.monotonic()
+    results = dashboard_sections.load_sections(
+        db_session,
+        tenant_id="t-1",
+        namespace="test",
+        sections=[DashboardSection(name, _slow_backend_pid(0.4)) for name in ("a", "b", "c")],
+    )
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert {r.source for r in results.values()} == {"live"}
+    assert len({r.value for r in results.values()}) == 3
+
+
+def test_slow_section_times_out_then_serves_late_result_from_cache(db_session: Session):
+    section = DashboardSection("slow", lambda _s: time.sleep(0.3) or "done", default="fallback")
+    broken = DashboardSection("broken", lambda _s: 1 / 0, default=0)
+
+    first = dashboard_sections.load_sections(
+        db_session, tenant_id="t-1", namespace="test", sections=[section, broken], timeout_s=0.05
+    )
+    assert (first["slow"].value, first["slow"].ok, first["slow"].source) == ("fallback", False, "timeout")
+    assert (first["broken"].value, first["broken"].source) == (0, "error")
+
+    time.sleep(0.4)
+    second = dashboard_sections.load_sections(
+        db_session, tenant_id="t-1", namespace="test", sections=[section, broken], timeout_s=0.05
+    )
+    assert (second["slow"].value, second["slow"].source) == ("done", "cache")
+    assert second["slow"].freshness()["age_s"] >= 0
+    assert second["broken"].source == "error"  # failures are never cached
+
+
+def test_invalidation_drops_only_matching_scopes(db_session: Session):
+    calls: list[str] = []
+    sections = [
+        DashboardSection("fees", lambda _s: calls.append("fees"), scopes=frozenset({SCOPE_FINANCE})),
+        DashboardSection("users", lambda _s: calls.append("users"), scopes=frozenset({SCOPE_PEOPLE})),
+    ]
+    load = lambda: dashboard_sections.load_sections(  # noqa: E731
+        db_session, tenant_id="t-1", namespace="test", sections=sections
+    )
+
+    load()
+    load()
+    assert calls == ["fees", "users"]
+
+    dashboard_sections.invalidate_dashboard_sections("t-2", SCOPE_FINANCE)
+    dashboard_sections.invalidate_dashboard_sections("t-1", SCOPE_FINANCE)
+    assert {name: r.source for name, r in load().items()} == {"fees": "live", "users": "cache"}
+
+    dashboard_sections.invalidate_dashboard_sections("t-1")
+    assert {r.source for r in load().values()} == {"live"}
+
+
+def test_principal_dashboard_caches_sections_until_a_tenant_write(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="dash-principal")
+    _user, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+
+    first = client.get("/api/v1/tenants/principal/dashboard", headers=headers)
+    assert first.status_code == 200, first.text
+    body = first.json()
+    assert body["health"]["summary"] is True
+    assert body["summary"]["total_users"] == 1
+    assert body["freshness"]["summary"]["source"] == "live"
+
+    second = client.get("/api/v1/tenants/principal/dashboard", headers=headers).json()
+    assert second["freshness"]["summary"]["source"] == "cache"
+    assert second["freshness"]["notifications"]["source"] == "live"  # per-user, never cached
+
+    assert client.post("/api/v1/tenants/notifications/mark-all-read", headers=headers).status_code == 200
+    third = client.get("/api/v1/tenants/principal/dashboard", headers=headers).json()
+    assert third["freshness"]["summary"]["source"] == "live"
+
+
+def test_secretary_finance_reports_health_and_freshness(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="dash-finance")
+    _user, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+
+    resp = client.get("/api/v1/tenants/secretary/finance/setup", headers=headers)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["policy"] is not None
+    assert body["health"]["policy"] is True
+    assert body["health"]["fee_categories"] is True
+    assert set(body["freshness"]) >= {"policy", "invoices", "fee_structures", "payments"}
+
+    again = client.get("/api/v1/tenants/secretary/finance", headers=headers).json()
+    assert again["freshness"]["policy"]["source"] == "cache"
+    assert again["policy"] == body["policy"]
+
+
+def test_secretary_dashboard_reports_each_section(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="dash-secretary")
+    _user, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+
+    resp = client.get("/api/v1/tenants/secretary/dashboard", headers=headers)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["health"]["api"] is True
+    assert body["health"]["users"] is True and len(body["users"]) == 1
+    assert body["health"]["invoices"] is True and body["invoices"] == []
+    assert body["finance_outstanding"] is not None
+    assert set(body["freshness"]) == {
+        "users", "audit", "enrollments", "invoices", "today_at_school", "demographics", "finance_outstanding",
+    }
@@ -5,6 +5,7 @@ Covers:
   * By-date current-term selection (today inside window, fallback paths)
   * Finance current-term scoping via term_number + academic_year
   * Per-class / per-term / per-provider / top-outstanding breakdowns
+  * Per-tenant KPI snapshot: reuse, trigger-driven staleness, day rollover
 """
 from __future__ import annotations
 
@@ -13,6 +14,7 @@ from decimal import Decimal
 from uuid import uuid4
 
 import sqlalchemy as sa
+from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.api.v1.tenants.dashboard_stats import (
@@ -23,11 +25,12 @@ from app.api.v1.tenants.dashboard_stats import (
     get_finance_by_provider,
     get_finance_by_term,
     get_finance_current_term,
+    get_kpi_snapshot,
     get_scholarship_breakdown,
     get_student_demographics,
     get_top_outstanding,
 )
-from tests.helpers import create_tenant
+from tests.helpers import create_tenant, make_actor
 
 
 # ── Seed helpers ────────────────────────────────────────────────────────────
@@ -573,3 +576,82 @@ class TestScholarshipBreakdown:
             db_session, tenant_id=tenant.id, top_beneficiaries_limit=3,
         )
         assert len(out["top_beneficiaries"]) == 3
+
+
+# ── KPI snapshot ────────────────────────────────────────────────────────────
+
+class TestKpiSnapshot:
+    def _pending_changes(self, db: Session, tenant_id) -> int:
+        return db.execute(
+            sa.text("SELECT COUNT(*) FROM core.tenant_kpi_changes WHERE tenant_id = :tid"),
+            {"tid": str(tenant_id)},
+        ).scalar()
+
+    def test_snapshot_matches_live_helpers_and_is_reused(self, db_session: Session):
+        tenant = create_tenant(db_session)
+        sid = _seed_student(db_session, tenant_id=tenant.id, gender="F")
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid, class_code="G4")
+        _seed_invoice(
+            db_session, tenant_id=tenant.id, enrollment_id=eid,
+            total=Decimal("1000"), paid=Decimal("400"), term_number=1, academic_year=2026,
+        )
+        _seed_payment(db_session, tenant_id=tenant.id, provider="mpesa", amount=Decimal("400"))
+
+        first = get_kpi_snapshot(db_session, tenant_id=tenant.id)
+        db_session.commit()
+        assert first["all_time"] == get_finance_all_time(db_session, tenant_id=tenant.id)
+        assert first["by_class"] == get_finance_by_class(db_session, tenant_id=tenant.id)
+        assert first["by_term"] == get_finance_by_term(db_session, tenant_id=tenant.id)
+        assert first["by_provider"] == get_finance_by_provider(db_session, tenant_id=tenant.id)
+        assert first["demographics"]["female_count"] == 1
+        assert self._pending_changes(db_session, tenant.id) == 0
+
+        again = get_kpi_snapshot(db_session, tenant_id=tenant.id)
+        assert again["snapshot_at"] == first["snapshot_at"]
+
+    def test_source_writes_mark_snapshot_stale(self, db_session: Session):
+        tenant = create_tenant(db_session)
+        other = create_tenant(db_session, slug="kpi-other", domain="kpi-other.example.com")
+        get_kpi_snapshot(db_session, tenant_id=tenant.id)
+        get_kpi_snapshot(db_session, tenant_id=other.id)
+        db_session.commit()
+
+        _seed_payment(db_session, tenant_id=tenant.id, provider="cash", amount=Decimal("250"))
+        _seed_payment(db_session, tenant_id=tenant.id, provider="cash", amount=Decimal("50"))
+        assert self._pending_changes(db_session, tenant.id) == 1  # one marker per tenant
+        assert self._pending_changes(db_session, other.id) == 0
+
+        fresh = get_kpi_snapshot(db_session, tenant_id=tenant.id)
+        db_session.commit()
+        assert fresh["all_time"]["payment_count"] == 2
+        assert fresh["by_provider"] == [{"provider": "CASH", "payment_count": 2, "amount": 300.0}]
+
+        db_session.execute(
+            sa.text("DELETE FROM core.payments WHERE tenant_id = :tid"), {"tid": str(tenant.id)}
+        )
+        db_session.commit()
+        assert get_kpi_snapshot(db_session, tenant_id=tenant.id)["all_time"]["payment_count"] == 0
+
+    def test_snapshot_expires_at_day_boundary(self, db_session: Session):
+        tenant = create_tenant(db_session)
+        first = get_kpi_snapshot(db_session, tenant_id=tenant.id)
+        db_session.commit()
+        tomorrow = get_kpi_snapshot(
+            db_session, tenant_id=tenant.id, today=date.today() + timedelta(days=1)
+        )
+        assert tomorrow["snapshot_at"] != first["snapshot_at"]
+
+    def test_director_kpis_serve_the_snapshot(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _user, headers = make_actor(
+            db_session, tenant=tenant, permissions=["admin.dashboard.view_tenant"]
+        )
+        _seed_payment(db_session, tenant_id=tenant.id, provider="bank", amount=Decimal("75"))
+
+        resp = client.get("/api/v1/director/kpis", headers=headers)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert body["finance"]["payment_count"] == 1
+        assert body["finance_breakdowns"]["by_provider"][0]["provider"] == "BANK"
+        assert self._pending_changes(db_session, tenant.id) == 0
+        assert client.get("/api/v1/director/kpis", headers=headers).json()["snapshot_at"] == body["snapshot_at"]
@@ -245,6 +245,52 @@ class TestSortAndIsolation:
         assert rb.json()["meta"]["total"] == 0
 
 
+class TestCursorPaging:
+    def test_cursor_pages_share_a_timestamp_without_gaps(
+        self, client: TestClient, db_session: Session
+    ):
+        """Five payments, three with the same received_at: the (received_at,
+        id) cursor walks all five exactly once each way."""
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc)
+        for i, hours in enumerate((0, 1, 1, 1, 2)):
+            _seed_payment(
+                db_session, tenant_id=tenant.id, receipt_no=f"C{i}",
+                received_at=(now - timedelta(hours=hours)).isoformat(),
+            )
+        everything = [i["receipt_no"] for i in client.get(ROUTE, headers=headers).json()["items"]]
+
+        pages, cursor = [], None
+        while True:
+            params = {"cursor": cursor, "page_size": 2} if cursor else {"paging": "cursor", "page_size": 2}
+            body = client.get(ROUTE, params=params, headers=headers).json()
+            pages.append(body)
+            cursor = body["meta"]["next_cursor"]
+            if cursor is None:
+                break
+        assert [i["receipt_no"] for p in pages for i in p["items"]] == everything
+        assert len(pages) == 3
+        assert pages[0]["meta"]["total"] == 5 and pages[0]["meta"]["prev_cursor"] is None
+        assert pages[1]["meta"]["total"] is None
+
+        back = client.get(
+            ROUTE, params={"cursor": pages[2]["meta"]["prev_cursor"], "page_size": 2}, headers=headers,
+        ).json()
+        assert back["items"] == pages[1]["items"]
+        with_total = client.get(
+            ROUTE, params={"cursor": pages[1]["meta"]["next_cursor"], "page_size": 2, "with_total": True},
+            headers=headers,
+        ).json()
+        assert with_total["meta"]["total"] == 5
+
+    def test_invalid_cursor_is_400(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        assert client.get(f"{ROUTE}?cursor=garbage", headers=headers).status_code == 400
+
+
 class TestRBAC:
     def test_requires_finance_payments_view(
         self, client: TestClient, db_session: Session
@@ -19,6 +19,7 @@ Tests for enrollment endpoints:
 from __future__ import annotations
 
 import pytest
+import sqlalchemy as sa
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
@@ -150,6 +151,86 @@ class TestListEnrollmentsPaged:
         data = resp.json()
         assert data["total"] >= 1
 
+    def test_paged_cursor_mode_walks_forward_and_back(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=MANAGE)
+        created = [_create_draft(client, headers)["id"] for _ in range(5)]
+
+        first = client.get(BASE + "/paged?limit=2&paging=cursor", headers=headers).json()
+        assert first["total"] == 5
+        assert first["prev_cursor"] is None
+        second = client.get(BASE + f"/paged?limit=2&cursor={first['next_cursor']}", headers=headers).json()
+        assert second["total"] is None
+        third = client.get(BASE + f"/paged?limit=2&cursor={second['next_cursor']}", headers=headers).json()
+        assert third["next_cursor"] is None
+
+        seen = [row["id"] for page in (first, second, third) for row in page["items"]]
+        assert seen == list(reversed(created))
+        back = client.get(BASE + f"/paged?limit=2&cursor={second['prev_cursor']}", headers=headers).json()
+        assert [row["id"] for row in back["items"]] == [row["id"] for row in first["items"]]
+        assert back["prev_cursor"] is None
+
+    def test_paged_invalid_cursor_rejected(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=MANAGE)
+        assert client.get(BASE + "/paged?cursor=nope", headers=headers).status_code == 400
+
+    def test_paged_class_and_term_filters_follow_payload_edits(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=MANAGE)
+        grade4 = client.post(
+            BASE + "/",
+            json={"payload": {"student_name": "Neema", "admission_class": " grade 4 ",
+                              "admission_term": "term 2"}},
+            headers=headers,
+        ).json()
+        # A non-string alias is skipped in favour of the next key.
+        client.post(
+            BASE + "/",
+            json={"payload": {"student_name": "Juma", "admission_class": 5, "class_code": "GRADE 5"}},
+            headers=headers,
+        )
+
+        def _ids(**params) -> list[str]:
+            resp = client.get(BASE + "/paged", params=params, headers=headers)
+            assert resp.status_code == 200, resp.text
+            return [row["id"] for row in resp.json()["items"]]
+
+        assert _ids(class_code="Grade 4") == [grade4["id"]]
+        assert _ids(term_code="TERM_2") == [grade4["id"]]
+        assert _ids(term_code="term 2", class_code="grade 5") == []
+        assert len(_ids(class_code="GRADE 5")) == 1
+
+        resp = client.patch(
+            BASE + f"/{grade4['id']}",
+            json={"payload": {"admission_class": "Grade 5"}},
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.text
+        assert _ids(class_code="Grade 4") == []
+        assert len(_ids(class_code="grade 5")) == 2
+
+    def test_payload_term_reader_matches_generated_column(
+        self, client: TestClient, db_session: Session
+    ):
+        from app.api.v1.tenants.routes import _enrollment_term_bucket
+
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=MANAGE)
+        for payload in (
+            {"admission_term": " term 1 "},
+            {"admission_term": "  ", "termCode": "Term\t2"},
+            {"academic_term": "2026 term 3"},
+        ):
+            created = client.post(BASE + "/", json={"payload": payload}, headers=headers).json()
+            generated = db_session.execute(
+                sa.text("SELECT term_code FROM core.enrollments WHERE id = :id"),
+                {"id": created["id"]},
+            ).scalar()
+            assert _enrollment_term_bucket(created["payload"]) == generated
+
 
 # ── Single record ────────────────────────────────────────────────────────────
 
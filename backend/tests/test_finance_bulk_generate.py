@@ -21,6 +21,7 @@ Plus an audit-trail check and a regression guard that the resolver tag
 """
 from __future__ import annotations
 
+import json
 from decimal import Decimal
 from uuid import uuid4
 
@@ -434,6 +435,148 @@ class TestBulkGenerate:
         assert resp.json()["summary"]["total"] == 0
 
 
+# ────────────────────────────────────────────────────────────────────────────
+# Set-based engine
+# ────────────────────────────────────────────────────────────────────────────
+
+def _invoice_state(db_session: Session, tenant_id) -> tuple[dict, list, list]:
+    """Per-enrollment invoice + line contents, the invoice numbers and the
+    carry-forward rows' (status, invoice enrollment) — everything but ids."""
+    invoices = db_session.execute(
+        text(
+            "SELECT id, enrollment_id, invoice_no, status, total_amount, balance_amount, "
+            "student_type_snapshot, meta FROM core.invoices "
+            "WHERE tenant_id = :tid AND invoice_type = 'SCHOOL_FEES'"
+        ),
+        {"tid": str(tenant_id)},
+    ).mappings().all()
+    enrollment_of = {r["id"]: str(r["enrollment_id"]) for r in invoices}
+    state = {}
+    for r in invoices:
+        lines = db_session.execute(
+            text("SELECT description, amount, meta FROM core.invoice_lines WHERE invoice_id = :id"),
+            {"id": r["id"]},
+        ).all()
+        state[str(r["enrollment_id"])] = (
+            r["status"], r["total_amount"], r["balance_amount"], r["student_type_snapshot"], r["meta"],
+            sorted((d, a, json.dumps(m, sort_keys=True)) for d, a, m in lines),
+        )
+    cf_rows = db_session.execute(
+        text("SELECT id, status, invoice_id FROM core.student_carry_forward_balances WHERE tenant_id = :tid"),
+        {"tid": str(tenant_id)},
+    ).all()
+    carry_forward = sorted(
+        (str(cf_id), status, enrollment_of.get(invoice_id)) for cf_id, status, invoice_id in cf_rows
+    )
+    return state, sorted(r["invoice_no"] for r in invoices), carry_forward
+
+
+class TestSetBasedEngine:
+    def test_batch_matches_per_invoice_generation(
+        self, client: TestClient, db_session: Session, monkeypatch
+    ):
+        """The set-based engine writes exactly what one
+        generate_school_fees_invoice_v2 call per enrollment would — lines,
+        totals, arrears breakdown, carry-forward bundling and numbering."""
+        from app.api.v1.finance import service
+
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="bulkset")
+        _setup_full_structure(
+            client, headers, class_code="GRADE_1",
+            academic_year=2026, student_type="RETURNING",
+        )
+        eids = [
+            _enroll_with_admission_year(
+                client, headers, db_session, class_code="GRADE_1", admission_year=2025,
+            )
+            for _ in range(3)
+        ]
+        student_ids = [
+            db_session.execute(
+                select(Enrollment.student_id).where(Enrollment.id == eid)
+            ).scalar_one()
+            for eid in eids
+        ]
+        for student_id, amount in ((student_ids[0], "2500"), (student_ids[1], "-300")):
+            service.add_carry_forward(
+                db_session, tenant_id=tenant.id, student_id=student_id, actor_user_id=None,
+                term_label="Term 3 2025", academic_year=2025, term_number=3,
+                amount=Decimal(amount), description=None,
+                category="MANUAL_DEBIT" if Decimal(amount) > 0 else "GOODWILL_CREDIT",
+            )
+        db_session.commit()
+
+        enrollments = db_session.execute(
+            select(Enrollment).where(Enrollment.tenant_id == tenant.id)
+        ).scalars().all()
+        batch = [(e, "Bulk Student", "GRADE_1") for e in enrollments]
+        args = dict(
+            tenant_id=tenant.id, actor_user_id=None,
+            term_number=1, academic_year=2026, batch=batch,
+        )
+
+        sp = db_session.begin_nested()
+        service._bulk_generate_rowwise(db_session, **args)
+        db_session.flush()
+        expected = _invoice_state(db_session, tenant.id)
+        sp.rollback()
+
+        # The bulk run must not fall back to the per-row generator.
+        def _no_per_row(*_a, **_kw):
+            raise AssertionError("per-row generator used")
+
+        monkeypatch.setattr(service, "generate_school_fees_invoice_v2", _no_per_row)
+        created, skipped, failed = service._bulk_generate_batch(db_session, **args)
+        db_session.flush()
+
+        assert (len(created), skipped, failed) == (3, [], [])
+        assert _invoice_state(db_session, tenant.id) == expected
+        state, _numbers, carry_forward = expected
+        assert {status for _id, status, _enr in carry_forward} == {"BUNDLED", "SETTLED"}
+        assert all(enr is not None for _id, _status, enr in carry_forward)
+        assert any("arrears_total" in inv[4] for inv in state.values())
+
+    def test_numbers_are_reserved_as_one_contiguous_block(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant, headers = _make_actor_with_perms(db_session, slug_prefix="bulknums")
+        _setup_full_structure(
+            client, headers, class_code="GRADE_1",
+            academic_year=2026, student_type="RETURNING",
+        )
+        for _ in range(3):
+            _enroll_with_admission_year(
+                client, headers, db_session, class_code="GRADE_1", admission_year=2025,
+            )
+        # A number already handed out by the single-invoice path.
+        from app.api.v1.finance.service import _next_document_number
+        first = _next_document_number(db_session, tenant_id=tenant.id, doc_type="INV")
+        db_session.commit()
+
+        body = _bulk(client, headers, term_number=1, academic_year=2026).json()
+        seqs = sorted(int(row["invoice_no"].rsplit("-", 1)[1]) for row in body["created"])
+        start = int(first.rsplit("-", 1)[1]) + 1
+        assert seqs == [start, start + 1, start + 2]
+
+        next_seq = db_session.execute(
+            text(
+                "SELECT next_seq FROM core.document_sequences "
+                "WHERE tenant_id = :tid AND doc_type = 'INV'"
+            ),
+            {"tid": str(tenant.id)},
+        ).scalar_one()
+        assert next_seq == start + 3
+
+        audit_count = db_session.execute(
+            text(
+                "SELECT COUNT(*) FROM core.audit_logs "
+                "WHERE tenant_id = :tid AND action = 'invoice.create.v2'"
+            ),
+            {"tid": str(tenant.id)},
+        ).scalar_one()
+        assert audit_count == 3
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # Bulk publish
 # ────────────────────────────────────────────────────────────────────────────
@@ -16,10 +16,11 @@ from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import select, text
+from sqlalchemy import event, select, text
 from sqlalchemy.orm import Session
 
 from app.models.student_carry_forward import StudentCarryForward
+from tests.conftest import TEST_ENGINE
 from tests.helpers import create_tenant, make_actor
 
 
@@ -700,3 +701,60 @@ class TestEdgeCases:
         assert sc is not None
         assert sc["student_id"] == sid_b
         assert Decimal(receipt_payload["surplus_credit"]) == Decimal("2000")
+
+
+class TestBatchedRecalc:
+    def test_family_payment_recalcs_every_invoice_in_one_pass(
+        self, client: TestClient, db_session: Session
+    ):
+        """Four children, one payment part-paying each invoice: the totals
+        are recomputed with one grouped query per source, not one per
+        invoice, and every invoice lands on PARTIAL."""
+        tenant = create_tenant(db_session, slug=f"fr-{uuid4().hex[:6]}")
+        pid, children = _seed_parent_with_children(
+            db_session, tenant_id=tenant.id, n_children=4
+        )
+        iids = [
+            _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid,
+                          term_number=1, academic_year=2026, total=Decimal("5000"))
+            for _, eid in children
+        ]
+        _, headers = make_actor(db_session, tenant=tenant, permissions=ALL_FINANCE)
+
+        sums: list[str] = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if "sum(" in statement.lower() and (
+                "FROM core.invoice_lines" in statement
+                or "FROM core.payment_allocations" in statement
+            ):
+                sums.append(statement)
+
+        event.listen(TEST_ENGINE, "before_cursor_execute", _count)
+        try:
+            resp = client.post(
+                f"{BASE}/parents/{pid}/payments",
+                json={
+                    "amount": "8000", "provider": "MPESA", "reference": "MX-BATCH",
+                    "mode": "manual",
+                    "per_student_allocations": [
+                        {"student_id": sid, "amount": "2000"} for sid, _ in children
+                    ],
+                },
+                headers=headers,
+            )
+        finally:
+            event.remove(TEST_ENGINE, "before_cursor_execute", _count)
+        assert resp.status_code == 200, resp.text
+        assert len(sums) == 2
+
+        rows = db_session.execute(
+            text(
+                "SELECT status, paid_amount, balance_amount FROM core.invoices "
+                "WHERE id = ANY(:ids)"
+            ),
+            {"ids": iids},
+        ).all()
+        assert {(r[0], r[1], r[2]) for r in rows} == {
+            ("PARTIAL", Decimal("2000.00"), Decimal("3000.00"))
+        }
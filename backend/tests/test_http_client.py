@@ -0,0 +1,221 @@
+"""Shared outbound HTTP client tests (app.core.http_client).
+
+Behaviour matrix:
+  sequential requests to one host       → one pooled keep-alive connection
+  server drops an idle connection       → re-sent on a fresh one, no retry spent
+  5xx                                   → retried, then HttpStatusError
+  4xx                                   → raised at once
+  retry budget exhausted                → no further retries
+  concurrent token misses               → one fetch (single-flight), failure shared
+  Daraja OAuth (payments + SMS flows)   → one token request until near expiry
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.api.v1.payments import service as payments_service
+from app.api.v1.sms import service as sms_service
+from app.core import http_client
+from app.core.config import settings
+
+
+class _Server:
+    """Local HTTP/1.1 server: replies with the queued (status, body) answers
+    (then 200 {}) and records each request's path and client port."""
+
+    def __init__(self) -> None:
+        self.answers: list[tuple[int, dict]] = []
+        self.seen: list[tuple[str, int]] = []
+        self.close_after_reply = False
+        self.drop_without_reply = 0
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # keep pytest output clean
+                pass
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                outer.seen.append((self.path, self.client_address[1]))
+                if outer.drop_without_reply:
+                    # Read the request, then hang up without answering.
+                    outer.drop_without_reply -= 1
+                    self.close_connection = True
+                    return
+                status, payload = outer.answers.pop(0) if outer.answers else (200, {})
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+                # Drop the connection without announcing it, as an idle
+                # keep-alive timeout on the provider's side would.
+                self.close_connection = outer.close_after_reply
+
+            do_GET = _reply
+            do_POST = _reply
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def connections(self) -> int:
+        return len({port for _, port in self.seen})
+
+
+@pytest.fixture
+def server():
+    srv = _Server()
+    yield srv
+    srv.httpd.shutdown()
+    srv.httpd.server_close()
+    http_client.close_all()
+    http_client.token_cache.invalidate()
+
+
+def test_sequential_requests_share_one_connection(server):
+    for _ in range(3):
+        assert http_client.request("GET", f"{server.url}/ping", timeout_sec=5).status == 200
+    assert server.connections() == 1
+
+
+def test_dropped_idle_connection_is_replaced(server):
+    server.close_after_reply = True
+    server.answers = [(200, {"n": 1}), (200, {"n": 2})]
+    assert http_client.request("GET", f"{server.url}/a", timeout_sec=5).json() == {"n": 1}
+    time.sleep(0.05)
+    assert http_client.request("GET", f"{server.url}/b", timeout_sec=5, max_retries=0).json() == {"n": 2}
+    assert server.connections() == 2
+
+
+def test_dropped_idle_connection_is_not_used_for_post(server):
+    server.close_after_reply = True
+    assert http_client.request("POST", f"{server.url}/a", body=b"{}", timeout_sec=5).status == 200
+    time.sleep(0.05)
+    assert http_client.request("POST", f"{server.url}/b", body=b"{}", timeout_sec=5).status == 200
+    assert [path for path, _ in server.seen] == ["/a", "/b"]
+
+
+@pytest.mark.parametrize(("method", "resent"), [("GET", True), ("POST", False)])
+def test_only_idempotent_requests_are_resent_after_a_hang_up(server, method, resent):
+    assert http_client.request(method, f"{server.url}/a", body=b"{}", timeout_sec=5).status == 200
+    server.drop_without_reply = 1
+    if resent:
+        assert http_client.request(method, f"{server.url}/b", body=b"{}", timeout_sec=5).status == 200
+        assert [path for path, _ in server.seen] == ["/a", "/b", "/b"]
+    else:
+        # The server may have acted on it (an STK push prompt): not resent.
+        with pytest.raises(http_client.HttpNetworkError):
+            http_client.request(method, f"{server.url}/b", body=b"{}", timeout_sec=5)
+        assert [path for path, _ in server.seen] == ["/a", "/b"]
+
+
+def test_server_errors_are_retried_then_raised(server):
+    server.answers = [(503, {}), (200, {"ok": True})]
+    resp = http_client.request("POST", f"{server.url}/x", body=b"{}", max_retries=2, retry_backoff_sec=0)
+    assert resp.json() == {"ok": True}
+
+    server.answers = [(502, {"e": 1}), (502, {"e": 2})]
+    with pytest.raises(http_client.HttpStatusError) as exc:
+        http_client.request("POST", f"{server.url}/x", body=b"{}", max_retries=1, retry_backoff_sec=0)
+    assert exc.value.status == 502
+    assert json.loads(exc.value.text()) == {"e": 2}
+
+
+def test_client_errors_are_not_retried(server):
+    server.answers = [(400, {"errorMessage": "bad"})]
+    with pytest.raises(http_client.HttpStatusError) as exc:
+        http_client.request("GET", f"{server.url}/x", max_retries=3, retry_backoff_sec=0)
+    assert exc.value.status == 400
+    assert len(server.seen) == 1
+
+
+def test_retry_budget_limits_retries(server, monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_RETRY_BUDGET_MIN", 1)
+    monkeypatch.setattr(settings, "HTTP_RETRY_BUDGET_RATIO", 0.0)
+    server.answers = [(500, {})] * 10
+    for _ in range(2):
+        with pytest.raises(http_client.HttpStatusError):
+            http_client.request("GET", f"{server.url}/x", max_retries=3, retry_backoff_sec=0)
+    # One retry in the bucket: 2 + 1 attempts, not 2 * 4.
+    assert len(server.seen) == 3
+
+
+def test_unreachable_host_is_a_network_error():
+    with pytest.raises(http_client.HttpNetworkError):
+        http_client.request("GET", "http://127.0.0.1:9/", timeout_sec=1)
+
+
+class TestTokenCache:
+    def test_concurrent_misses_fetch_once(self):
+        cache = http_client.TokenCache(name="t")
+        calls = []
+        gate = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            gate.wait(2)
+            return "tok", 3600
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k", fetch))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        gate.set()
+        for t in threads:
+            t.join()
+        assert results == ["tok"] * 8
+        assert len(calls) == 1
+        assert cache.get("k", fetch) == "tok"
+        assert len(calls) == 1
+
+    def test_near_expiry_tokens_are_not_reused(self, monkeypatch):
+        monkeypatch.setattr(settings, "HTTP_TOKEN_REFRESH_MARGIN_SEC", 60)
+        cache = http_client.TokenCache()
+        tokens = iter(["a", "b"])
+        assert cache.get("k", lambda: (next(tokens), 30)) == "a"
+        assert cache.get("k", lambda: (next(tokens), 30)) == "b"
+
+    def test_failed_fetch_is_not_cached(self):
+        cache = http_client.TokenCache()
+
+        def boom():
+            raise RuntimeError("Daraja OAuth failed: timed out")
+
+        with pytest.raises(RuntimeError):
+            cache.get("k", boom)
+        assert cache.get("k", lambda: ("fresh", 3600)) == "fresh"
+        cache.invalidate("k")
+        assert cache.get("k", lambda: ("again", 3600)) == "again"
+
+
+def test_daraja_token_is_shared_and_cached(server, monkeypatch):
+    monkeypatch.setattr(payments_service, "_daraja_base_url", lambda: server.url)
+    monkeypatch.setattr(payments_service, "_required_daraja_config_missing", lambda: set())
+    monkeypatch.setattr(sms_service, "_daraja_base_url", lambda: server.url)
+    server.answers = [(200, {"access_token": "T1", "expires_in": "3599"})]
+
+    assert payments_service._daraja_access_token() == "T1"
+    assert payments_service._daraja_access_token() == "T1"
+    assert sms_service._daraja_access_token() == "T1"
+    assert [path for path, _ in server.seen] == ["/oauth/v1/generate?grant_type=client_credentials"]
+
+    # A Bearer call rejected with 401 drops the token; the next call refetches.
+    server.answers = [(401, {"errorMessage": "Invalid Access Token"}), (200, {"access_token": "T2", "expires_in": 3599})]
+    with pytest.raises(ValueError, match="Invalid Access Token"):
+        payments_service._http_json(
+            method="POST", url=f"{server.url}/mpesa/stkpushquery/v1/query",
+            headers={"Authorization": "Bearer T1"}, payload={},
+        )
+    assert payments_service._daraja_access_token() == "T2"
@@ -558,3 +558,97 @@ class TestReconcileWithScholarship:
             "SELECT amount FROM core.scholarship_allocations WHERE id = :aid"
         ), {"aid": str(alloc_id)}).scalar()
         assert Decimal(str(alloc_amount)) == Decimal("5000.00")
+
+
+class TestSetBasedSweep:
+    def test_only_drifted_invoices_are_touched(
+        self, client: TestClient, db_session: Session,
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        drifting_id, drifting_fees = _seed_structure(
+            db_session, tenant_id=tenant.id, items=[("Tuition", Decimal("8000"))],
+        )
+        stable_id, stable_fees = _seed_structure(
+            db_session, tenant_id=tenant.id, items=[("Tuition", Decimal("7000"))],
+            class_code="PP1",
+        )
+        drifting, stable = [], []
+        for _ in range(2):
+            _, eid = _seed_student_enrollment(db_session, tenant_id=tenant.id)
+            drifting.append(_seed_invoice_from_structure(
+                db_session, tenant_id=tenant.id, enrollment_id=eid, structure_id=drifting_id,
+                lines=[(drifting_fees["Tuition"], "Tuition (PP2)", Decimal("8000"))],
+            ))
+            _, eid = _seed_student_enrollment(db_session, tenant_id=tenant.id)
+            stable.append(_seed_invoice_from_structure(
+                db_session, tenant_id=tenant.id, enrollment_id=eid, structure_id=stable_id,
+                lines=[(stable_fees["Tuition"], "Tuition (PP1)", Decimal("7000"))],
+            ))
+        _set_structure_amount(
+            db_session, structure_id=drifting_id,
+            fee_item_id=drifting_fees["Tuition"], amount=Decimal("8500"),
+        )
+
+        r = client.post(f"{BASE}/reconcile/sweep", headers=headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert (body["checked"], body["reconciled"], body["groups"]) == (4, 2, 2)
+        assert sorted(i["invoice_id"] for i in body["invoices"]) == sorted(drifting)
+        assert body["invoices_per_sec"] > 0
+        assert body["elapsed_ms"] >= 0
+
+        db_session.expire_all()
+        for inv_id in drifting:
+            inv = db_session.get(Invoice, inv_id)
+            assert Decimal(str(inv.total_amount)) == Decimal("8500.00")
+            assert inv.meta["reconciled_count"] == 1
+        for inv_id in stable:
+            assert "reconciled_count" not in db_session.get(Invoice, inv_id).meta
+
+    def test_once_ever_item_added_to_one_invoice_per_enrollment(
+        self, client: TestClient, db_session: Session,
+    ):
+        """A ONCE_EVER item added to the structure lands on only one of a
+        student's invoices, even though both are missing it."""
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        _, eid = _seed_student_enrollment(db_session, tenant_id=tenant.id)
+        struct_id, fee_ids = _seed_structure(
+            db_session, tenant_id=tenant.id, items=[("Tuition", Decimal("8000"))],
+        )
+        term_2 = _seed_invoice_from_structure(
+            db_session, tenant_id=tenant.id, enrollment_id=eid, structure_id=struct_id,
+            lines=[(fee_ids["Tuition"], "Tuition (PP2)", Decimal("8000"))],
+        )
+        term_3 = _seed_invoice_from_structure(
+            db_session, tenant_id=tenant.id, enrollment_id=eid, structure_id=struct_id,
+            lines=[(fee_ids["Tuition"], "Tuition (PP2)", Decimal("8000"))],
+        )
+        db_session.execute(text("UPDATE core.invoices SET term_number = 3 WHERE id = :id"), {"id": term_3})
+        cat_id = db_session.execute(text(
+            "SELECT category_id FROM core.fee_items WHERE id = :fid"
+        ), {"fid": fee_ids["Tuition"]}).scalar()
+        badge_id = uuid4()
+        db_session.execute(text(
+            "INSERT INTO core.fee_items (id, tenant_id, category_id, code, name, charge_frequency) "
+            "VALUES (:id, :tid, :cat, :code, 'Admission Badge', 'ONCE_EVER')"
+        ), {"id": str(badge_id), "tid": str(tenant.id), "cat": str(cat_id),
+            "code": f"FI-{uuid4().hex[:4].upper()}"})
+        db_session.execute(text(
+            "INSERT INTO core.fee_structure_items "
+            "(id, structure_id, fee_item_id, term_1_amount, term_2_amount, term_3_amount) "
+            "VALUES (:id, :sid, :fid, 300, 0, 0)"
+        ), {"id": str(uuid4()), "sid": struct_id, "fid": str(badge_id)})
+        db_session.commit()
+
+        r = client.post(f"{BASE}/reconcile/sweep", headers=headers)
+        assert r.status_code == 200, r.text
+        assert [i["invoice_id"] for i in r.json()["invoices"]] == [term_2]
+        badge_lines = db_session.execute(
+            select(InvoiceLine.invoice_id).where(
+                InvoiceLine.invoice_id.in_([term_2, term_3]),
+                InvoiceLine.meta["fee_item_id"].astext == str(badge_id),
+            )
+        ).scalars().all()
+        assert [str(i) for i in badge_lines] == [term_2]
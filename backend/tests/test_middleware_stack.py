@@ -0,0 +1,121 @@
+"""Pure-ASGI middleware stack.
+
+Behaviour checks for the header-injecting middlewares plus a micro-benchmark
+of per-request overhead: the app's full middleware stack wrapped around a
+no-op route versus the same route with no middleware. The benchmark drives
+the ASGI callables directly (no HTTP client) so the number is the stack's
+own cost. The bound is relative to the bare app, so a slow or noisy CI
+runner scales both sides, but it still catches a regression back to
+per-layer tasks and response buffering.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.main import app
+
+_BENCH_REQUESTS = 2000
+# The full stack currently costs ~1.5x the bare no-op route.
+_MAX_OVERHEAD_RATIO = 3.0
+
+
+def _noop_app(*, with_stack: bool) -> FastAPI:
+    # /healthz and /readyz are tenant-public, so TenantMiddleware does no
+    # lookups and the measurement is the stack itself.
+    bench = FastAPI(middleware=list(app.user_middleware) if with_stack else None)
+
+    @bench.get("/healthz")
+    def noop():
+        return PlainTextResponse("ok")
+
+    @bench.get("/readyz")
+    def stream():
+        return StreamingResponse(iter([b"a" * 10, b"b" * 10, b"c" * 10]), media_type="text/csv")
+
+    return bench
+
+
+def _scope(path: str, headers: list[tuple[bytes, bytes]] | None = None) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), *(headers or [])],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+def _receiver():
+    """An empty request body, then no disconnect until the response is done."""
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+
+    return receive
+
+
+async def _call(asgi, scope: dict) -> list[dict]:
+    sent: list[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi(scope, _receiver(), send)
+    return sent
+
+
+async def _time(asgi, n: int) -> float:
+    async def send(message):
+        pass
+
+    await asgi(_scope("/healthz"), _receiver(), send)   # build the stack once
+    start = time.perf_counter()
+    for _ in range(n):
+        await asgi(_scope("/healthz"), _receiver(), send)
+    return time.perf_counter() - start
+
+
+def _headers(start_message: dict) -> dict[str, str]:
+    return {k.decode().lower(): v.decode() for k, v in start_message["headers"]}
+
+
+def test_stack_sets_request_id_and_security_headers():
+    scope = _scope("/healthz", [(b"x-request-id", b"rid-1")])
+    headers = _headers(asyncio.run(_call(_noop_app(with_stack=True), scope))[0])
+    assert headers["x-request-id"] == "rid-1"
+    assert headers["x-frame-options"] == "DENY"
+    assert headers["content-security-policy"] == "default-src 'none'; frame-ancestors 'none'"
+
+
+def test_streamed_body_is_passed_through_chunk_by_chunk():
+    sent = asyncio.run(_call(_noop_app(with_stack=True), _scope("/readyz")))
+    bodies = [m["body"] for m in sent if m["type"] == "http.response.body" and m.get("body")]
+    assert bodies == [b"a" * 10, b"b" * 10, b"c" * 10]
+    assert "x-request-id" in _headers(sent[0])
+
+
+def test_oversized_body_is_rejected_before_the_route():
+    scope = _scope("/healthz", [(b"content-length", str(3 * 1024 * 1024).encode())])
+    sent = asyncio.run(_call(_noop_app(with_stack=True), scope))
+    assert sent[0]["status"] == 413
+    assert "x-request-id" in _headers(sent[0])
+
+
+def test_per_request_overhead_of_full_stack():
+    bare = asyncio.run(_time(_noop_app(with_stack=False), _BENCH_REQUESTS))
+    full = asyncio.run(_time(_noop_app(with_stack=True), _BENCH_REQUESTS))
+    assert full < bare * _MAX_OVERHEAD_RATIO
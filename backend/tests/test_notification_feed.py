@@ -0,0 +1,205 @@
+"""Materialized tenant notification feed (app.api.v1.tenants.notification_feed).
+
+The asset / staff source tables are not ORM-modelled, so feed entries for
+those types are written through sync_notifications directly; transfers and
+support replies go through their real sources. The contract checked here:
+  - the unread badge is a stored counter that follows activation, resolve,
+    read, dismiss and mark-all-read, and always equals a fresh recount;
+  - /notifications pages newest-first by keyset cursor;
+  - an admin support reply lands in the feed for everyone but its author;
+  - the sweep re-derives the feed from the sources and heals counters.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.v1.tenants import notification_feed as feed
+from app.models.enrollment import Enrollment
+from app.models.notification import TenantNotification, TenantNotificationCounter
+from tests.conftest import TEST_ENGINE
+from tests.helpers import (
+    assign_permission_to_role,
+    create_permission,
+    create_role,
+    create_super_admin_user,
+    create_tenant,
+    create_tenant_user,
+    get_saas_token,
+    make_actor,
+    tenant_headers,
+)
+
+BASE = "/api/v1/tenants/notifications"
+PERMS = ["admin.dashboard.view_tenant"]
+_T0 = datetime(2026, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _assets(*ids: int) -> list[dict]:
+    return [
+        {
+            "notification_id": f"asset-due-{i}",
+            "severity": "warning",
+            "title": f"Asset return overdue · A{i}",
+            "message": "overdue",
+            "entity_type": "asset_assignment",
+            "entity_id": str(i),
+            "occurred_at": (_T0 + timedelta(hours=i)).isoformat(),
+            "due_at": (_T0 + timedelta(hours=i)).isoformat(),
+        }
+        for i in ids
+    ]
+
+
+def _sync_assets(db: Session, tenant_id, *ids: int) -> dict:
+    result = feed.sync_notifications(db, tenant_id=tenant_id, type="ASSET_DUE", items=_assets(*ids), replace=True)
+    db.commit()
+    return result
+
+
+def _badge(client: TestClient, headers) -> int:
+    resp = client.get(f"{BASE}/unread-count", headers=headers)
+    assert resp.status_code == 200, resp.text
+    return resp.json()["unread_count"]
+
+
+def _recount(db: Session, tenant_id, user_id) -> int:
+    return db.execute(sa.select(feed._count_unread(tenant_id=tenant_id, user_id=user_id))).scalar()
+
+
+def test_badge_counter_follows_feed_and_read_state(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="notif-badge")
+    user, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+    _sync_assets(db_session, tenant.id, 1, 2, 3)
+
+    assert _badge(client, headers) == 3  # first call initializes the counter
+
+    assert client.post(f"{BASE}/asset-due-1/read", headers=headers).status_code == 200
+    assert client.post(f"{BASE}/asset-due-1/read", headers=headers).status_code == 200
+    assert client.post(f"{BASE}/asset-due-2/delete", headers=headers).status_code == 200
+    assert client.post(f"{BASE}/asset-due-1/delete", headers=headers).status_code == 200
+    assert _badge(client, headers) == 1
+
+    # 1 and 2 stop being overdue, 4 becomes overdue.
+    assert _sync_assets(db_session, tenant.id, 3, 4) == {"activated": 1, "resolved": 2}
+    assert _badge(client, headers) == 2
+    # Unchanged re-sync is a no-op for the counters.
+    assert _sync_assets(db_session, tenant.id, 3, 4) == {"activated": 0, "resolved": 0}
+    assert _badge(client, headers) == 2 == _recount(db_session, tenant.id, user.id)
+
+    resp = client.post(f"{BASE}/mark-all-read", headers=headers)
+    assert resp.json() == {"ok": True, "marked_count": 2}
+    assert _badge(client, headers) == 0
+
+    # A resolved notification that comes back is unread again only for users
+    # who never read it.
+    _sync_assets(db_session, tenant.id, 1, 2, 3, 4)
+    assert _badge(client, headers) == 0 == _recount(db_session, tenant.id, user.id)
+
+
+def test_feed_pages_newest_first_by_cursor(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="notif-pages")
+    _user, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+    _sync_assets(db_session, tenant.id, 1, 2, 3, 4, 5)
+    client.post(f"{BASE}/asset-due-4/delete", headers=headers)
+    client.post(f"{BASE}/asset-due-3/read", headers=headers)
+
+    seen: list[dict] = []
+    cursor = None
+    while True:
+        resp = client.get(BASE, params={"limit": 2, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert resp.status_code == 200, resp.text
+        seen.extend(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [n["id"] for n in seen] == ["asset-due-5", "asset-due-3", "asset-due-2", "asset-due-1"]
+    assert [n["unread"] for n in seen] == [True, False, True, True]
+    assert seen[0]["due_at"].startswith("2026-03-01T13:00:00")
+
+    legacy = client.get(BASE, params={"limit": 2, "offset": 2}, headers=headers).json()
+    assert [n["id"] for n in legacy] == ["asset-due-2", "asset-due-1"]
+    assert client.get(BASE, params={"cursor": "nope"}, headers=headers).status_code == 400
+
+
+def test_admin_support_reply_is_published_to_tenant_feed(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="notif-support")
+    # Contact Admin is limited to director / secretary roles.
+    role = create_role(db_session, "DIRECTOR", tenant_id=tenant.id)
+    assign_permission_to_role(db_session, role, create_permission(db_session, PERMS[0]))
+    user = create_tenant_user(db_session, tenant=tenant, email="director@notif.test", role=role)
+    db_session.commit()
+    headers = tenant_headers(user, tenant, roles=["DIRECTOR"], permissions=PERMS)
+    thread = client.post(
+        "/api/v1/support/tenant/threads",
+        json={"subject": "Fees", "priority": "NORMAL", "message": "Help"},
+        headers=headers,
+    )
+    assert thread.status_code == 200, thread.text
+    assert _badge(client, headers) == 0
+
+    admin = create_super_admin_user(db_session)
+    db_session.commit()
+    resp = client.post(
+        f"/api/v1/support/admin/threads/{thread.json()['id']}/messages",
+        json={"message": "Your fees are sorted."},
+        headers={"Authorization": f"Bearer {get_saas_token(admin)}"},
+    )
+    assert resp.status_code == 200, resp.text
+
+    assert _badge(client, headers) == 1
+    [item] = client.get(BASE, headers=headers).json()
+    assert item["id"] == f"support-msg-{resp.json()['id']}"
+    assert item["type"] == "SUPPORT_REPLY"
+    assert item["title"] == "Admin replied: Fees"
+    assert feed.unread_count(db_session, tenant_id=tenant.id, user_id=admin.id) == 0
+
+
+def test_sweep_rederives_sources_and_heals_counters(db_session: Session):
+    tenant = create_tenant(db_session, slug="notif-sweep")
+    user, _headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+    enrollment = Enrollment(
+        id=uuid4(),
+        tenant_id=tenant.id,
+        status="TRANSFERRED",
+        payload={"student_name": "Jane Doe", "transfer_approved_at": _T0.isoformat()},
+    )
+    db_session.add(enrollment)
+    _sync_assets(db_session, tenant.id, 1)  # no asset source table here → resolved by the sweep
+    feed.unread_count(db_session, tenant_id=tenant.id, user_id=user.id)
+    db_session.execute(
+        sa.update(TenantNotificationCounter)
+        .where(TenantNotificationCounter.user_id == user.id)
+        .values(unread_count=42)
+    )
+    db_session.commit()
+
+    totals = feed.sweep_notification_feeds(db_session)
+
+    assert totals["tenants"] >= 1
+    active = dict(
+        db_session.execute(
+            sa.select(TenantNotification.notification_id, TenantNotification.is_active).where(
+                TenantNotification.tenant_id == tenant.id
+            )
+        ).all()
+    )
+    assert active == {"asset-due-1": False, f"transfer-approved-{enrollment.id}": True}
+    assert feed.unread_count(db_session, tenant_id=tenant.id, user_id=user.id) == 1
+
+
+def test_sweep_releases_its_lock_and_yields_to_a_holder(db_session: Session):
+    key = {"key": feed._SWEEP_LOCK_KEY}
+    assert feed.sweep_notification_feeds(db_session) is not None
+
+    with TEST_ENGINE.connect() as other:
+        assert other.execute(sa.text("SELECT pg_try_advisory_lock(hashtext(:key))"), key).scalar()
+        try:
+            assert feed.sweep_notification_feeds(db_session) is None
+        finally:
+            other.execute(sa.text("SELECT pg_advisory_unlock(hashtext(:key))"), key)
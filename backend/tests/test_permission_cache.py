@@ -0,0 +1,101 @@
+"""Cached role → permission maps and effective-permission resolution."""
+from __future__ import annotations
+
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import permission_cache as pc
+from app.models.rbac import RolePermission, UserPermissionOverride, UserRole
+from tests.conftest import TEST_ENGINE
+from tests.helpers import (
+    create_permission,
+    create_role,
+    create_tenant,
+    create_tenant_user,
+    make_actor,
+)
+
+
+class _StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(TEST_ENGINE, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(TEST_ENGINE, "before_cursor_execute", self)
+
+
+def _grant(db: Session, *, tenant, user, role) -> None:
+    db.add(UserRole(id=uuid4(), tenant_id=tenant.id, user_id=user.id, role_id=role.id))
+
+
+def test_roles_plus_overrides(db_session: Session):
+    tenant = create_tenant(db_session, slug="rbac-resolve")
+    user = create_tenant_user(db_session, tenant=tenant, email="r@rbac.test")
+    read, write, extra = (create_permission(db_session, c) for c in ("x.read", "x.write", "x.extra"))
+    role = create_role(db_session, "CLERK", tenant_id=tenant.id)
+    db_session.add_all([
+        RolePermission(role_id=role.id, permission_id=read.id),
+        RolePermission(role_id=role.id, permission_id=write.id),
+    ])
+    _grant(db_session, tenant=tenant, user=user, role=role)
+    db_session.add_all([
+        UserPermissionOverride(id=uuid4(), tenant_id=tenant.id, user_id=user.id, permission_id=write.id, effect="DENY"),
+        UserPermissionOverride(id=uuid4(), tenant_id=tenant.id, user_id=user.id, permission_id=extra.id, effect="ALLOW"),
+    ])
+    db_session.commit()
+
+    roles, perms = pc.resolve_roles_permissions(db_session, tenant.id, user.id)
+    assert "CLERK" in roles
+    assert "x.read" in perms and "x.extra" in perms
+    assert "x.write" not in perms
+
+
+def test_map_is_reused_and_new_roles_are_picked_up(db_session: Session):
+    tenant = create_tenant(db_session, slug="rbac-reuse")
+    user = create_tenant_user(db_session, tenant=tenant, email="u@rbac.test")
+    perm = create_permission(db_session, "y.read")
+    role = create_role(db_session, "FIRST", tenant_id=tenant.id)
+    db_session.add(RolePermission(role_id=role.id, permission_id=perm.id))
+    _grant(db_session, tenant=tenant, user=user, role=role)
+    db_session.commit()
+
+    pc.resolve_roles_permissions(db_session, tenant.id, user.id)
+    with _StatementCounter() as counter:
+        assert pc.resolve_roles_permissions(db_session, tenant.id, user.id)[1] == ["y.read"]
+    assert counter.count == 1   # the user's own grants only
+
+    # A role created after the map was built is resolved without a bump.
+    later = create_role(db_session, "LATER", tenant_id=tenant.id)
+    _grant(db_session, tenant=tenant, user=user, role=later)
+    db_session.commit()
+    assert "LATER" in pc.resolve_roles_permissions(db_session, tenant.id, user.id)[0]
+
+
+def test_set_role_permissions_takes_effect(client: TestClient, db_session: Session):
+    tenant = create_tenant(db_session, slug="rbac-bump")
+    _, headers = make_actor(db_session, tenant=tenant, permissions=["rbac.permissions.manage"])
+    user = create_tenant_user(db_session, tenant=tenant, email="c@rbac.test")
+    create_permission(db_session, "z.read")
+    role = create_role(db_session, "VIEWER", tenant_id=tenant.id)
+    _grant(db_session, tenant=tenant, user=user, role=role)
+    db_session.commit()
+
+    assert pc.resolve_roles_permissions(db_session, tenant.id, user.id)[1] == []
+
+    resp = client.put(
+        f"/api/v1/tenants/rbac/roles/{role.id}/permissions",
+        json={"permission_codes": ["z.read"]},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert pc.resolve_roles_permissions(db_session, tenant.id, user.id)[1] == ["z.read"]
@@ -16,6 +16,7 @@ from uuid import uuid4
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.api.v1.reports.results import class_term_results, invalidate_class_results_after_commit
 from tests.helpers import create_tenant, make_actor
 
 BASE = "/api/v1/reports/8-4-4"
@@ -217,6 +218,78 @@ class TestClassResults:
         assert rows[0]["position"] == 1
         assert rows[0]["enrollment_id"] == e1  # higher marks first
 
+    def test_tied_means_share_a_position(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _u, headers = make_actor(db_session, tenant=tenant, permissions=VIEW)
+        tid = _seed_term(db_session, tenant_id=tenant.id)
+        subj_id = _seed_subject(db_session, tenant_id=tenant.id)
+        exam_id = _seed_exam(db_session, tenant_id=tenant.id, term_id=tid, subject_id=subj_id)
+        eids = []
+        for adm, marks in [("ADM-001", 80.0), ("ADM-002", 60.0), ("ADM-003", 80.0)]:
+            sid = _seed_student(db_session, tenant_id=tenant.id, admission_no=adm)
+            eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+            _seed_mark(db_session, tenant_id=tenant.id, exam_id=exam_id, enrollment_id=eid,
+                       subject_id=subj_id, marks=marks)
+            eids.append(eid)
+
+        rows = client.get(f"{BASE}/classes/G9A/term/{tid}", headers=headers).json()
+        assert [r["position"] for r in rows] == [1, 1, 3]
+        assert rows[2]["enrollment_id"] == eids[1]
+
+        card = client.get(f"{BASE}/enrollments/{eids[2]}/term/{tid}", headers=headers).json()
+        assert (card["position"], card["out_of"]) == (1, 3)
+
+    def test_class_results_load_in_one_query(self, db_session: Session):
+        tenant = create_tenant(db_session)
+        tenant_id = tenant.id
+        _sid, eid, tid, subj_id, exam_id = _setup_full_student(db_session, tenant_id=tenant_id)
+        for adm in ("ADM-002", "ADM-003"):
+            sid = _seed_student(db_session, tenant_id=tenant_id, admission_no=adm)
+            other = _seed_enrollment(db_session, tenant_id=tenant_id, student_id=sid)
+            _seed_mark(db_session, tenant_id=tenant_id, exam_id=exam_id, enrollment_id=other,
+                       subject_id=subj_id, marks=50.0)
+
+        statements = []
+
+        def record(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        sa.event.listen(db_session.bind, "before_cursor_execute", record)
+        try:
+            results = class_term_results(db_session, tenant_id=tenant_id, class_code="G9A", term_id=tid)
+            cached = class_term_results(db_session, tenant_id=tenant_id, class_code="G9A", term_id=tid)
+        finally:
+            sa.event.remove(db_session.bind, "before_cursor_execute", record)
+        assert len(statements) == 1
+        assert cached is results
+        assert results.out_of == 3
+        assert results.ranked[0].enrollment_id == eid
+
+    def test_mark_change_refreshes_cached_results(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        tenant_id = tenant.id
+        _u, headers = make_actor(db_session, tenant=tenant, permissions=VIEW)
+        _s1, e1, tid, subj_id, exam_id = _setup_full_student(db_session, tenant_id=tenant_id, marks=70.0)
+        s2 = _seed_student(db_session, tenant_id=tenant_id, admission_no="ADM-002")
+        e2 = _seed_enrollment(db_session, tenant_id=tenant_id, student_id=s2)
+        mark_id = _seed_mark(db_session, tenant_id=tenant_id, exam_id=exam_id, enrollment_id=e2,
+                             subject_id=subj_id, marks=40.0)
+
+        rows = client.get(f"{BASE}/classes/G9A/term/{tid}", headers=headers).json()
+        assert rows[0]["enrollment_id"] == e1
+
+        # As upsert_tenant_exam_mark does: the cache is dropped once the mark commits.
+        db_session.execute(
+            sa.text("UPDATE core.tenant_exam_marks SET marks_obtained = 95 WHERE id = :id"),
+            {"id": mark_id},
+        )
+        invalidate_class_results_after_commit(db_session, tenant_id)
+        assert client.get(f"{BASE}/classes/G9A/term/{tid}", headers=headers).json()[0]["enrollment_id"] == e1
+        db_session.commit()
+
+        rows = client.get(f"{BASE}/classes/G9A/term/{tid}", headers=headers).json()
+        assert [(r["enrollment_id"], r["mean_grade"]) for r in rows] == [(e2, "A"), (e1, "B+")]
+
     def test_class_results_empty_class(self, client: TestClient, db_session: Session):
         tenant = create_tenant(db_session)
         _u, headers = make_actor(db_session, tenant=tenant, permissions=VIEW)
@@ -292,6 +365,23 @@ class TestStudentReportCard:
         assert card["position"] == 1
         assert card["out_of"] == 2
 
+    def test_report_card_uses_class_of_latest_exam(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _u, headers = make_actor(db_session, tenant=tenant, permissions=VIEW)
+        _sid, eid, tid, subj_id, _exam = _setup_full_student(db_session, tenant_id=tenant.id)
+        later = _seed_exam(db_session, tenant_id=tenant.id, term_id=tid, subject_id=subj_id,
+                           class_code="G9B", name="Mid-Term Exam")
+        db_session.execute(
+            sa.text("UPDATE core.tenant_exams SET start_date = '2026-03-20' WHERE id = :id"),
+            {"id": later},
+        )
+        _seed_mark(db_session, tenant_id=tenant.id, exam_id=later, enrollment_id=eid,
+                   subject_id=subj_id, class_code="G9B")
+
+        for _ in range(3):
+            card = client.get(f"{BASE}/enrollments/{eid}/term/{tid}", headers=headers).json()
+            assert (card["class_code"], card["position"], card["out_of"]) == ("G9B", 1, 1)
+
     def test_report_card_unknown_enrollment_returns_404(
         self, client: TestClient, db_session: Session
     ):
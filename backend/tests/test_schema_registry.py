@@ -0,0 +1,61 @@
+"""In-memory schema registry used for table-candidate resolution."""
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import schema_registry as sr
+from tests.conftest import TEST_ENGINE
+
+
+class _StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(TEST_ENGINE, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(TEST_ENGINE, "before_cursor_execute", self)
+
+
+def test_resolves_first_existing_candidate_with_columns(db_session: Session):
+    sr.invalidate_schema_registry()
+    ref, cols = sr.resolve_existing_table(db_session, ("core.no_such_table", "core.tenants"))
+    assert ref == "core.tenants"
+    assert {"id", "slug", "primary_domain"} <= cols
+
+
+def test_repeat_lookups_are_served_from_memory(db_session: Session):
+    sr.invalidate_schema_registry()
+    sr.resolve_existing_table(db_session, ("core.tenants",))
+    with _StatementCounter() as counter:
+        for _ in range(5):
+            sr.resolve_existing_table(db_session, ("core.tenant_classes", "tenant_classes"))
+            sr.resolve_existing_table(db_session, ("core.enrollments",))
+    assert counter.count == 0
+
+
+def test_missing_candidates_reload_at_most_once_per_window(db_session: Session, monkeypatch):
+    monkeypatch.setattr(sr.settings, "SCHEMA_REGISTRY_MISS_RELOAD_SEC", 3600)
+    sr.invalidate_schema_registry()
+    sr.resolve_existing_table(db_session, ("core.tenants",))
+    loads = sr.schema_registry.snapshot()["loads"]
+    for _ in range(3):
+        assert sr.resolve_existing_table(db_session, ("core.nope", "nope")) == (None, set())
+    assert sr.schema_registry.snapshot()["loads"] == loads
+
+
+def test_invalidate_picks_up_new_tables(db_session: Session):
+    sr.invalidate_schema_registry()
+    assert sr.resolve_existing_table(db_session, ("core.registry_probe",))[0] is None
+    with TEST_ENGINE.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE core.registry_probe (id int, label text)")
+    sr.invalidate_schema_registry()
+    ref, cols = sr.resolve_existing_table(db_session, ("core.registry_probe",))
+    assert ref == "core.registry_probe"
+    assert cols == {"id", "label"}
@@ -0,0 +1,160 @@
+"""Tests for the trigger-maintained listing search documents
+(core.search_documents, app.core.search).
+
+Coverage focus:
+  • documents follow later writes — a student rename, a payment allocated
+    after it was recorded, an enrollment payload edit, a deleted invoice.
+  • a query never matches across two fields of the same document.
+  • `count=estimated` — exact below the floor, the planner's estimate above.
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import pagination
+from app.models.invoice import Invoice
+from tests.helpers import create_tenant, make_actor
+from tests.test_director_payments_pagination import (
+    _seed_enrollment,
+    _seed_invoice,
+    _seed_payment,
+    _seed_student,
+)
+
+INVOICES = "/api/v1/director/finance/invoices"
+PAYMENTS = "/api/v1/director/finance/payments"
+PERMS = ["finance.invoices.view", "finance.payments.view"]
+
+
+def _hits(client, headers, route: str, q: str) -> list[str]:
+    resp = client.get(route, params={"q": q}, headers=headers)
+    assert resp.status_code == 200, resp.text
+    return [row["id"] for row in resp.json()["items"]]
+
+
+class TestDocumentMaintenance:
+    def test_student_rename_reaches_invoice_and_payment(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        sid = _seed_student(db_session, tenant_id=tenant.id, first="Amina", last="Wanjiru")
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+        iid = _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid, no="INV-0001")
+        pid = _seed_payment(db_session, tenant_id=tenant.id, invoice_ids=[iid])
+
+        assert _hits(client, headers, INVOICES, "amina wanjiru") == [iid]
+        assert _hits(client, headers, PAYMENTS, "amina wanjiru") == [pid]
+
+        db_session.execute(
+            sa.text("UPDATE core.students SET first_name = 'Halima' WHERE id = :id"),
+            {"id": sid},
+        )
+        db_session.commit()
+        assert _hits(client, headers, INVOICES, "amina") == []
+        assert _hits(client, headers, INVOICES, "halima wanjiru") == [iid]
+        assert _hits(client, headers, PAYMENTS, "halima") == [pid]
+
+    def test_payment_found_by_student_once_allocated(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        sid = _seed_student(db_session, tenant_id=tenant.id, first="Baraka", last="Otieno")
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+        iid = _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid, no="INV-0002")
+        pid = _seed_payment(db_session, tenant_id=tenant.id, reference="QK12ABC")
+        assert _hits(client, headers, PAYMENTS, "baraka") == []
+
+        db_session.execute(
+            sa.text(
+                "INSERT INTO core.payment_allocations (payment_id, invoice_id, amount) "
+                "VALUES (:pid, :iid, 500)"
+            ),
+            {"pid": pid, "iid": iid},
+        )
+        db_session.commit()
+        assert _hits(client, headers, PAYMENTS, "baraka") == [pid]
+        assert _hits(client, headers, PAYMENTS, "qk12") == [pid]
+
+    def test_deleted_invoice_and_enrollment_edit(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        sid = _seed_student(db_session, tenant_id=tenant.id)
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+        iid = _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid, no="INV-0003")
+
+        db_session.execute(
+            sa.text(
+                "UPDATE core.enrollments SET payload = payload || "
+                "'{\"full_name\": \"Zawadi Njeri\"}'::jsonb WHERE id = :id"
+            ),
+            {"id": eid},
+        )
+        db_session.commit()
+        assert _hits(client, headers, INVOICES, "zawadi") == [iid]
+
+        db_session.execute(sa.text("DELETE FROM core.invoices WHERE id = :id"), {"id": iid})
+        db_session.commit()
+        remaining = db_session.execute(
+            sa.text("SELECT count(*) FROM core.search_documents WHERE entity_id = :id"),
+            {"id": iid},
+        ).scalar_one()
+        assert remaining == 0
+
+    def test_query_does_not_span_two_fields(
+        self, client: TestClient, db_session: Session
+    ):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        sid = _seed_student(db_session, tenant_id=tenant.id, first="Amina", last="Wanjiru")
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+        _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid, no="INV-0004")
+        assert _hits(client, headers, INVOICES, "0004 amina") == []
+
+
+class TestEstimatedCount:
+    def test_small_results_stay_exact(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        for _ in range(3):
+            _seed_payment(db_session, tenant_id=tenant.id)
+        meta = client.get(PAYMENTS, params={"count": "estimated"}, headers=headers).json()["meta"]
+        assert meta["total"] == 3
+        assert meta["total_estimated"] is False
+
+    def test_large_results_use_the_planner_estimate(
+        self, client: TestClient, db_session: Session, monkeypatch
+    ):
+        monkeypatch.setattr(pagination, "ESTIMATED_COUNT_FLOOR", 1)
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        for _ in range(3):
+            _seed_payment(db_session, tenant_id=tenant.id)
+        resp = client.get(PAYMENTS, params={"count": "estimated", "q": "x"}, headers=headers)
+        assert resp.status_code == 200
+        meta = resp.json()["meta"]
+        assert meta["total_estimated"] is True
+        assert meta["total"] >= 1
+
+    def test_estimate_handles_a_list_in_filter(self, db_session: Session, monkeypatch):
+        monkeypatch.setattr(pagination, "ESTIMATED_COUNT_FLOOR", 1)
+        tenant = create_tenant(db_session)
+        sid = _seed_student(db_session, tenant_id=tenant.id, first="Amina", last="Wanjiru")
+        eid = _seed_enrollment(db_session, tenant_id=tenant.id, student_id=sid)
+        _seed_invoice(db_session, tenant_id=tenant.id, enrollment_id=eid, no="INV-0005")
+        stmt = sa.select(Invoice.id).where(
+            Invoice.tenant_id == tenant.id, Invoice.status.in_(["DRAFT", "ISSUED", "PARTIAL"])
+        )
+        total, estimated = pagination.count_rows(db_session, stmt, estimated=True)
+        assert estimated is True
+        assert total >= 1
+
+    def test_unknown_count_mode_rejected(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session)
+        _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+        assert client.get(INVOICES, params={"count": "fast"}, headers=headers).status_code == 422
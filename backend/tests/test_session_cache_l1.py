@@ -0,0 +1,125 @@
+"""Per-worker L1 in front of the Redis session cache.
+
+A fake Redis client records every command so the tests can assert the
+round-trip budget: one pipelined call on an L1 miss, none on an L1 hit, and
+immediate eviction on logout / user invalidation.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.core import cache_bus
+from app.core import session_cache as sc
+
+
+class _FakePipeline:
+    def __init__(self, client: "_FakeRedis") -> None:
+        self._client = client
+        self._ops: list[tuple[str, tuple]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def _queue(*args):
+            self._ops.append((name, args))
+            return self
+        return _queue
+
+    async def execute(self):
+        self._client.round_trips += 1
+        return [getattr(self._client, f"_{name}")(*args) for name, args in self._ops]
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True):
+        return _FakePipeline(self)
+
+    def _exists(self, key):
+        return int(key in self.data)
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self._get(key)
+
+    async def exists(self, key):
+        self.round_trips += 1
+        return self._exists(key)
+
+    async def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis():
+    sc._breaker._failures = 0
+    sc._breaker._state = "closed"
+    client = _FakeRedis()
+    with patch("app.core.session_cache.get_redis_client", return_value=client):
+        yield client
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _seed(client: _FakeRedis, token: str, data: dict) -> None:
+    client.data[sc._SESSION_PREFIX + sc._token_hash(token)] = json.dumps(data)
+
+
+def test_l1_miss_is_one_pipelined_round_trip_then_served_locally(fake_redis):
+    _seed(fake_redis, "tok-a", {"user_id": "u1", "roles": []})
+
+    assert _run(sc.load_session("tok-a")) == (False, {"user_id": "u1", "roles": []})
+    assert fake_redis.round_trips == 1
+
+    for _ in range(5):
+        assert _run(sc.load_session("tok-a"))[1]["user_id"] == "u1"
+    assert fake_redis.round_trips == 1
+
+
+def test_blacklisting_evicts_and_is_remembered(fake_redis):
+    _seed(fake_redis, "tok-b", {"user_id": "u2"})
+    _run(sc.load_session("tok-b"))
+
+    _run(sc.blacklist_token("tok-b", {"exp": None}))
+    assert _run(sc.load_session("tok-b")) == (True, None)
+
+    trips = fake_redis.round_trips
+    assert _run(sc.load_session("tok-b")) == (True, None)
+    assert fake_redis.round_trips == trips
+
+
+def test_user_eviction_message_drops_all_their_sessions(fake_redis):
+    _seed(fake_redis, "tok-c1", {"user_id": "u3"})
+    _seed(fake_redis, "tok-c2", {"user_id": "u3"})
+    _seed(fake_redis, "tok-d", {"user_id": "u4"})
+    for token in ("tok-c1", "tok-c2", "tok-d"):
+        _run(sc.load_session(token))
+
+    # As delivered by another worker over pub/sub.
+    cache_bus.dispatch(sc.EVICT_CHANNEL, "u:u3")
+
+    assert sc._local.lookup(sc._token_hash("tok-c1")) is sc.MISSING
+    assert sc._local.lookup(sc._token_hash("tok-c2")) is sc.MISSING
+    assert sc._local.lookup(sc._token_hash("tok-d")) == {"user_id": "u4"}
@@ -0,0 +1,293 @@
+"""Tests for fee-reminder SMS campaigns (app.api.v1.sms.campaigns).
+
+Coverage focus:
+  • a campaign renders one consolidated body per parent, reserves every
+    credit up front and is sent by the dispatch job in shared requests.
+  • short credits reject the whole campaign — nothing queued, nothing spent.
+  • a partly failed campaign is resumed: only its failed recipients are
+    re-queued and charged again.
+  • the synchronous /send/fee-reminders run goes through a campaign.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.v1.sms import campaigns, outbox
+from app.core import jobs
+from app.core.config import settings
+from tests.conftest import TestSessionLocal
+from tests.helpers import create_tenant, make_actor
+
+BASE = "/api/v1/sms"
+PERMS = ["sms.credits.view", "sms.send"]
+
+
+def _seed_debtor(db: Session, *, tenant_id, phone: str, first: str, children: list[tuple[str, str]]) -> None:
+    """A parent with one SCHOOL_FEES invoice of `balance` per (child name, balance)."""
+    pid = str(uuid4())
+    db.execute(sa.text(
+        "INSERT INTO core.parents (id, tenant_id, first_name, last_name, phone) "
+        "VALUES (:id, :tid, :fn, 'Otieno', :phone)"
+    ), {"id": pid, "tid": str(tenant_id), "fn": first, "phone": phone})
+    for name, balance in children:
+        eid = str(uuid4())
+        db.execute(sa.text(
+            "INSERT INTO core.enrollments (id, tenant_id, status, payload) "
+            "VALUES (:id, :tid, 'ENROLLED', CAST(:pl AS jsonb))"
+        ), {"id": eid, "tid": str(tenant_id), "pl": json.dumps({"student_name": name})})
+        db.execute(sa.text(
+            "INSERT INTO core.parent_enrollment_links "
+            "(tenant_id, parent_id, enrollment_id, relationship, is_primary) "
+            "VALUES (:tid, :pid, :eid, 'GUARDIAN', true)"
+        ), {"tid": str(tenant_id), "pid": pid, "eid": eid})
+        db.execute(sa.text(
+            "INSERT INTO core.invoices (id, tenant_id, invoice_no, invoice_type, status, enrollment_id,"
+            " currency, total_amount, paid_amount, balance_amount) "
+            "VALUES (:id, :tid, :no, 'SCHOOL_FEES', 'ISSUED', :eid, 'KES', :bal, 0, :bal)"
+        ), {"id": str(uuid4()), "tid": str(tenant_id), "no": f"INV-{uuid4().hex[:6]}",
+            "eid": eid, "bal": balance})
+    db.commit()
+
+
+def _set_credits(db: Session, *, tenant_id, units: int) -> None:
+    db.execute(sa.text(
+        "INSERT INTO core.sms_credit_accounts (tenant_id, balance_units) VALUES (:tid, :u) "
+        "ON CONFLICT (tenant_id) DO UPDATE SET balance_units = EXCLUDED.balance_units"
+    ), {"tid": str(tenant_id), "u": units})
+    db.commit()
+
+
+def _balance(client: TestClient, headers) -> int:
+    return client.get(f"{BASE}/account", headers=headers).json()["balance_units"]
+
+
+def _setup(db_session: Session):
+    tenant = create_tenant(db_session)
+    _, headers = make_actor(db_session, tenant=tenant, permissions=PERMS)
+    _seed_debtor(db_session, tenant_id=tenant.id, phone="0712000001", first="Akinyi",
+                 children=[("Baraka", "3000"), ("Neema", "1500")])
+    _seed_debtor(db_session, tenant_id=tenant.id, phone="0712000002", first="Wafula",
+                 children=[("Juma", "2000")])
+    _seed_debtor(db_session, tenant_id=tenant.id, phone="12345", first="Broken",
+                 children=[("Zawadi", "500")])
+    return tenant, headers
+
+
+class TestFeeReminderCampaign:
+    def test_campaign_queues_then_sends(self, client: TestClient, db_session: Session, monkeypatch):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+        calls = []
+        real_send = outbox.send_sms_batch
+        monkeypatch.setattr(
+            outbox, "send_sms_batch", lambda **kw: calls.append(kw["to"]) or real_send(**kw)
+        )
+
+        resp = client.post(
+            f"{BASE}/campaigns/fee-reminders",
+            json={"message_template": "Hi {guardian_name}: {student_names} owe {balance}. {unknown}"},
+            headers=headers,
+        )
+        assert resp.status_code == 201, resp.text
+        campaign = resp.json()
+        assert campaign["status"] == "QUEUED"
+        assert (campaign["total_recipients"], campaign["skipped"], campaign["queued"]) == (2, 1, 2)
+        assert _balance(client, headers) == 8
+        assert calls == []
+
+        assert jobs.run_pending_jobs(TestSessionLocal) == 1
+        done = client.get(f"{BASE}/campaigns/{campaign['id']}", headers=headers).json()
+        assert done["status"] == "COMPLETED"
+        assert (done["sent"], done["failed"], done["queued"]) == (2, 0, 0)
+        # Bodies differ per parent, so each gets its own request.
+        assert sorted(calls) == [["+254712000001"], ["+254712000002"]]
+
+        recipients = client.get(f"{BASE}/campaigns/{campaign['id']}/recipients", headers=headers).json()
+        bodies = {r["to_phone"]: r["message_body"] for r in recipients}
+        assert bodies["254712000001"] == "Hi Akinyi Otieno: Baraka, Neema owe KES 4,500.00. {unknown}"
+        assert _balance(client, headers) == 8
+
+    def test_short_credits_queue_nothing(self, client: TestClient, db_session: Session):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=1)
+        resp = client.post(f"{BASE}/campaigns/fee-reminders", json={}, headers=headers)
+        assert resp.status_code == 400
+        assert "Insufficient" in resp.json()["detail"]
+        assert client.get(f"{BASE}/campaigns", headers=headers).json() == []
+        assert _balance(client, headers) == 1
+
+    def test_resume_requeues_only_failed(self, client: TestClient, db_session: Session, monkeypatch):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+
+        def flaky(*, to, message, sender_id=None):
+            if to == ["+254712000002"]:
+                raise RuntimeError("AT network error: timed out")
+            return {n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to}
+
+        monkeypatch.setattr(outbox, "send_sms_batch", flaky)
+        campaign_id = client.post(
+            f"{BASE}/campaigns/fee-reminders",
+            json={"message_template": "{guardian_name}: fees due {balance}"},
+            headers=headers,
+        ).json()["id"]
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        partial = client.get(f"{BASE}/campaigns/{campaign_id}", headers=headers).json()
+        assert partial["status"] == "PARTIAL"
+        assert (partial["sent"], partial["failed"]) == (1, 1)
+        failed = client.get(
+            f"{BASE}/campaigns/{campaign_id}/recipients", params={"status": "failed"}, headers=headers
+        ).json()
+        assert [r["error_message"] for r in failed] == ["AT network error: timed out"]
+        assert _balance(client, headers) == 9  # the failed recipient was refunded
+
+        sent_again = []
+
+        def recovered(*, to, message, sender_id=None):
+            sent_again.append(to)
+            return {n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "y"} for n in to}
+
+        monkeypatch.setattr(outbox, "send_sms_batch", recovered)
+        resumed = client.post(f"{BASE}/campaigns/{campaign_id}/resume", headers=headers)
+        assert resumed.status_code == 200, resumed.text
+        assert resumed.json()["queued"] == 1
+        assert _balance(client, headers) == 8
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert sent_again == [["+254712000002"]]
+        final = client.get(f"{BASE}/campaigns/{campaign_id}", headers=headers).json()
+        assert final["status"] == "COMPLETED"
+        assert (final["sent"], final["failed"]) == (2, 0)
+        again = client.post(f"{BASE}/campaigns/{campaign_id}/resume", headers=headers)
+        assert again.status_code == 400
+
+    def test_concurrent_resumes_reserve_once(self, client: TestClient, db_session: Session, monkeypatch):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+
+        def down(*, to, message, sender_id=None):
+            raise RuntimeError("AT network error: timed out")
+
+        monkeypatch.setattr(outbox, "send_sms_batch", down)
+        created = client.post(f"{BASE}/campaigns/fee-reminders", json={}, headers=headers).json()
+        campaign_id = created["id"]
+        jobs.run_pending_jobs(TestSessionLocal)
+        assert _balance(client, headers) == 10
+
+        first, second = TestSessionLocal(), TestSessionLocal()
+        try:
+            campaigns.resume_campaign(first, tenant_id=tenant.id, campaign_id=UUID(campaign_id), actor_user_id=None)
+            outcome = {}
+
+            def resume_again():
+                try:
+                    campaigns.resume_campaign(
+                        second, tenant_id=tenant.id, campaign_id=UUID(campaign_id), actor_user_id=None
+                    )
+                except ValueError as exc:
+                    outcome["error"] = str(exc)
+                second.rollback()
+
+            racer = threading.Thread(target=resume_again)
+            racer.start()
+            racer.join(0.5)
+            assert racer.is_alive()   # waiting on the campaign lock
+            first.commit()
+            racer.join(5)
+            assert outcome["error"].startswith("Campaign is QUEUED")
+        finally:
+            first.close()
+            second.close()
+        assert _balance(client, headers) == 10 - created["units_reserved"]
+
+    def test_sync_fee_reminders_run_a_campaign(self, client: TestClient, db_session: Session):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+        resp = client.post(f"{BASE}/send/fee-reminders", headers=headers)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert (body["sent"], body["failed"], body["skipped"], body["total"]) == (2, 0, 1, 3)
+        campaign = client.get(f"{BASE}/campaigns/{body['campaign_id']}", headers=headers).json()
+        assert campaign["status"] == "COMPLETED"
+        assert campaign["job_id"] is None
+        assert _balance(client, headers) == 10 - campaign["units_reserved"]
+
+    def test_rerun_fee_reminder_job_resumes_its_campaign(
+        self, client: TestClient, db_session: Session, monkeypatch
+    ):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+        calls = []
+        monkeypatch.setattr(
+            outbox, "send_sms_batch",
+            lambda *, to, message, sender_id=None: calls.extend(to) or {
+                n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to
+            },
+        )
+        job_id = client.post(f"{BASE}/send/fee-reminders", params={"async": "true"}, headers=headers).json()["id"]
+        assert jobs.run_pending_jobs(TestSessionLocal) == 1
+        assert sorted(calls) == ["+254712000001", "+254712000002"]
+        balance = _balance(client, headers)
+
+        # The worker died before Wafula's message went out, and the stale
+        # job was requeued.
+        with TestSessionLocal() as s:
+            s.execute(sa.text(
+                "UPDATE core.sms_messages SET status = 'QUEUED', sent_at = NULL "
+                "WHERE to_phone = '254712000002'"
+            ))
+            s.execute(sa.text("UPDATE core.background_jobs SET status = 'QUEUED' WHERE id = :id"), {"id": job_id})
+            s.commit()
+        assert jobs.run_pending_jobs(TestSessionLocal) == 1
+
+        assert sorted(calls) == ["+254712000001", "+254712000002", "+254712000002"]
+        listed = client.get(f"{BASE}/campaigns", headers=headers).json()
+        assert len(listed) == 1
+        assert listed[0]["job_id"] == job_id
+        assert listed[0]["status"] == "COMPLETED"
+        assert _balance(client, headers) == balance
+
+    def test_cancelled_fee_reminder_job_refunds_and_can_resume(
+        self, client: TestClient, db_session: Session, monkeypatch
+    ):
+        tenant, headers = _setup(db_session)
+        _set_credits(db_session, tenant_id=tenant.id, units=10)
+        monkeypatch.setattr(settings, "JOB_PROGRESS_INTERVAL_MS", 0)
+        calls = []
+
+        def cancel_first(*, to, message, sender_id=None):
+            calls.extend(to)
+            with TestSessionLocal() as s:   # cancelled while the first request is out
+                s.execute(sa.text("UPDATE core.background_jobs SET cancel_requested = true"))
+                s.commit()
+            return {n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to}
+
+        monkeypatch.setattr(settings, "SMS_DISPATCH_CONCURRENCY", 1)
+        monkeypatch.setattr(outbox, "send_sms_batch", cancel_first)
+        job_id = client.post(f"{BASE}/send/fee-reminders", params={"async": "true"}, headers=headers).json()["id"]
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()["status"] == "CANCELLED"
+        assert len(calls) == 1
+        campaign = client.get(f"{BASE}/campaigns", headers=headers).json()[0]
+        assert campaign["status"] == "CANCELLED"
+        assert (campaign["sent"], campaign["failed"], campaign["queued"]) == (1, 1, 0)
+        recipients = client.get(f"{BASE}/campaigns/{campaign['id']}/recipients", headers=headers).json()
+        sent_units = sum(r["units_deducted"] for r in recipients if r["status"] == "SENT")
+        assert _balance(client, headers) == 10 - sent_units   # the unsent one was refunded
+
+        monkeypatch.setattr(outbox, "send_sms_batch", lambda *, to, message, sender_id=None: {
+            n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "y"} for n in to
+        })
+        resumed = client.post(f"{BASE}/campaigns/{campaign['id']}/resume", headers=headers)
+        assert resumed.status_code == 200, resumed.text
+        jobs.run_pending_jobs(TestSessionLocal)
+        final = client.get(f"{BASE}/campaigns/{campaign['id']}", headers=headers).json()
+        assert (final["status"], final["sent"]) == ("COMPLETED", 2)
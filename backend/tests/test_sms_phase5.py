@@ -6,7 +6,7 @@ Tests cover:
   - Top-up initiation (mock Daraja) + status polling (auto-complete)
   - Top-up history
   - Send single SMS (mock AT) + credit deduction + refund on failure
-  - Broadcast SMS
+  - Broadcast SMS (queued outbox + dispatch job, multi-recipient requests)
   - Message history
   - Template CRUD (create / list / update / delete)
   - Insufficient credits guard
@@ -19,8 +19,13 @@ import os
 from uuid import uuid4
 
 import pytest
+import sqlalchemy as sa
 from fastapi.testclient import TestClient
 
+from app.api.v1.sms import outbox
+from app.core import jobs
+from app.core.config import settings
+from tests.conftest import TestSessionLocal
 from tests.helpers import create_tenant, make_actor, create_super_admin_user, saas_headers
 
 os.environ.setdefault("AT_USE_MOCK", "true")
@@ -237,30 +242,170 @@ class TestSendSms:
 # ---------------------------------------------------------------------------
 
 class TestBroadcast:
-    def test_broadcast_to_multiple(self, client, director):
+    RECIPIENTS = [
+        {"phone": "0712345678", "name": "Jane"},
+        {"phone": "0723456789", "name": "Peter"},
+        {"phone": "0734567890", "name": "Mary"},
+    ]
+
+    def _broadcast(self, client, headers, body="School fees reminder"):
+        return client.post(
+            "/api/v1/sms/send/broadcast",
+            json={"recipients": self.RECIPIENTS, "message_body": body},
+            headers=headers,
+        )
+
+    def _messages(self, client, headers) -> dict[str, dict]:
+        rows = client.get("/api/v1/sms/messages", headers=headers).json()
+        return {row["to_phone"]: row for row in rows}
+
+    def test_broadcast_to_multiple(self, client, director, monkeypatch):
         _, _, headers = director
         topup = _topup(client, headers, units=200)
         _complete_topup(client, headers, topup["checkout_request_id"])
-
-        recipients = [
-            {"phone": "0712345678", "name": "Jane"},
-            {"phone": "0723456789", "name": "Peter"},
-            {"phone": "0734567890", "name": "Mary"},
-        ]
-        resp = client.post(
-            "/api/v1/sms/send/broadcast",
-            json={"recipients": recipients, "message_body": "School fees reminder"},
-            headers=headers,
+        calls = []
+        real_send = outbox.send_sms_batch
+        monkeypatch.setattr(
+            outbox, "send_sms_batch", lambda **kw: calls.append(kw["to"]) or real_send(**kw)
         )
+
+        resp = self._broadcast(client, headers)
         assert resp.status_code == 200
         data = resp.json()
         assert data["total"] == 3
-        assert data["sent"] == 3
+        assert data["queued"] == 3
         assert data["units_deducted"] == 3
+        assert {r["status"] for r in data["results"]} == {"QUEUED"}
+        # Credits are reserved before anything is sent.
+        assert client.get("/api/v1/sms/account", headers=headers).json()["balance_units"] == 197
+        assert calls == []
+
+        assert jobs.run_pending_jobs(TestSessionLocal) == 1
+        job = client.get(f"/api/v1/jobs/{data['job_id']}", headers=headers).json()
+        assert job["status"] == "SUCCEEDED", job
+        assert job["result"]["sent"] == 3
+        # One multi-recipient provider request for the shared body.
+        assert [sorted(c) for c in calls] == [["+254712345678", "+254723456789", "+254734567890"]]
+        assert {m["status"] for m in self._messages(client, headers).values()} == {"SENT"}
 
         acct = client.get("/api/v1/sms/account", headers=headers).json()
         assert acct["balance_units"] == 197
 
+    def test_requests_capped_and_failures_refunded(self, client, director, monkeypatch):
+        _, _, headers = director
+        topup = _topup(client, headers, units=50)
+        _complete_topup(client, headers, topup["checkout_request_id"])
+        monkeypatch.setattr(settings, "AT_MAX_RECIPIENTS_PER_REQUEST", 2)
+        calls = []
+
+        def fake_send(*, to, message, sender_id=None):
+            calls.append(to)
+            return {
+                n: {"number": n, "statusCode": 403 if n.endswith("789") else 101,
+                    "status": "InvalidPhoneNumber" if n.endswith("789") else "Success",
+                    "messageId": f"id-{n}"}
+                for n in to
+            }
+
+        monkeypatch.setattr(outbox, "send_sms_batch", fake_send)
+        assert self._broadcast(client, headers).status_code == 200
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert sorted(len(c) for c in calls) == [1, 2]
+        messages = self._messages(client, headers)
+        assert messages["254723456789"]["status"] == "FAILED"
+        assert messages["254723456789"]["error_message"] == "InvalidPhoneNumber"
+        assert messages["254712345678"]["provider_message_id"] == "id-+254712345678"
+        acct = client.get("/api/v1/sms/account", headers=headers).json()
+        assert acct["balance_units"] == 48
+
+    def test_any_provider_error_fails_only_its_request(self, client, director, monkeypatch):
+        _, _, headers = director
+        topup = _topup(client, headers, units=50)
+        _complete_topup(client, headers, topup["checkout_request_id"])
+        monkeypatch.setattr(settings, "AT_MAX_RECIPIENTS_PER_REQUEST", 1)
+
+        def fake_send(*, to, message, sender_id=None):
+            if to == ["+254723456789"]:
+                raise ValueError("unexpected provider payload")
+            return {n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to}
+
+        monkeypatch.setattr(outbox, "send_sms_batch", fake_send)
+        job_id = self._broadcast(client, headers).json()["job_id"]
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()["status"] == "SUCCEEDED"
+        messages = self._messages(client, headers)
+        assert messages["254723456789"]["status"] == "FAILED"
+        assert messages["254723456789"]["error_message"] == "unexpected provider payload"
+        assert messages["254712345678"]["status"] == "SENT"
+        assert client.get("/api/v1/sms/account", headers=headers).json()["balance_units"] == 48
+
+    def test_rows_claimed_by_another_run_are_not_sent(self, client, director, monkeypatch):
+        _, _, headers = director
+        topup = _topup(client, headers, units=50)
+        _complete_topup(client, headers, topup["checkout_request_id"])
+        calls = []
+        monkeypatch.setattr(
+            outbox, "send_sms_batch",
+            lambda *, to, message, sender_id=None: calls.extend(to) or {
+                n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to
+            },
+        )
+        assert self._broadcast(client, headers).status_code == 200
+        with TestSessionLocal() as s:
+            # Jane is mid-send in a live run; Peter's run died long ago.
+            s.execute(sa.text(
+                "UPDATE core.sms_messages SET status = 'SENDING', claimed_at = now() "
+                "WHERE to_phone = '254712345678'"
+            ))
+            s.execute(sa.text(
+                "UPDATE core.sms_messages SET status = 'SENDING', claimed_at = now() - interval '1 day' "
+                "WHERE to_phone = '254723456789'"
+            ))
+            s.commit()
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert sorted(calls) == ["+254723456789", "+254734567890"]
+        messages = self._messages(client, headers)
+        assert messages["254712345678"]["status"] == "SENDING"
+        assert messages["254723456789"]["status"] == "SENT"
+
+    def test_cancel_mid_send_keeps_sent_results(self, client, director, monkeypatch):
+        _, _, headers = director
+        topup = _topup(client, headers, units=50)
+        _complete_topup(client, headers, topup["checkout_request_id"])
+        monkeypatch.setattr(settings, "AT_MAX_RECIPIENTS_PER_REQUEST", 1)
+        monkeypatch.setattr(settings, "SMS_DISPATCH_CONCURRENCY", 1)
+        monkeypatch.setattr(settings, "JOB_PROGRESS_INTERVAL_MS", 0)
+        calls = []
+
+        def fake_send(*, to, message, sender_id=None):
+            calls.extend(to)
+            with TestSessionLocal() as s:   # cancelled while the first request is out
+                s.execute(sa.text("UPDATE core.background_jobs SET cancel_requested = true"))
+                s.commit()
+            return {n: {"number": n, "statusCode": 101, "status": "Success", "messageId": "x"} for n in to}
+
+        monkeypatch.setattr(outbox, "send_sms_batch", fake_send)
+        job_id = self._broadcast(client, headers).json()["job_id"]
+        jobs.run_pending_jobs(TestSessionLocal)
+
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=headers).json()["status"] == "CANCELLED"
+        assert len(calls) == 1
+        statuses = {phone: m["status"] for phone, m in self._messages(client, headers).items()}
+        assert statuses[calls[0].lstrip("+")] == "SENT"
+        assert sorted(statuses.values()) == ["FAILED", "FAILED", "SENT"]
+        # Only the two never-sent recipients are refunded.
+        assert client.get("/api/v1/sms/account", headers=headers).json()["balance_units"] == 49
+
+    def test_broadcast_insufficient_credits_queues_nothing(self, client, director):
+        _, _, headers = director
+        resp = self._broadcast(client, headers)
+        assert resp.status_code == 400
+        assert "Insufficient" in resp.json()["detail"]
+        assert self._messages(client, headers) == {}
+
     def test_broadcast_empty_recipients_rejected(self, client, director):
         _, _, headers = director
         resp = client.post(
@@ -0,0 +1,193 @@
+"""Tests for the background STK status reconciler (app.api.v1.payments.reconciler).
+
+Coverage focus:
+  • an overdue subscription payment / SMS top-up is settled from an STK
+    query through the callback's apply paths, and stops being tracked.
+  • "still processing" answers back off; checkouts not yet due are skipped.
+  • a checkout whose callback already arrived is dropped without a query.
+  • a pass run by the loop clears the tenant's shared subscription state.
+  • the status endpoint only reads — it never calls Daraja.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.v1.payments import reconciler, service as payments_service
+from app.core import subscription_gate as sg
+from app.core.config import settings
+from app.models.sms import SmsCreditAccount, SmsCreditTopup
+from app.models.stk_checkout import PendingStkCheckout
+from app.models.subscription import Subscription, SubscriptionPayment
+from tests.conftest import TestSessionLocal
+from tests.helpers import create_tenant, make_actor
+
+
+@pytest.fixture(autouse=True)
+def _due_immediately(monkeypatch):
+    monkeypatch.setattr(settings, "STK_RECONCILE_FIRST_CHECK_SEC", 0)
+    monkeypatch.setattr(settings, "DARAJA_USE_MOCK", False)
+
+
+def _query_result(result_code: int, desc: str = "done") -> dict:
+    return {"ResponseCode": "0", "ResultCode": str(result_code), "ResultDesc": desc}
+
+
+def _pending_payment(db: Session, tenant_id, subscription_id=None) -> str:
+    checkout_id = f"ws_CO_{uuid4().hex}"
+    db.add(SubscriptionPayment(
+        tenant_id=tenant_id, subscription_id=subscription_id,
+        phone_number="254712000001", amount_kes=Decimal("1000"),
+        checkout_request_id=checkout_id, status="PENDING", request_payload={},
+    ))
+    reconciler.track_checkout(
+        db, kind=reconciler.KIND_SUBSCRIPTION, tenant_id=tenant_id, checkout_request_id=checkout_id
+    )
+    db.commit()
+    return checkout_id
+
+
+def _pending_topup(db: Session, tenant_id, units: int = 50) -> str:
+    checkout_id = f"ws_CO_{uuid4().hex}"
+    db.add(SmsCreditTopup(
+        tenant_id=tenant_id, units_requested=units, amount_kes=Decimal("50"),
+        price_per_unit_snapshot=Decimal("1"), phone_number="254712000001",
+        checkout_request_id=checkout_id, status="PENDING", request_payload={},
+    ))
+    reconciler.track_checkout(
+        db, kind=reconciler.KIND_SMS_TOPUP, tenant_id=tenant_id, checkout_request_id=checkout_id
+    )
+    db.commit()
+    return checkout_id
+
+
+def _tracked(db: Session) -> dict[str, PendingStkCheckout]:
+    db.expire_all()
+    return {r.checkout_request_id: r for r in db.execute(sa.select(PendingStkCheckout)).scalars()}
+
+
+class TestReconcilePass:
+    def test_overdue_checkouts_are_settled(self, db_session: Session, monkeypatch):
+        tenant = create_tenant(db_session)
+        pay_id = _pending_payment(db_session, tenant.id)
+        topup_id = _pending_topup(db_session, tenant.id, units=50)
+        answers = {pay_id: _query_result(0), topup_id: _query_result(1032, "Request cancelled by user")}
+        monkeypatch.setattr(
+            payments_service, "_call_daraja_stk_query", lambda *, checkout_request_id: answers[checkout_request_id]
+        )
+
+        totals = reconciler.reconcile_pending_checkouts(db_session)
+        assert (totals["checked"], totals["completed"], totals["failed"]) == (2, 1, 1)
+
+        db_session.expire_all()
+        pay = db_session.execute(
+            sa.select(SubscriptionPayment).where(SubscriptionPayment.checkout_request_id == pay_id)
+        ).scalar_one()
+        assert (pay.status, pay.result_code) == ("COMPLETED", 0)
+        topup = db_session.execute(
+            sa.select(SmsCreditTopup).where(SmsCreditTopup.checkout_request_id == topup_id)
+        ).scalar_one()
+        assert (topup.status, topup.result_desc) == ("FAILED", "Request cancelled by user")
+        assert _tracked(db_session) == {}
+
+    def test_completed_topup_credits_the_account(self, db_session: Session, monkeypatch):
+        tenant = create_tenant(db_session)
+        _pending_topup(db_session, tenant.id, units=75)
+        monkeypatch.setattr(payments_service, "_call_daraja_stk_query", lambda **_: _query_result(0))
+        reconciler.reconcile_pending_checkouts(db_session)
+        db_session.expire_all()
+        balance = db_session.execute(
+            sa.select(SmsCreditAccount.balance_units).where(SmsCreditAccount.tenant_id == tenant.id)
+        ).scalar()
+        assert balance == 75
+
+    def test_still_processing_backs_off(self, db_session: Session, monkeypatch):
+        tenant = create_tenant(db_session)
+        checkout_id = _pending_payment(db_session, tenant.id)
+        calls = []
+
+        def processing(*, checkout_request_id):
+            calls.append(checkout_request_id)
+            raise RuntimeError("Daraja upstream unavailable (500): The transaction is being processed")
+
+        monkeypatch.setattr(payments_service, "_call_daraja_stk_query", processing)
+        assert reconciler.reconcile_pending_checkouts(db_session)["pending"] == 1
+        row = _tracked(db_session)[checkout_id]
+        assert row.attempts == 1
+        assert "being processed" in row.last_error
+        assert row.next_check_at > row.created_at + timedelta(seconds=settings.STK_RECONCILE_BASE_DELAY_SEC - 1)
+
+        # Not due again yet: the next pass leaves it alone.
+        assert reconciler.reconcile_pending_checkouts(db_session)["checked"] == 0
+        assert calls == [checkout_id]
+
+    def test_checkout_settled_by_callback_is_dropped_unqueried(self, db_session: Session, monkeypatch):
+        tenant = create_tenant(db_session)
+        checkout_id = _pending_payment(db_session, tenant.id)
+        db_session.execute(
+            sa.update(SubscriptionPayment)
+            .where(SubscriptionPayment.checkout_request_id == checkout_id)
+            .values(status="COMPLETED")
+        )
+        db_session.commit()
+        monkeypatch.setattr(
+            payments_service, "_call_daraja_stk_query",
+            lambda **_: pytest.fail("a settled checkout must not be queried"),
+        )
+        assert reconciler.reconcile_pending_checkouts(db_session)["settled"] == 1
+        assert _tracked(db_session) == {}
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def test_loop_pass_drops_the_shared_subscription_state(db_session: Session, monkeypatch):
+    tenant = create_tenant(db_session)
+    sub = Subscription(
+        tenant_id=tenant.id, plan="per_term", billing_cycle="per_term",
+        status="past_due", amount_kes=Decimal("1000"),
+    )
+    db_session.add(sub)
+    db_session.flush()
+    _pending_payment(db_session, tenant.id, subscription_id=sub.id)
+    monkeypatch.setattr(payments_service, "_call_daraja_stk_query", lambda **_: _query_result(0))
+    monkeypatch.setattr(sg._breaker, "_failures", 0)
+    monkeypatch.setattr(sg._breaker, "_state", "closed")
+    redis = _FakeRedis()
+    redis.data[sg._REDIS_PREFIX + str(tenant.id)] = '{"state": "LOCKED"}'
+
+    with patch("app.core.subscription_gate.get_redis_client", return_value=redis):
+        totals = asyncio.run(reconciler.run_reconcile_pass(TestSessionLocal))
+
+    assert totals["completed"] == 1
+    assert redis.data == {}
+
+
+def test_payment_status_endpoint_only_reads(client: TestClient, db_session: Session, monkeypatch):
+    tenant = create_tenant(db_session)
+    _, headers = make_actor(db_session, tenant=tenant, permissions=["admin.dashboard.view_tenant"])
+    checkout_id = _pending_payment(db_session, tenant.id)
+    monkeypatch.setattr(
+        payments_service, "_call_daraja_stk_query",
+        lambda **_: pytest.fail("status reads must not call Daraja"),
+    )
+    resp = client.get(
+        f"/api/v1/payments/subscription/payment-status?checkout_request_id={checkout_id}",
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["status"] == "pending"
@@ -0,0 +1,127 @@
+"""Subscription state shared across workers.
+
+The Redis tier is exercised through its async helpers against a fake client
+(sync callers cannot reach an event loop under test, so `run_from_sync`
+falls back to the resolver there). The contract checked here:
+  - a state written by one worker is served to another without resolving;
+  - an entry resolved on a previous day is ignored;
+  - an eviction message drops the L1 copy on every worker;
+  - payment-driven changes invalidate only once committed.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core import cache_bus
+from app.core import subscription_gate as sg
+from app.core.local_cache import MISSING
+from app.core.subscription import STATE_ACTIVE, SubscriptionState
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match: str, count: int = 100):
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key
+
+
+@pytest.fixture
+def fake_redis():
+    sg._breaker._failures = 0
+    sg._breaker._state = "closed"
+    client = _FakeRedis()
+    with patch("app.core.subscription_gate.get_redis_client", return_value=client):
+        yield client
+
+
+def _state(plan_code: str = "basic") -> SubscriptionState:
+    return SubscriptionState(
+        state=STATE_ACTIVE,
+        plan_code=plan_code,
+        plan_name=plan_code.title(),
+        modules=frozenset({"finance", "sis"}),
+        status="active",
+        period_end=date.today() + timedelta(days=30),
+        grace_until=date.today() + timedelta(days=44),
+        grace_days=14,
+    )
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_shared_entry_round_trips_and_expires_with_the_day(fake_redis):
+    key = str(uuid4())
+    _run(sg._aset_shared(key, _state(), 60))
+    assert _run(sg._aget_shared(key)) == _state()
+
+    raw = json.loads(fake_redis.data[sg._REDIS_PREFIX + key])
+    raw["day"] = (date.today() - timedelta(days=1)).isoformat()
+    fake_redis.data[sg._REDIS_PREFIX + key] = json.dumps(raw)
+    assert _run(sg._aget_shared(key)) is None
+
+
+def test_invalidate_all_clears_redis_and_every_l1(fake_redis):
+    a, b = str(uuid4()), str(uuid4())
+    for key in (a, b):
+        _run(sg._aset_shared(key, _state(), 60))
+        sg._local.set(key, (date.today(), _state()))
+
+    _run(sg._ainvalidate("*"))
+    assert fake_redis.data == {}
+    assert sg._local.lookup(a) is sg._local.lookup(b) is MISSING
+
+
+def test_l1_hit_skips_the_resolver_until_evicted(db_session: Session, monkeypatch):
+    calls: list[str] = []
+
+    def _resolve(db, *, tenant_id):
+        calls.append(str(tenant_id))
+        return _state()
+
+    monkeypatch.setattr(sg, "resolve_subscription_state", _resolve)
+    tenant_id = uuid4()
+
+    for _ in range(3):
+        assert sg.get_cached_subscription_state(db_session, tenant_id).plan_code == "basic"
+    assert len(calls) == 1
+
+    # As delivered by another worker over pub/sub.
+    cache_bus.dispatch(sg.EVICT_CHANNEL, str(tenant_id))
+    sg.get_cached_subscription_state(db_session, tenant_id)
+    assert len(calls) == 2
+
+
+def test_after_commit_invalidation_waits_for_the_commit(db_session: Session, monkeypatch):
+    dropped: list[str] = []
+    monkeypatch.setattr(sg, "invalidate_subscription_cache", lambda tid: dropped.append(str(tid)))
+    tenant_id = uuid4()
+
+    sg.invalidate_subscription_cache_after_commit(db_session, tenant_id)
+    assert dropped == []
+    db_session.commit()
+    assert dropped == [str(tenant_id)]
+    db_session.commit()
+    assert dropped == [str(tenant_id)]
@@ -0,0 +1,96 @@
+"""TenantMiddleware resolution cache.
+
+Covers the contract that matters for correctness:
+  - repeat requests for the same tenant do not hit core.tenants again;
+  - unknown hosts/slugs are negatively cached;
+  - suspend/activate through the API invalidates immediately;
+  - the L1 tier is bounded.
+"""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import tenant_cache
+from app.core.local_cache import MISSING, LocalTTLCache
+from tests.conftest import TEST_ENGINE
+from tests.helpers import create_super_admin_user, create_tenant, get_saas_token, make_actor
+
+
+class _TenantQueryCounter:
+    """Count SELECTs against core.tenants issued through the test engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if "FROM core.tenants" in statement and statement.lstrip().upper().startswith("SELECT"):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(TEST_ENGINE, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(TEST_ENGINE, "before_cursor_execute", self)
+
+
+class TestTenantResolutionCache:
+    def test_repeat_requests_skip_tenant_lookup(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session, slug="cache-school")
+        _, headers = make_actor(db_session, tenant=tenant, permissions=[])
+
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+        with _TenantQueryCounter() as counter:
+            for _ in range(3):
+                assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+        assert counter.count == 0
+
+    def test_unknown_slug_is_negatively_cached(self, client: TestClient, db_session: Session):
+        headers = {"X-Tenant-Slug": "no-such-school"}
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 400
+        assert tenant_cache._local.lookup(tenant_cache.slug_key("no-such-school")) is None
+
+        with _TenantQueryCounter() as counter:
+            assert client.get("/api/v1/auth/me", headers=headers).status_code == 400
+        assert counter.count == 0
+
+    def test_suspend_and_activate_invalidate(self, client: TestClient, db_session: Session):
+        tenant = create_tenant(db_session, slug="flip-school")
+        _, headers = make_actor(db_session, tenant=tenant, permissions=[])
+        admin = create_super_admin_user(db_session)
+        saas = {"Authorization": f"Bearer {get_saas_token(admin)}"}
+
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        resp = client.post(f"/api/v1/admin/tenants/{tenant.id}/suspend", headers=saas)
+        assert resp.status_code == 200, resp.text
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 403
+
+        resp = client.post(f"/api/v1/admin/tenants/{tenant.id}/restore", headers=saas)
+        assert resp.status_code == 200, resp.text
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+
+class TestLocalTTLCache:
+    def test_lru_bound_evicts_oldest(self):
+        cache = LocalTTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")          # a becomes most-recently used
+        cache.set("c", 3)
+        assert cache.lookup("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_cached_none_is_distinct_from_miss(self):
+        cache = LocalTTLCache(max_entries=4, ttl_seconds=60)
+        cache.set("neg", None)
+        assert cache.lookup("neg") is None
+        assert cache.lookup("absent") is MISSING
+
+    def test_zero_ttl_is_not_stored(self):
+        cache = LocalTTLCache(max_entries=4, ttl_seconds=60)
+        cache.set("k", 1, ttl_seconds=0)
+        assert cache.lookup("k") is MISSING
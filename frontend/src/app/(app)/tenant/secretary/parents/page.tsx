@@ -1108,7 +1108,7 @@ function SecretaryParentsPageContent() {
         { tenantRequired: true }
       );
       toast.success(
-        `Bulk reminder sent — ${res.sent} delivered, ${res.failed} failed${res.skipped > 0 ? `, ${res.skipped} skipped (low credits)` : ""}`
+        `Bulk reminder sent — ${res.sent} delivered, ${res.failed} failed${res.skipped > 0 ? `, ${res.skipped} skipped (invalid phone)` : ""}`
       );
     } catch (e: unknown) {
       toast.error((e as { message?: string })?.message || "Failed to send bulk reminder");
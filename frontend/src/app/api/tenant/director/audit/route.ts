@@ -7,12 +7,17 @@ export async function GET(req: Request) {
   const offset = searchParams.get("offset") || "0";
   const action = searchParams.get("action") || "";
   const resource = searchParams.get("resource") || "";
+  const cursor = searchParams.get("cursor") || "";
 
   const qs = new URLSearchParams({ limit, offset });
   if (action) qs.set("action", action);
   if (resource) qs.set("resource", resource);
+  if (cursor) qs.set("cursor", cursor);
 
   const res = await backendFetch(`/api/v1/audit/logs?${qs.toString()}`, { method: "GET" });
   const data = await res.json().catch(() => []);
-  return NextResponse.json(data, { status: res.status });
+  const out = NextResponse.json(data, { status: res.status });
+  const nextCursor = res.headers.get("x-next-cursor");
+  if (nextCursor) out.headers.set("x-next-cursor", nextCursor);
+  return out;
 }
\ No newline at end of file
@@ -15,11 +15,13 @@ export async function GET(req: Request) {
   const action = searchParams.get("action") || "";
   const resource = searchParams.get("resource") || "";
   const actor = searchParams.get("actor_user_id") || "";
+  const cursor = searchParams.get("cursor") || "";
 
   const qs = new URLSearchParams({ limit, offset });
   if (action) qs.set("action", action);
   if (resource) qs.set("resource", resource);
   if (actor) qs.set("actor_user_id", actor);
+  if (cursor) qs.set("cursor", cursor);
 
   try {
     const res = await backendFetch(`/api/v1/audit/logs?${qs.toString()}`, {
@@ -34,7 +36,10 @@ export async function GET(req: Request) {
       );
     }
 
-    return NextResponse.json(Array.isArray(data) ? data : [], { status: 200 });
+    const out = NextResponse.json(Array.isArray(data) ? data : [], { status: 200 });
+    const nextCursor = res.headers.get("x-next-cursor");
+    if (nextCursor) out.headers.set("x-next-cursor", nextCursor);
+    return out;
   } catch {
     return NextResponse.json(
       { detail: "Audit service unavailable" },
@@ -437,9 +437,8 @@ export default function SmsModulePage({ title, nav, canTopup = false }: Props) {
         recipients,
         message_body: bcastBody,
       }, { tenantRequired: true });
-      const sent = Number(res?.sent ?? 0);
-      const failed = Number(res?.failed ?? 0);
-      toast.success(`Broadcast complete: ${sent} sent, ${failed} failed`);
+      const queued = Number(res?.queued ?? 0);
+      toast.success(`Broadcast queued: ${queued} message(s) are being sent`);
       setBcastBody("");
       setBcastRecipients("");
       fetchAccount();